@@ -0,0 +1,578 @@
+# Interfaz no interactiva: subcomandos argparse con salida JSON y modo batch.
+# Ejemplos:
+#   echo secreto | python main.py users create alice --password-stdin
+#   python main.py firewall allow 443 --protocol tcp
+#   python main.py --pretty net routes
+#   python main.py batch operaciones.txt --stop-on-error
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import shlex
+import signal
+import sys
+from utils.system_info import get_os_type, execute_command
+from utils.executor import start_privileged_helper
+from utils.logger import log_action, flush_logs
+from utils.proc_sampler import sample_cpu_memory
+from utils.resource_monitor import ResourceMonitor
+from utils.process_table import read_process_table, filter_processes, sort_processes, top_processes, SORT_KEYS
+from utils.process_signals import resolve_targets, signal_processes, summarize_results
+from utils.log_query import query_logs
+from utils.firewall_analyzer import finding_to_dict, removal_script
+from utils.net_traffic import SORT_KEYS as SORT_KEYS_TRAFFIC
+from utils.disk_io import SORT_KEYS as SORT_KEYS_DISK_IO
+from modules import user_group_management, network_management, disk_partition_management, \
+                    firewall_management, system_report, audit_log, disk_reclaim
+from config import MONITOR_INTERVAL, MONITOR_MOUNTPOINTS
+
+LINUX_ONLY = ("Esta operación solo está disponible en Linux.", 1)
+
+class CliError(Exception):
+    """Error de argumentos en una operación (no termina el proceso en modo batch)."""
+
+class CliParser(argparse.ArgumentParser):
+    """ArgumentParser que lanza CliError en lugar de llamar a sys.exit()."""
+
+    def error(self, message):
+        raise CliError(message)
+
+# --- Usuarios y grupos ---
+
+def _users_list(args):
+    return user_group_management.run_list_users()
+
+def _read_password(args):
+    """
+    Contraseña de --password-stdin (primera línea de stdin) o de --password-env (nombre de una
+    variable de entorno). Nunca se acepta en argv: quedaría visible en 'ps' y en el historial.
+    """
+    if args.password_stdin:
+        password = sys.stdin.readline().rstrip("\n")
+        if not password:
+            raise CliError("--password-stdin: no se leyó ninguna contraseña de la entrada estándar.")
+        return password
+    if args.password_env:
+        password = os.environ.get(args.password_env)
+        if not password:
+            raise CliError(f"--password-env: la variable de entorno '{args.password_env}' no existe o está vacía.")
+        return password
+    return None
+
+def _users_create(args):
+    return user_group_management.run_create_user(args.username, _read_password(args))
+
+def _users_delete(args):
+    return user_group_management.run_delete_user(args.username)
+
+def _users_import(args):
+    if get_os_type() != 'linux':
+        return LINUX_ONLY
+    return user_group_management.run_import_users(args.file, args.root, args.dry_run, args.skip_invalid)
+
+def _users_show(args):
+    if get_os_type() != 'linux':
+        return LINUX_ONLY
+    return user_group_management.run_show_user(args.username)
+
+def _groups_show(args):
+    if get_os_type() != 'linux':
+        return LINUX_ONLY
+    return user_group_management.run_show_group(args.groupname)
+
+def _groups_reconcile(args):
+    if get_os_type() != 'linux':
+        return LINUX_ONLY
+    return user_group_management.run_reconcile_groups(args.file, args.root, args.dry_run, args.additive)
+
+def _groups_list(args):
+    return user_group_management.run_list_groups()
+
+def _groups_create(args):
+    return user_group_management.run_create_group(args.groupname)
+
+def _groups_delete(args):
+    return user_group_management.run_delete_group(args.groupname)
+
+def _groups_add_member(args):
+    return user_group_management.run_add_user_to_group(args.username, args.groupname)
+
+def _groups_remove_member(args):
+    return user_group_management.run_remove_user_from_group(args.username, args.groupname)
+
+# --- Redes ---
+
+def _net_ip(args):
+    if get_os_type() != 'linux':
+        return network_management.run_view_ip_config()
+    return network_management.run_list_interfaces(args.interface)
+
+def _net_routes(args):
+    if get_os_type() != 'linux':
+        return network_management.run_view_routing_tables()
+    return network_management.run_list_routes(args.table, args.interface, args.family)
+
+def _net_traffic(args):
+    if get_os_type() != 'linux':
+        return LINUX_ONLY
+    return network_management.run_interface_traffic(args.duration, args.interval, args.top, args.interface, args.sort)
+
+def _net_watch(args):
+    if get_os_type() != 'linux':
+        return LINUX_ONLY
+    return network_management.run_watch_network(args.seconds)
+
+def _net_connections(args):
+    return network_management.run_view_network_connections()
+
+def _net_summary(args):
+    if get_os_type() != 'linux':
+        return LINUX_ONLY
+    return network_management.run_connection_summary(args.state, args.top, args.process)
+
+def _net_sockets(args):
+    if get_os_type() != 'linux':
+        return LINUX_ONLY
+    protocols = [p for p in network_management.PROTOCOLS if not args.protocol or p.startswith(args.protocol)]
+    records, status = network_management.run_search_sockets(args.state, args.port, args.process_filter, protocols,
+                                                            args.limit or None, args.with_process)
+    return ([record.to_dict() for record in records] if status == 0 else records), status
+
+def _net_static_ip(args):
+    return network_management.run_configure_static_ip(args.interface, args.address, args.netmask, args.gateway)
+
+def _net_apply(args):
+    if get_os_type() != 'linux':
+        return LINUX_ONLY
+    return network_management.run_apply_network_changes(args.file, args.dry_run)
+
+def _net_up(args):
+    return network_management.run_toggle_interface(args.interface, "habilitar")
+
+def _net_down(args):
+    return network_management.run_toggle_interface(args.interface, "deshabilitar")
+
+# --- Firewall ---
+
+def _firewall_status(args):
+    return firewall_management.run_view_firewall_status()
+
+def _firewall_enable(args):
+    return firewall_management.run_set_firewall_state(True)
+
+def _firewall_disable(args):
+    return firewall_management.run_set_firewall_state(False)
+
+def _firewall_rules(args):
+    return firewall_management.run_list_firewall_rules()
+
+def _firewall_allow(args):
+    return firewall_management.run_add_allow_port_rule(args.name or f"Permitir_{args.port}", args.port, args.protocol, args.direction)
+
+def _firewall_delete(args):
+    return firewall_management.run_delete_allow_port_rule(args.name or f"Permitir_{args.port}", args.port, args.protocol)
+
+def _firewall_apply(args):
+    if get_os_type() != 'linux':
+        return LINUX_ONLY
+    try:
+        return firewall_management.run_apply_port_rules(args.ports, args.action, args.protocol, args.direction,
+                                                        args.source, args.comment, args.backend, args.dry_run)
+    except firewall_management.FirewallTransactionError as e:
+        raise CliError(str(e))
+
+def _firewall_find(args):
+    if get_os_type() != 'linux':
+        return LINUX_ONLY
+    try:
+        rules, source = firewall_management.run_find_rules(args.name, args.port, args.protocol, args.chain, args.action, args.source)
+    except RuntimeError as e:
+        return str(e), 1
+    return {"source": source, "rules": [rule.to_dict() for rule in rules]}, 0
+
+def _firewall_analyze(args):
+    if get_os_type() != 'linux':
+        return LINUX_ONLY
+    try:
+        findings, summary, source = firewall_management.run_analyze_rules(args.source, args.min_set_size)
+    except RuntimeError as e:
+        return str(e), 1
+    return {"source": source, "summary": summary, "findings": [finding_to_dict(f) for f in findings],
+            "removal_script": removal_script(findings)}, 0
+
+# --- Discos ---
+
+def _disk_list(args):
+    if get_os_type() != 'linux':
+        return disk_partition_management.run_list_disks_partitions()
+    return disk_partition_management.run_list_block_devices()
+
+def _disk_usage(args):
+    if get_os_type() != 'linux':
+        return disk_partition_management.run_view_mounted_partition_usage()
+    entries, status = disk_partition_management.run_mount_usage(args.all, args.timeout)
+    return ([entry.to_dict() for entry in entries] if status == 0 else entries), status
+
+def _disk_scan(args):
+    result, status = disk_partition_management.run_scan_directory(args.path, args.top, args.workers,
+                                                                  not args.cross_mounts, not args.no_cache)
+    return (result.to_dict() if status == 0 else result), status
+
+def _disk_io(args):
+    if get_os_type() != 'linux':
+        return LINUX_ONLY
+    return disk_partition_management.run_disk_io(args.duration, args.interval, args.top, args.device, args.sort,
+                                                 not args.no_partitions)
+
+# --- Recuperación de espacio ---
+
+def _reclaim_scan(args):
+    report, status = disk_reclaim.run_find_reclaimable(args.path, args.min_size, args.workers, args.log_age, args.core_age,
+                                                       not args.cross_mounts, not args.no_duplicates, not args.no_cache)
+    return (report.to_dict() if status == 0 else report), status
+
+# --- Monitorización ---
+
+def _monitor_sample(args):
+    if get_os_type() != 'linux':
+        return LINUX_ONLY
+    sample = sample_cpu_memory(args.interval)
+    log_action("ResourceMonitoring", "View CPU/Memory Usage",
+               f"Muestra de CPU/memoria (CLI). CPU: {sample['cpu_total']['usage']:.1f}%, Memoria: {sample['memory']['percent']:.1f}%.")
+    return sample, 0
+
+def _monitor_summary(args):
+    if get_os_type() != 'linux':
+        return LINUX_ONLY
+    monitor = ResourceMonitor(args.interval, args.duration + args.interval, MONITOR_MOUNTPOINTS)
+    monitor.run(duration=args.duration)
+    summary = monitor.summary()
+    averages = ", ".join(f"{name}={stats['avg']:.1f}" for name, stats in summary.items() if stats)
+    log_action("ResourceMonitoring", "Continuous Monitoring", f"Monitorización de {args.duration:g} s (CLI). Medias: {averages}")
+    return summary, 0
+
+# --- Procesos ---
+
+def _proc_list(args):
+    if get_os_type() != 'linux':
+        output, status = execute_command("tasklist /v /fo list")
+        log_action("Process", "List Processes", "Procesos listados exitosamente." if status == 0 else f"Error al listar procesos: {output}")
+        return output, status
+    records = filter_processes(read_process_table(), user=args.user, name_regex=args.name, state=args.state,
+                               min_rss=int(args.min_rss_mb * 1024 * 1024) or None, min_cpu=args.min_cpu or None)
+    # Mismo criterio que la búsqueda interactiva: texto ascendente, métricas de mayor a menor
+    if args.sort in ("pid", "ppid", "name", "user", "state"):
+        records = sort_processes(records, args.sort)[:args.limit] if args.limit else sort_processes(records, args.sort)
+    else:
+        records = list(records)
+        records = top_processes(records, args.limit or len(records), args.sort)
+    log_action("Process", "Search Processes",
+               f"Búsqueda CLI (usuario={args.user}, regex={args.name}, estado={args.state}, orden={args.sort}): {len(records)} resultado(s).")
+    return [record.to_dict() for record in records], 0
+
+def _proc_kill(args):
+    if not (args.pid or args.name or args.user):
+        raise CliError("Debe indicar al menos --pid, --name o --user.")
+    if get_os_type() != 'linux':
+        if args.user:
+            return "El filtro por usuario solo está disponible en Linux.", 1
+        commands = [f"taskkill /PID {pid} /F" for pid in args.pid] + ([f'taskkill /IM "{args.name}" /F'] if args.name else [])
+        output, status = "", 0
+        for command in commands:
+            output, status = execute_command(command, sudo=True)
+            if status != 0:
+                break
+        log_action("Process", "Terminate Bulk", f"taskkill {args.pid or ''} {args.name or ''} (código {status}).")
+        return output, status
+    try:
+        sig = signal.Signals[args.signal.upper() if args.signal.upper().startswith("SIG") else f"SIG{args.signal.upper()}"]
+    except KeyError:
+        raise CliError(f"Señal inválida: '{args.signal}'.")
+    targets = resolve_targets(pids=args.pid, name_regex=args.name, user=args.user, match_cmdline=True)
+    results = signal_processes(targets, sig=sig, grace=args.grace, escalate=not args.no_escalate)
+    summary = summarize_results(results)
+    failed = summary.get("survived", 0) + summary.get("permission_denied", 0) + summary.get("not_found", 0)
+    description = f"(pids={args.pid or '-'}, nombre={args.name or '-'}, usuario={args.user or '-'})"
+    log_action("Process", "Terminate Bulk", f"Señal {sig.name} a {description} (CLI): {summary}.")
+    return {"results": {str(pid): outcome for pid, outcome in sorted(results.items())}, "summary": summary}, 1 if failed or not targets else 0
+
+# --- Informe y logs ---
+
+def _report(args):
+    path, sections, elapsed = system_report.run_full_system_report(args.timeout)
+    return {"path": path, "elapsed": elapsed,
+            "sections": [{k: v for k, v in section.items() if k != "output"} for section in sections]}, 0
+
+def _logs_search(args):
+    try:
+        start = audit_log.parse_datetime(args.since)
+        end = audit_log.parse_datetime(args.until, end_of_day=True)
+    except ValueError as e:
+        raise CliError(str(e))
+    flush_logs()
+    return query_logs(start=start, end=end, module=args.module, action=args.action,
+                      text=args.text, substring=args.substring, limit=args.limit), 0
+
+def _add_operation(areas, area, name, handler, help, arguments=()):
+    """Registra la operación 'area name' con sus argumentos [(flags, kwargs), ...]."""
+    parser = areas[area].add_parser(name, help=help)
+    for flags, kwargs in arguments:
+        parser.add_argument(*flags, **kwargs)
+    parser.set_defaults(handler=handler)
+
+def build_parser():
+    """Construye el parser con un subcomando por área y una operación por acción del menú."""
+    parser = CliParser(prog="main.py", description="Administración de sistemas sin interacción (salida JSON).")
+    parser.add_argument("--pretty", action="store_true", help="JSON indentado")
+    subparsers = parser.add_subparsers(dest="area", required=True, parser_class=CliParser)
+    areas = {}
+    for area, help in (("users", "Usuarios"), ("groups", "Grupos"), ("net", "Redes"), ("firewall", "Firewall"),
+                       ("disk", "Discos y particiones"), ("reclaim", "Recuperación de espacio"), ("monitor", "Monitorización de recursos"),
+                       ("proc", "Procesos"), ("logs", "Logs de auditoría")):
+        areas[area] = subparsers.add_parser(area, help=help).add_subparsers(dest="operation", required=True, parser_class=CliParser)
+
+    username = (("username",), {"help": "Nombre de usuario"})
+    groupname = (("groupname",), {"help": "Nombre del grupo"})
+    interface = (("interface",), {"help": "Interfaz de red (ej. eth0)"})
+    _add_operation(areas, "users", "list", _users_list, "Listar usuarios")
+    _add_operation(areas, "users", "create", _users_create, "Crear usuario",
+                   [username, (("--password-stdin",), {"action": "store_true", "help": "Leer la contraseña inicial de la primera línea de stdin"}),
+                    (("--password-env",), {"metavar": "VARIABLE", "help": "Leer la contraseña inicial de esta variable de entorno"})])
+    _add_operation(areas, "users", "delete", _users_delete, "Eliminar usuario", [username])
+    _add_operation(areas, "users", "show", _users_show, "Datos y grupos de un usuario (Linux)", [username])
+    _add_operation(areas, "users", "import", _users_import, "Importar usuarios en bloque desde CSV/JSON (Linux)",
+                   [(("file",), {"help": "Fichero CSV (con cabecera) o JSON"}),
+                    (("--root",), {"help": "Directorio raíz alternativo (useradd/chpasswd -R)"}),
+                    (("--dry-run",), {"action": "store_true", "help": "Validar y mostrar el plan sin aplicar"}),
+                    (("--skip-invalid",), {"action": "store_true", "help": "Crear las filas válidas aunque haya inválidas"})])
+    _add_operation(areas, "groups", "list", _groups_list, "Listar grupos")
+    _add_operation(areas, "groups", "create", _groups_create, "Crear grupo", [groupname])
+    _add_operation(areas, "groups", "show", _groups_show, "Datos y miembros de un grupo (Linux)", [groupname])
+    _add_operation(areas, "groups", "reconcile", _groups_reconcile, "Sincronizar membresías con un fichero (gpasswd -M por grupo, Linux)",
+                   [(("file",), {"help": "JSON {grupo: [usuarios]} o CSV con columnas group,user"}),
+                    (("--root",), {"help": "Directorio raíz alternativo (gpasswd -Q)"}),
+                    (("--dry-run",), {"action": "store_true", "help": "Mostrar el diff sin aplicar"}),
+                    (("--additive",), {"action": "store_true", "help": "Solo añadir miembros, nunca quitar"})])
+    _add_operation(areas, "groups", "delete", _groups_delete, "Eliminar grupo", [groupname])
+    _add_operation(areas, "groups", "add-member", _groups_add_member, "Añadir usuario a grupo", [username, groupname])
+    _add_operation(areas, "groups", "remove-member", _groups_remove_member, "Eliminar usuario de grupo", [username, groupname])
+
+    _add_operation(areas, "net", "ip", _net_ip, "Ver configuración IP (en Linux, interfaces y direcciones vía netlink)",
+                   [(("--interface",), {"help": "Solo esta interfaz"})])
+    _add_operation(areas, "net", "routes", _net_routes, "Ver tablas de enrutamiento (en Linux, rutas vía netlink)",
+                   [(("--table",), {"default": "main", "help": "main, local, default, número o all"}),
+                    (("--interface",), {"help": "Interfaz de salida"}), (("--family",), {"choices": ("4", "6")})])
+    _add_operation(areas, "net", "traffic", _net_traffic, "Tráfico, errores y descartes por interfaz: las más ocupadas (Linux)",
+                   [(("--duration",), {"type": float, "default": 5.0}),
+                    (("--interval",), {"type": float, "default": network_management.NET_TRAFFIC_INTERVAL}),
+                    (("--top",), {"type": int, "default": network_management.NET_TRAFFIC_TOP}),
+                    (("--interface",), {"help": "Expresión regular sobre el nombre de la interfaz"}),
+                    (("--sort",), {"default": "total_bytes", "choices": SORT_KEYS_TRAFFIC})])
+    _add_operation(areas, "net", "watch", _net_watch, "Registrar cambios de enlaces, direcciones y rutas (Linux)",
+                   [(("--seconds",), {"type": float, "default": 10.0})])
+    _add_operation(areas, "net", "connections", _net_connections, "Ver conexiones de red")
+    _add_operation(areas, "net", "summary", _net_summary, "Resumen de sockets por estado, puerto, red remota y proceso (Linux)",
+                   [(("--state",), {"action": "append", "help": "Estado a incluir (repetible), ej. ESTAB, LISTEN, TIME-WAIT"}),
+                    (("--top",), {"type": int, "default": 10}),
+                    (("--process",), {"action": "store_true", "help": "Atribuir sockets a procesos (/proc/[pid]/fd)"})])
+    _add_operation(areas, "net", "sockets", _net_sockets, "Listar sockets de /proc/net con filtros (Linux)",
+                   [(("--state",), {"action": "append"}), (("--port",), {"type": int, "help": "Puerto local o remoto"}),
+                    (("--protocol",), {"choices": ("tcp", "tcp6", "udp", "udp6")}),
+                    (("--process",), {"dest": "process_filter", "help": "Nombre exacto o PID del proceso"}),
+                    (("--with-process",), {"action": "store_true"}), (("--limit",), {"type": int, "default": 0, "help": "0 = sin límite"})])
+    _add_operation(areas, "net", "static-ip", _net_static_ip, "Configurar IP estática",
+                   [interface, (("address",), {"help": "Dirección IP"}), (("netmask",), {"help": "Máscara de subred"}),
+                    (("--gateway",), {"help": "Puerta de enlace"})])
+    _add_operation(areas, "net", "apply", _net_apply, "Aplicar cambios de direcciones, rutas y enlaces en un solo 'ip -batch' con vuelta atrás (Linux)",
+                   [(("file",), {"help": "JSON: lista de {\"op\": add_address|del_address|add_route|replace_route|del_route|set_link, ...}"}),
+                    (("--dry-run",), {"action": "store_true", "help": "Validar y mostrar el payload sin aplicar"})])
+    _add_operation(areas, "net", "up", _net_up, "Habilitar interfaz", [interface])
+    _add_operation(areas, "net", "down", _net_down, "Deshabilitar interfaz", [interface])
+
+    protocol = (("--protocol",), {"default": "any", "help": "tcp/udp/any (por defecto any)"})
+    _add_operation(areas, "firewall", "status", _firewall_status, "Ver estado del firewall")
+    _add_operation(areas, "firewall", "enable", _firewall_enable, "Habilitar firewall")
+    _add_operation(areas, "firewall", "disable", _firewall_disable, "Deshabilitar firewall")
+    _add_operation(areas, "firewall", "rules", _firewall_rules, "Listar reglas")
+    _add_operation(areas, "firewall", "allow", _firewall_allow, "Añadir regla que permite un puerto",
+                   [(("port",), {"help": "Puerto"}), protocol,
+                    (("--direction",), {"default": "in", "choices": ("in", "out")}),
+                    (("--name",), {"help": "Nombre de la regla (Windows)"})])
+    _add_operation(areas, "firewall", "delete", _firewall_delete, "Eliminar regla que permite un puerto",
+                   [(("--port",), {"help": "Puerto (obligatorio en Linux)"}), protocol,
+                    (("--name",), {"help": "Nombre de la regla (Windows)"})])
+
+    _add_operation(areas, "firewall", "apply", _firewall_apply, "Aplicar muchos puertos en una transacción atómica (Linux)",
+                   [(("ports",), {"nargs": "+", "help": "Puertos o rangos (ej. 22 80 8000-8100)"}),
+                    (("--action",), {"default": "allow", "choices": ("allow", "deny", "remove")}),
+                    (("--protocol",), {"default": "tcp", "choices": ("tcp", "udp", "any")}),
+                    (("--direction",), {"default": "in", "choices": ("in", "out")}),
+                    (("--source",), {"help": "Dirección o red remota"}), (("--comment",), {}),
+                    (("--backend",), {"default": firewall_management.FIREWALL_BACKEND, "choices": ("iptables", "ip6tables", "nft")}),
+                    (("--dry-run",), {"action": "store_true", "help": "Mostrar el payload sin ejecutar nada"})])
+
+    _add_operation(areas, "firewall", "find", _firewall_find, "Buscar reglas parseadas por nombre, puerto, protocolo, cadena o acción (Linux)",
+                   [(("--name",), {"help": "Subcadena del nombre/comentario"}), (("--port",), {"type": int}),
+                    (("--protocol",), {}), (("--chain",), {}),
+                    (("--action",), {"choices": ("allow", "deny", "reject", "limit", "jump", "return")}),
+                    (("--source",), {"default": "auto", "choices": ("auto", "ufw", "nft", "iptables", "ip6tables")})])
+    _add_operation(areas, "firewall", "analyze", _firewall_analyze, "Detectar reglas tapadas, redundantes y consolidables (Linux)",
+                   [(("--source",), {"default": "auto", "choices": ("auto", "ufw", "nft", "iptables", "ip6tables")}),
+                    (("--min-set-size",), {"type": int, "default": firewall_management.FIREWALL_SET_THRESHOLD,
+                                           "help": "Reglas casi iguales a partir de las cuales se sugiere un set"})])
+
+    _add_operation(areas, "disk", "list", _disk_list, "Listar discos y particiones (en Linux, desde /sys/block)")
+    _add_operation(areas, "disk", "usage", _disk_usage, "Ver uso de particiones montadas (en Linux, statvfs con timeout por montaje)",
+                   [(("--all",), {"action": "store_true", "help": "Incluir pseudo sistemas de ficheros, bind mounts y montajes ocultos"}),
+                    (("--timeout",), {"type": float, "default": disk_partition_management.DISK_STATVFS_TIMEOUT,
+                                      "help": "Segundos máximos de statvfs por montaje"})])
+    _add_operation(areas, "disk", "scan", _disk_scan, "Directorios y ficheros más grandes bajo una ruta ('du' paralelo con caché por mtime)",
+                   [(("path",), {"help": "Directorio a analizar"}),
+                    (("--top",), {"type": int, "default": disk_partition_management.DISK_SCAN_TOP}),
+                    (("--workers",), {"type": int, "default": disk_partition_management.DISK_SCAN_WORKERS}),
+                    (("--cross-mounts",), {"action": "store_true", "help": "Entrar en otros sistemas de ficheros montados debajo"}),
+                    (("--no-cache",), {"action": "store_true", "help": "Listar todos los directorios aunque no hayan cambiado"})])
+    _add_operation(areas, "disk", "io", _disk_io, "Actividad de E/S por dispositivo: IOPS, caudal, latencia, cola y % de uso (Linux)",
+                   [(("--duration",), {"type": float, "default": 5.0}),
+                    (("--interval",), {"type": float, "default": disk_partition_management.DISK_IO_INTERVAL}),
+                    (("--top",), {"type": int, "default": disk_partition_management.DISK_IO_TOP}),
+                    (("--device",), {"help": "Expresión regular sobre el nombre del dispositivo"}),
+                    (("--sort",), {"default": "utilization", "choices": SORT_KEYS_DISK_IO}),
+                    (("--no-partitions",), {"action": "store_true", "help": "Solo discos completos"})])
+
+    _add_operation(areas, "reclaim", "scan", _reclaim_scan,
+                   "Duplicados (hash por etapas con caché), logs rotados antiguos y core dumps bajo una ruta (solo informa)",
+                   [(("path",), {"help": "Directorio a analizar"}),
+                    (("--min-size",), {"type": int, "default": disk_reclaim.RECLAIM_MIN_SIZE, "help": "Bytes mínimos de un duplicado"}),
+                    (("--workers",), {"type": int, "default": disk_reclaim.RECLAIM_WORKERS}),
+                    (("--log-age",), {"type": float, "default": disk_reclaim.RECLAIM_LOG_AGE_DAYS, "help": "Días mínimos de un log rotado"}),
+                    (("--core-age",), {"type": float, "default": disk_reclaim.RECLAIM_CORE_AGE_DAYS, "help": "Días mínimos de un core dump"}),
+                    (("--cross-mounts",), {"action": "store_true", "help": "Entrar en otros sistemas de ficheros montados debajo"}),
+                    (("--no-duplicates",), {"action": "store_true", "help": "Solo logs rotados y core dumps (no lee ficheros)"}),
+                    (("--no-cache",), {"action": "store_true", "help": "No usar ni guardar la caché de hashes"})])
+
+    _add_operation(areas, "monitor", "sample", _monitor_sample, "Muestra de CPU, memoria y carga (Linux)",
+                   [(("--interval",), {"type": float, "default": 0.5, "help": "Segundos entre lecturas de /proc/stat"})])
+    _add_operation(areas, "monitor", "summary", _monitor_summary, "Resumen min/max/media/p95 de un periodo (Linux)",
+                   [(("--duration",), {"type": float, "default": 60.0, "help": "Segundos a muestrear"}),
+                    (("--interval",), {"type": float, "default": MONITOR_INTERVAL})])
+
+    _add_operation(areas, "proc", "list", _proc_list, "Listar y filtrar procesos",
+                   [(("--user",), {}), (("--name",), {"help": "Expresión regular sobre nombre/comando"}),
+                    (("--state",), {"help": "Estados a incluir, ej. R, DZ"}),
+                    (("--min-rss-mb",), {"type": float, "default": 0.0}), (("--min-cpu",), {"type": float, "default": 0.0}),
+                    (("--sort",), {"default": "cpu_percent", "choices": SORT_KEYS}),
+                    (("--limit",), {"type": int, "default": 0, "help": "0 = sin límite"})])
+    _add_operation(areas, "proc", "kill", _proc_kill, "Terminar procesos (SIGTERM y escalado a SIGKILL)",
+                   [(("--pid",), {"type": int, "action": "append", "default": []}), (("--name",), {"help": "Expresión regular"}),
+                    (("--user",), {}), (("--signal",), {"default": "TERM"}), (("--grace",), {"type": float, "default": 5.0}),
+                    (("--no-escalate",), {"action": "store_true"})])
+
+    _add_operation(areas, "logs", "search", _logs_search, "Consultar logs de auditoría",
+                   [(("--since",), {"help": "YYYY-MM-DD [HH:MM[:SS]]"}), (("--until",), {"help": "YYYY-MM-DD [HH:MM[:SS]]"}),
+                    (("--module",), {}), (("--action",), {}), (("--text",), {"help": "Palabras completas"}),
+                    (("--substring",), {}), (("--limit",), {"type": int, "default": 100})])
+
+    report = subparsers.add_parser("report", help="Generar informe completo del sistema")
+    report.add_argument("--timeout", type=float, default=system_report.REPORT_COLLECTOR_TIMEOUT, help="Timeout por recolector")
+    report.set_defaults(handler=_report)
+
+    batch = subparsers.add_parser("batch", help="Ejecutar un fichero de operaciones (una por línea) en un solo proceso")
+    batch.add_argument("file", help="Fichero de operaciones ('-' para stdin); '#' inicia un comentario")
+    batch.add_argument("--stop-on-error", action="store_true", help="Detenerse en la primera operación fallida")
+    return parser
+
+def run_operation(parser, argv):
+    """Ejecuta una operación ya dividida en argumentos. Retorna el diccionario de resultado."""
+    result = {"command": " ".join(argv)}
+    try:
+        help_text = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(help_text): # --help no debe mezclarse con la salida JSON
+                args = parser.parse_args(argv)
+        except SystemExit:
+            # argparse sale tras imprimir la ayuda (--help): en un lote se informa y se sigue
+            payload, status = help_text.getvalue(), 0
+        else:
+            if args.area == "batch":
+                raise CliError("No se puede anidar 'batch' dentro de un fichero batch.")
+            payload, status = args.handler(args)
+    except CliError as e:
+        payload, status = f"Argumentos inválidos: {e}", 2
+    except (OSError, ValueError, re.error) as e:
+        payload, status = f"Error: {e}", 1
+    except Exception as e:
+        # Un fallo inesperado de una operación no debe abortar el resto del lote
+        log_action("CLI", "Operation Error", f"Excepción en '{result['command']}': {type(e).__name__}: {e}")
+        payload, status = f"Error inesperado ({type(e).__name__}): {e}", 1
+    result["ok"] = status == 0
+    result["status"] = status
+    result["output" if isinstance(payload, str) else "data"] = payload
+    return result
+
+def read_batch_lines(path):
+    """Lee el fichero batch y retorna [(número de línea, argv)] ignorando líneas vacías y comentarios."""
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        operations = []
+        for number, line in enumerate(stream, 1):
+            argv = shlex.split(line, comments=True)
+            if argv:
+                operations.append((number, argv))
+        return operations
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def run_batch(parser, path, stop_on_error=False, emit=None):
+    """
+    Ejecuta las operaciones del fichero en este mismo proceso (un solo logger y un solo
+    auxiliar privilegiado). 'emit' recibe el resultado de cada operación según termina.
+    Retorna el resumen {'file', 'total', 'failed', 'stopped_at'}.
+    """
+    operations = read_batch_lines(path)
+    start_privileged_helper() # Una sola autenticación sudo para todo el lote
+    failed = 0
+    stopped_at = None
+    for number, argv in operations:
+        result = run_operation(parser, argv)
+        result["line"] = number
+        if emit:
+            emit(result)
+        if not result["ok"]:
+            failed += 1
+            if stop_on_error:
+                stopped_at = number
+                break
+    log_action("CLI", "Batch", f"Lote '{path}': {len(operations)} operación(es), {failed} con error"
+               + (f", detenido en la línea {stopped_at}." if stopped_at else "."))
+    return {"file": path, "total": len(operations), "failed": failed, "stopped_at": stopped_at}
+
+def main(argv=None):
+    """Punto de entrada no interactivo. Retorna el código de salida (0 = todo correcto)."""
+    parser = build_parser()
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        args = parser.parse_args(argv)
+    except CliError as e:
+        parser.print_usage(sys.stderr)
+        print(f"{parser.prog}: error: {e}", file=sys.stderr)
+        return 2
+
+    def emit(result):
+        print(json.dumps(result, ensure_ascii=False, indent=2 if args.pretty else None, default=str), flush=True)
+
+    if args.area == "batch":
+        try:
+            summary = run_batch(parser, args.file, args.stop_on_error, emit)
+        except (OSError, ValueError) as e: # ValueError: comillas sin cerrar en shlex
+            emit({"file": args.file, "ok": False, "output": f"Error al leer el fichero batch: {e}"})
+            return 1
+        emit({"summary": summary, "ok": summary["failed"] == 0})
+        return 0 if summary["failed"] == 0 else 1
+
+    result = run_operation(parser, argv)
+    emit(result)
+    return 0 if result["ok"] else 1
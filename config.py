@@ -3,4 +3,71 @@ import os
 # Directorio para almacenar los logs
 LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
 
-# Puedes añadir más configuraciones aquí si es necesario
\ No newline at end of file
+# Puedes añadir más configuraciones aquí si es necesario
+
+# Monitorización continua: intervalo de muestreo (segundos), historial retenido (segundos)
+# y puntos de montaje cuyo uso de disco se registra
+MONITOR_INTERVAL = 5
+MONITOR_HISTORY_SECONDS = 24 * 3600
+MONITOR_MOUNTPOINTS = ["/"]
+
+# Panel en vivo (curses): intervalo inicial de refresco (segundos, ajustable con +/-), cada cuánto
+# se consulta el uso de los montajes (segundos) y filas máximas de los paneles de disco, montajes y red
+DASHBOARD_INTERVAL = 2.0
+DASHBOARD_MOUNT_REFRESH = 30
+DASHBOARD_PANE_ROWS = 6
+
+# Tráfico por interfaz: intervalo de muestreo (segundos), historial por interfaz (segundos)
+# y número de interfaces más ocupadas que se muestran
+NET_TRAFFIC_INTERVAL = 1.0
+NET_TRAFFIC_HISTORY_SECONDS = 300
+NET_TRAFFIC_TOP = 10
+
+# Informe completo del sistema: tiempo máximo (segundos) por recolector
+REPORT_COLLECTOR_TIMEOUT = 30
+
+# Logger: formato ('text' o 'json' por líneas), rotación por tamaño (bytes, copias conservadas),
+# política de fsync ('never', 'batch' o 'always') y máximo de registros por escritura
+LOG_FORMAT = "text"
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+LOG_FSYNC = "never"
+LOG_BATCH_SIZE = 256
+
+# Importación de usuarios en bloque: filas por lote y método de cifrado de chpasswd
+# (obligatorio con un directorio raíz alternativo, donde PAM no está disponible)
+USER_IMPORT_BATCH_SIZE = 100
+USER_IMPORT_CRYPT_METHOD = "SHA512"
+
+# Transacciones de firewall: backend ('iptables', 'ip6tables' o 'nft') y cadenas de destino
+# (con UFW activo se pueden usar 'ufw-user-input'/'ufw-user-output' para que convivan)
+FIREWALL_BACKEND = "iptables"
+FIREWALL_CHAINS = None
+# Análisis de reglas: mínimo de reglas que solo difieren en puerto u origen para sugerir un set/ipset
+FIREWALL_SET_THRESHOLD = 4
+
+# Uso de los sistemas de ficheros montados: tiempo máximo (segundos) de cada statvfs antes de
+# marcar el montaje como 'sin respuesta' (NFS caído, FUSE colgado) y statvfs simultáneos
+DISK_STATVFS_TIMEOUT = 2.0
+DISK_STATVFS_WORKERS = 16
+
+# Actividad de E/S por dispositivo (/proc/diskstats): intervalo de muestreo (segundos),
+# historial por dispositivo (segundos) y número de dispositivos más ocupados que se muestran
+DISK_IO_INTERVAL = 1.0
+DISK_IO_HISTORY_SECONDS = 300
+DISK_IO_TOP = 10
+
+# Escaneo de espacio por directorio ('du' paralelo): hilos, número de directorios y ficheros más
+# grandes que se muestran y directorio de la caché por mtime para los reescaneos incrementales
+DISK_SCAN_WORKERS = 8
+DISK_SCAN_TOP = 20
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+
+# Recuperación de espacio: tamaño mínimo (bytes) de los ficheros que se comparan como duplicados,
+# hilos de hash, antigüedad (días) a partir de la cual se listan logs rotados y core dumps y número
+# de entradas de cada categoría que se muestran
+RECLAIM_MIN_SIZE = 1024 * 1024
+RECLAIM_WORKERS = 4
+RECLAIM_LOG_AGE_DAYS = 7
+RECLAIM_CORE_AGE_DAYS = 0
+RECLAIM_TOP = 20
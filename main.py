@@ -2,7 +2,8 @@ import sys
 from utils.display import clear_screen, print_menu, print_header, print_error, get_user_input
 from utils.system_info import get_os_type
 from modules import user_group_management, network_management, resource_monitoring, \
-                    disk_partition_management, firewall_management, process_management
+                    disk_partition_management, firewall_management, process_management, system_report, \
+                    audit_log, disk_reclaim
 
 def main_menu():
     while True:
@@ -15,6 +16,9 @@ def main_menu():
             "4": "Gestión de Particiones de Disco",
             "5": "Gestión de Firewall",
             "6": "Gestión de Procesos",
+            "7": "Generar Informe Completo del Sistema",
+            "8": "Consultar Logs de Auditoría",
+            "9": "Recuperar Espacio en Disco",
             "0": "Salir"
         }
         print_menu(options)
@@ -33,6 +37,14 @@ def main_menu():
             firewall_management.firewall_menu()
         elif choice == '6':
             process_management.process_menu()
+        elif choice == '7':
+            system_report.generate_full_system_report()
+            get_user_input("Presione Enter para continuar...")
+        elif choice == '8':
+            audit_log.search_audit_log()
+            get_user_input("Presione Enter para continuar...")
+        elif choice == '9':
+            disk_reclaim.disk_reclaim_menu()
         elif choice == '0':
             print_header("Saliendo del script. ¡Hasta luego!")
             sys.exit()
@@ -41,4 +53,8 @@ def main_menu():
             get_user_input("Presione Enter para continuar...")
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Con argumentos: modo no interactivo (subcomandos con salida JSON y modo batch)
+        import cli
+        sys.exit(cli.main(sys.argv[1:]))
     main_menu()
\ No newline at end of file
@@ -0,0 +1,51 @@
+from utils.display import print_header, print_info, print_error, get_user_input
+from utils.logger import log_action, flush_logs
+from utils.log_query import query_logs
+import datetime
+import time
+
+def parse_datetime(text, end_of_day=False):
+    """Acepta 'YYYY-MM-DD' o 'YYYY-MM-DD HH:MM[:SS]'. Retorna None si el texto está vacío."""
+    if not text:
+        return None
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            value = datetime.datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        if fmt == "%Y-%m-%d" and end_of_day:
+            value = value.replace(hour=23, minute=59, second=59)
+        return value
+    raise ValueError(f"Fecha inválida: '{text}'. Use YYYY-MM-DD o YYYY-MM-DD HH:MM[:SS].")
+
+def search_audit_log():
+    print_header("Consultar Logs de Auditoría")
+    try:
+        start = parse_datetime(get_user_input("Desde (YYYY-MM-DD [HH:MM], dejar en blanco para sin límite)"))
+        end = parse_datetime(get_user_input("Hasta (YYYY-MM-DD [HH:MM], dejar en blanco para sin límite)"), end_of_day=True)
+    except ValueError as e:
+        print_error(str(e))
+        return
+    module = get_user_input("Módulo exacto, ej. 'UserGroup', 'Firewall' (dejar en blanco para todos)") or None
+    action = get_user_input("Acción exacta, ej. 'Delete User', 'Add Rule' (dejar en blanco para todas)") or None
+    text = get_user_input("Palabras en los detalles (dejar en blanco para no filtrar)") or None
+    substring = get_user_input("Subcadena en la línea (dejar en blanco para no filtrar)") or None
+    try:
+        limit = int(get_user_input("Número máximo de resultados (dejar en blanco para 100)") or 100)
+    except ValueError:
+        print_error("Valor numérico inválido.")
+        return
+
+    flush_logs() # Incluye en la búsqueda las acciones aún pendientes de escribir
+    started = time.monotonic()
+    results = query_logs(start=start, end=end, module=module, action=action, text=text, substring=substring, limit=limit)
+    elapsed = time.monotonic() - started
+    if results:
+        print_info(f"{len(results)} registro(s) encontrados en {elapsed * 1000:.0f} ms:")
+        for record in results:
+            print(f"[{record['timestamp']}] [{record['module']}] [{record['action']}] {record.get('details', '')}")
+    else:
+        print_info(f"No se encontraron registros ({elapsed * 1000:.0f} ms).")
+    log_action("AuditLog", "Search Logs",
+               f"Consulta (desde={start}, hasta={end}, módulo={module}, acción={action}, texto={text}, "
+               f"subcadena={substring}): {len(results)} resultado(s).", duration=elapsed)
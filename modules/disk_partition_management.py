@@ -1,7 +1,14 @@
 from utils.display import clear_screen, print_menu, print_header, print_info, print_success, print_error, get_user_input
 from utils.system_info import get_os_type, execute_command
 from utils.logger import log_action
+from utils.disk_topology import read_block_devices, format_block_tree
+from utils.mount_table import mount_usage, format_mount_usage
+from utils.disk_io import DiskIoSampler, format_top, format_throughput
+from utils.space_scanner import scan_tree, format_scan_result
+from config import DISK_STATVFS_TIMEOUT, DISK_STATVFS_WORKERS, DISK_IO_INTERVAL, DISK_IO_HISTORY_SECONDS, DISK_IO_TOP, \
+                   DISK_SCAN_WORKERS, DISK_SCAN_TOP, CACHE_DIR
 import os
+import re
 
 def disk_partition_menu():
     while True:
@@ -9,7 +16,9 @@ def disk_partition_menu():
         print_header("Gestión de Particiones de Disco Duro")
         options = {
             "1": "Listar Discos y Particiones",
-            "2": "Ver Uso de Particiones Montadas", # df -h ya lo cubre parcialmente
+            "2": "Ver Uso de Particiones Montadas",
+            "3": "Actividad de E/S por Disco: IOPS, Latencia y % de Uso (Solo Linux)",
+            "4": "¿Dónde Está el Espacio? Directorios y Ficheros Más Grandes",
             "9": "Generar Log de Particiones",
             "0": "Volver al Menú Principal"
         }
@@ -21,6 +30,13 @@ def disk_partition_menu():
             list_disks_partitions()
         elif choice == '2':
             view_mounted_partition_usage()
+        elif choice == '3':
+            if get_os_type() == 'linux':
+                disk_io_activity()
+            else:
+                print_error("Esta opción solo está disponible en Linux.")
+        elif choice == '4':
+            scan_directory_usage()
         elif choice == '9':
             generate_disk_partition_log()
         elif choice == '0':
@@ -29,71 +45,179 @@ def disk_partition_menu():
             print_error("Opción inválida. Por favor, intente de nuevo.")
         get_user_input("Presione Enter para continuar...")
 
+def run_list_disks_partitions():
+    """Obtiene discos y particiones sin interacción. Retorna (salida, código)."""
+    if get_os_type() == 'windows':
+        sections = (
+            ("Discos Físicos", "wmic diskdrive get Caption,Size,MediaType,Model,SerialNumber /value"),
+            ("Particiones", "wmic partition get Name,DiskIndex,Size,StartingOffset /value"),
+            ("Unidades Lógicas (Volúmenes)", "wmic logicaldisk get Caption,Size,FreeSpace,FileSystem /value"),
+        )
+        parts, status = [], 0
+        for title, command in sections:
+            section_output, section_status = execute_command(command)
+            parts.append(f"--- {title} ---\n{section_output}")
+            status = status or section_status
+        output = "\n".join(parts)
+    else: # linux: /sys/block, /proc/partitions y mountinfo; 'lsblk' solo si no se pueden leer
+        try:
+            output, status = format_block_tree(read_block_devices()), 0
+        except OSError:
+            output, status = execute_command(["lsblk", "-o", "NAME,SIZE,FSTYPE,MOUNTPOINT,UUID,MODEL,STATE"])
+    if status == 0:
+        log_action("DiskPartition", "List Disks/Partitions", f"Discos y particiones listados exitosamente ({get_os_type().capitalize()}).")
+    else:
+        log_action("DiskPartition", "List Disks/Partitions", f"Error al listar discos y particiones: {output}")
+    return output, status
+
 def list_disks_partitions():
     print_header("Listar Discos y Particiones")
-    os_type = get_os_type()
-    if os_type == 'windows':
+    if get_os_type() == 'windows':
         print_info("Información de discos y particiones (wmic diskdrive, wmic partition, wmic logicaldisk):")
-        command_disk = "wmic diskdrive get Caption,Size,MediaType,Model,SerialNumber /value"
-        command_partition = "wmic partition get Name,DiskIndex,Size,StartingOffset /value"
-        command_logicaldisk = "wmic logicaldisk get Caption,Size,FreeSpace,FileSystem /value"
+    else:
+        print_info("Información de discos y particiones (/sys/block):")
+    output, status = run_list_disks_partitions()
+    if status == 0:
+        print(output)
+    else:
+        print_error(f"Error al listar discos y particiones: {output}")
 
-        output_disk, status_disk = execute_command(command_disk)
-        output_partition, status_partition = execute_command(command_partition)
-        output_logicaldisk, status_logicaldisk = execute_command(command_logicaldisk)
+def run_list_block_devices():
+    """Discos, particiones y dispositivos apilados leídos de /sys/block (Linux). Retorna (lista de diccionarios, código)."""
+    try:
+        devices = read_block_devices()
+    except OSError as e:
+        log_action("DiskPartition", "List Block Devices", f"Error al leer /sys/block: {e}")
+        return str(e), 1
+    log_action("DiskPartition", "List Block Devices", f"{len(devices)} dispositivo(s) de bloques listados.")
+    return [device.to_dict() for device in devices.values()], 0
 
-        if status_disk == 0:
-            print_info("\n--- Discos Físicos ---")
-            print(output_disk)
-        else:
-            print_error(f"Error al listar discos físicos: {output_disk}")
+def run_mount_usage(all_mounts=False, timeout=DISK_STATVFS_TIMEOUT):
+    """
+    Uso de los sistemas de ficheros montados con statvfs concurrente y timeout por montaje (Linux).
+    Los montajes colgados se marcan 'unresponsive' sin bloquear el resto. Retorna (lista de MountEntry, código).
+    """
+    try:
+        entries = mount_usage(all_mounts, timeout, DISK_STATVFS_WORKERS)
+    except OSError as e:
+        log_action("DiskPartition", "View Mounted Usage", f"Error al leer los montajes: {e}")
+        return str(e), 1
+    unresponsive = [entry.mountpoint for entry in entries if entry.status == "unresponsive"]
+    message = f"Uso de {len(entries)} montaje(s) consultado."
+    if unresponsive:
+        message += f" Sin respuesta: {', '.join(unresponsive)}."
+    log_action("DiskPartition", "View Mounted Usage", message)
+    return entries, 0
 
-        if status_partition == 0:
-            print_info("\n--- Particiones ---")
-            print(output_partition)
-        else:
-            print_error(f"Error al listar particiones: {output_partition}")
-        
-        if status_logicaldisk == 0:
-            print_info("\n--- Unidades Lógicas (Volúmenes) ---")
-            print(output_logicaldisk)
-        else:
-            print_error(f"Error al listar unidades lógicas: {output_logicaldisk}")
-
-        if all(s == 0 for s in [status_disk, status_partition, status_logicaldisk]):
-            log_action("DiskPartition", "List Disks/Partitions", "Discos y particiones listados exitosamente (Windows).")
-        else:
-            log_action("DiskPartition", "List Disks/Partitions", "Error al listar discos y particiones (Windows).")
-
-    else: # linux
-        print_info("Información de discos y particiones (lsblk):")
-        command = "lsblk -o NAME,SIZE,FSTYPE,MOUNTPOINT,UUID,MODEL,STATE"
-        output, status = execute_command(command)
-        if status == 0:
-            print(output)
-            log_action("DiskPartition", "List Disks/Partitions", "Discos y particiones listados exitosamente (Linux).")
-        else:
-            print_error(f"Error al listar discos y particiones: {output}")
-            log_action("DiskPartition", "List Disks/Partitions", f"Error al listar discos y particiones: {output}")
+def run_view_mounted_partition_usage():
+    """Obtiene el uso de las particiones montadas sin interacción. Retorna (salida, código)."""
+    if get_os_type() == 'windows':
+        # Ya lo cubrimos en `list_disks_partitions` con `wmic logicaldisk`
+        output, status = execute_command("wmic logicaldisk get Caption,Size,FreeSpace,FileSystem /value")
+    else: # linux: sin 'df', que se queda bloqueado entero con un solo NFS o FUSE caído
+        entries, status = run_mount_usage()
+        return (format_mount_usage(entries) if status == 0 else entries), status
+    if status == 0:
+        log_action("DiskPartition", "View Mounted Usage", "Uso de particiones montadas listado exitosamente.")
+    else:
+        log_action("DiskPartition", "View Mounted Usage", f"Error al ver uso de particiones montadas: {output}")
+    return output, status
 
 def view_mounted_partition_usage():
     print_header("Ver Uso de Particiones Montadas")
-    os_type = get_os_type()
-    if os_type == 'windows':
-        # Ya lo cubrimos en `list_disks_partitions` con `wmic logicaldisk`
+    if get_os_type() == 'windows':
         print_info("Ver uso de particiones montadas (información de volúmenes):")
-        command = "wmic logicaldisk get Caption,Size,FreeSpace,FileSystem /value"
-    else: # linux
-        command = "df -hT" # -h: humano, -T: tipo de sistema de archivos
-    
-    output, status = execute_command(command)
+    output, status = run_view_mounted_partition_usage()
     if status == 0:
         print(output)
-        log_action("DiskPartition", "View Mounted Usage", "Uso de particiones montadas listado exitosamente.")
     else:
         print_error(f"Error al ver uso de particiones montadas: {output}")
-        log_action("DiskPartition", "View Mounted Usage", f"Error al ver uso de particiones montadas: {output}")
 
+def run_disk_io(duration=5.0, interval=DISK_IO_INTERVAL, top=DISK_IO_TOP, pattern=None, sort="utilization", partitions=True):
+    """
+    Muestrea /proc/diskstats durante 'duration' segundos. Retorna ({'top': dispositivos más ocupados
+    en la última muestra, 'summary': min/max/media/p95 de esos dispositivos}, código).
+    """
+    try:
+        sampler = DiskIoSampler(interval, max(duration, DISK_IO_HISTORY_SECONDS), pattern, partitions)
+        sampler.run(duration=duration)
+    except (OSError, ValueError, re.error) as e:
+        log_action("DiskPartition", "Disk I/O", f"Error al muestrear /proc/diskstats: {e}")
+        return str(e), 1
+    busiest = sampler.top(top, sort)
+    log_action("DiskPartition", "Disk I/O",
+               f"Actividad de {len(sampler.buffers)} dispositivo(s) durante {duration:g} s. Más ocupado: "
+               + (f"{busiest[0]['device']} ({busiest[0]['utilization']:.1f}%)" if busiest else "ninguno"))
+    return {"top": busiest, "summary": sampler.summary(names=[entry["device"] for entry in busiest])}, 0
+
+def disk_io_activity():
+    print_header("Actividad de E/S por Disco")
+    pattern = get_user_input("Filtro de dispositivos (expresión regular, en blanco para todos)") or None
+    partitions = get_user_input("¿Incluir particiones? (s/N)").lower() == 's'
+    try:
+        duration = float(get_user_input("Segundos de muestreo (ej. 30)") or 30)
+        sampler = DiskIoSampler(DISK_IO_INTERVAL, DISK_IO_HISTORY_SECONDS, pattern, partitions)
+    except (ValueError, re.error) as e:
+        print_error(f"Parámetro inválido: {e}")
+        return
+
+    def show(rates):
+        clear_screen()
+        print_header(f"Actividad de E/S (top {DISK_IO_TOP} de {len(rates)}, cada {DISK_IO_INTERVAL:g} s, Ctrl+C para terminar)")
+        print(format_top(sampler.top(DISK_IO_TOP)))
+
+    try:
+        sampler.run(duration=duration, on_sample=show)
+    except KeyboardInterrupt:
+        pass
+    summary = sampler.summary()
+    print_info("Medias del periodo (dispositivos más ocupados en la última muestra):")
+    for entry in sampler.top(DISK_IO_TOP):
+        stats = summary.get(entry["device"], {})
+        if stats.get("utilization"):
+            print(f"  {entry['device']:<14} uso medio {stats['utilization']['avg']:.1f}% (p95 {stats['utilization']['p95']:.1f}%), "
+                  f"{stats['iops']['avg']:.0f} IOPS, latencia media {stats['await']['avg']:.2f} ms, "
+                  f"lectura {format_throughput(stats['read_bytes']['avg'])}, escritura {format_throughput(stats['write_bytes']['avg'])}")
+    log_action("DiskPartition", "Disk I/O", f"Monitorización de E/S de {len(sampler.buffers)} dispositivo(s).")
+
+def run_scan_directory(path, top=DISK_SCAN_TOP, workers=DISK_SCAN_WORKERS, one_filesystem=True, use_cache=True):
+    """
+    Calcula el espacio ocupado bajo 'path' (ver utils.space_scanner) con la caché por mtime de
+    CACHE_DIR: los reescaneos solo listan los directorios que cambiaron. Retorna (ScanResult, código).
+    """
+    try:
+        result = scan_tree(path, workers, one_filesystem, top, CACHE_DIR, use_cache)
+    except (OSError, ValueError) as e:
+        log_action("DiskPartition", "Scan Directory", f"Error al escanear '{path}': {e}")
+        return str(e), 1
+    log_action("DiskPartition", "Scan Directory",
+               f"Escaneo de '{result.root}': {result.usage} bytes en {result.files} ficheros, {result.directories} directorios "
+               f"({result.scanned} listados, {result.cached} desde caché, {len(result.errors)} con error) en {result.elapsed:.2f} s.")
+    return result, 0
+
+def scan_directory_usage():
+    print_header("¿Dónde Está el Espacio?")
+    path = get_user_input("Directorio a analizar (ej. /var)") or "/"
+    cross = get_user_input("¿Cruzar a otros sistemas de ficheros montados debajo? (s/N)").lower() == 's'
+    print_info("Escaneando... (los reescaneos reutilizan la caché de los directorios sin cambios)")
+    result, status = run_scan_directory(path, one_filesystem=not cross)
+    if status == 0:
+        print(format_scan_result(result))
+    else:
+        print_error(f"Error al escanear '{path}': {result}")
+
+def get_report_collectors():
+    """Recolectores de solo lectura de este módulo para el informe completo del sistema."""
+    if get_os_type() == 'windows':
+        return [
+            {"title": "Discos Físicos", "argv": ["wmic", "diskdrive", "get", "Caption,Size,MediaType,Model,SerialNumber", "/value"]},
+            {"title": "Particiones", "argv": ["wmic", "partition", "get", "Name,DiskIndex,Size,StartingOffset", "/value"]},
+            {"title": "Unidades Lógicas", "argv": ["wmic", "logicaldisk", "get", "Caption,Size,FreeSpace,FileSystem", "/value"]},
+        ]
+    return [
+        {"title": "Discos y Particiones", "func": lambda: format_block_tree(read_block_devices())},
+        {"title": "Uso de Particiones Montadas", "func": lambda: format_mount_usage(mount_usage(timeout=DISK_STATVFS_TIMEOUT, workers=DISK_STATVFS_WORKERS))},
+    ]
 
 def generate_disk_partition_log():
     print_header("Generar Log de Particiones")
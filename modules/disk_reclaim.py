@@ -0,0 +1,73 @@
+from utils.display import clear_screen, print_menu, print_header, print_info, print_error, get_user_input, format_bytes
+from utils.logger import log_action
+from utils.duplicate_finder import find_reclaimable, format_reclaim_report
+from config import RECLAIM_MIN_SIZE, RECLAIM_WORKERS, RECLAIM_LOG_AGE_DAYS, RECLAIM_CORE_AGE_DAYS, RECLAIM_TOP, CACHE_DIR
+
+def disk_reclaim_menu():
+    while True:
+        clear_screen()
+        print_header("Recuperación de Espacio en Disco")
+        options = {
+            "1": "Buscar Duplicados, Logs Rotados y Core Dumps",
+            "2": "Buscar Solo Logs Rotados y Core Dumps (sin leer ficheros)",
+            "0": "Volver al Menú Principal"
+        }
+        print_menu(options)
+
+        choice = get_user_input("Seleccione una opción")
+
+        if choice == '1':
+            find_reclaimable_space(duplicates=True)
+        elif choice == '2':
+            find_reclaimable_space(duplicates=False)
+        elif choice == '0':
+            break
+        else:
+            print_error("Opción inválida. Por favor, intente de nuevo.")
+        get_user_input("Presione Enter para continuar...")
+
+def run_find_reclaimable(path, min_size=RECLAIM_MIN_SIZE, workers=RECLAIM_WORKERS, log_age_days=RECLAIM_LOG_AGE_DAYS,
+                         core_age_days=RECLAIM_CORE_AGE_DAYS, one_filesystem=True, duplicates=True, use_cache=True):
+    """
+    Busca espacio recuperable bajo 'path' (ver utils.duplicate_finder): duplicados por hash en
+    etapas, logs rotados antiguos y core dumps. Los hashes se guardan en CACHE_DIR para reanudar.
+    Solo informa, no borra nada. Retorna (ReclaimReport, código).
+    """
+    try:
+        report = find_reclaimable(path, min_size, workers, one_filesystem, log_age_days, core_age_days,
+                                  CACHE_DIR if use_cache else None, duplicates)
+    except OSError as e:
+        log_action("DiskReclaim", "Find Reclaimable", f"Error al analizar '{path}': {e}")
+        return str(e), 1
+    totals = report.to_dict()["reclaimable"]
+    log_action("DiskReclaim", "Find Reclaimable",
+               f"Análisis de '{report.root}' ({report.stats['files']} ficheros, {report.stats['bytes_read']} bytes leídos, "
+               f"{report.stats['elapsed']:.2f} s): {len(report.duplicates)} grupos de duplicados ({totals['duplicates']} bytes), "
+               f"{len(report.rotated_logs)} logs rotados ({totals['rotated_logs']} bytes), "
+               f"{len(report.core_dumps)} core dumps ({totals['core_dumps']} bytes).")
+    return report, 0
+
+def find_reclaimable_space(duplicates=True):
+    print_header("Buscar Espacio Recuperable")
+    path = get_user_input("Directorio a analizar (ej. /srv)") or "/"
+    try:
+        log_age_days = float(get_user_input(f"Antigüedad mínima de los logs rotados en días (por defecto {RECLAIM_LOG_AGE_DAYS})")
+                             or RECLAIM_LOG_AGE_DAYS)
+        min_size = RECLAIM_MIN_SIZE
+        if duplicates:
+            min_size = int(get_user_input(f"Tamaño mínimo de los duplicados en bytes (por defecto {format_bytes(RECLAIM_MIN_SIZE)})")
+                           or RECLAIM_MIN_SIZE)
+    except ValueError as e:
+        print_error(f"Parámetro inválido: {e}")
+        return
+    print_info("Analizando... (Ctrl+C para interrumpir; los hashes calculados se guardan y el siguiente análisis continúa)")
+    try:
+        report, status = run_find_reclaimable(path, min_size, log_age_days=log_age_days, duplicates=duplicates)
+    except KeyboardInterrupt:
+        print_error("Análisis interrumpido.")
+        return
+    if status == 0:
+        print(format_reclaim_report(report, RECLAIM_TOP))
+        print_info("Solo se informa: no se ha borrado ningún fichero.")
+    else:
+        print_error(f"Error al analizar '{path}': {report}")
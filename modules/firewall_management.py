@@ -1,7 +1,13 @@
 from utils.display import clear_screen, print_menu, print_header, print_info, print_success, print_error, get_user_input
 from utils.system_info import get_os_type, execute_command
 from utils.logger import log_action
+from utils.executor import start_privileged_helper, default_executor, RecordingExecutor
+from utils.firewall_transaction import RulesetTransaction, FirewallTransactionError, is_read_only
+from utils.firewall_rules import get_rule_index, invalidate_rule_cache, format_rule_table
+from utils.firewall_analyzer import analyze_rules, format_findings
+from config import FIREWALL_BACKEND, FIREWALL_CHAINS, FIREWALL_SET_THRESHOLD
 import os
+import re
 
 def firewall_menu():
     while True:
@@ -15,7 +21,10 @@ def firewall_menu():
             "5": "Añadir Regla (Permitir Puerto) (Requiere Privilegios)",
             "6": "Eliminar Regla (Permitir Puerto) (Requiere Privilegios)",
             "7": "Mostrar Información de Regla por Nombre", # Nueva opción
+            "8": "Aplicar Lista de Puertos en Bloque (Transacción) (Solo Linux)",
             "9": "Generar Log de Firewall",
+            "10": "Buscar Reglas por Puerto/Protocolo (Solo Linux)",
+            "11": "Analizar Reglas Tapadas, Redundantes y Fusionables (Solo Linux)",
             "0": "Volver al Menú Principal"
         }
         print_menu(options)
@@ -36,127 +45,165 @@ def firewall_menu():
             delete_allow_port_rule()
         elif choice == '7': # Manejo de la nueva opción
             show_rule_by_name()
+        elif choice == '8':
+            if get_os_type() == 'linux':
+                apply_port_rules()
+            else:
+                print_error("Esta opción solo está disponible en Linux.")
         elif choice == '9':
             generate_firewall_log()
+        elif choice == '10':
+            if get_os_type() == 'linux':
+                find_rules_by_port()
+            else:
+                print_error("Esta opción solo está disponible en Linux.")
+        elif choice == '11':
+            if get_os_type() == 'linux':
+                analyze_firewall_rules()
+            else:
+                print_error("Esta opción solo está disponible en Linux.")
         elif choice == '0':
             break
         else:
             print_error("Opción inválida. Por favor, intente de nuevo.")
         get_user_input("Presione Enter para continuar...")
 
+def run_view_firewall_status():
+    """Obtiene el estado del firewall sin interacción. Retorna (salida, código)."""
+    if get_os_type() == 'windows':
+        output, status = execute_command("netsh advfirewall show allprofiles state")
+        # Se comprueba la salida además del código: es más robusto que solo confiar en el código de salida
+        if status == 0 and "State               ON" not in output and "State               OFF" not in output:
+            log_action("Firewall", "View Status", f"Comando exitoso pero salida inesperada: {output}")
+            return f"No se pudo determinar el estado del firewall de la salida: {output}", 1
+    else: # linux (ufw es común en Debian/Ubuntu, iptables en otros)
+        output, status = execute_command(["ufw", "status"], sudo=True)
+        if status != 0:
+            output, status = execute_command(["iptables", "-L", "-n", "-v"], sudo=True)
+    if status == 0:
+        log_action("Firewall", "View Status", "Estado del firewall listado exitosamente.")
+    else:
+        log_action("Firewall", "View Status", f"Error al ver estado del firewall (código: {status}): {output}")
+    return output, status
+
 def view_firewall_status():
     print_header("Ver Estado del Firewall")
-    os_type = get_os_type()
-    output = ""
-    status = 1 # Valor inicial de error
-
-    if os_type == 'windows':
-        command = "netsh advfirewall show allprofiles state"
-        print_info(f"Ejecutando en Windows: {command}") # Añadir para depuración
-        output, status = execute_command(command)
-        
-        # Depuración: Imprimir el status y output tal cual
-        print_info(f"DEBUG: Status de netsh advfirewall: {status}")
-        print_info(f"DEBUG: Salida de netsh advfirewall:\n{output}")
-
-        if status == 0:
-            # Comprobar si la salida contiene "State               ON" o "State               OFF"
-            # Esto es más robusto que solo confiar en el código de salida
-            if "State               ON" in output or "State               OFF" in output:
-                print_info("Estado del Firewall:")
-                print(output)
-                log_action("Firewall", "View Status", "Estado del firewall listado exitosamente.")
-            else:
-                print_error(f"El comando se ejecutó, pero no se pudo determinar el estado del firewall de la salida: {output}")
-                log_action("Firewall", "View Status", f"Comando exitoso pero salida inesperada: {output}")
-        else:
-            print_error(f"Error al ver estado del firewall (código: {status}): {output}")
-            log_action("Firewall", "View Status", f"Error al ver estado del firewall (código: {status}): {output}")
+    output, status = run_view_firewall_status()
+    if status == 0:
+        print_info("Estado del Firewall:")
+        print(output)
+    else:
+        print_error(f"Error al ver estado del firewall (código: {status}): {output}")
 
-    else: # linux (ufw es común en Debian/Ubuntu, iptables en otros)
-        command = "ufw status"
-        output, status = execute_command(command, sudo=True)
-        if status != 0:
-            print_info("UFW no encontrado o no activo. Intentando con iptables...")
-            command = "sudo iptables -L -n -v"
-            output, status = execute_command(command, sudo=True)
+def firewall_state_command(enabled):
+    """Comando que habilita o deshabilita el firewall."""
+    if get_os_type() == 'windows':
+        return f"netsh advfirewall set allprofiles state {'on' if enabled else 'off'}"
+    return ["ufw", "enable" if enabled else "disable"]
 
-        if status == 0:
-            print_info("Estado del Firewall:")
-            print(output)
-            log_action("Firewall", "View Status", "Estado del firewall listado exitosamente.")
-        else:
-            print_error(f"Error al ver estado del firewall: {output}")
-            log_action("Firewall", "View Status", f"Error al ver estado del firewall: {output}")
+def run_set_firewall_state(enabled):
+    """Habilita (enabled=True) o deshabilita el firewall sin interacción. Retorna (salida, código)."""
+    action = "Enable Firewall" if enabled else "Disable Firewall"
+    label = "habilitar" if enabled else "deshabilitar"
+    output, status = execute_command(firewall_state_command(enabled), sudo=True)
+    invalidate_rule_cache()
+    if status == 0:
+        log_action("Firewall", action, f"Firewall {label[:-1]}do.")
+    else:
+        log_action("Firewall", action, f"Error al {label} firewall: {output}")
+    return output, status
 
 def enable_firewall():
     print_header("Habilitar Firewall")
-    os_type = get_os_type()
-    if os_type == 'windows':
-        command = "netsh advfirewall set allprofiles state on"
-    else: # linux
-        command = "ufw enable"
+    if get_os_type() == 'linux':
         print_info("Si UFW no está instalado o en uso, esta operación puede fallar.")
         print_info("Considere 'sudo systemctl enable firewalld' y 'sudo systemctl start firewalld' para RHEL/CentOS, o 'sudo iptables -P INPUT ACCEPT' etc. para reglas directas.")
-    
-    print_info(f"Comando a ejecutar: {command}")
+    command = firewall_state_command(True)
+    print_info(f"Comando a ejecutar: {command if isinstance(command, str) else ' '.join(command)}")
     confirm = get_user_input("¿Está seguro que desea habilitar el firewall? Esto podría afectar la conectividad. (s/N)").lower()
     if confirm == 's':
-        output, status = execute_command(command, sudo=True)
+        output, status = run_set_firewall_state(True)
         if status == 0:
             print_success("Firewall habilitado exitosamente.")
-            log_action("Firewall", "Enable Firewall", "Firewall habilitado.")
         else:
             print_error(f"Error al habilitar firewall: {output}")
-            log_action("Firewall", "Enable Firewall", f"Error al habilitar firewall: {output}")
     else:
         print_info("Operación cancelada.")
         log_action("Firewall", "Enable Firewall", "Habilitación de firewall cancelada.")
 
 def disable_firewall():
     print_header("Deshabilitar Firewall")
-    os_type = get_os_type()
-    if os_type == 'windows':
-        command = "netsh advfirewall set allprofiles state off"
-    else: # linux
-        command = "ufw disable"
+    if get_os_type() == 'linux':
         print_info("Si UFW no está instalado o en uso, esta operación puede fallar.")
         print_info("Considere 'sudo systemctl stop firewalld' y 'sudo systemctl disable firewalld' para RHEL/CentOS, o 'sudo iptables -F' y 'sudo iptables -X' para limpiar reglas.")
-    
-    print_info(f"Comando a ejecutar: {command}")
+    command = firewall_state_command(False)
+    print_info(f"Comando a ejecutar: {command if isinstance(command, str) else ' '.join(command)}")
     confirm = get_user_input("¿Está seguro que desea deshabilitar el firewall? Esto podría dejar el sistema vulnerable. (s/N)").lower()
     if confirm == 's':
-        output, status = execute_command(command, sudo=True)
+        output, status = run_set_firewall_state(False)
         if status == 0:
             print_success("Firewall deshabilitado exitosamente.")
-            log_action("Firewall", "Disable Firewall", "Firewall deshabilitado.")
         else:
             print_error(f"Error al deshabilitar firewall: {output}")
-            log_action("Firewall", "Disable Firewall", f"Error al deshabilitar firewall: {output}")
     else:
         print_info("Operación cancelada.")
         log_action("Firewall", "Disable Firewall", "Deshabilitación de firewall cancelada.")
 
-def list_firewall_rules():
-    print_header("Listar Reglas del Firewall")
-    os_type = get_os_type()
-    if os_type == 'windows':
-        command = "netsh advfirewall firewall show rule name=all"
+def run_list_firewall_rules():
+    """Obtiene las reglas del firewall sin interacción. Retorna (salida, código)."""
+    if get_os_type() == 'windows':
+        output, status = execute_command("netsh advfirewall firewall show rule name=all")
     else: # linux
-        command = "ufw status verbose"
-        output, status = execute_command(command, sudo=True)
+        output, status = execute_command(["ufw", "status", "verbose"], sudo=True)
         if status != 0:
-            print_info("UFW no encontrado o no activo. Intentando con iptables...")
-            command = "sudo iptables -L -n -v"
-            output, status = execute_command(command, sudo=True)
-    
+            output, status = execute_command(["iptables", "-L", "-n", "-v"], sudo=True)
+    if status == 0:
+        log_action("Firewall", "List Rules", "Reglas del firewall listadas exitosamente.")
+    else:
+        log_action("Firewall", "List Rules", f"Error al listar reglas del firewall: {output}")
+    return output, status
+
+def list_firewall_rules():
+    print_header("Listar Reglas del Firewall")
+    if get_os_type() == 'linux':
+        try:
+            index, source = get_rule_index()
+        except RuntimeError as e:
+            print_error(f"Error al listar reglas del firewall: {e}")
+            log_action("Firewall", "List Rules", f"Error al listar reglas del firewall: {e}")
+            return
+        print_info(f"Reglas del Firewall ({source}, {len(index.rules)} reglas):")
+        print(format_rule_table(index.rules))
+        log_action("Firewall", "List Rules", f"{len(index.rules)} reglas de {source} listadas exitosamente.")
+        return
+    output, status = run_list_firewall_rules()
     if status == 0:
         print_info("Reglas del Firewall:")
         print(output)
-        log_action("Firewall", "List Rules", "Reglas del firewall listadas exitosamente.")
     else:
         print_error(f"Error al listar reglas del firewall: {output}")
-        log_action("Firewall", "List Rules", f"Error al listar reglas del firewall: {output}")
+
+def allow_port_rule_command(rule_name, port, protocol="any", direction="in"):
+    """Comando que añade una regla que permite el puerto. Retorna None si la dirección es inválida."""
+    if direction not in ('in', 'out'):
+        return None
+    if get_os_type() == 'windows':
+        return f'netsh advfirewall firewall add rule name="{rule_name}" dir={direction} action=allow protocol={protocol} localport={port}'
+    # Ejemplo iptables: sudo iptables -A INPUT -p tcp --dport 80 -j ACCEPT
+    return ["ufw", "allow"] + (["out"] if direction == 'out' else []) + [f"{port}/{protocol}"]
+
+def run_add_allow_port_rule(rule_name, port, protocol="any", direction="in"):
+    """Añade una regla que permite el puerto sin interacción. Retorna (salida, código)."""
+    command = allow_port_rule_command(rule_name, port, protocol, direction)
+    if command is None:
+        return "Dirección inválida. Use 'in' o 'out'.", 1
+    output, status = execute_command(command, sudo=True)
+    invalidate_rule_cache()
+    if status == 0:
+        log_action("Firewall", "Add Rule", f"Regla '{rule_name}' (permitir puerto {port}/{protocol}, {direction}) añadida.")
+    else:
+        log_action("Firewall", "Add Rule", f"Error al añadir regla '{rule_name}': {output}")
+    return output, status
 
 def add_allow_port_rule():
     print_header("Añadir Regla (Permitir Puerto)")
@@ -166,105 +213,263 @@ def add_allow_port_rule():
     protocol = get_user_input("Ingrese el protocolo (tcp/udp/any, dejar en blanco para 'any')").lower() or "any"
     direction = get_user_input("Ingrese la dirección (in/out, dejar en blanco para 'in')").lower() or "in"
 
-    os_type = get_os_type()
-    if os_type == 'windows':
-        command = f'netsh advfirewall firewall add rule name="{rule_name}" dir={direction} action=allow protocol={protocol} localport={port}'
-    else: # linux (ufw)
-        if direction == 'in':
-            command = f"ufw allow {port}/{protocol}"
-        elif direction == 'out':
-            command = f"ufw allow out {port}/{protocol}"
-        else:
-            print_error("Dirección inválida. Use 'in' o 'out'.")
-            return
+    command = allow_port_rule_command(rule_name, port, protocol, direction)
+    if command is None:
+        print_error("Dirección inválida. Use 'in' o 'out'.")
+        return
+    if get_os_type() == 'linux':
         print_info("Si UFW no está en uso, necesitará reglas de iptables.")
-        # Ejemplo iptables: sudo iptables -A INPUT -p tcp --dport 80 -j ACCEPT
     
-    print_info(f"Comando a ejecutar: {command}")
+    print_info(f"Comando a ejecutar: {command if isinstance(command, str) else ' '.join(command)}")
     confirm = get_user_input("¿Está seguro que desea añadir esta regla? (s/N)").lower()
     if confirm == 's':
-        output, status = execute_command(command, sudo=True)
+        output, status = run_add_allow_port_rule(rule_name, port, protocol, direction)
         if status == 0:
             print_success(f"Regla '{rule_name}' (permitir puerto {port}/{protocol}, {direction}) añadida exitosamente.")
-            log_action("Firewall", "Add Rule", f"Regla '{rule_name}' (permitir puerto {port}/{protocol}, {direction}) añadida.")
         else:
             print_error(f"Error al añadir regla: {output}")
-            log_action("Firewall", "Add Rule", f"Error al añadir regla '{rule_name}': {output}")
     else:
         print_info("Operación cancelada.")
         log_action("Firewall", "Add Rule", "Adición de regla cancelada.")
 
+def delete_allow_port_rule_command(rule_name, port=None, protocol="any"):
+    """Comando que elimina una regla: por nombre en Windows, por puerto/protocolo en UFW."""
+    if get_os_type() == 'windows':
+        return f'netsh advfirewall firewall delete rule name="{rule_name}"'
+    return ["ufw", "delete", "allow", f"{port}/{protocol}"]
+
+def run_delete_allow_port_rule(rule_name, port=None, protocol="any"):
+    """Elimina una regla sin interacción. En Linux se requiere 'port'. Retorna (salida, código)."""
+    if get_os_type() == 'linux' and not port:
+        return "En Linux (UFW) se requiere el puerto de la regla a eliminar.", 1
+    output, status = execute_command(delete_allow_port_rule_command(rule_name, port, protocol), sudo=True)
+    invalidate_rule_cache()
+    if status == 0:
+        log_action("Firewall", "Delete Rule", f"Regla '{rule_name}' eliminada.")
+    else:
+        log_action("Firewall", "Delete Rule", f"Error al eliminar regla '{rule_name}': {output}")
+    return output, status
+
 def delete_allow_port_rule():
     print_header("Eliminar Regla (Permitir Puerto)")
     print_info("Esta operación requiere privilegios de administrador/root.")
     rule_name = get_user_input("Ingrese el nombre de la regla a eliminar (ej. 'Permitir_SSH')")
     
-    os_type = get_os_type()
-    if os_type == 'windows':
-        command = f'netsh advfirewall firewall delete rule name="{rule_name}"'
-    else: # linux (ufw)
+    port, protocol = None, "any"
+    if get_os_type() == 'linux': # UFW
         # UFW no permite eliminar por nombre directo, hay que buscar la regla
         print_info("En Linux (UFW), la eliminación de reglas por nombre exacto no es directa. Se recomienda 'ufw status numbered' y eliminar por número.")
         print_info("Este script intentará eliminar una regla UFW basada en el nombre que se le dio al añadirla (menos fiable).")
         port = get_user_input("Ingrese el número de puerto de la regla a eliminar (ej. 22, 8080)")
         protocol = get_user_input("Ingrese el protocolo de la regla (tcp/udp/any, dejar en blanco para 'any')").lower() or "any"
-        command = f"ufw delete allow {port}/{protocol}"
+    command = delete_allow_port_rule_command(rule_name, port, protocol)
 
-    print_info(f"Comando a ejecutar: {command}")
+    print_info(f"Comando a ejecutar: {command if isinstance(command, str) else ' '.join(command)}")
     confirm = get_user_input("¿Está seguro que desea eliminar esta regla? (s/N)").lower()
     if confirm == 's':
-        output, status = execute_command(command, sudo=True)
+        output, status = run_delete_allow_port_rule(rule_name, port, protocol)
         if status == 0:
             print_success(f"Regla '{rule_name}' eliminada exitosamente.")
-            log_action("Firewall", "Delete Rule", f"Regla '{rule_name}' eliminada.")
         else:
             print_error(f"Error al eliminar regla: {output}")
-            log_action("Firewall", "Delete Rule", f"Error al eliminar regla '{rule_name}': {output}")
     else:
         print_info("Operación cancelada.")
         log_action("Firewall", "Delete Rule", "Eliminación de regla cancelada.")
 
+def build_port_transaction(ports, action="allow", protocol="tcp", direction="in", source=None, comment=None,
+                           backend=FIREWALL_BACKEND, executor=None):
+    """
+    Crea una RulesetTransaction con un cambio por puerto o rango de 'ports'.
+    'action' es 'allow', 'deny' o 'remove' (quita reglas 'allow'). Lanza FirewallTransactionError si algo es inválido.
+    """
+    transaction = RulesetTransaction(backend, executor=executor, chains=FIREWALL_CHAINS)
+    for port in ports:
+        if action == "remove":
+            transaction.remove(port, protocol, direction, source=source, comment=comment)
+        elif action in ("allow", "deny"):
+            getattr(transaction, action)(port, protocol, direction, source=source, comment=comment)
+        else:
+            raise FirewallTransactionError(f"Acción inválida: '{action}'. Use allow, deny o remove.")
+    return transaction
+
+def run_apply_port_rules(ports, action="allow", protocol="tcp", direction="in", source=None, comment=None,
+                         backend=FIREWALL_BACKEND, dry_run=False):
+    """
+    Aplica todos los puertos en una sola transacción atómica (iptables-restore / nft -f) con
+    instantánea previa y restauración si falla. En simulación solo se ejecutan las lecturas del
+    ruleset (instantánea y handles de nft); los cambios se registran sin aplicarse.
+    Retorna (resultado de commit(), código).
+    """
+    executor = RecordingExecutor(read_executor=default_executor, read_only=is_read_only) if dry_run else None
+    transaction = build_port_transaction(ports, action, protocol, direction, source, comment, backend,
+                                         executor=executor)
+    if not dry_run:
+        start_privileged_helper()
+    result = transaction.commit()
+    if not dry_run:
+        invalidate_rule_cache()
+    description = f"{action} {len(ports)} puerto(s) {protocol}/{direction} vía {backend}"
+    if dry_run:
+        log_action("Firewall", "Apply Rules", f"Simulación de transacción: {description}.")
+    elif result["status"] == 0:
+        log_action("Firewall", "Apply Rules", f"Transacción aplicada: {description}.")
+    else:
+        rollback = f" Instantánea restaurada (código {result['rollback_status']})." if result["rolled_back"] else ""
+        log_action("Firewall", "Apply Rules", f"Error en la transacción ({description}): {result['output'].strip()}.{rollback}")
+    return result, result["status"]
+
+def apply_port_rules():
+    print_header("Aplicar Lista de Puertos en Bloque")
+    print_info("Todos los cambios se aplican en una sola transacción atómica, con instantánea previa para restaurar si falla.")
+    ports = [p for p in re.split(r"[\s,]+", get_user_input("Puertos o rangos (ej. 22, 80, 443, 8000-8100)")) if p]
+    action = get_user_input("Acción (allow/deny/remove, dejar en blanco para 'allow')").lower() or "allow"
+    protocol = get_user_input("Protocolo (tcp/udp/any, dejar en blanco para 'tcp')").lower() or "tcp"
+    direction = get_user_input("Dirección (in/out, dejar en blanco para 'in')").lower() or "in"
+    source = get_user_input("Dirección o red remota (dejar en blanco para cualquiera)") or None
+    backend = get_user_input(f"Backend (iptables/ip6tables/nft, dejar en blanco para '{FIREWALL_BACKEND}')").lower() or FIREWALL_BACKEND
+    if not ports:
+        print_error("No se indicó ningún puerto.")
+        return
+    try:
+        preview, _ = run_apply_port_rules(ports, action, protocol, direction, source, None, backend, dry_run=True)
+    except FirewallTransactionError as e:
+        print_error(str(e))
+        return
+    if preview["status"] != 0:
+        print_error(f"No se pudo generar la transacción: {preview['output']}")
+        return
+    print_info("Payload a aplicar:")
+    print(preview["payload"])
+    confirm = get_user_input(f"¿Está seguro que desea aplicar {len(ports)} cambio(s) en una transacción? (s/N)").lower()
+    if confirm != 's':
+        print_info("Operación cancelada.")
+        log_action("Firewall", "Apply Rules", "Transacción de reglas cancelada.")
+        return
+    result, status = run_apply_port_rules(ports, action, protocol, direction, source, None, backend)
+    if status == 0:
+        print_success(f"Transacción aplicada: {result['changes']} cambio(s).")
+    else:
+        print_error(f"Error al aplicar la transacción: {result['output']}")
+        if result["rolled_back"]:
+            if result["rollback_status"] == 0:
+                print_info("Se restauró la instantánea previa del ruleset.")
+            else:
+                print_error("No se pudo restaurar la instantánea previa del ruleset.")
+
+def run_find_rules(name=None, port=None, protocol=None, chain=None, action=None, source="auto"):
+    """
+    Busca reglas en el índice de utils.firewall_rules (en caché hasta que cambie el ruleset).
+    Retorna (lista de FirewallRule en orden de evaluación, fuente).
+    """
+    index, source = get_rule_index(source)
+    rules = index.find(name=name, port=port, protocol=protocol, chain=chain, action=action)
+    log_action("Firewall", "Find Rules",
+               f"Búsqueda en {source} (nombre={name}, puerto={port}, protocolo={protocol}, cadena={chain}, acción={action}): "
+               f"{len(rules)} regla(s).")
+    return rules, source
+
 def show_rule_by_name():
     print_header("Mostrar Información de Regla por Nombre")
     rule_name = get_user_input("Ingrese el nombre de la regla a mostrar")
     
-    os_type = get_os_type()
-    if os_type == 'windows':
-        command = f'netsh advfirewall firewall show rule name="{rule_name}"'
-    else: # linux
-        # UFW no tiene un comando directo para "mostrar regla por nombre"
-        # La forma más directa es buscarla en la salida de 'ufw status verbose' o 'iptables -S'
-        print_info("En Linux (UFW/iptables), no hay un comando directo para mostrar una regla específica por nombre.")
-        print_info("Se listarán todas las reglas y se buscará la que coincida con el nombre, o se mostrarán todas las reglas detalladas.")
-        print_info("Considere revisar la salida de 'ufw status verbose' o 'sudo iptables -S' para buscar manualmente.")
-        # Como alternativa, podemos intentar listar todas las reglas detalladas y pedir al usuario que la busque.
-        command = "ufw status verbose"
-        output, status = execute_command(command, sudo=True)
-        if status != 0:
-            print_info("UFW no encontrado o no activo. Intentando con iptables...")
-            command = "sudo iptables -S" # Muestra las reglas de iptables en formato que se pueden volver a añadir
-            output, status = execute_command(command, sudo=True)
-    
-    output, status = execute_command(command, sudo=True) # Ejecutar el comando para Windows o el alternativo de Linux
-    
-    if status == 0:
-        if os_type == 'windows':
-            if f"Rule Name: {rule_name}" in output:
-                print_info(f"Información de la regla '{rule_name}':")
-                print(output)
-                log_action("Firewall", "Show Rule by Name", f"Información de la regla '{rule_name}' mostrada exitosamente.")
-            else:
-                print_error(f"No se encontró ninguna regla con el nombre '{rule_name}'.")
-                print(output) # Muestra la salida completa para ayudar a depurar si no se encontró
-                log_action("Firewall", "Show Rule by Name", f"No se encontró la regla '{rule_name}'.")
-        else: # Linux
-            print_info(f"Salida completa de las reglas del firewall (busque '{rule_name}' manualmente):")
+    if get_os_type() == 'windows':
+        output, status = execute_command(f'netsh advfirewall firewall show rule name="{rule_name}"', sudo=True)
+        if status == 0 and f"Rule Name: {rule_name}" in output:
+            print_info(f"Información de la regla '{rule_name}':")
             print(output)
-            log_action("Firewall", "Show Rule by Name", f"Reglas del firewall listadas para buscar '{rule_name}'.")
+            log_action("Firewall", "Show Rule by Name", f"Información de la regla '{rule_name}' mostrada exitosamente.")
+        elif status == 0:
+            print_error(f"No se encontró ninguna regla con el nombre '{rule_name}'.")
+            print(output) # Muestra la salida completa para ayudar a depurar si no se encontró
+            log_action("Firewall", "Show Rule by Name", f"No se encontró la regla '{rule_name}'.")
+        else:
+            print_error(f"Error al mostrar información de la regla: {output}")
+            log_action("Firewall", "Show Rule by Name", f"Error al mostrar información de la regla '{rule_name}': {output}")
+        return
+
+    # Linux: el nombre se busca en los comentarios de las reglas parseadas (ufw, nft o iptables)
+    try:
+        rules, source = run_find_rules(name=rule_name)
+    except RuntimeError as e:
+        print_error(f"Error al mostrar información de la regla: {e}")
+        log_action("Firewall", "Show Rule by Name", f"Error al mostrar información de la regla '{rule_name}': {e}")
+        return
+    if rules:
+        print_info(f"Reglas de {source} cuyo nombre/comentario contiene '{rule_name}':")
+        print(format_rule_table(rules))
+        for rule in rules:
+            print(f"  {rule.raw}")
     else:
-        print_error(f"Error al mostrar información de la regla: {output}")
-        log_action("Firewall", "Show Rule by Name", f"Error al mostrar información de la regla '{rule_name}': {output}")
+        print_error(f"No se encontró ninguna regla con el nombre '{rule_name}'.")
+
+def find_rules_by_port():
+    print_header("Buscar Reglas por Puerto/Protocolo")
+    try:
+        port = int(get_user_input("Puerto (ej. 8443)"))
+    except ValueError:
+        print_error("Puerto inválido.")
+        return
+    protocol = get_user_input("Protocolo (tcp/udp, dejar en blanco para cualquiera)").lower() or None
+    try:
+        rules, source = run_find_rules(port=port, protocol=protocol)
+    except RuntimeError as e:
+        print_error(str(e))
+        return
+    if not rules:
+        print_info(f"Ninguna regla de {source} aplica a {port}/{protocol or 'cualquiera'}: decide la política por defecto.")
+        return
+    # La primera regla con veredicto (sin condiciones de origen/interfaz) es la que decide
+    decisive = next((r for r in rules if r.action in ("allow", "deny", "reject", "limit")
+                     and not (r.source or r.interface or r.negated)), None)
+    print_info(f"{len(rules)} regla(s) de {source} aplican a {port}/{protocol or 'cualquiera'} (en orden de evaluación):")
+    print(format_rule_table(rules))
+    if decisive:
+        number = decisive.number if decisive.number is not None else decisive.position + 1
+        print_info(f"Decide la regla {number} de '{decisive.chain}': {decisive.action}.")
+
+def run_analyze_rules(source="auto", min_set_size=FIREWALL_SET_THRESHOLD):
+    """
+    Analiza el ruleset actual con utils.firewall_analyzer: reglas tapadas o redundantes (nunca
+    coinciden), rangos fusionables y grupos que caben en un set. Retorna (hallazgos, resumen, fuente).
+    """
+    index, source = get_rule_index(source)
+    findings, summary = analyze_rules(index.rules, min_set_size)
+    log_action("Firewall", "Analyze Rules",
+               f"Análisis de {summary['rules']} regla(s) de {source}: {summary['shadowed']} tapada(s), "
+               f"{summary['redundant']} redundante(s), {summary['mergeable'] + summary['port_set'] + summary['source_set']} "
+               f"consolidación(es); {summary['removable']} regla(s) eliminable(s).")
+    return findings, summary, source
+
+def analyze_firewall_rules():
+    print_header("Analizar Reglas del Firewall")
+    try:
+        findings, summary, source = run_analyze_rules()
+    except RuntimeError as e:
+        print_error(str(e))
+        return
+    if not findings:
+        print_success(f"Ninguna de las {summary['rules']} regla(s) de {source} está tapada, repetida o es consolidable.")
+        return
+    print(format_findings(findings))
+    print()
+    print_info(f"{summary['rules']} regla(s) de {source} en {summary['chains']} cadena(s): {summary['shadowed']} tapada(s), "
+               f"{summary['redundant']} redundante(s), {summary['mergeable']} fusionable(s), "
+               f"{summary['port_set'] + summary['source_set']} grupo(s) para set.")
+    print_info(f"Aplicando las sugerencias el ruleset tendría {summary['removable']} regla(s) menos. "
+               "Revise cada comando antes de ejecutarlo.")
+
 
+def get_report_collectors():
+    """Recolectores de solo lectura de este módulo para el informe completo del sistema."""
+    if get_os_type() == 'windows':
+        return [
+            {"title": "Estado del Firewall", "argv": ["netsh", "advfirewall", "show", "allprofiles", "state"]},
+            {"title": "Reglas del Firewall", "argv": ["netsh", "advfirewall", "firewall", "show", "rule", "name=all"]},
+        ]
+    return [
+        {"title": "Estado del Firewall (UFW)", "argv": ["ufw", "status", "verbose"], "sudo": True},
+        {"title": "Reglas del Firewall (iptables)", "argv": ["iptables", "-S"], "sudo": True},
+    ]
 
 def generate_firewall_log():
     print_header("Generar Log de Firewall")
@@ -1,7 +1,15 @@
 from utils.display import clear_screen, print_menu, print_header, print_info, print_success, print_error, get_user_input
 from utils.system_info import get_os_type, execute_command
 from utils.logger import log_action
+from utils.socket_table import summarize_sockets, list_sockets, format_socket_summary, format_socket_table, PROTOCOLS
+from utils.rtnetlink import get_network_state, RtnetlinkSocket, ALL_GROUPS, format_links, format_routes
+from utils.net_traffic import TrafficSampler, format_top, format_rate
+from utils.network_changeset import NetworkChangeset, NetworkChangesetError, load_network_changes, format_changeset_result
+from utils.executor import start_privileged_helper, RecordingExecutor
+from config import NET_TRAFFIC_INTERVAL, NET_TRAFFIC_HISTORY_SECONDS, NET_TRAFFIC_TOP
 import os
+import re
+import socket
 
 def network_menu():
     while True:
@@ -13,7 +21,12 @@ def network_menu():
             "3": "Habilitar/Deshabilitar Interfaz (Requiere Privilegios)",
             "4": "Ver Tablas de Enrutamiento",
             "5": "Ver Conexiones de Red",
+            "6": "Resumen de Conexiones por Estado, Puerto y Red (Solo Linux)",
+            "7": "Buscar Sockets por Estado, Puerto o Proceso (Solo Linux)",
+            "8": "Monitorizar Cambios de Interfaces, Direcciones y Rutas (Solo Linux)",
             "9": "Generar Log de Redes",
+            "10": "Tráfico por Interfaz: Más Ocupadas, Errores y Descartes (Solo Linux)",
+            "11": "Aplicar Cambios de Direcciones, Rutas y Enlaces en Bloque (Solo Linux)",
             "0": "Volver al Menú Principal"
         }
         print_menu(options)
@@ -30,30 +43,110 @@ def network_menu():
             view_routing_tables()
         elif choice == '5':
             view_network_connections()
+        elif choice == '6':
+            if get_os_type() == 'linux':
+                connection_summary()
+            else:
+                print_error("Esta opción solo está disponible en Linux.")
+        elif choice == '7':
+            if get_os_type() == 'linux':
+                search_sockets()
+            else:
+                print_error("Esta opción solo está disponible en Linux.")
+        elif choice == '8':
+            if get_os_type() == 'linux':
+                watch_network_changes()
+            else:
+                print_error("Esta opción solo está disponible en Linux.")
         elif choice == '9':
             generate_network_log()
+        elif choice == '10':
+            if get_os_type() == 'linux':
+                interface_traffic()
+            else:
+                print_error("Esta opción solo está disponible en Linux.")
+        elif choice == '11':
+            if get_os_type() == 'linux':
+                apply_network_changes()
+            else:
+                print_error("Esta opción solo está disponible en Linux.")
         elif choice == '0':
             break
         else:
             print_error("Opción inválida. Por favor, intente de nuevo.")
         get_user_input("Presione Enter para continuar...")
 
+def run_view_ip_config():
+    """Obtiene la configuración IP sin interacción. Retorna (salida, código)."""
+    if get_os_type() == 'windows':
+        output, status = execute_command("ipconfig /all")
+    else: # linux: directamente del kernel vía rtnetlink; 'ip a' solo si netlink no está disponible
+        try:
+            state = get_network_state()
+            output, status = format_links(state.links(), state.addresses()), 0
+        except OSError:
+            output, status = execute_command(["ip", "a"])
+    if status == 0:
+        log_action("Network", "View IP Config", "Configuración IP listada exitosamente.")
+    else:
+        log_action("Network", "View IP Config", f"Error al ver configuración IP: {output}")
+    return output, status
+
 def view_ip_config():
     print_header("Ver Configuración IP")
-    os_type = get_os_type()
-    if os_type == 'windows':
-        command = "ipconfig /all"
-    else: # linux
-        command = "ip a"
-    
-    output, status = execute_command(command)
+    output, status = run_view_ip_config()
     if status == 0:
         print_info("Configuración IP:")
         print(output)
-        log_action("Network", "View IP Config", "Configuración IP listada exitosamente.")
     else:
         print_error(f"Error al ver configuración IP: {output}")
-        log_action("Network", "View IP Config", f"Error al ver configuración IP: {output}")
+
+def static_ip_commands(interface_name, ip_address, subnet_mask, gateway=None):
+    """Comandos que aplican una IP estática (cadena en Windows, lista de argv en Linux)."""
+    if get_os_type() == 'windows':
+        # netsh requiere el nombre exacto de la interfaz y un orden específico
+        command = f'netsh interface ip set address name="{interface_name}" static {ip_address} {subnet_mask}'
+        if gateway:
+            command += f' {gateway} 1' # '1' es el métrica, puedes ajustarlo
+        return [command]
+    # Ejemplo con 'ip' command, puede requerir deshacer DHCP primero
+    commands = [["ip", "address", "add", f"{ip_address}/{subnet_mask}", "dev", interface_name]]
+    if gateway:
+        commands.append(["ip", "route", "add", "default", "via", gateway])
+    return commands
+
+def static_ip_changeset(interface_name, ip_address, subnet_mask, gateway=None):
+    """NetworkChangeset (Linux) con la dirección y la ruta por defecto. Lanza NetworkChangesetError si algo es inválido."""
+    changeset = NetworkChangeset()
+    changeset.add_address(interface_name, f"{ip_address}/{subnet_mask}")
+    if gateway:
+        changeset.add_route("default", gateway=gateway)
+    return changeset
+
+def run_configure_static_ip(interface_name, ip_address, subnet_mask, gateway=None):
+    """
+    Aplica una IP estática sin interacción. En Linux, dirección y ruta por defecto van en un solo
+    'ip -batch' y, si la ruta falla, se retira la dirección. Retorna (salida, código).
+    """
+    output, status = "", 0
+    if get_os_type() == 'linux':
+        try:
+            changeset = static_ip_changeset(interface_name, ip_address, subnet_mask, gateway)
+        except NetworkChangesetError as e:
+            output, status = str(e), 1
+        else:
+            result = changeset.commit()
+            output, status = format_changeset_result(result) if result["status"] else result["output"], result["status"]
+    else:
+        for command in static_ip_commands(interface_name, ip_address, subnet_mask, gateway):
+            output, status = execute_command(command, sudo=True)
+            if status != 0:
+                break
+    if status == 0:
+        log_action("Network", "Configure Static IP", f"IP estática {ip_address}/{subnet_mask} configurada en '{interface_name}'.")
+    else:
+        log_action("Network", "Configure Static IP", f"Error al configurar IP estática en '{interface_name}': {output}")
+    return output, status
 
 def configure_static_ip():
     print_header("Configurar IP Estática")
@@ -63,108 +156,376 @@ def configure_static_ip():
     subnet_mask = get_user_input("Ingrese la máscara de subred (ej. 255.255.255.0)")
     gateway = get_user_input("Ingrese la puerta de enlace (opcional, dejar en blanco si no aplica)")
 
-    os_type = get_os_type()
-    if os_type == 'windows':
-        # netsh requiere el nombre exacto de la interfaz y un orden específico
-        command = f'netsh interface ip set address name="{interface_name}" static {ip_address} {subnet_mask}'
-        if gateway:
-            command += f' {gateway} 1' # '1' es el métrica, puedes ajustarlo
-    else: # linux
+    if get_os_type() == 'linux':
         # Para Linux, los comandos varían mucho según la distribución y la configuración de red (systemd-networkd, NetworkManager, etc.)
         # Este es un ejemplo básico para interfaces 'ip' en sistemas basados en Debian/Ubuntu (ej. /etc/network/interfaces o directamente con 'ip a')
         print_error("La configuración de IP estática en Linux varía mucho.")
         print_error("Considere editar /etc/network/interfaces o usar nmtui/nmcli para NetworkManager.")
-        
-        # Ejemplo con 'ip' command, puede requerir deshacer DHCP primero
-        command = f"ip address add {ip_address}/{subnet_mask} dev {interface_name}"
-        if gateway:
-            command += f" && ip route add default via {gateway}"
 
-    print_info(f"Comando a ejecutar: {command}")
+    if get_os_type() == 'linux':
+        try:
+            payload = static_ip_changeset(interface_name, ip_address, subnet_mask, gateway).render()
+        except NetworkChangesetError as e:
+            print_error(str(e))
+            log_action("Network", "Configure Static IP", f"Error al configurar IP estática en '{interface_name}': {e}")
+            return
+        print_info("Comando a ejecutar: ip -batch - con:")
+        print(payload, end="")
+    else:
+        commands = static_ip_commands(interface_name, ip_address, subnet_mask, gateway)
+        print_info(f"Comando a ejecutar: {' && '.join(c if isinstance(c, str) else ' '.join(c) for c in commands)}")
     confirm = get_user_input("¿Está seguro que desea ejecutar este comando? (s/N)").lower()
     if confirm == 's':
-        output, status = execute_command(command, sudo=True)
+        output, status = run_configure_static_ip(interface_name, ip_address, subnet_mask, gateway)
         if status == 0:
             print_success(f"Configuración de IP estática aplicada a '{interface_name}'.")
-            log_action("Network", "Configure Static IP", f"IP estática {ip_address}/{subnet_mask} configurada en '{interface_name}'.")
         else:
             print_error(f"Error al configurar IP estática: {output}")
-            log_action("Network", "Configure Static IP", f"Error al configurar IP estática en '{interface_name}': {output}")
     else:
         print_info("Operación cancelada.")
         log_action("Network", "Configure Static IP", "Configuración de IP estática cancelada.")
 
+def interface_toggle_command(interface_name, action):
+    """Comando para 'habilitar' o 'deshabilitar' una interfaz. Retorna None si la acción es inválida."""
+    if action not in ('habilitar', 'deshabilitar'):
+        return None
+    if get_os_type() == 'windows':
+        admin = 'enable' if action == 'habilitar' else 'disable'
+        return f'netsh interface set interface name="{interface_name}" admin={admin}'
+    return ["ip", "link", "set", "dev", interface_name, "up" if action == 'habilitar' else "down"]
+
+def run_toggle_interface(interface_name, action):
+    """Habilita o deshabilita una interfaz sin interacción. Retorna (salida, código)."""
+    command = interface_toggle_command(interface_name, action)
+    if command is None:
+        return "Acción inválida. Use 'habilitar' o 'deshabilitar'.", 1
+    output, status = execute_command(command, sudo=True)
+    if status == 0:
+        log_action("Network", "Toggle Interface", f"Interfaz '{interface_name}' {action}da.")
+    else:
+        log_action("Network", "Toggle Interface", f"Error al {action} interfaz '{interface_name}': {output}")
+    return output, status
+
 def toggle_interface_status():
     print_header("Habilitar/Deshabilitar Interfaz")
     print_info("Esta operación requiere privilegios de administrador/root.")
     interface_name = get_user_input("Ingrese el nombre de la interfaz de red (ej. 'Ethernet', 'eth0')")
     action = get_user_input("¿Desea 'habilitar' o 'deshabilitar' la interfaz?").lower()
 
-    os_type = get_os_type()
-    if os_type == 'windows':
-        if action == 'habilitar':
-            command = f'netsh interface set interface name="{interface_name}" admin=enable'
-        elif action == 'deshabilitar':
-            command = f'netsh interface set interface name="{interface_name}" admin=disable'
-        else:
-            print_error("Acción inválida. Use 'habilitar' o 'deshabilitar'.")
-            return
-    else: # linux
-        if action == 'habilitar':
-            command = f"ip link set dev {interface_name} up"
-        elif action == 'deshabilitar':
-            command = f"ip link set dev {interface_name} down"
-        else:
-            print_error("Acción inválida. Use 'habilitar' o 'deshabilitar'.")
-            return
+    command = interface_toggle_command(interface_name, action)
+    if command is None:
+        print_error("Acción inválida. Use 'habilitar' o 'deshabilitar'.")
+        return
     
-    print_info(f"Comando a ejecutar: {command}")
+    print_info(f"Comando a ejecutar: {command if isinstance(command, str) else ' '.join(command)}")
     confirm = get_user_input("¿Está seguro que desea ejecutar este comando? (s/N)").lower()
     if confirm == 's':
-        output, status = execute_command(command, sudo=True)
+        output, status = run_toggle_interface(interface_name, action)
         if status == 0:
             print_success(f"Interfaz '{interface_name}' {action}da exitosamente.")
-            log_action("Network", "Toggle Interface", f"Interfaz '{interface_name}' {action}da.")
         else:
             print_error(f"Error al {action} la interfaz: {output}")
-            log_action("Network", "Toggle Interface", f"Error al {action} interfaz '{interface_name}': {output}")
     else:
         print_info("Operación cancelada.")
         log_action("Network", "Toggle Interface", f"Operación {action} interfaz cancelada.")
 
+def run_view_routing_tables():
+    """Obtiene las tablas de enrutamiento sin interacción. Retorna (salida, código)."""
+    if get_os_type() == 'windows':
+        output, status = execute_command("route print")
+    else: # linux: tabla main vía rtnetlink (equivale a 'ip r')
+        try:
+            output, status = format_routes(get_network_state().routes()), 0
+        except OSError:
+            output, status = execute_command(["ip", "r"])
+    if status == 0:
+        log_action("Network", "View Routing Tables", "Tablas de enrutamiento listadas exitosamente.")
+    else:
+        log_action("Network", "View Routing Tables", f"Error al ver tablas de enrutamiento: {output}")
+    return output, status
+
+FAMILY_NUMBERS = {"4": socket.AF_INET, "6": socket.AF_INET6}
+
+def run_list_interfaces(interface=None):
+    """
+    Interfaces con sus direcciones, leídas por rtnetlink (en caché hasta el siguiente cambio).
+    Retorna (lista de diccionarios, código).
+    """
+    try:
+        state = get_network_state()
+        links = state.links(interface)
+        addresses = state.addresses(interface)
+    except OSError as e:
+        log_action("Network", "List Interfaces", f"Error de netlink: {e}")
+        return str(e), 1
+    result = []
+    for link in links:
+        data = link.to_dict()
+        data["addresses"] = [a.to_dict() for a in addresses if a.index == link.index]
+        result.append(data)
+    log_action("Network", "List Interfaces", f"{len(result)} interfaz(es) listada(s) (filtro={interface}).")
+    return result, 0
+
+def run_list_routes(table="main", interface=None, family=None):
+    """
+    Rutas de una tabla ('main', 'local', número o 'all') filtradas por interfaz y familia ('4'/'6'),
+    leídas por rtnetlink. Retorna (lista de diccionarios, código).
+    """
+    try:
+        routes = get_network_state().routes(None if table == "all" else table, interface, FAMILY_NUMBERS.get(family))
+    except (OSError, ValueError) as e:
+        log_action("Network", "List Routes", f"Error al listar rutas: {e}")
+        return str(e), 1
+    log_action("Network", "List Routes", f"{len(routes)} ruta(s) (tabla={table}, interfaz={interface}, familia={family}).")
+    return [route.to_dict() for route in routes], 0
+
+def run_watch_network(seconds):
+    """Recoge durante 'seconds' los cambios de enlaces, direcciones y rutas. Retorna (lista de eventos, código)."""
+    events = []
+    try:
+        with RtnetlinkSocket(ALL_GROUPS) as monitor:
+            names = {link.index: link.name for link in get_network_state().links()}
+            for event, kind, item in monitor.events(timeout=seconds):
+                if kind == "link":
+                    names[item.index] = item.name
+                elif kind == "address":
+                    item.interface = names.get(item.index)
+                elif kind == "route":
+                    item.interface = names.get(item.oif)
+                events.append({"event": event, "type": kind, "data": item.to_dict() if item is not None else None})
+    except OSError as e:
+        log_action("Network", "Watch Changes", f"Error de netlink: {e}")
+        return str(e), 1
+    log_action("Network", "Watch Changes", f"{len(events)} cambio(s) de red en {seconds} s.")
+    return events, 0
+
+def watch_network_changes():
+    print_header("Monitorizar Cambios de Red")
+    try:
+        seconds = float(get_user_input("Segundos de monitorización (ej. 30)") or 30)
+    except ValueError:
+        print_error("Duración inválida.")
+        return
+    print_info(f"Esperando cambios durante {seconds:g} s (Ctrl+C para terminar antes)...")
+    count = 0
+    try:
+        with RtnetlinkSocket(ALL_GROUPS) as monitor:
+            names = {link.index: link.name for link in get_network_state().links()}
+            for event, kind, item in monitor.events(timeout=seconds):
+                count += 1
+                if kind is None:
+                    print_error("El kernel descartó notificaciones (buffer lleno): vuelva a consultar el estado.")
+                elif kind == "link":
+                    names[item.index] = item.name
+                    print(f"[{event}] enlace {item.name} state {item.operstate} <{','.join(item.flag_names())}>")
+                elif kind == "address":
+                    print(f"[{event}] dirección {item.address}/{item.prefixlen} dev {names.get(item.index, item.index)}")
+                else:
+                    item.interface = names.get(item.oif)
+                    print(f"[{event}] ruta {format_routes([item])}")
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print_error(f"Error de netlink: {e}")
+        return
+    log_action("Network", "Watch Changes", f"{count} cambio(s) de red observados.")
+    print_info(f"{count} cambio(s) observados.")
+
+def run_interface_traffic(duration=5.0, interval=NET_TRAFFIC_INTERVAL, top=NET_TRAFFIC_TOP, pattern=None, sort="total_bytes"):
+    """
+    Muestrea /proc/net/dev durante 'duration' segundos. Retorna ({'top': interfaces más ocupadas
+    en la última muestra, 'summary': min/max/media/p95 de esas interfaces}, código).
+    """
+    try:
+        sampler = TrafficSampler(interval, max(duration, NET_TRAFFIC_HISTORY_SECONDS), pattern)
+        sampler.run(duration=duration)
+    except (OSError, ValueError, re.error) as e:
+        log_action("Network", "Interface Traffic", f"Error al muestrear el tráfico: {e}")
+        return str(e), 1
+    busiest = sampler.top(top, sort)
+    log_action("Network", "Interface Traffic",
+               f"Tráfico de {len(sampler.buffers)} interfaz(es) durante {duration:g} s. Más ocupada: "
+               + (f"{busiest[0]['interface']} ({format_rate(busiest[0]['total_bytes'])})" if busiest else "ninguna"))
+    return {"top": busiest, "summary": sampler.summary(names=[entry["interface"] for entry in busiest])}, 0
+
+def interface_traffic():
+    print_header("Tráfico por Interfaz")
+    pattern = get_user_input("Filtro de interfaces (expresión regular, en blanco para todas)") or None
+    try:
+        duration = float(get_user_input("Segundos de muestreo (ej. 30)") or 30)
+        sampler = TrafficSampler(NET_TRAFFIC_INTERVAL, NET_TRAFFIC_HISTORY_SECONDS, pattern)
+    except (ValueError, re.error) as e:
+        print_error(f"Parámetro inválido: {e}")
+        return
+
+    def show(rates):
+        clear_screen()
+        print_header(f"Tráfico por Interfaz (top {NET_TRAFFIC_TOP} de {len(rates)}, cada {NET_TRAFFIC_INTERVAL:g} s, Ctrl+C para terminar)")
+        print(format_top(sampler.top(NET_TRAFFIC_TOP)))
+
+    try:
+        sampler.run(duration=duration, on_sample=show)
+    except KeyboardInterrupt:
+        pass
+    busiest = sampler.top(NET_TRAFFIC_TOP)
+    summary = sampler.summary()
+    print_info("Medias del periodo (interfaces más ocupadas en la última muestra):")
+    for entry in busiest:
+        stats = summary.get(entry["interface"], {})
+        rx, tx = stats.get("rx_bytes"), stats.get("tx_bytes")
+        if rx and tx:
+            print(f"  {entry['interface']:<18} RX media {format_rate(rx['avg'])}, pico {format_rate(rx['max'])} | "
+                  f"TX media {format_rate(tx['avg'])}, pico {format_rate(tx['max'])}")
+    log_action("Network", "Interface Traffic", f"Monitorización de tráfico de {len(sampler.buffers)} interfaz(es).")
+
 def view_routing_tables():
     print_header("Ver Tablas de Enrutamiento")
-    os_type = get_os_type()
-    if os_type == 'windows':
-        command = "route print"
-    else: # linux
-        command = "ip r" # o "route -n" para un formato más clásico
-    
-    output, status = execute_command(command)
+    output, status = run_view_routing_tables()
     if status == 0:
         print_info("Tablas de enrutamiento:")
         print(output)
-        log_action("Network", "View Routing Tables", "Tablas de enrutamiento listadas exitosamente.")
     else:
         print_error(f"Error al ver tablas de enrutamiento: {output}")
-        log_action("Network", "View Routing Tables", f"Error al ver tablas de enrutamiento: {output}")
+
+def run_view_network_connections():
+    """Obtiene las conexiones de red sin interacción. Retorna (salida, código)."""
+    if get_os_type() == 'windows':
+        output, status = execute_command("netstat -ano") # -a: todas las conexiones, -n: números, -o: PID
+    else: # linux
+        output, status = execute_command(["ss", "-tunap"]) # -t: tcp, -u: udp, -n: numérica, -a: todas, -p: proceso
+    if status == 0:
+        log_action("Network", "View Network Connections", "Conexiones de red listadas exitosamente.")
+    else:
+        log_action("Network", "View Network Connections", f"Error al ver conexiones de red: {output}")
+    return output, status
 
 def view_network_connections():
     print_header("Ver Conexiones de Red")
-    os_type = get_os_type()
-    if os_type == 'windows':
-        command = "netstat -ano" # -a: todas las conexiones, -n: números, -o: PID
-    else: # linux
-        command = "ss -tunap" # -t: tcp, -u: udp, -n: numérica, -a: todas, -p: proceso
-    
-    output, status = execute_command(command)
+    output, status = run_view_network_connections()
     if status == 0:
         print_info("Conexiones de red activas:")
         print(output)
-        log_action("Network", "View Network Connections", "Conexiones de red listadas exitosamente.")
     else:
         print_error(f"Error al ver conexiones de red: {output}")
-        log_action("Network", "View Network Connections", f"Error al ver conexiones de red: {output}")
+
+def run_connection_summary(states=None, top=10, with_process=False):
+    """
+    Resumen de sockets leído directamente de /proc/net (ver utils.socket_table), sin 'ss' y sin
+    generar el listado completo. Retorna (resumen, código).
+    """
+    try:
+        summary = summarize_sockets(PROTOCOLS, states, top, with_process)
+    except OSError as e:
+        log_action("Network", "Connection Summary", f"Error al leer /proc/net: {e}")
+        return str(e), 1
+    log_action("Network", "Connection Summary", f"Resumen de {summary['total']} socket(s) (estados={states}).")
+    return summary, 0
+
+def connection_summary():
+    print_header("Resumen de Conexiones")
+    with_process = get_user_input("¿Incluir procesos con más sockets? (s/n)").lower() == 's'
+    summary, status = run_connection_summary(with_process=with_process)
+    if status == 0:
+        print(format_socket_summary(summary))
+    else:
+        print_error(f"Error al leer las conexiones: {summary}")
+
+def run_search_sockets(states=None, port=None, process=None, protocols=PROTOCOLS, limit=None, with_process=False):
+    """Sockets filtrados por estado, puerto (local o remoto) y proceso. Retorna (lista de SocketRecord, código)."""
+    try:
+        records = list_sockets(protocols, states, port, process, with_process, limit)
+    except OSError as e:
+        log_action("Network", "Search Sockets", f"Error al leer /proc/net: {e}")
+        return str(e), 1
+    log_action("Network", "Search Sockets",
+               f"Búsqueda de sockets (estados={states}, puerto={port}, proceso={process}): {len(records)} resultado(s).")
+    return records, 0
+
+def search_sockets():
+    print_header("Buscar Sockets")
+    states = get_user_input("Estados separados por comas (ej. ESTAB,LISTEN; en blanco para todos)").replace(" ", "")
+    port = get_user_input("Puerto local o remoto (en blanco para cualquiera)")
+    process = get_user_input("Nombre o PID del proceso (en blanco para cualquiera)") or None
+    if port and not port.isdigit():
+        print_error("Puerto inválido.")
+        return
+    records, status = run_search_sockets(states.split(",") if states else None, int(port) if port else None,
+                                         process, limit=500, with_process=True)
+    if status != 0:
+        print_error(f"Error al leer las conexiones: {records}")
+    elif not records:
+        print_info("Ningún socket cumple los filtros.")
+    else:
+        print(format_socket_table(records))
+        if len(records) == 500:
+            print_info("Se muestran los primeros 500 sockets; afine los filtros para ver el resto.")
+
+def run_apply_network_changes(path, dry_run=False):
+    """
+    Aplica los cambios de red de un fichero JSON (ver utils.network_changeset) en un solo
+    'ip -batch', validados contra una instantánea previa y con vuelta atrás si algo falla.
+    En simulación se valida y se genera el payload sin ejecutar nada. Retorna (resultado de commit(), código).
+    """
+    try:
+        changeset = NetworkChangeset(executor=RecordingExecutor() if dry_run else None)
+        changeset.extend(load_network_changes(path))
+    except (OSError, ValueError, NetworkChangesetError) as e:
+        log_action("Network", "Apply Changes", f"Error al leer '{path}': {e}")
+        return f"Error al leer '{path}': {e}", 1
+    if not dry_run:
+        start_privileged_helper()
+    result = changeset.commit()
+    description = f"{result['changes']} cambio(s) de '{path}'"
+    if dry_run:
+        log_action("Network", "Apply Changes", f"Simulación de {description}: código {result['status']}.")
+    elif result["status"] == 0:
+        log_action("Network", "Apply Changes", f"Aplicados {description}.")
+    else:
+        rollback = f" Estado previo restaurado (código {result['rollback_status']})." if result["rolled_back"] else ""
+        log_action("Network", "Apply Changes", f"Error al aplicar {description}: {result['output'].strip()}.{rollback}")
+    return result, result["status"]
+
+def apply_network_changes():
+    print_header("Aplicar Cambios de Red en Bloque")
+    print_info("Fichero JSON con una lista de cambios, ej. [{\"op\": \"add_address\", \"interface\": \"eth0.10\", \"address\": \"10.10.0.1/24\"}].")
+    print_info("Operaciones: add_address, del_address, add_route, replace_route, del_route, set_link (state/mtu).")
+    path = get_user_input("Ruta del fichero de cambios")
+    preview, status = run_apply_network_changes(path, dry_run=True)
+    if isinstance(preview, str):
+        print_error(preview)
+        return
+    if status != 0:
+        print_error(f"Los cambios no son válidos: {preview['output']}")
+        return
+    print_info("Payload a aplicar con 'ip -batch':")
+    print(preview["payload"])
+    confirm = get_user_input(f"¿Está seguro que desea aplicar {preview['changes']} cambio(s)? (s/N)").lower()
+    if confirm != 's':
+        print_info("Operación cancelada.")
+        log_action("Network", "Apply Changes", "Aplicación de cambios de red cancelada.")
+        return
+    result, status = run_apply_network_changes(path)
+    if isinstance(result, str):
+        print_error(result)
+    elif status == 0:
+        print_success(f"Cambios aplicados: {result['changes']}.")
+    else:
+        print_error("Error al aplicar los cambios de red:")
+        print(format_changeset_result(result))
+
+def get_report_collectors():
+    """Recolectores de solo lectura de este módulo para el informe completo del sistema."""
+    if get_os_type() == 'windows':
+        return [
+            {"title": "Configuración IP", "argv": ["ipconfig", "/all"]},
+            {"title": "Tablas de Enrutamiento", "argv": ["route", "print"]},
+            {"title": "Conexiones de Red", "argv": ["netstat", "-ano"]},
+        ]
+    return [
+        {"title": "Configuración IP", "argv": ["ip", "a"]},
+        {"title": "Tablas de Enrutamiento", "argv": ["ip", "r"]},
+        {"title": "Conexiones de Red", "argv": ["ss", "-tunap"]},
+    ]
 
 def generate_network_log():
     print_header("Generar Log de Redes")
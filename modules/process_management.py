@@ -1,7 +1,16 @@
 from utils.display import clear_screen, print_menu, print_header, print_info, print_success, print_error, get_user_input
 from utils.system_info import get_os_type, execute_command
 from utils.logger import log_action
+from utils.process_table import read_process_table, filter_processes, sort_processes, top_processes, \
+                                format_process_table, ProcessSnapshot, SORT_KEYS
+from utils.process_signals import resolve_targets, signal_processes, summarize_results
 import os
+import re
+import signal
+import time
+
+# Instantánea compartida entre listados: los refrescos sucesivos solo releen lo que cambia
+_process_snapshot = None
 
 def process_menu():
     while True:
@@ -11,6 +20,9 @@ def process_menu():
             "1": "Listar Procesos",
             "2": "Terminar Proceso por PID",
             "3": "Terminar Proceso por Nombre (Requiere PID en Windows)",
+            "4": "Buscar y Filtrar Procesos (Solo Linux)",
+            "5": "Vigilar Procesos (Refresco Incremental) (Solo Linux)",
+            "6": "Terminar Procesos en Bloque (Solo Linux)",
             "9": "Generar Log de Procesos",
             "0": "Volver al Menú Principal"
         }
@@ -24,6 +36,21 @@ def process_menu():
             terminate_process_by_pid()
         elif choice == '3':
             terminate_process_by_name()
+        elif choice == '4':
+            if get_os_type() == 'linux':
+                search_processes()
+            else:
+                print_error("Esta opción solo está disponible en Linux.")
+        elif choice == '5':
+            if get_os_type() == 'linux':
+                watch_processes()
+            else:
+                print_error("Esta opción solo está disponible en Linux.")
+        elif choice == '6':
+            if get_os_type() == 'linux':
+                terminate_processes_bulk()
+            else:
+                print_error("Esta opción solo está disponible en Linux.")
         elif choice == '9':
             generate_process_log()
         elif choice == '0':
@@ -35,11 +62,27 @@ def process_menu():
 def list_processes():
     print_header("Listar Procesos")
     os_type = get_os_type()
-    if os_type == 'windows':
-        command = "tasklist /v /fo list" # /v: verbose, /fo list: list format
-    else: # linux
-        command = "ps aux"
-    
+    if os_type == 'linux':
+        # Tabla de procesos leída directamente de /proc en lugar de 'ps aux'
+        global _process_snapshot
+        first_listing = _process_snapshot is None
+        if first_listing:
+            _process_snapshot = ProcessSnapshot()
+        try:
+            diff = _process_snapshot.refresh()
+        except OSError as e:
+            print_error(f"Error al listar procesos: {e}")
+            log_action("Process", "List Processes", f"Error al listar procesos: {e}")
+            return
+        records = sort_processes(_process_snapshot.processes(), "pid")
+        print_info(f"Procesos del sistema ({len(records)}):")
+        print(format_process_table(records))
+        if not first_listing:
+            print_process_diff(diff)
+        log_action("Process", "List Processes", f"{len(records)} procesos listados exitosamente.")
+        return
+
+    command = "tasklist /v /fo list" # /v: verbose, /fo list: list format
     output, status = execute_command(command)
     if status == 0:
         print_info("Procesos del sistema:")
@@ -49,16 +92,150 @@ def list_processes():
         print_error(f"Error al listar procesos: {output}")
         log_action("Process", "List Processes", f"Error al listar procesos: {output}")
 
+def search_processes():
+    print_header("Buscar y Filtrar Procesos")
+    user = get_user_input("Filtrar por usuario (dejar en blanco para todos)") or None
+    name_regex = get_user_input("Expresión regular sobre nombre/comando (dejar en blanco para todos)") or None
+    state = get_user_input("Estados a incluir, ej. 'R', 'DZ' (dejar en blanco para todos)").upper() or None
+    try:
+        min_rss_mb = float(get_user_input("RSS mínimo en MB (dejar en blanco para 0)") or 0)
+        min_cpu = float(get_user_input("%CPU mínimo (dejar en blanco para 0)") or 0)
+        limit = int(get_user_input("Número máximo de resultados (dejar en blanco para 20)") or 20)
+    except ValueError:
+        print_error("Valor numérico inválido.")
+        return
+    sort_key = get_user_input(f"Ordenar por ({', '.join(SORT_KEYS)}; dejar en blanco para cpu_percent)") or "cpu_percent"
+    if sort_key not in SORT_KEYS:
+        print_error(f"Campo de ordenación inválido: '{sort_key}'.")
+        return
+
+    try:
+        matches = filter_processes(read_process_table(), user=user, name_regex=name_regex, state=state,
+                                   min_rss=int(min_rss_mb * 1024 * 1024) or None, min_cpu=min_cpu or None)
+        # Con nombres/usuarios se ordena ascendente; con métricas interesan los mayores primero
+        if sort_key in ("pid", "ppid", "name", "user", "state"):
+            results = sort_processes(matches, sort_key)[:limit]
+        else:
+            results = top_processes(matches, limit, sort_key)
+    except re.error as e:
+        print_error(f"Expresión regular inválida '{name_regex}': {e}")
+        return
+    except (OSError, ValueError) as e:
+        print_error(f"Error al buscar procesos: {e}")
+        log_action("Process", "Search Processes", f"Error al buscar procesos: {e}")
+        return
+
+    if results:
+        print_info(f"{len(results)} proceso(s) encontrados:")
+        print(format_process_table(results))
+    else:
+        print_info("No se encontraron procesos con esos criterios.")
+    log_action("Process", "Search Processes",
+               f"Búsqueda (usuario={user}, regex={name_regex}, estado={state}, orden={sort_key}): {len(results)} resultado(s).")
+
+def print_process_diff(diff, limit=20):
+    """Imprime los procesos iniciados, terminados y modificados desde el refresco anterior."""
+    print_info(f"Cambios desde el refresco anterior: {len(diff['started'])} iniciados, "
+               f"{len(diff['exited'])} terminados, {len(diff['changed'])} modificados.")
+    for label, sign in (("started", "+"), ("exited", "-"), ("changed", "~")):
+        records = diff[label]
+        for record in records[:limit]:
+            command = " ".join(record.cmdline.split())[:60]
+            print(f"  {sign} {record.pid:>8} {record.user[:11]:<12}{record.state:<2}{record.rss // 1024:>9}K  {command}")
+        if len(records) > limit:
+            print(f"  {sign} ... y {len(records) - limit} más")
+
+def watch_processes():
+    print_header("Vigilar Procesos")
+    try:
+        interval = float(get_user_input("Intervalo de refresco en segundos (dejar en blanco para 1)") or 1)
+        top = int(get_user_input("Procesos a mostrar por uso de CPU (dejar en blanco para 10)") or 10)
+    except ValueError:
+        print_error("Valor numérico inválido.")
+        return
+    if interval <= 0:
+        print_error("El intervalo de refresco debe ser mayor que 0.")
+        return
+
+    snapshot = ProcessSnapshot()
+    refreshes = 0
+    try:
+        snapshot.refresh()
+        print_info(f"Refrescando cada {interval:g} s. Pulse Ctrl+C para detener.")
+        while True:
+            time.sleep(interval)
+            started_at = time.monotonic()
+            diff = snapshot.refresh()
+            cost_ms = (time.monotonic() - started_at) * 1000
+            refreshes += 1
+            print_header(f"{time.strftime('%H:%M:%S')} - {len(snapshot.records)} procesos (refresco en {cost_ms:.0f} ms)")
+            print(format_process_table(top_processes(snapshot.processes(), top, "cpu_percent")))
+            print_process_diff(diff)
+    except KeyboardInterrupt:
+        print_info("Vigilancia detenida por el usuario.")
+    except OSError as e:
+        print_error(f"Error al leer la tabla de procesos: {e}")
+        log_action("Process", "Watch Processes", f"Error al leer la tabla de procesos: {e}")
+        return
+    log_action("Process", "Watch Processes", f"Vigilancia de procesos finalizada tras {refreshes} refresco(s).")
+
+# Resultados del motor de señales traducidos para mostrar al usuario
+OUTCOME_LABELS = {
+    "terminated": "terminado",
+    "killed": "terminado con SIGKILL",
+    "survived": "sigue en ejecución",
+    "not_found": "no encontrado",
+    "permission_denied": "permiso denegado",
+}
+
+def parse_pid_list(text):
+    """Convierte una lista de PIDs separados por espacios o comas en una lista de enteros."""
+    return [int(pid) for pid in re.split(r"[\s,]+", text.strip()) if pid]
+
+def signal_and_report(targets, action, description, sig=signal.SIGTERM, grace=5.0, escalate=True):
+    """
+    Envía la señal a los objetivos con utils.process_signals, espera a que terminen
+    (escalando a SIGKILL si procede), imprime el resultado por PID y lo registra.
+    """
+    results = signal_processes(targets, sig=sig, grace=grace, escalate=escalate)
+    for pid, outcome in sorted(results.items()):
+        print(f"  PID {pid:>8}: {OUTCOME_LABELS.get(outcome, outcome)}")
+    summary = summarize_results(results)
+    summary_text = ", ".join(f"{OUTCOME_LABELS.get(k, k)}: {v}" for k, v in summary.items())
+    failed = summary.get("survived", 0) + summary.get("permission_denied", 0) + summary.get("not_found", 0)
+    if failed:
+        print_error(f"No se pudieron terminar todos los procesos ({summary_text}).")
+        if summary.get("permission_denied"):
+            print_info("Ejecute el script como root para señalizar procesos de otros usuarios.")
+    else:
+        print_success(f"Proceso(s) {description} terminado(s) exitosamente ({summary_text}).")
+    log_action("Process", action, f"Señal {signal.Signals(sig).name} a {description}: {summary_text}.")
+    return results
+
 def terminate_process_by_pid():
     print_header("Terminar Proceso por PID")
-    pid = get_user_input("Ingrese el PID del proceso a terminar")
-    
     os_type = get_os_type()
-    if os_type == 'windows':
-        command = f"taskkill /PID {pid} /F" # /F: force
-    else: # linux
-        command = f"kill {pid}" # -9 para forzar
-    
+    if os_type == 'linux':
+        pid_text = get_user_input("Ingrese el PID o PIDs (separados por espacios o comas) a terminar")
+        try:
+            pids = parse_pid_list(pid_text)
+        except ValueError:
+            print_error(f"PID inválido: '{pid_text}'.")
+            return
+        if not pids:
+            print_error("No se indicó ningún PID.")
+            return
+        print_info("Se enviará SIGTERM y, si no terminan en 5 segundos, SIGKILL.")
+        confirm = get_user_input(f"¿Está seguro que desea terminar el/los proceso(s) con PID {', '.join(map(str, pids))}? (s/N)").lower()
+        if confirm == 's':
+            signal_and_report(resolve_targets(pids=pids), "Terminate by PID", f"con PID {', '.join(map(str, pids))}")
+        else:
+            print_info("Operación cancelada.")
+            log_action("Process", "Terminate by PID", f"Terminación de proceso PID {pid_text} cancelada.")
+        return
+
+    pid = get_user_input("Ingrese el PID del proceso a terminar")
+    command = f"taskkill /PID {pid} /F" # /F: force
     print_info(f"Comando a ejecutar: {command}")
     confirm = get_user_input(f"¿Está seguro que desea terminar el proceso con PID {pid}? (s/N)").lower()
     if confirm == 's':
@@ -78,13 +255,30 @@ def terminate_process_by_name():
     process_name = get_user_input("Ingrese el nombre del proceso a terminar (ej. 'chrome.exe', 'apache2')")
     
     os_type = get_os_type()
-    if os_type == 'windows':
-        command = f'taskkill /IM "{process_name}" /F'
-        print_info(f"Nota: En Windows, para procesos con múltiples instancias o si no se termina, puede que necesites el PID específico.")
-    else: # linux
-        command = f"pkill {process_name}" # pkill es más robusto para nombres
-        print_info(f"Nota: En Linux, 'pkill' terminará todos los procesos con ese nombre.")
-    
+    if os_type == 'linux':
+        # Igual que 'pkill': expresión regular sobre el nombre del proceso
+        print_info("Nota: En Linux se terminarán todos los procesos cuyo nombre coincida (expresión regular, como 'pkill').")
+        try:
+            targets = resolve_targets(name_regex=process_name)
+        except (OSError, re.error) as e:
+            print_error(f"Error al buscar procesos '{process_name}': {e}")
+            log_action("Process", "Terminate by Name", f"Error al buscar procesos '{process_name}': {e}")
+            return
+        if not targets:
+            print_error(f"No se encontró ningún proceso con el nombre '{process_name}'.")
+            log_action("Process", "Terminate by Name", f"No se encontraron procesos '{process_name}'.")
+            return
+        print_info(f"PIDs encontrados: {', '.join(str(pid) for pid, _ in targets)}")
+        confirm = get_user_input(f"¿Está seguro que desea terminar el proceso(s) '{process_name}'? (s/N)").lower()
+        if confirm == 's':
+            signal_and_report(targets, "Terminate by Name", f"'{process_name}'")
+        else:
+            print_info("Operación cancelada.")
+            log_action("Process", "Terminate by Name", f"Terminación de proceso '{process_name}' cancelada.")
+        return
+
+    command = f'taskkill /IM "{process_name}" /F'
+    print_info(f"Nota: En Windows, para procesos con múltiples instancias o si no se termina, puede que necesites el PID específico.")
     print_info(f"Comando a ejecutar: {command}")
     confirm = get_user_input(f"¿Está seguro que desea terminar el proceso(s) '{process_name}'? (s/N)").lower()
     if confirm == 's':
@@ -99,6 +293,48 @@ def terminate_process_by_name():
         print_info("Operación cancelada.")
         log_action("Process", "Terminate by Name", f"Terminación de proceso '{process_name}' cancelada.")
 
+def terminate_processes_bulk():
+    print_header("Terminar Procesos en Bloque")
+    pid_text = get_user_input("PIDs separados por espacios o comas (dejar en blanco para ninguno)")
+    name_regex = get_user_input("Expresión regular sobre nombre/comando (dejar en blanco para ninguno)") or None
+    user = get_user_input("Usuario propietario (dejar en blanco para ninguno)") or None
+    signal_name = (get_user_input("Señal inicial (dejar en blanco para TERM)") or "TERM").upper()
+    try:
+        pids = parse_pid_list(pid_text)
+        sig = signal.Signals[signal_name if signal_name.startswith("SIG") else f"SIG{signal_name}"]
+        grace = float(get_user_input("Periodo de gracia en segundos (dejar en blanco para 5)") or 5)
+    except (ValueError, KeyError) as e:
+        print_error(f"Valor inválido: {e}")
+        return
+    escalate = get_user_input("¿Escalar a SIGKILL los que sigan vivos? (S/n)").lower() != 'n'
+    if not (pids or name_regex or user):
+        print_error("Debe indicar al menos PIDs, un nombre o un usuario.")
+        return
+
+    try:
+        targets = resolve_targets(pids=pids, name_regex=name_regex, user=user, match_cmdline=True)
+    except (OSError, re.error) as e:
+        print_error(f"Error al resolver los procesos objetivo: {e}")
+        log_action("Process", "Terminate Bulk", f"Error al resolver los procesos objetivo: {e}")
+        return
+    if not targets:
+        print_error("Ningún proceso coincide con los criterios indicados.")
+        return
+    description = f"(pids={pid_text or '-'}, nombre={name_regex or '-'}, usuario={user or '-'})"
+    print_info(f"{len(targets)} proceso(s) seleccionados {description}.")
+    confirm = get_user_input(f"¿Está seguro que desea enviar {sig.name} a {len(targets)} proceso(s)? (s/N)").lower()
+    if confirm == 's':
+        signal_and_report(targets, "Terminate Bulk", description, sig=sig, grace=grace, escalate=escalate)
+    else:
+        print_info("Operación cancelada.")
+        log_action("Process", "Terminate Bulk", f"Terminación en bloque {description} cancelada.")
+
+def get_report_collectors():
+    """Recolectores de solo lectura de este módulo para el informe completo del sistema."""
+    if get_os_type() == 'windows':
+        return [{"title": "Procesos Activos", "argv": ["tasklist", "/v", "/fo", "list"]}]
+    return [{"title": "Procesos Activos", "func": lambda: format_process_table(sort_processes(read_process_table(), "pid"))}]
+
 def generate_process_log():
     print_header("Generar Log de Procesos")
     log_action("Process", "Generate Log", "Generando log de gestión de procesos.")
@@ -1,6 +1,12 @@
-from utils.display import clear_screen, print_menu, print_header, print_info, print_success, print_error, get_user_input
+from utils.display import clear_screen, print_menu, print_header, print_info, print_success, print_error, get_user_input, format_bytes
 from utils.system_info import get_os_type, execute_command
 from utils.logger import log_action
+from utils.proc_sampler import sample_cpu_memory
+from utils.resource_monitor import ResourceMonitor
+from utils.process_table import read_process_table, top_processes, format_process_table
+from utils.mount_table import mount_usage, format_mount_usage
+from config import MONITOR_INTERVAL, MONITOR_HISTORY_SECONDS, MONITOR_MOUNTPOINTS, DISK_STATVFS_TIMEOUT, DISK_STATVFS_WORKERS, \
+                   DASHBOARD_INTERVAL, DASHBOARD_MOUNT_REFRESH, DASHBOARD_PANE_ROWS
 import os
 import time
 
@@ -12,6 +18,8 @@ def resource_monitoring_menu():
             "1": "Ver Uso de CPU y Memoria",
             "2": "Ver Uso de Disco",
             "3": "Ver Procesos Más Consumidores (Solo Linux)", # top en Windows no es tan directo
+            "4": "Monitorización Continua (Solo Linux)",
+            "5": "Panel en Vivo: CPU, Memoria, Disco, Red y Procesos (Solo Linux)",
             "9": "Generar Log de Monitorización",
             "0": "Volver al Menú Principal"
         }
@@ -28,6 +36,16 @@ def resource_monitoring_menu():
                 view_top_processes_linux()
             else:
                 print_error("Esta opción solo está disponible en Linux.")
+        elif choice == '4':
+            if get_os_type() == 'linux':
+                continuous_monitoring()
+            else:
+                print_error("Esta opción solo está disponible en Linux.")
+        elif choice == '5':
+            if get_os_type() == 'linux':
+                live_dashboard()
+            else:
+                print_error("Esta opción solo está disponible en Linux.")
         elif choice == '9':
             generate_monitoring_log()
         elif choice == '0':
@@ -84,25 +102,52 @@ def view_cpu_memory_usage():
         log_action("ResourceMonitoring", "View CPU/Memory Usage", "Uso de CPU y memoria listado (Windows).")
 
     else: # linux
-        print_info("Uso de CPU y Memoria (top -bn1):")
-        command = "top -bn1 | head -n 5" # Muestra resumen de CPU y memoria
-        output, status = execute_command(command)
-        if status == 0:
-            print(output)
-            log_action("ResourceMonitoring", "View CPU/Memory Usage", "Uso de CPU y memoria listado (Linux).")
-        else:
-            print_error(f"Error al obtener uso de CPU/Memoria: {output}")
-            log_action("ResourceMonitoring", "View CPU/Memory Usage", f"Error al obtener uso de CPU/Memoria: {output}")
+        # Lectura directa de /proc: evita lanzar una shell y 'top' en cada consulta
+        try:
+            sample = sample_cpu_memory()
+        except (OSError, ValueError) as e:
+            print_error(f"Error al obtener uso de CPU/Memoria: {e}")
+            log_action("ResourceMonitoring", "View CPU/Memory Usage", f"Error al obtener uso de CPU/Memoria: {e}")
+            return
+        print_cpu_memory_sample(sample)
+        log_action("ResourceMonitoring", "View CPU/Memory Usage",
+                   f"Uso de CPU y memoria listado (Linux). CPU: {sample['cpu_total']['usage']:.1f}%, "
+                   f"Memoria: {sample['memory']['percent']:.1f}%, Carga: {sample['load']['load1']:.2f}.")
+
+def format_cpu_memory_sample(sample):
+    """Genera el texto legible de una muestra de utils.proc_sampler."""
+    cpu = sample['cpu_total']
+    mem = sample['memory']
+    load = sample['load']
+    lines = ["Uso de CPU:",
+             f"  Total: {cpu['usage']:5.1f}%  (usuario {cpu['user']:.1f}%, sistema {cpu['system']:.1f}%, "
+             f"iowait {cpu['iowait']:.1f}%, steal {cpu['steal']:.1f}%)"]
+    for core in sample['cpu_cores']:
+        lines.append(f"  CPU{core['id']:<3} {core['usage']:5.1f}%")
+    lines += ["Uso de Memoria:",
+              f"  Memoria Total: {format_bytes(mem['total'])}",
+              f"  Memoria Usada: {format_bytes(mem['used'])} ({mem['percent']:.1f}%)",
+              f"  Memoria Disponible: {format_bytes(mem['available'])}",
+              f"  Swap: {format_bytes(mem['swap_used'])} / {format_bytes(mem['swap_total'])} ({mem['swap_percent']:.1f}%)",
+              "Carga del Sistema:",
+              f"  1 min: {load['load1']:.2f}  5 min: {load['load5']:.2f}  15 min: {load['load15']:.2f}  "
+              f"Tareas: {load['running']}/{load['total_tasks']}"]
+    return "\n".join(lines)
+
+def print_cpu_memory_sample(sample):
+    """Imprime una muestra de utils.proc_sampler en formato legible."""
+    print()
+    print(format_cpu_memory_sample(sample))
 
 def view_disk_usage():
     print_header("Uso de Disco")
-    os_type = get_os_type()
-    if os_type == 'windows':
-        command = "wmic logicaldisk get Caption,Size,FreeSpace /value"
-    else: # linux
-        command = "df -h"
-    
-    output, status = execute_command(command)
+    if get_os_type() == 'windows':
+        output, status = execute_command("wmic logicaldisk get Caption,Size,FreeSpace /value")
+    else: # linux: statvfs concurrente con timeout por montaje en lugar de 'df -h'
+        try:
+            output, status = format_mount_usage(mount_usage(timeout=DISK_STATVFS_TIMEOUT, workers=DISK_STATVFS_WORKERS)), 0
+        except OSError as e:
+            output, status = str(e), 1
     if status == 0:
         print_info("Uso de Disco:")
         print(output)
@@ -114,14 +159,86 @@ def view_disk_usage():
 def view_top_processes_linux():
     print_header("Procesos Más Consumidores (Linux)")
     print_info("Los 10 procesos con mayor uso de CPU y Memoria:")
-    command = "ps aux --sort=-%cpu,-%mem | head -n 11" # Top 10 procesos + encabezado
-    output, status = execute_command(command)
-    if status == 0:
-        print(output)
-        log_action("ResourceMonitoring", "View Top Processes", "Procesos más consumidores listados (Linux).")
-    else:
-        print_error(f"Error al obtener procesos: {output}")
-        log_action("ResourceMonitoring", "View Top Processes", f"Error al obtener procesos: {output}")
+    try:
+        records = read_process_table()
+    except OSError as e:
+        print_error(f"Error al obtener procesos: {e}")
+        log_action("ResourceMonitoring", "View Top Processes", f"Error al obtener procesos: {e}")
+        return
+    # Selección con heap: no hace falta ordenar toda la tabla para quedarse con 10
+    print_info("Por uso de CPU:")
+    print(format_process_table(top_processes(records, 10, "cpu_percent")))
+    print_info("Por uso de Memoria:")
+    print(format_process_table(top_processes(records, 10, "rss")))
+    log_action("ResourceMonitoring", "View Top Processes", "Procesos más consumidores listados (Linux).")
+
+def continuous_monitoring():
+    print_header("Monitorización Continua")
+    try:
+        interval = float(get_user_input(f"Intervalo de muestreo en segundos (dejar en blanco para {MONITOR_INTERVAL})") or MONITOR_INTERVAL)
+        duration = float(get_user_input("Duración en segundos (dejar en blanco para continuar hasta Ctrl+C)") or 0)
+        window = float(get_user_input("Minutos a resumir al finalizar (dejar en blanco para todo el historial)") or 0)
+        monitor = ResourceMonitor(interval, MONITOR_HISTORY_SECONDS, MONITOR_MOUNTPOINTS)
+    except ValueError as e:
+        print_error(f"Valor inválido: {e}")
+        return
+
+    disk_metrics = [f"disk:{m}" for m in MONITOR_MOUNTPOINTS]
+    print_info(f"Muestreando cada {interval:g} s. Pulse Ctrl+C para detener.")
+    print(f"{'Hora':<10}{'CPU%':>7}{'Mem%':>7}{'Swap%':>7}{'Carga1':>8}" + "".join(f"{m[5:]:>12}" for m in disk_metrics))
+
+    def print_sample(values):
+        line = (f"{time.strftime('%H:%M:%S'):<10}{values['cpu']:>7.1f}{values['memory']:>7.1f}"
+                f"{values['swap']:>7.1f}{values['load1']:>8.2f}")
+        line += "".join(f"{values.get(m, float('nan')):>11.1f}%" for m in disk_metrics)
+        print(line)
+
+    try:
+        monitor.run(duration=duration or None, on_sample=print_sample)
+    except KeyboardInterrupt:
+        print_info("Monitorización detenida por el usuario.")
+
+    print_monitoring_summary(monitor.summary(window * 60 if window else None))
+    averages = ", ".join(f"{name}={stats['avg']:.1f}" for name, stats in monitor.summary().items() if stats)
+    log_action("ResourceMonitoring", "Continuous Monitoring", f"Monitorización continua finalizada. Medias: {averages}")
+
+def live_dashboard():
+    # curses no forma parte de Python en Windows: se importa solo al abrir el panel
+    import curses
+    from utils.dashboard import run_dashboard
+    try:
+        stats = run_dashboard(DASHBOARD_INTERVAL, DASHBOARD_MOUNT_REFRESH, DASHBOARD_PANE_ROWS, DISK_STATVFS_TIMEOUT, DISK_STATVFS_WORKERS)
+    except (curses.error, OSError) as e: # Terminal sin soporte (TERM desconocido, salida redirigida) o /proc ilegible
+        print_error(f"No se pudo abrir el panel en vivo: {e}")
+        log_action("ResourceMonitoring", "Live Dashboard", f"Error al abrir el panel en vivo: {e}")
+        return
+    print_info(f"Panel cerrado tras {stats['elapsed']:.0f} s y {stats['frames']} refrescos "
+               f"({stats['segments'] / max(stats['frames'], 1):.1f} líneas redibujadas por refresco de media).")
+    log_action("ResourceMonitoring", "Live Dashboard",
+               f"Panel en vivo abierto durante {stats['elapsed']:.0f} s ({stats['frames']} refrescos, intervalo final {stats['interval']:g} s).")
+
+def print_monitoring_summary(summary):
+    """Imprime la tabla min/max/avg/p95 de ResourceMonitor.summary()."""
+    print_info("Resumen del periodo:")
+    print(f"{'Métrica':<16}{'Muestras':>9}{'Mín':>9}{'Máx':>9}{'Media':>9}{'P95':>9}")
+    for name, stats in summary.items():
+        if stats is None:
+            print(f"{name:<16}{'sin datos':>9}")
+            continue
+        print(f"{name:<16}{stats['count']:>9}{stats['min']:>9.2f}{stats['max']:>9.2f}{stats['avg']:>9.2f}{stats['p95']:>9.2f}")
+
+def get_report_collectors():
+    """Recolectores de solo lectura de este módulo para el informe completo del sistema."""
+    if get_os_type() == 'windows':
+        return [
+            {"title": "Uso de CPU", "argv": ["wmic", "cpu", "get", "LoadPercentage,NumberOfCores,NumberOfLogicalProcessors", "/value"]},
+            {"title": "Memoria Total", "argv": ["wmic", "ComputerSystem", "get", "TotalPhysicalMemory", "/value"]},
+            {"title": "Memoria Libre", "argv": ["wmic", "OS", "get", "FreePhysicalMemory", "/value"]},
+        ]
+    return [
+        {"title": "Uso de CPU y Memoria", "func": lambda: format_cpu_memory_sample(sample_cpu_memory())},
+        {"title": "Procesos Más Consumidores", "func": lambda: format_process_table(top_processes(read_process_table(), 10, "cpu_percent"))},
+    ]
 
 def generate_monitoring_log():
     print_header("Generar Log de Monitorización")
@@ -0,0 +1,136 @@
+from utils.display import print_header, print_info, print_success, print_error
+from utils.system_info import get_os_type
+from utils.executor import run_command_async, start_privileged_helper, TIMEOUT_STATUS, ERROR_STATUS
+from utils.logger import log_action
+from modules import user_group_management, network_management, resource_monitoring, \
+                    disk_partition_management, firewall_management, process_management
+from config import LOG_DIR, REPORT_COLLECTOR_TIMEOUT
+import asyncio
+import datetime
+import os
+import threading
+import time
+
+# Módulos que aportan recolectores al informe, en el orden en que aparecen en el fichero
+REPORT_MODULES = (
+    ("Usuarios y Grupos", user_group_management),
+    ("Redes", network_management),
+    ("Monitorización de Recursos", resource_monitoring),
+    ("Particiones de Disco", disk_partition_management),
+    ("Firewall", firewall_management),
+    ("Procesos", process_management),
+)
+
+def _run_in_daemon_thread(func):
+    """
+    Ejecuta 'func' en un hilo daemon y retorna un futuro asyncio con su resultado.
+    Un hilo daemon colgado (ej. statvfs sobre un NFS caído) no impide que el programa termine.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def deliver(callback):
+        # Si el recolector agotó su timeout, asyncio.run() pudo cerrar ya el bucle: el resultado se descarta
+        if loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(callback)
+        except RuntimeError:
+            pass # Cerrado entre la comprobación y la llamada
+
+    def target():
+        try:
+            result = func()
+        except Exception as e:
+            deliver(lambda: future.done() or future.set_exception(e))
+        else:
+            deliver(lambda: future.done() or future.set_result(result))
+
+    threading.Thread(target=target, daemon=True).start()
+    return future
+
+async def _run_collector(module_name, collector, timeout):
+    """Ejecuta un recolector con su timeout. Retorna un diccionario con el resultado de la sección."""
+    started = time.monotonic()
+    if "argv" in collector:
+        output, status = await run_command_async(collector["argv"], sudo=collector.get("sudo", False), timeout=timeout)
+        source = " ".join(collector["argv"])
+    else:
+        source = "interno"
+        try:
+            output = await asyncio.wait_for(_run_in_daemon_thread(collector["func"]), timeout)
+            status = 0
+        except asyncio.TimeoutError:
+            output, status = f"Tiempo de espera agotado ({timeout} s).", TIMEOUT_STATUS
+        except Exception as e:
+            output, status = f"Excepción en el recolector: {e}", ERROR_STATUS
+    return {
+        "module": module_name,
+        "title": collector["title"],
+        "source": source,
+        "status": status,
+        "duration": time.monotonic() - started,
+        "output": output,
+    }
+
+async def collect_full_system_report(timeout=REPORT_COLLECTOR_TIMEOUT):
+    """Lanza concurrentemente todos los recolectores de todos los módulos. Retorna la lista de secciones."""
+    tasks = []
+    for module_name, module in REPORT_MODULES:
+        for collector in module.get_report_collectors():
+            tasks.append(_run_collector(module_name, collector, timeout))
+    return await asyncio.gather(*tasks)
+
+def write_report(sections, path, elapsed):
+    """Escribe el informe consolidado en 'path'."""
+    with open(path, "w") as f:
+        f.write(f"Informe Completo del Sistema ({get_os_type().capitalize()})\n")
+        f.write(f"Generado: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')} en {elapsed:.2f} s\n")
+        failed = [s for s in sections if s["status"] != 0]
+        f.write(f"Secciones: {len(sections)} ({len(failed)} con error o tiempo agotado)\n")
+        for section in sections:
+            title = f"[{section['module']}] {section['title']}"
+            f.write("\n" + "=" * (len(title) + 6) + "\n")
+            f.write(f"   {title}   \n")
+            f.write("=" * (len(title) + 6) + "\n")
+            f.write(f"Origen: {section['source']} | Código: {section['status']} | Duración: {section['duration']:.2f} s\n\n")
+            f.write(section["output"].rstrip() + "\n")
+
+def run_full_system_report(timeout=REPORT_COLLECTOR_TIMEOUT):
+    """
+    Ejecuta todos los recolectores y escribe el informe en LOG_DIR sin interacción.
+    Retorna (ruta, secciones, segundos). Lanza OSError si no se puede escribir el fichero.
+    """
+    # Una sola autenticación sudo para todos los recolectores que la necesiten
+    start_privileged_helper()
+    started = time.monotonic()
+    sections = asyncio.run(collect_full_system_report(timeout))
+    elapsed = time.monotonic() - started
+
+    os.makedirs(LOG_DIR, exist_ok=True)
+    path = os.path.join(LOG_DIR, f"{datetime.datetime.now().strftime('%Y-%m-%d_%H%M%S')}_full_system_report.txt")
+    try:
+        write_report(sections, path, elapsed)
+    except OSError as e:
+        log_action("SystemReport", "Generate Full Report", f"Error al escribir el informe: {e}")
+        raise
+    failed = sum(1 for s in sections if s["status"] != 0)
+    log_action("SystemReport", "Generate Full Report",
+               f"Informe completo generado en {path}: {len(sections)} secciones, {failed} con error, {elapsed:.2f} s.")
+    return path, sections, elapsed
+
+def generate_full_system_report():
+    print_header("Informe Completo del Sistema")
+    print_info(f"Ejecutando recolectores en paralelo (timeout por recolector: {REPORT_COLLECTOR_TIMEOUT} s)...")
+    try:
+        path, sections, elapsed = run_full_system_report()
+    except OSError as e:
+        print_error(f"Error al escribir el informe: {e}")
+        return None
+
+    for section in sections:
+        status = "OK" if section["status"] == 0 else ("TIMEOUT" if section["status"] == TIMEOUT_STATUS else f"ERROR {section['status']}")
+        print(f"  [{status:^9}] {section['module']}: {section['title']} ({section['duration']:.2f} s)")
+    failed = sum(1 for s in sections if s["status"] != 0)
+    print_success(f"Informe generado en {path} ({elapsed:.2f} s, {failed} sección(es) con error).")
+    return path
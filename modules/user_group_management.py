@@ -1,6 +1,11 @@
 from utils.display import clear_screen, print_menu, print_header, print_info, print_success, print_error, get_user_input
 from utils.system_info import get_os_type, execute_command
 from utils.logger import log_action
+from utils.executor import start_privileged_helper
+from utils.account_db import get_account_db
+from utils.group_reconcile import load_membership_map, plan_reconciliation, apply_reconciliation
+from utils.user_provisioning import load_user_rows, provision_users, summarize_provisioning, CREATED, PLANNED
+from config import USER_IMPORT_BATCH_SIZE, USER_IMPORT_CRYPT_METHOD
 import os
 
 def user_group_menu():
@@ -17,6 +22,9 @@ def user_group_menu():
             "7": "Añadir Usuario a Grupo",
             "8": "Remover Usuario de Grupo",
             "9": "Generar Log de Usuarios y Grupos",
+            "10": "Importar Usuarios en Bloque (CSV/JSON) (Solo Linux)",
+            "11": "Consultar Cuenta y Membresías (Solo Linux)",
+            "12": "Sincronizar Membresías de Grupos (Solo Linux)",
             "0": "Volver al Menú Principal"
         }
         print_menu(options)
@@ -41,160 +49,395 @@ def user_group_menu():
             remove_user_from_group()
         elif choice == '9':
             generate_user_group_log()
+        elif choice == '10':
+            if get_os_type() == 'linux':
+                import_users()
+            else:
+                print_error("Esta opción solo está disponible en Linux.")
+        elif choice == '11':
+            if get_os_type() == 'linux':
+                show_account()
+            else:
+                print_error("Esta opción solo está disponible en Linux.")
+        elif choice == '12':
+            if get_os_type() == 'linux':
+                reconcile_groups()
+            else:
+                print_error("Esta opción solo está disponible en Linux.")
         elif choice == '0':
             break
         else:
             print_error("Opción inválida. Por favor, intente de nuevo.")
         get_user_input("Presione Enter para continuar...")
 
+def run_list_users():
+    """Lista los usuarios sin interacción. Retorna (salida, código)."""
+    if get_os_type() == 'windows':
+        output, status = execute_command("net user")
+    else: # linux
+        # Índice en memoria de /etc/passwd: solo se vuelve a leer si el fichero cambió
+        try:
+            output, status = "".join(f"{name}\n" for name in get_account_db().user_names()), 0
+        except OSError as e:
+            output, status = f"Error al leer la base de datos de cuentas: {e}", 1
+    if status == 0:
+        log_action("UserGroup", "List Users", "Usuarios listados exitosamente.")
+    else:
+        log_action("UserGroup", "List Users", f"Error al listar usuarios: {output}")
+    return output, status
+
 def list_users():
     print_header("Listar Usuarios")
-    os_type = get_os_type()
-    if os_type == 'windows':
-        command = "net user"
-    else: # linux
-        command = "cat /etc/passwd | cut -d: -f1" # Muestra solo los nombres de usuario
-    
-    output, status = execute_command(command)
+    output, status = run_list_users()
     if status == 0: # Comando exitoso
         print_info("Usuarios del sistema:")
         print(output)
-        log_action("UserGroup", "List Users", "Usuarios listados exitosamente.")
     else:
         print_error(f"Error al listar usuarios: {output}")
-        log_action("UserGroup", "List Users", f"Error al listar usuarios: {output}")
+
+def run_create_user(username, password=None):
+    """Crea un usuario sin interacción. Retorna (salida, código)."""
+    if get_os_type() == 'windows':
+        command = f'net user "{username}" "{password}" /add' if password else f'net user "{username}" * /add'
+        # Puedes añadir /passwordchg:no /passwordreq:yes si lo necesitas en Windows
+        output, status = execute_command(command, sudo=True)
+    else: # linux
+        output, status = execute_command(["useradd", username], sudo=True)
+        if status == 0 and password:
+            # La contraseña va por stdin a chpasswd, nunca en la línea de comandos
+            output, status = execute_command(["chpasswd"], sudo=True, input=f"{username}:{password}\n")
+    if status == 0:
+        log_action("UserGroup", "Create User", f"Usuario '{username}' creado.")
+    else:
+        log_action("UserGroup", "Create User", f"Error al crear usuario '{username}': {output}")
+    return output, status
 
 def create_user():
     print_header("Crear Usuario")
     username = get_user_input("Ingrese el nombre del nuevo usuario")
     password = get_user_input("Ingrese la contraseña para el nuevo usuario (dejar en blanco para no establecer)")
-    
-    os_type = get_os_type()
-    if os_type == 'windows':
-        command = f'net user "{username}" "{password}" /add' if password else f'net user "{username}" * /add'
-        # Puedes añadir /passwordchg:no /passwordreq:yes si lo necesitas en Windows
-    else: # linux
-        command = f"useradd {username}"
-        if password:
-            command += f" && echo '{username}:{password}' | chpasswd" # chpasswd requiere sudo
-    
-    output, status = execute_command(command, sudo=True)
+    output, status = run_create_user(username, password)
     if status == 0:
         print_success(f"Usuario '{username}' creado exitosamente.")
-        log_action("UserGroup", "Create User", f"Usuario '{username}' creado.")
     else:
         print_error(f"Error al crear usuario: {output}")
-        log_action("UserGroup", "Create User", f"Error al crear usuario '{username}': {output}")
+
+def run_delete_user(username):
+    """Elimina un usuario sin interacción. Retorna (salida, código)."""
+    if get_os_type() == 'windows':
+        output, status = execute_command(f'net user "{username}" /delete', sudo=True)
+    else: # linux
+        output, status = execute_command(["userdel", username], sudo=True)
+    if status == 0:
+        log_action("UserGroup", "Delete User", f"Usuario '{username}' eliminado.")
+    else:
+        log_action("UserGroup", "Delete User", f"Error al eliminar usuario '{username}': {output}")
+    return output, status
 
 def delete_user():
     print_header("Eliminar Usuario")
     username = get_user_input("Ingrese el nombre del usuario a eliminar")
-    
-    os_type = get_os_type()
-    if os_type == 'windows':
-        command = f'net user "{username}" /delete'
-    else: # linux
-        command = f"userdel {username}"
-    
-    output, status = execute_command(command, sudo=True)
+    output, status = run_delete_user(username)
     if status == 0:
         print_success(f"Usuario '{username}' eliminado exitosamente.")
-        log_action("UserGroup", "Delete User", f"Usuario '{username}' eliminado.")
     else:
         print_error(f"Error al eliminar usuario: {output}")
-        log_action("UserGroup", "Delete User", f"Error al eliminar usuario '{username}': {output}")
+
+def run_list_groups():
+    """Lista los grupos sin interacción. Retorna (salida, código)."""
+    if get_os_type() == 'windows':
+        output, status = execute_command("net localgroup")
+    else: # linux
+        try:
+            output, status = "".join(f"{name}\n" for name in get_account_db().group_names()), 0
+        except OSError as e:
+            output, status = f"Error al leer la base de datos de cuentas: {e}", 1
+    if status == 0:
+        log_action("UserGroup", "List Groups", "Grupos listados exitosamente.")
+    else:
+        log_action("UserGroup", "List Groups", f"Error al listar grupos: {output}")
+    return output, status
 
 def list_groups():
     print_header("Listar Grupos")
-    os_type = get_os_type()
-    if os_type == 'windows':
-        command = "net localgroup"
-    else: # linux
-        command = "cat /etc/group | cut -d: -f1"
-    
-    output, status = execute_command(command)
+    output, status = run_list_groups()
     if status == 0:
         print_info("Grupos del sistema:")
         print(output)
-        log_action("UserGroup", "List Groups", "Grupos listados exitosamente.")
     else:
         print_error(f"Error al listar grupos: {output}")
-        log_action("UserGroup", "List Groups", f"Error al listar grupos: {output}")
+
+def run_create_group(groupname):
+    """Crea un grupo sin interacción. Retorna (salida, código)."""
+    if get_os_type() == 'windows':
+        output, status = execute_command(f'net localgroup "{groupname}" /add', sudo=True)
+    else: # linux
+        output, status = execute_command(["groupadd", groupname], sudo=True)
+    if status == 0:
+        log_action("UserGroup", "Create Group", f"Grupo '{groupname}' creado.")
+    else:
+        log_action("UserGroup", "Create Group", f"Error al crear grupo '{groupname}': {output}")
+    return output, status
 
 def create_group():
     print_header("Crear Grupo")
     groupname = get_user_input("Ingrese el nombre del nuevo grupo")
-    
-    os_type = get_os_type()
-    if os_type == 'windows':
-        command = f'net localgroup "{groupname}" /add'
-    else: # linux
-        command = f"groupadd {groupname}"
-    
-    output, status = execute_command(command, sudo=True)
+    output, status = run_create_group(groupname)
     if status == 0:
         print_success(f"Grupo '{groupname}' creado exitosamente.")
-        log_action("UserGroup", "Create Group", f"Grupo '{groupname}' creado.")
     else:
         print_error(f"Error al crear grupo: {output}")
-        log_action("UserGroup", "Create Group", f"Error al crear grupo '{groupname}': {output}")
+
+def run_delete_group(groupname):
+    """Elimina un grupo sin interacción. Retorna (salida, código)."""
+    if get_os_type() == 'windows':
+        output, status = execute_command(f'net localgroup "{groupname}" /delete', sudo=True)
+    else: # linux
+        output, status = execute_command(["groupdel", groupname], sudo=True)
+    if status == 0:
+        log_action("UserGroup", "Delete Group", f"Grupo '{groupname}' eliminado.")
+    else:
+        log_action("UserGroup", "Delete Group", f"Error al eliminar grupo '{groupname}': {output}")
+    return output, status
 
 def delete_group():
     print_header("Eliminar Grupo")
     groupname = get_user_input("Ingrese el nombre del grupo a eliminar")
-    
-    os_type = get_os_type()
-    if os_type == 'windows':
-        command = f'net localgroup "{groupname}" /delete'
-    else: # linux
-        command = f"groupdel {groupname}"
-    
-    output, status = execute_command(command, sudo=True)
+    output, status = run_delete_group(groupname)
     if status == 0:
         print_success(f"Grupo '{groupname}' eliminado exitosamente.")
-        log_action("UserGroup", "Delete Group", f"Grupo '{groupname}' eliminado.")
     else:
         print_error(f"Error al eliminar grupo: {output}")
-        log_action("UserGroup", "Delete Group", f"Error al eliminar grupo '{groupname}': {output}")
+
+def run_add_user_to_group(username, groupname):
+    """Añade un usuario a un grupo sin interacción. Retorna (salida, código)."""
+    if get_os_type() == 'windows':
+        output, status = execute_command(f'net localgroup "{groupname}" "{username}" /add', sudo=True)
+    else: # linux
+        output, status = execute_command(["usermod", "-aG", groupname, username], sudo=True)
+    if status == 0:
+        log_action("UserGroup", "Add User to Group", f"Usuario '{username}' añadido a '{groupname}'.")
+    else:
+        log_action("UserGroup", "Add User to Group", f"Error al añadir usuario '{username}' a '{groupname}': {output}")
+    return output, status
 
 def add_user_to_group():
     print_header("Añadir Usuario a Grupo")
     username = get_user_input("Ingrese el nombre del usuario")
     groupname = get_user_input("Ingrese el nombre del grupo")
-    
-    os_type = get_os_type()
-    if os_type == 'windows':
-        command = f'net localgroup "{groupname}" "{username}" /add'
-    else: # linux
-        command = f"usermod -aG {groupname} {username}"
-    
-    output, status = execute_command(command, sudo=True)
+    output, status = run_add_user_to_group(username, groupname)
     if status == 0:
         print_success(f"Usuario '{username}' añadido al grupo '{groupname}' exitosamente.")
-        log_action("UserGroup", "Add User to Group", f"Usuario '{username}' añadido a '{groupname}'.")
     else:
         print_error(f"Error al añadir usuario a grupo: {output}")
-        log_action("UserGroup", "Add User to Group", f"Error al añadir usuario '{username}' a '{groupname}': {output}")
+
+def run_remove_user_from_group(username, groupname):
+    """Quita un usuario de un grupo sin interacción. Retorna (salida, código)."""
+    if get_os_type() == 'windows':
+        output, status = execute_command(f'net localgroup "{groupname}" "{username}" /delete', sudo=True)
+    else: # linux
+        # gpasswd es más seguro que userdel para remover de un grupo
+        output, status = execute_command(["gpasswd", "-d", username, groupname], sudo=True)
+    if status == 0:
+        log_action("UserGroup", "Remove User from Group", f"Usuario '{username}' removido de '{groupname}'.")
+    else:
+        log_action("UserGroup", "Remove User from Group", f"Error al remover usuario '{username}' de '{groupname}': {output}")
+    return output, status
 
 def remove_user_from_group():
     print_header("Remover Usuario de Grupo")
     username = get_user_input("Ingrese el nombre del usuario")
     groupname = get_user_input("Ingrese el nombre del grupo")
-    
-    os_type = get_os_type()
-    if os_type == 'windows':
-        command = f'net localgroup "{groupname}" "{username}" /delete'
-    else: # linux
-        # gpasswd es más seguro que userdel para remover de un grupo
-        command = f"gpasswd -d {username} {groupname}"
-    
-    output, status = execute_command(command, sudo=True)
+    output, status = run_remove_user_from_group(username, groupname)
     if status == 0:
         print_success(f"Usuario '{username}' removido del grupo '{groupname}' exitosamente.")
-        log_action("UserGroup", "Remove User from Group", f"Usuario '{username}' removido de '{groupname}'.")
     else:
         print_error(f"Error al remover usuario de grupo: {output}")
-        log_action("UserGroup", "Remove User from Group", f"Error al remover usuario '{username}' de '{groupname}': {output}")
+
+def run_show_user(username):
+    """Datos de un usuario y sus grupos (índice de cuentas). Retorna (diccionario o mensaje, código)."""
+    db = get_account_db()
+    user = db.get_user(username)
+    if user is None:
+        return f"El usuario '{username}' no existe.", 1
+    info = user.to_dict()
+    info["groups"] = db.groups_of(username)
+    log_action("UserGroup", "Show User", f"Consulta del usuario '{username}': {len(info['groups'])} grupo(s).")
+    return info, 0
+
+def run_show_group(groupname):
+    """Datos de un grupo y todos sus miembros (explícitos y por grupo primario). Retorna (diccionario o mensaje, código)."""
+    db = get_account_db()
+    group = db.get_group(groupname)
+    if group is None:
+        return f"El grupo '{groupname}' no existe.", 1
+    info = group.to_dict()
+    info["all_members"] = db.members_of(groupname)
+    log_action("UserGroup", "Show Group", f"Consulta del grupo '{groupname}': {len(info['all_members'])} miembro(s).")
+    return info, 0
+
+def show_account():
+    print_header("Consultar Cuenta y Membresías")
+    name = get_user_input("Nombre de usuario o de grupo")
+    try:
+        user, user_status = run_show_user(name)
+        group, group_status = run_show_group(name)
+    except OSError as e:
+        print_error(f"Error al leer la base de datos de cuentas: {e}")
+        return
+    if user_status != 0 and group_status != 0:
+        print_error(f"No existe ningún usuario ni grupo llamado '{name}'.")
+        return
+    if user_status == 0:
+        print_info(f"Usuario '{name}':")
+        print(f"  UID: {user['uid']}  GID: {user['gid']}  Home: {user['home']}  Shell: {user['shell']}")
+        if user['gecos']:
+            print(f"  Comentario: {user['gecos']}")
+        print(f"  Grupos: {', '.join(user['groups']) or '(ninguno)'}")
+        shadow = user['shadow']
+        if shadow:
+            print(f"  Bloqueado: {'sí' if shadow['locked'] else 'no'}  Sin contraseña: {'sí' if shadow['no_password'] else 'no'}  "
+                  f"Último cambio (días desde 1970): {shadow['last_change']}  Caduca: {shadow['expire'] or 'nunca'}")
+        else:
+            print("  (Metadatos de /etc/shadow no disponibles: ejecute como root)")
+    if group_status == 0:
+        print_info(f"Grupo '{name}' (GID {group['gid']}):")
+        print(f"  Miembros explícitos: {', '.join(group['members']) or '(ninguno)'}")
+        print(f"  Todos los miembros (incluye grupo primario): {', '.join(group['all_members']) or '(ninguno)'}")
+
+def run_reconcile_groups(path, root=None, dry_run=False, additive=False):
+    """
+    Sincroniza la membresía de los grupos con la indicada en 'path' (ver utils.group_reconcile).
+    Solo se ejecuta un gpasswd -M por grupo que realmente cambia. Retorna (plan, código).
+    """
+    desired = load_membership_map(path)
+    plan = plan_reconciliation(desired, root=root, additive=additive)
+    if not dry_run and any(entry["error"] is None for entry in plan):
+        start_privileged_helper()
+        apply_reconciliation(plan, root=root)
+    errors = sum(1 for entry in plan if entry["error"] is not None or entry.get("status", 0) != 0)
+    added = sum(len(entry["add"]) for entry in plan if entry["error"] is None)
+    removed = sum(len(entry["remove"]) for entry in plan if entry["error"] is None)
+    log_action("UserGroup", "Reconcile Groups",
+               f"Sincronización de '{path}' ({'simulación' if dry_run else 'aplicado'}): {len(desired)} grupo(s) deseados, "
+               f"{len(plan) - errors} con cambios (+{added}/-{removed}), {errors} con error.")
+    return plan, 1 if errors else 0
+
+def reconcile_groups():
+    print_header("Sincronizar Membresías de Grupos")
+    print_info("Fichero JSON {grupo: [usuarios]} o CSV con columnas 'group' y 'user' (o 'members').")
+    path = get_user_input("Ruta del fichero de membresía deseada")
+    root = get_user_input("Directorio raíz alternativo (dejar en blanco para el sistema actual)") or None
+    additive = get_user_input("¿Solo añadir miembros, sin quitar ninguno? (s/N)").lower() == 's'
+    try:
+        plan, status = run_reconcile_groups(path, root, dry_run=True, additive=additive)
+    except (OSError, ValueError) as e:
+        print_error(f"Error al leer el fichero de membresía: {e}")
+        log_action("UserGroup", "Reconcile Groups", f"Error al leer '{path}': {e}")
+        return
+    print_reconcile_plan(plan)
+    if not any(entry["error"] is None for entry in plan):
+        print_info("No hay cambios que aplicar.")
+        return
+    confirm = get_user_input("¿Desea aplicar estos cambios? (s/N)").lower()
+    if confirm != 's':
+        print_info("Operación cancelada.")
+        log_action("UserGroup", "Reconcile Groups", f"Sincronización de '{path}' cancelada.")
+        return
+    plan, status = run_reconcile_groups(path, root, additive=additive)
+    for entry in plan:
+        if entry.get("status", 0) != 0:
+            print_error(f"Error en el grupo '{entry['group']}': {entry['output'].strip()}")
+    if status == 0:
+        print_success(f"Membresías sincronizadas ({len(plan)} grupo(s) modificados).")
+    else:
+        print_error("La sincronización terminó con errores.")
+
+def print_reconcile_plan(plan):
+    """Imprime el diff por grupo de plan_reconciliation()."""
+    if not plan:
+        print_info("Todos los grupos ya tienen la membresía deseada.")
+        return
+    for entry in plan:
+        if entry["error"]:
+            print(f"  ! {entry['group']}: {entry['error']}")
+            continue
+        print(f"  ~ {entry['group']}")
+        for user in entry["add"]:
+            print(f"      + {user}")
+        for user in entry["remove"]:
+            print(f"      - {user}")
+
+# Etiquetas del resultado por fila de utils.user_provisioning
+IMPORT_RESULT_LABELS = {
+    "created": "creado",
+    "planned": "se crearía",
+    "invalid": "inválido",
+    "skipped": "no aplicado",
+    "failed": "error",
+    "password_failed": "creado, contraseña no establecida",
+}
+
+def run_import_users(path, root=None, dry_run=False, skip_invalid=False, on_batch=None):
+    """
+    Importa cuentas desde un CSV/JSON sin interacción (ver utils.user_provisioning).
+    Retorna (resultados por fila, código): 0 si todas las filas se crearon (o se crearían).
+    """
+    rows = load_user_rows(path)
+    if not dry_run:
+        start_privileged_helper() # Una sola autenticación sudo para todo el lote
+    results = provision_users(rows, root=root, dry_run=dry_run, skip_invalid=skip_invalid,
+                              batch_size=USER_IMPORT_BATCH_SIZE,
+                              crypt_method=USER_IMPORT_CRYPT_METHOD if root else None, on_batch=on_batch)
+    summary = summarize_provisioning(results)
+    expected = PLANNED if dry_run else CREATED
+    status = 0 if summary.get(expected, 0) == len(results) else 1
+    mode = "simulación" if dry_run else "aplicado"
+    log_action("UserGroup", "Import Users",
+               f"Importación de '{path}' ({mode}{', raíz ' + root if root else ''}): "
+               + ", ".join(f"{IMPORT_RESULT_LABELS.get(k, k)}: {v}" for k, v in summary.items()) + ".")
+    return results, status
+
+def import_users():
+    print_header("Importar Usuarios en Bloque")
+    print_info("Columnas: username, password, groups (separados por comas), shell, home, comment, uid.")
+    path = get_user_input("Ruta del fichero CSV o JSON")
+    root = get_user_input("Directorio raíz alternativo (dejar en blanco para el sistema actual)") or None
+    dry_run = get_user_input("¿Simular sin aplicar cambios? (S/n)").lower() != 'n'
+    skip_invalid = False
+    if not dry_run:
+        skip_invalid = get_user_input("¿Crear las filas válidas aunque haya filas inválidas? (s/N)").lower() == 's'
+
+    def on_batch(done, total):
+        print_info(f"Cuentas procesadas: {done}/{total}")
+
+    try:
+        results, status = run_import_users(path, root, dry_run, skip_invalid, on_batch)
+    except (OSError, ValueError) as e: # ValueError incluye JSON/CSV mal formado
+        print_error(f"Error al leer el fichero de importación: {e}")
+        log_action("UserGroup", "Import Users", f"Error al leer '{path}': {e}")
+        return
+    for result in results:
+        line = f"  Fila {result['row']:>5} {result['username'][:20]:<21}{IMPORT_RESULT_LABELS.get(result['result'], result['result'])}"
+        print(line + (f": {result['detail']}" if result['detail'] else ""))
+    summary = summarize_provisioning(results)
+    summary_text = ", ".join(f"{IMPORT_RESULT_LABELS.get(k, k)}: {v}" for k, v in summary.items())
+    if status == 0:
+        print_success(f"Importación {'simulada' if dry_run else 'completada'} ({summary_text}).")
+    else:
+        print_error(f"Importación con incidencias ({summary_text}).")
+
+def get_report_collectors():
+    """Recolectores de solo lectura de este módulo para el informe completo del sistema."""
+    if get_os_type() == 'windows':
+        return [
+            {"title": "Usuarios", "argv": ["net", "user"]},
+            {"title": "Grupos", "argv": ["net", "localgroup"]},
+        ]
+    return [
+        {"title": "Usuarios", "argv": ["cut", "-d:", "-f1", "/etc/passwd"]},
+        {"title": "Grupos", "argv": ["cut", "-d:", "-f1", "/etc/group"]},
+    ]
 
 def generate_user_group_log():
     print_header("Generar Log de Usuarios y Grupos")
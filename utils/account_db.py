@@ -0,0 +1,204 @@
+import os
+import threading
+
+class UserEntry:
+    """Entrada de /etc/passwd, con metadatos de /etc/shadow si se pudieron leer."""
+    __slots__ = ("name", "uid", "gid", "gecos", "home", "shell", "shadow")
+
+    def __init__(self, name, uid, gid, gecos, home, shell):
+        self.name = name
+        self.uid = uid
+        self.gid = gid
+        self.gecos = gecos
+        self.home = home
+        self.shell = shell
+        self.shadow = None
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+class GroupEntry:
+    """Entrada de /etc/group. 'members' son los miembros explícitos (grupos suplementarios)."""
+    __slots__ = ("name", "gid", "members")
+
+    def __init__(self, name, gid, members):
+        self.name = name
+        self.gid = gid
+        self.members = members
+
+    def to_dict(self):
+        return {"name": self.name, "gid": self.gid, "members": list(self.members)}
+
+def _to_int(value):
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+def _shadow_metadata(fields):
+    """Metadatos de una línea de /etc/shadow. Nunca se conserva el hash de la contraseña."""
+    password = fields[1]
+    return {
+        "locked": password.startswith("!"),
+        "no_password": password in ("", "*", "!", "!!") or password.startswith("!*"),
+        "last_change": _to_int(fields[2]) if len(fields) > 2 else None, # días desde 1970-01-01
+        "min_days": _to_int(fields[3]) if len(fields) > 3 else None,
+        "max_days": _to_int(fields[4]) if len(fields) > 4 else None,
+        "warn_days": _to_int(fields[5]) if len(fields) > 5 else None,
+        "inactive_days": _to_int(fields[6]) if len(fields) > 6 else None,
+        "expire": _to_int(fields[7]) if len(fields) > 7 else None,
+    }
+
+def _read_colon_file(path):
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            # Las líneas '+'/'-' de NIS no son cuentas locales
+            if line and not line.startswith(("#", "+", "-")):
+                yield line.split(":")
+
+def _file_key(path):
+    """Identidad de un fichero para invalidar la caché: (inode, mtime_ns, tamaño) o None si no existe."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+class AccountDatabase:
+    """
+    Índice en memoria de /etc/passwd, /etc/group y (si es legible) /etc/shadow bajo 'root'.
+    Búsquedas O(1) por nombre, UID y GID y mapa inverso de membresías. Cada consulta
+    comprueba inode/mtime/tamaño de los ficheros y solo reconstruye el que haya cambiado.
+    """
+
+    def __init__(self, root=None):
+        base = root or "/"
+        self.passwd_path = os.path.join(base, "etc", "passwd")
+        self.group_path = os.path.join(base, "etc", "group")
+        self.shadow_path = os.path.join(base, "etc", "shadow")
+        self._keys = {}
+        self._lock = threading.RLock()
+        self.users = {}
+        self.users_by_uid = {}
+        self.groups = {}
+        self.groups_by_gid = {}
+        self._primary_members = {}  # gid -> [usuarios con ese grupo primario]
+        self._memberships = {}      # usuario -> [grupos suplementarios]
+        self.shadow_available = False
+
+    def refresh(self):
+        """Reconstruye los índices de los ficheros que hayan cambiado. Retorna True si hubo cambios."""
+        with self._lock:
+            keys = {path: _file_key(path) for path in (self.passwd_path, self.group_path, self.shadow_path)}
+            changed = {path for path, key in keys.items() if self._keys.get(path, False) != key}
+            if not changed:
+                return False
+            if keys[self.passwd_path] is None or keys[self.group_path] is None:
+                raise FileNotFoundError(f"No existe {self.passwd_path if keys[self.passwd_path] is None else self.group_path}")
+            if self.passwd_path in changed:
+                self._load_passwd()
+                changed.add(self.shadow_path) # Los metadatos de shadow cuelgan de las entradas de usuario
+            if self.group_path in changed:
+                self._load_group()
+            if self.shadow_path in changed:
+                self._load_shadow()
+            self._keys = keys
+            return True
+
+    def _load_passwd(self):
+        users, by_uid, primary = {}, {}, {}
+        for fields in _read_colon_file(self.passwd_path):
+            if len(fields) < 7:
+                continue
+            uid, gid = _to_int(fields[2]), _to_int(fields[3])
+            entry = UserEntry(fields[0], uid, gid, fields[4], fields[5], fields[6])
+            users[entry.name] = entry
+            by_uid.setdefault(uid, entry) # Con UIDs duplicados, gana la primera entrada (como getpwuid)
+            primary.setdefault(gid, []).append(entry.name)
+        self.users, self.users_by_uid, self._primary_members = users, by_uid, primary
+
+    def _load_group(self):
+        groups, by_gid, memberships = {}, {}, {}
+        for fields in _read_colon_file(self.group_path):
+            if len(fields) < 4:
+                continue
+            members = [m for m in fields[3].split(",") if m]
+            entry = GroupEntry(fields[0], _to_int(fields[2]), members)
+            groups[entry.name] = entry
+            by_gid.setdefault(entry.gid, entry)
+            for member in members:
+                memberships.setdefault(member, []).append(entry.name)
+        self.groups, self.groups_by_gid, self._memberships = groups, by_gid, memberships
+
+    def _load_shadow(self):
+        for entry in self.users.values():
+            entry.shadow = None
+        try:
+            for fields in _read_colon_file(self.shadow_path):
+                entry = self.users.get(fields[0])
+                if entry is not None and len(fields) >= 2:
+                    entry.shadow = _shadow_metadata(fields)
+            self.shadow_available = True
+        except OSError: # Sin permisos (no root): se omiten los metadatos
+            self.shadow_available = False
+
+    def get_user(self, name):
+        self.refresh()
+        return self.users.get(name)
+
+    def get_user_by_uid(self, uid):
+        self.refresh()
+        return self.users_by_uid.get(uid)
+
+    def get_group(self, name):
+        self.refresh()
+        return self.groups.get(name)
+
+    def get_group_by_gid(self, gid):
+        self.refresh()
+        return self.groups_by_gid.get(gid)
+
+    def user_names(self):
+        """Nombres de usuario en el orden de /etc/passwd."""
+        self.refresh()
+        return list(self.users)
+
+    def group_names(self):
+        """Nombres de grupo en el orden de /etc/group."""
+        self.refresh()
+        return list(self.groups)
+
+    def groups_of(self, username):
+        """Grupos del usuario: el primario primero y después los suplementarios. None si no existe."""
+        self.refresh()
+        user = self.users.get(username)
+        if user is None:
+            return None
+        primary = self.groups_by_gid.get(user.gid)
+        names = [primary.name] if primary else []
+        names += [g for g in self._memberships.get(username, ()) if g not in names]
+        return names
+
+    def members_of(self, groupname):
+        """Miembros del grupo: explícitos y usuarios que lo tienen como primario. None si no existe."""
+        self.refresh()
+        group = self.groups.get(groupname)
+        if group is None:
+            return None
+        members = list(group.members)
+        members += [u for u in self._primary_members.get(group.gid, ()) if u not in members]
+        return members
+
+# Una base de datos por directorio raíz, compartida por todo el proceso
+_databases = {}
+_databases_lock = threading.Lock()
+
+def get_account_db(root=None):
+    """Retorna la AccountDatabase compartida para 'root' (el sistema actual por defecto)."""
+    key = os.path.abspath(root or "/")
+    with _databases_lock:
+        db = _databases.get(key)
+        if db is None:
+            db = _databases[key] = AccountDatabase(root)
+    return db
@@ -0,0 +1,124 @@
+import re
+import threading
+import time
+from utils.ring_buffer import RingBuffer
+
+WRAP_32 = 1 << 32
+
+def counter_delta(previous, current):
+    """
+    Diferencia entre dos lecturas de un contador. Si el valor bajó desde la mitad alta del rango
+    de 32 bits hasta la mitad baja, el contador dio la vuelta (drivers con contadores de 32 bits);
+    cualquier otra bajada es un reinicio (interfaz recreada, driver recargado) y el delta es el
+    valor actual. Que un contador de 64 bits baje de, p. ej., 10 MB a 2 MB nunca es una vuelta.
+    """
+    if current >= previous:
+        return current - previous
+    if WRAP_32 // 2 <= previous < WRAP_32 and current < WRAP_32 // 2:
+        return current + WRAP_32 - previous
+    return current
+
+class CounterSampler:
+    """
+    Base del muestreo periódico de contadores acumulados del kernel (/proc/net/dev,
+    /proc/diskstats...). Calcula métricas a partir del delta entre dos lecturas y guarda las de
+    HISTORY_METRICS en un RingBuffer por elemento que cubre 'history_seconds'. Los elementos que
+    desaparecen (veth de contenedores, loop liberados) se eliminan del historial para que la
+    memoria no crezca. 'pattern' limita los elementos (expresión regular).
+
+    Las subclases definen HISTORY_METRICS, read_counters() -> {nombre: tupla de contadores} y
+    compute_rates(antes, después, segundos) -> {métrica: valor}; forget(nombre) descarta lo que
+    guarden por elemento.
+    """
+    HISTORY_METRICS = ()
+
+    def __init__(self, interval=1.0, history_seconds=300, pattern=None, path=None):
+        if interval <= 0:
+            raise ValueError("El intervalo de muestreo debe ser mayor que 0.")
+        self.interval = interval
+        self.capacity = max(int(history_seconds / interval), 1)
+        self.pattern = re.compile(pattern) if pattern else None
+        self.path = path
+        self.buffers = {}   # nombre -> {métrica: RingBuffer}
+        self.latest = {}    # nombre -> métricas de la última muestra
+        self._previous = None
+        self._previous_time = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def read_counters(self):
+        raise NotImplementedError
+
+    def compute_rates(self, before, after, elapsed):
+        raise NotImplementedError
+
+    def forget(self, name):
+        pass
+
+    def sample_once(self):
+        """Lee los contadores y, desde la segunda llamada, retorna {nombre: métricas} (ver compute_rates)."""
+        now = time.monotonic()
+        timestamp = time.time()
+        counters = self.read_counters()
+        previous, previous_time = self._previous, self._previous_time
+        self._previous, self._previous_time = counters, now
+        if previous is None:
+            return {}
+        elapsed = now - previous_time
+        if elapsed <= 0:
+            return {}
+        # Los elementos nuevos no tienen delta todavía
+        latest = {name: self.compute_rates(previous[name], values, elapsed)
+                  for name, values in counters.items() if name in previous}
+        with self._lock:
+            for name in set(self.buffers) - set(counters):
+                del self.buffers[name]
+                self.forget(name)
+            for name, rates in latest.items():
+                buffers = self.buffers.get(name)
+                if buffers is None:
+                    buffers = self.buffers[name] = {metric: RingBuffer(self.capacity) for metric in self.HISTORY_METRICS}
+                for metric in self.HISTORY_METRICS:
+                    buffers[metric].append(rates[metric], timestamp)
+            self.latest = latest
+        return latest
+
+    def summary(self, seconds=None, names=None):
+        """{nombre: {métrica: {'min', 'max', 'avg', 'p95', 'count'}}} de los últimos 'seconds' segundos."""
+        now = time.time()
+        with self._lock:
+            names = names if names is not None else list(self.buffers)
+            return {name: {metric: buffer.stats(seconds, now) for metric, buffer in self.buffers[name].items()}
+                    for name in names if name in self.buffers}
+
+    def run(self, duration=None, on_sample=None):
+        """
+        Bucle de muestreo en primer plano durante 'duration' segundos (None = hasta stop()).
+        'on_sample' recibe las métricas de cada muestra.
+        """
+        self.sample_once() # Lectura base: la primera tasa llega tras un intervalo
+        deadline = time.monotonic() + duration if duration is not None else None
+        next_tick = time.monotonic()
+        while not self._stop_event.wait(max(next_tick + self.interval - time.monotonic(), 0)):
+            next_tick += self.interval
+            rates = self.sample_once()
+            if on_sample:
+                on_sample(rates)
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+
+    def start(self, on_sample=None):
+        """Inicia el muestreo en un hilo en segundo plano (modo demonio)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, kwargs={"on_sample": on_sample}, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Detiene el muestreo continuo."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
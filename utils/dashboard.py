@@ -0,0 +1,439 @@
+import curses
+import re
+import socket
+import threading
+import time
+from utils.display import format_bytes
+from utils.proc_sampler import CpuMemorySampler
+from utils.process_table import ProcessSnapshot, read_uptime
+from utils.net_traffic import TrafficSampler, format_rate
+from utils.disk_io import DiskIoSampler, format_throughput
+from utils.mount_table import mount_usage
+
+INTERVALS = (0.5, 1, 2, 3, 5, 10, 30, 60) # Pasos de '+' y '-'
+MIN_WIDTH, MIN_HEIGHT = 60, 16
+PANE_MIN_WIDTH = 56 # Anchura mínima de los paneles que se colocan uno al lado de otro
+HELP = "q salir  Tab panel  s/S orden  r invertir  / filtro  +/- intervalo  ↑↓ desplazar"
+
+class Column:
+    """Columna de un panel: clave del valor, cabecera, anchura (None = el resto) y formato."""
+    __slots__ = ("key", "header", "width", "format", "right")
+
+    def __init__(self, key, header, width, format=str, right=True):
+        self.key = key
+        self.header = header
+        self.width = width
+        self.format = format
+        self.right = right
+
+class Pane:
+    """
+    Tabla de un panel del dashboard con orden y filtro propios. 'filter_keys' son los campos de
+    cada fila sobre los que se busca la expresión regular del filtro.
+    """
+    __slots__ = ("title", "columns", "sort_keys", "sort", "reverse", "filter_keys", "pattern", "offset", "source", "rows")
+
+    def __init__(self, title, columns, sort_keys, filter_keys, reverse=True):
+        self.title = title
+        self.columns = columns
+        self.sort_keys = sort_keys
+        self.sort = sort_keys[0]
+        self.reverse = reverse
+        self.filter_keys = filter_keys
+        self.pattern = None
+        self.offset = 0     # Primera fila visible
+        self.source = []    # Filas (diccionarios) del último muestreo
+        self.rows = []      # Las mismas, filtradas y ordenadas
+
+    def set_filter(self, text):
+        """Filtro sin distinguir mayúsculas; vacío lo quita. Lanza re.error si la expresión no es válida."""
+        self.pattern = re.compile(text, re.IGNORECASE) if text else None
+        self.offset = 0
+
+    def cycle_sort(self, step=1):
+        self.sort = self.sort_keys[(self.sort_keys.index(self.sort) + step) % len(self.sort_keys)]
+
+    def update(self, rows=None):
+        """Filtra y ordena 'rows' (o, sin ellas, las del último muestreo tras cambiar el orden o el filtro)."""
+        if rows is not None:
+            self.source = rows
+        rows = self.source
+        if self.pattern:
+            rows = [row for row in rows if any(self.pattern.search(str(row.get(key, ""))) for key in self.filter_keys)]
+        key = self.sort
+        present = sorted((row for row in rows if row[key] is not None), key=lambda row: row[key], reverse=self.reverse)
+        self.rows = present + [row for row in rows if row[key] is None] # Sin valor (montaje sin respuesta): al final
+
+    def scroll(self, delta, visible):
+        self.offset = max(min(self.offset + delta, len(self.rows) - visible), 0)
+
+    def render(self, width, height, focused):
+        """Líneas [(texto, atributo)] del panel, cada una de 'width' caracteres exactos."""
+        order = f"{self.sort} {'↓' if self.reverse else '↑'}"
+        title = f" {self.title} ({len(self.rows)}) · orden: {order}" + (f" · filtro: {self.pattern.pattern}" if self.pattern else "")
+        lines = [(title[:width].ljust(width), curses.A_REVERSE if focused else curses.A_BOLD)]
+        # Columnas que caben en el ancho, en el orden en que se definieron; la flexible ocupa el resto
+        columns, used = [], 0
+        for column in self.columns:
+            if column.width is None or used + column.width + 1 <= width:
+                columns.append(column)
+                used += (column.width or 0) + 1
+        flexible = max(width - used, 0)
+        widths = [column.width if column.width is not None else flexible for column in columns]
+
+        def row_text(values):
+            cells = [(value.rjust(w) if column.right else value.ljust(w))[:w] for column, value, w in zip(columns, values, widths)]
+            return " ".join(cells)[:width].ljust(width)
+
+        lines.append((row_text([column.header for column in columns]), curses.A_UNDERLINE))
+        visible = max(height - 2, 0)
+        self.offset = max(min(self.offset, len(self.rows) - visible), 0)
+        for row in self.rows[self.offset:self.offset + visible]:
+            lines.append((row_text([column.format(row[column.key]) for column in columns]), curses.A_NORMAL))
+        lines += [(" " * width, curses.A_NORMAL)] * (height - len(lines))
+        return lines[:height]
+
+class DiffScreen:
+    """
+    Capa sobre una ventana de curses que recuerda el texto y el atributo de cada segmento escrito
+    en el fotograma anterior y solo vuelve a escribir los que cambiaron. curses, a su vez, solo
+    envía al terminal las celdas distintas de las que ya muestra: por una conexión lenta viajan
+    unos pocos bytes por refresco en lugar de la pantalla entera.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.previous = {}
+        self.current = {}
+        self.written = 0 # Segmentos reescritos en el último flush()
+
+    def put(self, y, x, text, attr=curses.A_NORMAL):
+        self.current[(y, x)] = (text, attr)
+
+    def invalidate(self):
+        """Olvida el fotograma anterior (cambio de tamaño o de disposición): el siguiente se dibuja entero."""
+        self.previous = {}
+        self.window.erase()
+
+    def flush(self):
+        self.written = 0
+        for (y, x), (text, attr) in self.previous.items():
+            if (y, x) not in self.current:
+                self._write(y, x, " " * len(text), curses.A_NORMAL)
+        for position, value in self.current.items():
+            if self.previous.get(position) != value:
+                self._write(position[0], position[1], value[0], value[1])
+                self.written += 1
+        self.previous, self.current = self.current, {}
+        self.window.noutrefresh()
+        curses.doupdate()
+
+    def _write(self, y, x, text, attr):
+        try:
+            self.window.addstr(y, x, text, attr)
+        except curses.error:
+            pass # Escribir en la última celda de la pantalla mueve el cursor fuera y curses lo señala como error
+
+def _percent(value):
+    return f"{value:.1f}" if value is not None else "-"
+
+def _bar(percent, width):
+    filled = int(round(width * min(max(percent, 0.0), 100.0) / 100))
+    return "[" + "|" * filled + " " * (width - filled) + "]"
+
+def _uptime(seconds):
+    days, seconds = divmod(int(seconds), 86400)
+    hours, seconds = divmod(seconds, 3600)
+    return (f"{days}d " if days else "") + f"{hours:02d}:{seconds // 60:02d}"
+
+def build_panes():
+    """Paneles del dashboard: procesos, E/S de disco, sistemas de ficheros y red."""
+    processes = Pane("Procesos", [
+        Column("pid", "PID", 7), Column("user", "USUARIO", 10, right=False),
+        Column("cpu_percent", "%CPU", 6, _percent), Column("mem_percent", "%MEM", 5, _percent),
+        Column("rss", "RSS", 9, format_bytes), Column("state", "S", 1, right=False), Column("threads", "THR", 4),
+        Column("command", "COMANDO", None, right=False)],
+        ("cpu_percent", "rss", "mem_percent", "pid", "user", "name", "threads", "cpu_time"), ("name", "command", "user"))
+    disks = Pane("Discos: E/S", [
+        Column("device", "DISPOSITIVO", 11, right=False), Column("utilization", "%USO", 6, _percent),
+        Column("read_iops", "r/s", 7, lambda v: f"{v:.0f}"), Column("write_iops", "w/s", 7, lambda v: f"{v:.0f}"),
+        Column("read_bytes", "LECTURA", 11, format_throughput), Column("write_bytes", "ESCRITURA", 11, format_throughput),
+        Column("await", "AWAIT ms", 9, lambda v: f"{v:.2f}")],
+        ("utilization", "total_bytes", "iops", "await", "queue_depth", "device"), ("device",))
+    filesystems = Pane("Sistemas de ficheros", [
+        Column("mountpoint", "MONTAJE", 18, right=False), Column("percent", "USO%", 6, _percent),
+        Column("used", "USADO", 10, lambda v: format_bytes(v) if v is not None else "-"),
+        Column("available", "DISP", 10, lambda v: format_bytes(v) if v is not None else "SIN RESP."),
+        Column("fstype", "TIPO", 8, right=False), Column("source", "ORIGEN", None, right=False)],
+        ("percent", "used", "available", "mountpoint"), ("mountpoint", "source", "fstype"))
+    network = Pane("Red", [
+        Column("interface", "INTERFAZ", 12, right=False), Column("rx_bytes", "RX", 11, format_rate),
+        Column("tx_bytes", "TX", 11, format_rate), Column("rx_packets", "PAQ RX/s", 9, lambda v: f"{v:.0f}"),
+        Column("tx_packets", "PAQ TX/s", 9, lambda v: f"{v:.0f}"), Column("errors", "ERR/s", 6, lambda v: f"{v:.1f}"),
+        Column("dropped", "DESC/s", 7, lambda v: f"{v:.1f}")],
+        ("total_bytes", "rx_bytes", "tx_bytes", "total_packets", "errors", "dropped", "interface"), ("interface",))
+    return [processes, disks, filesystems, network]
+
+class DashboardCollector:
+    """
+    Reúne los datos de un refresco con los muestreadores incrementales de /proc: CPU y memoria,
+    tabla de procesos (solo se relee /proc/[pid]/stat de los conocidos), tráfico y E/S por delta
+    de contadores. El uso de los montajes (statvfs) se consulta cada 'mount_refresh' segundos en
+    un hilo aparte para que un NFS colgado no congele la pantalla.
+    """
+
+    def __init__(self, mount_refresh=30.0, statvfs_timeout=2.0, statvfs_workers=16):
+        self.cpu = CpuMemorySampler()
+        self.processes = ProcessSnapshot()
+        self.traffic = TrafficSampler()
+        self.disk_io = DiskIoSampler(partitions=False)
+        self.mount_refresh = mount_refresh
+        self.statvfs_timeout = statvfs_timeout
+        self.statvfs_workers = statvfs_workers
+        self.mounts = []
+        self._mounts_time = None
+        self._mounts_thread = None
+        self.processes.refresh()
+        self.traffic.sample_once()
+        self.disk_io.sample_once()
+
+    def _refresh_mounts(self):
+        try:
+            entries = mount_usage(timeout=self.statvfs_timeout, workers=self.statvfs_workers)
+        except OSError:
+            return
+        self.mounts = [entry.to_dict() for entry in entries]
+
+    def sample(self):
+        """Retorna {'summary': muestra de CpuMemorySampler, 'uptime', 'rows': [filas de cada panel]}."""
+        if (self._mounts_time is None or time.monotonic() - self._mounts_time >= self.mount_refresh) and \
+                not (self._mounts_thread and self._mounts_thread.is_alive()):
+            self._mounts_time = time.monotonic()
+            self._mounts_thread = threading.Thread(target=self._refresh_mounts, daemon=True)
+            self._mounts_thread.start()
+        summary = self.cpu.sample()
+        self.processes.refresh()
+        processes = []
+        for record in self.processes.processes():
+            row = record.to_dict()
+            row["command"] = " ".join(record.cmdline.split())
+            row["cpu_time"] = record.cpu_time
+            processes.append(row)
+        disks = [dict(rates, device=device) for device, rates in self.disk_io.sample_once().items()]
+        network = [dict(rates, interface=name) for name, rates in self.traffic.sample_once().items()]
+        return {"summary": summary, "uptime": read_uptime(), "rows": [processes, disks, list(self.mounts), network]}
+
+class Dashboard:
+    """Estado de la pantalla: paneles, panel con el foco, intervalo y mensaje de estado."""
+
+    def __init__(self, window, collector, interval, middle_rows):
+        self.window = window
+        self.screen = DiffScreen(window)
+        self.collector = collector
+        self.interval = interval
+        self.middle_rows = middle_rows
+        self.panes = build_panes()
+        self.focus = 0
+        self.data = None
+        self.layout = None
+        self.message = ""
+        self.hostname = socket.gethostname()
+        self.frames = 0
+        self.segments_written = 0
+
+    def refresh_data(self):
+        self.data = self.collector.sample()
+        for pane, rows in zip(self.panes, self.data["rows"]):
+            pane.update(rows)
+
+    def _summary_lines(self, width):
+        summary = self.data["summary"]
+        cpu, memory, load = summary["cpu_total"], summary["memory"], summary["load"]
+        lines = [(f" {self.hostname}  {time.strftime('%H:%M:%S')}  activo {_uptime(self.data['uptime'])}  "
+                  f"carga {load['load1']:.2f} {load['load5']:.2f} {load['load15']:.2f}  "
+                  f"tareas {load['running']}/{load['total_tasks']}  cada {self.interval:g} s", curses.A_BOLD)]
+        bar = max(min(width - 60, 40), 10)
+        lines.append((f" CPU {_bar(cpu['usage'], bar)} {cpu['usage']:5.1f}%  us {cpu['user']:.1f}  sy {cpu['system']:.1f}  "
+                      f"wa {cpu['iowait']:.1f}  st {cpu['steal']:.1f}", curses.A_NORMAL))
+        # Núcleos en columnas de 16 caracteres, como mucho en 3 líneas
+        per_line = max(width // 16, 1)
+        cores = summary["cpu_cores"]
+        core_lines = min((len(cores) + per_line - 1) // per_line, 3)
+        for line in range(core_lines):
+            chunk = cores[line * per_line:(line + 1) * per_line]
+            text = "".join(f" {core['id']:>3}{_bar(core['usage'], 6)}{core['usage']:3.0f}%" for core in chunk)
+            if line == core_lines - 1 and (line + 1) * per_line < len(cores):
+                text = text[:-6] + f" +{len(cores) - (line + 1) * per_line}"
+            lines.append((text, curses.A_NORMAL))
+        lines.append((f" Mem {_bar(memory['percent'], bar)} {memory['percent']:5.1f}%  {format_bytes(memory['used'])} de "
+                      f"{format_bytes(memory['total'])}  caché {format_bytes(memory['cached'])}  swap "
+                      f"{format_bytes(memory['swap_used'])}/{format_bytes(memory['swap_total'])}", curses.A_NORMAL))
+        return [(text[:width].ljust(width), attr) for text, attr in lines]
+
+    def _pane_rects(self, top, height, width):
+        """
+        Disposición: los paneles de disco, sistemas de ficheros y red se reparten en columnas (tantas
+        como quepan) con hasta 'middle_rows' filas cada uno; los procesos ocupan el resto. Retorna
+        {panel: (y, x, alto, ancho)}; los que no caben no aparecen.
+        """
+        middle = self.panes[1:]
+        per_row = max(min(width // PANE_MIN_WIDTH, len(middle)), 1)
+        bands = [middle[i:i + per_row] for i in range(0, len(middle), per_row)]
+        # Si no caben todas, la banda del panel con el foco va primero para que siempre se vea
+        bands.sort(key=lambda band: self.panes[self.focus] not in band)
+        rects = {}
+        y = top
+        for band in bands:
+            band_height = min(max(len(pane.rows) for pane in band) + 2, self.middle_rows + 2)
+            if height - (y - top) - band_height < max(height // 3, 5):
+                break # Los procesos conservan al menos un tercio de la altura
+            x = 0
+            for index, pane in enumerate(band):
+                pane_width = (width - x) // (len(band) - index)
+                rects[pane] = (y, x, band_height, pane_width - (1 if index < len(band) - 1 else 0))
+                x += pane_width
+            y += band_height
+        rects[self.panes[0]] = (y, 0, height - (y - top), width)
+        return rects
+
+    def draw(self):
+        height, width = self.window.getmaxyx()
+        if width < MIN_WIDTH or height < MIN_HEIGHT:
+            layout = ("small", height, width)
+            if layout != self.layout:
+                self.layout = layout
+                self.screen.invalidate()
+            self.screen.put(0, 0, f"Terminal demasiado pequeño ({width}x{height}; mínimo {MIN_WIDTH}x{MIN_HEIGHT})."[:width - 1])
+            self.screen.flush()
+            return
+        summary = self._summary_lines(width)
+        rects = self._pane_rects(len(summary), height - len(summary) - 1, width)
+        # Cualquier cambio de geometría obliga a redibujar todo: los segmentos viejos ya no encajan
+        layout = (height, width, len(summary), tuple(sorted((pane.title, rect) for pane, rect in rects.items())))
+        if layout != self.layout:
+            self.layout = layout
+            self.screen.invalidate()
+        for y, (text, attr) in enumerate(summary):
+            self.screen.put(y, 0, text, attr)
+        for index, pane in enumerate(self.panes):
+            if pane not in rects:
+                continue
+            y, x, pane_height, pane_width = rects[pane]
+            for offset, (text, attr) in enumerate(pane.render(pane_width, pane_height, index == self.focus)):
+                self.screen.put(y + offset, x, text, attr)
+        # Sin tocar la última columna: escribir en la esquina inferior derecha haría desplazar la pantalla
+        footer = self.message or HELP
+        status = f"{self.screen.written} líneas "
+        self.screen.put(height - 1, 0, f" {footer}"[:width - len(status) - 2].ljust(width - len(status) - 2) + status,
+                        curses.A_REVERSE if self.message else curses.A_DIM)
+        self.screen.flush()
+        self.frames += 1
+        self.segments_written += self.screen.written
+
+    def visible_rows(self, pane):
+        if not self.layout or self.layout[0] == "small":
+            return 1
+        for title, rect in self.layout[3]:
+            if title == pane.title:
+                return max(rect[2] - 2, 1)
+        return 1
+
+    def prompt(self, label):
+        """Lee una línea en la última fila (modo bloqueante, con eco). Retorna el texto o None con Esc/error."""
+        height, width = self.window.getmaxyx()
+        self.window.move(height - 1, 0)
+        self.window.clrtoeol()
+        self.window.addstr(height - 1, 0, label[:width - 1], curses.A_BOLD)
+        curses.echo()
+        self._cursor(1)
+        self.window.timeout(-1)
+        try:
+            text = self.window.getstr(height - 1, min(len(label), width - 2), 80).decode(errors="replace").strip()
+        except curses.error:
+            text = None
+        finally:
+            curses.noecho()
+            self._cursor(0)
+        self.layout = None # La última fila quedó escrita fuera de DiffScreen
+        return text
+
+    def _cursor(self, visibility):
+        try:
+            curses.curs_set(visibility)
+        except curses.error:
+            pass # Terminales sin control del cursor
+
+    def handle_key(self, key):
+        """Aplica una tecla. Retorna False para salir."""
+        pane = self.panes[self.focus]
+        self.message = ""
+        if key in (ord("q"), ord("Q"), 27):
+            return False
+        if key == ord("\t"):
+            self.focus = (self.focus + 1) % len(self.panes)
+        elif key == curses.KEY_BTAB:
+            self.focus = (self.focus - 1) % len(self.panes)
+        elif key == ord("s"):
+            pane.cycle_sort(1)
+        elif key == ord("S"):
+            pane.cycle_sort(-1)
+        elif key == ord("r"):
+            pane.reverse = not pane.reverse
+        elif key == ord("/"):
+            text = self.prompt(f"Filtro de {pane.title} (expresión regular, vacío para quitar): ")
+            if text is not None:
+                try:
+                    pane.set_filter(text)
+                except re.error as e:
+                    self.message = f"Expresión regular inválida: {e}"
+        elif key in (ord("+"), ord("=")): # Sin mover el muestreo en curso: el nuevo intervalo rige desde el siguiente
+            self.interval = next((step for step in INTERVALS if step > self.interval), self.interval)
+        elif key == ord("-"):
+            self.interval = next((step for step in reversed(INTERVALS) if step < self.interval), self.interval)
+        elif key in (curses.KEY_DOWN, curses.KEY_UP, curses.KEY_NPAGE, curses.KEY_PPAGE, curses.KEY_HOME):
+            visible = self.visible_rows(pane)
+            delta = {curses.KEY_DOWN: 1, curses.KEY_UP: -1, curses.KEY_NPAGE: visible, curses.KEY_PPAGE: -visible,
+                     curses.KEY_HOME: -len(pane.rows)}[key]
+            pane.scroll(delta, visible)
+        elif key == curses.KEY_RESIZE:
+            self.layout = None
+        return True
+
+    def run(self):
+        self._cursor(0)
+        self.window.keypad(True)
+        curses.set_escdelay(25) # Esc responde al momento en lugar de esperar 1 s a una secuencia
+        self.refresh_data()
+        next_sample = time.monotonic() + self.interval
+        while True:
+            self.draw()
+            self.window.timeout(max(int((next_sample - time.monotonic()) * 1000), 0))
+            key = self.window.getch()
+            if key == -1:
+                self.refresh_data()
+                next_sample = max(next_sample + self.interval, time.monotonic())
+                continue
+            if not self.handle_key(key):
+                return
+            # Un cambio de orden o de filtro se aplica a los datos actuales sin esperar al siguiente muestreo
+            self.panes[self.focus].update()
+
+def run_dashboard(interval=2.0, mount_refresh=30.0, middle_rows=6, statvfs_timeout=2.0, statvfs_workers=16):
+    """
+    Abre el dashboard en vivo a pantalla completa hasta que se pulse 'q'. Retorna
+    {'frames': refrescos dibujados, 'segments': segmentos reescritos, 'elapsed': segundos}.
+    """
+    started = time.monotonic()
+    collector = DashboardCollector(mount_refresh, statvfs_timeout, statvfs_workers)
+
+    def main(window):
+        dashboard = Dashboard(window, collector, interval, middle_rows)
+        try:
+            dashboard.run()
+        except KeyboardInterrupt:
+            pass
+        return dashboard
+
+    dashboard = curses.wrapper(main)
+    return {"frames": dashboard.frames, "segments": dashboard.segments_written, "elapsed": time.monotonic() - started,
+            "interval": dashboard.interval}
@@ -0,0 +1,115 @@
+import heapq
+import os
+from utils.counter_sampler import CounterSampler, counter_delta
+
+PROC_DISKSTATS = "/proc/diskstats"
+SYS_CLASS_BLOCK = "/sys/class/block"
+SECTOR = 512 # /proc/diskstats cuenta sectores de 512 bytes
+
+# Campos acumulados de /proc/diskstats (tras major, minor y nombre) que se usan: lecturas y
+# escrituras completadas, sectores, ms dedicados a cada tipo, E/S en curso, ms con E/S activa
+# (io_ticks) y ms ponderados por la cola (time_in_queue). Ver Documentation/admin-guide/iostats.rst.
+COUNTERS = ("reads", "sectors_read", "read_ms", "writes", "sectors_written", "write_ms", "in_flight", "io_ms", "queue_ms")
+COLUMNS = (3, 5, 6, 7, 9, 10, 11, 12, 13)
+# Métricas derivadas que se guardan en el historial de cada dispositivo
+HISTORY_METRICS = ("iops", "read_bytes", "write_bytes", "await", "queue_depth", "utilization")
+SORT_KEYS = ("utilization", "iops", "total_bytes", "read_bytes", "write_bytes", "await", "queue_depth")
+
+def read_diskstats(path=PROC_DISKSTATS):
+    """Lee los contadores de /proc/diskstats. Retorna {dispositivo: tupla de COUNTERS}."""
+    counters = {}
+    with open(path, "rb") as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 14:
+                counters[fields[2].decode(errors="replace")] = tuple(int(fields[i]) for i in COLUMNS)
+    return counters
+
+def is_partition(device):
+    """Indica si el dispositivo es una partición (/sys/class/block/<dispositivo>/partition)."""
+    return os.path.exists(f"{SYS_CLASS_BLOCK}/{device}/partition")
+
+def device_rates(before, after, elapsed):
+    """
+    Métricas de un dispositivo entre dos lecturas separadas 'elapsed' segundos, como las de
+    'iostat -x': IOPS, bytes/s, latencia media por petición (ms), profundidad media de la cola
+    y % del tiempo con E/S en curso.
+    """
+    delta = {key: counter_delta(b, a) for key, b, a in zip(COUNTERS, before, after) if key != "in_flight"}
+    elapsed_ms = elapsed * 1000
+    requests = delta["reads"] + delta["writes"]
+    rates = {
+        "read_iops": delta["reads"] / elapsed,
+        "write_iops": delta["writes"] / elapsed,
+        "iops": requests / elapsed,
+        "read_bytes": delta["sectors_read"] * SECTOR / elapsed,
+        "write_bytes": delta["sectors_written"] * SECTOR / elapsed,
+        "read_await": delta["read_ms"] / delta["reads"] if delta["reads"] else 0.0,
+        "write_await": delta["write_ms"] / delta["writes"] if delta["writes"] else 0.0,
+        "await": (delta["read_ms"] + delta["write_ms"]) / requests if requests else 0.0,
+        "queue_depth": delta["queue_ms"] / elapsed_ms,
+        # En dispositivos que atienden peticiones en paralelo (NVMe, RAID) el 100% no implica saturación
+        "utilization": min(100.0 * delta["io_ms"] / elapsed_ms, 100.0),
+        "in_flight": after[COUNTERS.index("in_flight")],
+    }
+    rates["total_bytes"] = rates["read_bytes"] + rates["write_bytes"]
+    return rates
+
+class DiskIoSampler(CounterSampler):
+    """
+    Muestreo periódico de la actividad de los dispositivos de bloques (ver utils.counter_sampler)
+    a partir de /proc/diskstats, con historial de HISTORY_METRICS. Sin 'partitions' solo se
+    muestrean discos completos (y dm/md/loop); los dispositivos sin ninguna E/S desde el arranque
+    (loop libres) se ignoran. 'pattern' limita los dispositivos (expresión regular).
+    """
+    HISTORY_METRICS = HISTORY_METRICS
+
+    def __init__(self, interval=1.0, history_seconds=300, pattern=None, partitions=True, path=PROC_DISKSTATS):
+        super().__init__(interval, history_seconds, pattern, path)
+        self.partitions = partitions
+        self._is_partition = {}
+
+    def _wanted(self, device, values):
+        if not any(values):
+            return False
+        if self.pattern and not self.pattern.search(device):
+            return False
+        if not self.partitions:
+            if device not in self._is_partition:
+                self._is_partition[device] = is_partition(device)
+            return not self._is_partition[device]
+        return True
+
+    def read_counters(self):
+        return {device: values for device, values in read_diskstats(self.path).items() if self._wanted(device, values)}
+
+    def compute_rates(self, before, after, elapsed):
+        return device_rates(before, after, elapsed)
+
+    def forget(self, device):
+        self._is_partition.pop(device, None)
+
+    def top(self, n=10, key="utilization"):
+        """Los 'n' dispositivos más ocupados en la última muestra según 'key'. Retorna [{'device', ...métricas}]."""
+        with self._lock:
+            latest = dict(self.latest)
+        return [dict(latest[device], device=device) for device in heapq.nlargest(n, latest, key=lambda d: latest[d][key])]
+
+def format_throughput(bytes_per_second):
+    """Caudal legible en bytes por segundo (como lo expresa 'iostat')."""
+    value = bytes_per_second
+    for unit in ("B/s", "KB/s", "MB/s", "GB/s"):
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TB/s"
+
+def format_top(entries):
+    """Tabla de los dispositivos más ocupados, con las columnas de 'iostat -x'."""
+    lines = [f"{'Dispositivo':<14}{'r/s':>8}{'w/s':>8}{'Lectura':>12}{'Escritura':>12}{'r_await':>9}{'w_await':>9}"
+             f"{'Cola':>7}{'%Uso':>7}"]
+    for e in entries:
+        lines.append(f"{e['device'][:13]:<14}{e['read_iops']:>8.1f}{e['write_iops']:>8.1f}{format_throughput(e['read_bytes']):>12}"
+                     f"{format_throughput(e['write_bytes']):>12}{e['read_await']:>9.2f}{e['write_await']:>9.2f}"
+                     f"{e['queue_depth']:>7.2f}{e['utilization']:>6.1f}%")
+    return "\n".join(lines)
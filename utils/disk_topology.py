@@ -0,0 +1,165 @@
+import os
+from utils.display import format_bytes
+from utils.mount_table import read_mountinfo, MOUNTINFO
+
+SYS_BLOCK = "/sys/block"
+PROC_PARTITIONS = "/proc/partitions"
+UDEV_DATA = "/run/udev/data"
+SECTOR = 512 # /sys/block/*/size siempre cuenta sectores de 512 bytes, sea cual sea el tamaño físico
+
+class BlockDevice:
+    """Dispositivo de bloques: disco, partición, volumen device-mapper, RAID md, loop..."""
+    __slots__ = ("name", "major", "minor", "size", "kind", "parent", "model", "serial", "rotational", "removable",
+                 "read_only", "fstype", "uuid", "label", "mountpoints", "children")
+
+    def __init__(self, name, major, minor, size, kind):
+        self.name = name
+        self.major = major
+        self.minor = minor
+        self.size = size
+        self.kind = kind
+        self.parent = None       # Disco de una partición
+        self.model = None
+        self.serial = None
+        self.rotational = None
+        self.removable = None
+        self.read_only = None
+        self.fstype = None       # Del montaje o, si no está montado, de la base de datos de udev
+        self.uuid = None
+        self.label = None
+        self.mountpoints = []
+        self.children = []       # Particiones y dispositivos construidos encima (LVM, LUKS, md)
+
+    @property
+    def device(self):
+        return f"{self.major}:{self.minor}"
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+def _read(path, default=None):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return default
+
+def read_partitions(path=PROC_PARTITIONS):
+    """{nombre: (major, minor, tamaño en bytes)} de /proc/partitions (solo dispositivos con tamaño)."""
+    partitions = {}
+    with open(path) as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) == 4 and fields[0].isdigit():
+                partitions[fields[3]] = (int(fields[0]), int(fields[1]), int(fields[2]) * 1024)
+    return partitions
+
+def udev_properties(major, minor, udev_data=UDEV_DATA):
+    """Propiedades 'E:' que udev guardó del dispositivo (ID_FS_TYPE, ID_FS_UUID...), o {} sin udev."""
+    properties = {}
+    try:
+        with open(f"{udev_data}/b{major}:{minor}") as f:
+            for line in f:
+                if line.startswith("E:"):
+                    key, _, value = line[2:].rstrip("\n").partition("=")
+                    properties[key] = value
+    except OSError:
+        pass
+    return properties
+
+def _kind(name, sys_path):
+    if os.path.exists(f"{sys_path}/partition"):
+        return "part"
+    if name.startswith("dm-"):
+        uuid = _read(f"{sys_path}/dm/uuid", "")
+        return "lvm" if uuid.startswith("LVM-") else "crypt" if uuid.startswith("CRYPT-") else "dm"
+    if name.startswith("md"):
+        return _read(f"{sys_path}/md/level") or "md"
+    if name.startswith("loop"):
+        return "loop"
+    if name.startswith("sr"):
+        return "rom"
+    return "disk"
+
+def read_block_devices(sys_block=SYS_BLOCK, partitions_path=PROC_PARTITIONS, mountinfo_path=MOUNTINFO, udev_data=UDEV_DATA):
+    """
+    Modelo de discos sin lsblk: /proc/partitions da los dispositivos presentes y su tamaño,
+    /sys/block los atributos, particiones y dispositivos apilados (holders), y mountinfo los
+    puntos de montaje. Retorna {nombre: BlockDevice}; las raíces son los que no tienen padre.
+    """
+    partitions = read_partitions(partitions_path)
+    devices = {}
+    holders = {}
+    for disk in sorted(os.listdir(sys_block)):
+        disk_path = f"{sys_block}/{disk}"
+        paths = [(disk, disk_path, None)]
+        try:
+            paths += [(entry, f"{disk_path}/{entry}", disk) for entry in sorted(os.listdir(disk_path))
+                      if entry.startswith(disk) and os.path.exists(f"{disk_path}/{entry}/partition")]
+        except OSError:
+            continue
+        for name, path, parent in paths:
+            if name not in partitions:
+                continue # Sin tamaño: loop sin fichero asociado, lector de tarjetas vacío...
+            major, minor, size = partitions[name]
+            sectors = _read(f"{path}/size")
+            device = BlockDevice(name, major, minor, int(sectors) * SECTOR if sectors and sectors.isdigit() else size,
+                                 _kind(name, path))
+            device.parent = parent
+            if parent is None:
+                device.model = " ".join(filter(None, (_read(f"{path}/device/vendor"), _read(f"{path}/device/model")))) or None
+                device.serial = _read(f"{path}/device/serial") or _read(f"{path}/serial")
+                device.rotational = _read(f"{path}/queue/rotational") == "1"
+                device.removable = _read(f"{path}/removable") == "1"
+            device.read_only = _read(f"{path}/ro") == "1"
+            if device.kind in ("lvm", "crypt", "dm"):
+                device.label = _read(f"{path}/dm/name")
+            try:
+                holders[name] = sorted(os.listdir(f"{path}/holders"))
+            except OSError:
+                holders[name] = []
+            devices[name] = device
+
+    for name, device in devices.items():
+        if device.parent in devices:
+            devices[device.parent].children.append(name)
+        device.children += [holder for holder in holders.get(name, []) if holder in devices]
+
+    by_number = {(device.major, device.minor): device for device in devices.values()}
+    for entry in read_mountinfo(mountinfo_path):
+        device = by_number.get((entry.major, entry.minor))
+        if device is not None:
+            device.mountpoints.append(entry.mountpoint if entry.root == "/" else f"{entry.mountpoint} [{entry.root}]")
+            device.fstype = device.fstype or entry.fstype
+    for device in devices.values():
+        properties = udev_properties(device.major, device.minor, udev_data)
+        device.fstype = device.fstype or properties.get("ID_FS_TYPE") or None
+        device.uuid = properties.get("ID_FS_UUID") or None
+        if device.label is None:
+            device.label = properties.get("ID_FS_LABEL") or None
+    return devices
+
+def root_devices(devices):
+    """Dispositivos que no cuelgan de otro (discos y dispositivos virtuales sin componentes listados)."""
+    stacked = {child for device in devices.values() for child in device.children}
+    return [device for name, device in devices.items() if name not in stacked]
+
+def format_block_tree(devices):
+    """Árbol legible al estilo de 'lsblk'."""
+    lines = [f"{'NOMBRE':<24}{'MAJ:MIN':<9}{'TAMAÑO':>10} {'TIPO':<6}{'FSTYPE':<10}{'MODELO':<20}MONTAJE"]
+
+    def add(device, prefix, branch):
+        name = f"{prefix}{branch}{device.name}"
+        if device.label and device.kind in ("lvm", "crypt", "dm"):
+            name += f" ({device.label})"
+        mounts = ", ".join(device.mountpoints)
+        lines.append(f"{name:<24}{device.device:<9}{format_bytes(device.size):>10} {device.kind:<6}"
+                     f"{(device.fstype or '')[:9]:<10}{(device.model or '')[:19]:<20}{mounts}")
+        children = [devices[child] for child in device.children]
+        child_prefix = prefix + {"": "", "├─": "│ ", "└─": "  "}[branch]
+        for index, child in enumerate(children):
+            add(child, child_prefix, "└─" if index == len(children) - 1 else "├─")
+
+    for device in root_devices(devices):
+        add(device, "", "")
+    return "\n".join(lines)
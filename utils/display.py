@@ -1,8 +1,19 @@
 import os
+import sys
+
+# Cursor al inicio, borrar pantalla y borrar el historial de desplazamiento (lo mismo que envía 'clear')
+CLEAR_SEQUENCE = "\033[H\033[2J\033[3J"
 
 def clear_screen():
-    """Limpia la pantalla de la terminal."""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    """
+    Limpia la pantalla de la terminal. En POSIX escribe la secuencia de escape directamente en
+    lugar de lanzar una shell y 'clear' en cada menú; si la salida no es una terminal no escribe nada.
+    """
+    if os.name == 'nt':
+        os.system('cls')
+    elif sys.stdout.isatty():
+        sys.stdout.write(CLEAR_SEQUENCE)
+        sys.stdout.flush()
 
 def print_header(title):
     """Imprime un encabezado formateado."""
@@ -30,4 +41,12 @@ def print_error(message):
 
 def get_user_input(prompt):
     """Obtiene la entrada del usuario con un prompt."""
-    return input(f"\n{prompt}: ").strip()
\ No newline at end of file
+    return input(f"\n{prompt}: ").strip()
+
+def format_bytes(num_bytes):
+    """Convierte un número de bytes a una cadena legible (B, KB, MB, GB, TB)."""
+    value = float(num_bytes)
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if abs(value) < 1024 or unit == "TB":
+            return f"{value:.1f} {unit}" if unit != "B" else f"{int(value)} B"
+        value /= 1024
@@ -0,0 +1,334 @@
+import collections
+import concurrent.futures
+import gzip
+import hashlib
+import itertools
+import json
+import os
+import re
+import stat
+import time
+from utils.display import format_bytes
+
+CACHE_VERSION = 1
+PARTIAL_BYTES = 64 * 1024   # Bytes del principio y del final que entran en el hash parcial
+CHUNK = 1 << 20             # Lectura del hash completo por bloques: memoria acotada por hilo
+CHECKPOINT_SECONDS = 30     # Cada cuánto se guarda la caché de hashes mientras se calculan
+ELF_CORE = b"\x7fELF"
+ET_CORE = 4
+# Sufijo de rotación: syslog.1, app.log.2.gz, messages-20240101, kern.log.gz... Solo cuenta si el
+# fichero está bajo un directorio 'log'/'logs' o su nombre sin el sufijo termina en '.log'
+ROTATED_SUFFIX = re.compile(r"(?:[.-]\d+(?:\.(?:gz|bz2|xz|zst|lz4))?|\.(?:gz|bz2|xz|zst|lz4))$")
+# core, core.1234, programa.core, core.*.zst de systemd-coredump y *.crash de apport (/var/crash)
+CORE_NAME = re.compile(r"^core(\.\d+)?$|\.core$|^core\..+\.(zst|lz4|xz)$|\.crash$")
+COREDUMP_DIRS = ("/var/lib/systemd/coredump", "/var/crash", "/var/lib/apport/coredump")
+
+class FileInfo:
+    """Fichero candidato: ruta, tamaño, identidad (dispositivo, inode), mtime y número de enlaces."""
+    __slots__ = ("path", "size", "device", "inode", "mtime", "nlink", "links")
+
+    def __init__(self, path, size, device, inode, mtime, nlink=1):
+        self.path = path
+        self.size = size
+        self.device = device
+        self.inode = inode
+        self.mtime = mtime
+        self.nlink = nlink
+        self.links = [] # Otras rutas del mismo inode (enlaces duros): no liberan espacio
+
+    def freeable(self):
+        """True si todos los enlaces del inode están en el análisis: borrarlos libera el espacio."""
+        return self.nlink <= 1 + len(self.links)
+
+class ReclaimReport:
+    """Resultado de find_reclaimable()."""
+    __slots__ = ("root", "duplicates", "rotated_logs", "core_dumps", "stats")
+
+    def __init__(self, root):
+        self.root = root
+        self.duplicates = []    # [{'size', 'hash', 'paths', 'links', 'reclaimable'}], de más a menos espacio recuperable
+        self.rotated_logs = []  # [{'path', 'size', 'age_days'}]
+        self.core_dumps = []    # [{'path', 'size', 'age_days'}]
+        self.stats = {"files": 0, "errors": 0, "size_groups": 0, "partial_hashed": 0,
+                      "full_hashed": 0, "bytes_read": 0, "cache_hits": 0, "elapsed": 0.0}
+
+    def to_dict(self):
+        data = {slot: getattr(self, slot) for slot in self.__slots__}
+        data["reclaimable"] = {"duplicates": sum(group["reclaimable"] for group in self.duplicates),
+                               "rotated_logs": sum(entry["size"] for entry in self.rotated_logs),
+                               "core_dumps": sum(entry["size"] for entry in self.core_dumps)}
+        return data
+
+def is_core_dump(path):
+    """Cabecera ELF con e_type == ET_CORE (lee 18 bytes)."""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(18)
+    except OSError:
+        return False
+    if len(header) < 18 or header[:4] != ELF_CORE:
+        return False
+    byteorder = "little" if header[5] == 1 else "big"
+    return int.from_bytes(header[16:18], byteorder) == ET_CORE
+
+def walk_files(root, one_filesystem=True, on_error=None):
+    """
+    Recorre 'root' con os.scandir sin seguir enlaces simbólicos. Genera (ruta, os.stat_result) de
+    cada fichero regular. Con 'one_filesystem' no entra en otros puntos de montaje.
+    """
+    device = os.stat(root).st_dev
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as e:
+            if on_error:
+                on_error(directory, e)
+            continue
+        for entry in entries:
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if stat.S_ISDIR(st.st_mode):
+                if not one_filesystem or st.st_dev == device:
+                    stack.append(entry.path)
+            elif stat.S_ISREG(st.st_mode):
+                yield entry.path, st
+
+def _read_partial(path, size):
+    """Principio y final del fichero (todo el fichero si cabe en 2 * PARTIAL_BYTES)."""
+    with open(path, "rb") as f:
+        if size <= 2 * PARTIAL_BYTES:
+            return f.read()
+        head = f.read(PARTIAL_BYTES)
+        f.seek(-PARTIAL_BYTES, os.SEEK_END)
+        return head + f.read(PARTIAL_BYTES)
+
+def partial_hash(path, size):
+    return hashlib.blake2b(_read_partial(path, size), digest_size=16).hexdigest()
+
+def full_hash(path):
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def is_rotated_log(path, name):
+    match = ROTATED_SUFFIX.search(name)
+    if not match:
+        return False
+    return name[:match.start()].lower().endswith(".log") or \
+           os.path.basename(os.path.dirname(path)) in ("log", "logs") or f"{os.sep}log{os.sep}" in path
+
+def cache_path(cache_dir, root):
+    """Fichero de caché de hashes de un directorio raíz."""
+    digest = hashlib.sha1(os.path.abspath(root).encode(errors="surrogateescape")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"duplicates-{digest}.json.gz")
+
+def load_hash_cache(path):
+    """{'dispositivo:inode': [tamaño, mtime_ns, hash parcial, hash completo]} de una ejecución anterior."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data.get("files", {}) if data.get("version") == CACHE_VERSION else {}
+
+def save_hash_cache(path, cache):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(temporary, "wt", encoding="utf-8", compresslevel=3) as f:
+        f.write(json.dumps({"version": CACHE_VERSION, "files": cache}, separators=(",", ":")))
+    os.replace(temporary, path)
+
+def _hash_stage(files, function, cost, slot, workers, previous, cache, checkpoint, report):
+    """
+    Calcula 'function' (hash parcial o completo) de cada FileInfo en un pool de hilos, salvo los
+    que 'previous' ya tiene con el mismo tamaño y mtime. Los resultados se anotan en 'cache' y
+    'checkpoint' se llama cada CHECKPOINT_SECONDS. 'cost' da los bytes que se leen de cada uno.
+    Como mucho hay 'workers' * 4 lecturas encoladas a la vez, así que la memoria no crece con el
+    número de candidatos. Retorna {FileInfo: hash}; los ilegibles se omiten.
+    """
+    results = {}
+    pending = []
+    for info in files:
+        key = f"{info.device}:{info.inode}"
+        entry = cache.get(key) or previous.get(key)
+        if entry and entry[0] == info.size and entry[1] == info.mtime:
+            cache[key] = entry
+            if entry[slot]:
+                results[info] = entry[slot]
+                report.stats["cache_hits"] += 1
+                continue
+        pending.append(info)
+    report.stats["bytes_read"] += sum(cost(info) for info in pending)
+    workers = max(workers, 1)
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    try:
+        queued = iter(pending)
+        futures = {}
+        saved = time.monotonic()
+        while True:
+            for info in itertools.islice(queued, workers * 4 - len(futures)):
+                futures[pool.submit(function, info)] = info
+            if not futures:
+                break
+            done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                _record_hash(future, futures.pop(future), slot, cache, results, report)
+            if checkpoint and time.monotonic() - saved >= CHECKPOINT_SECONDS:
+                checkpoint()
+                saved = time.monotonic()
+    finally:
+        pool.shutdown(cancel_futures=True) # Ctrl+C: solo se esperan las lecturas en curso
+    return results
+
+def _record_hash(future, info, slot, cache, results, report):
+    """Anota en 'results' y en 'cache' el hash de un futuro terminado (los errores de lectura se cuentan)."""
+    try:
+        digest = future.result()
+    except OSError:
+        report.stats["errors"] += 1
+        return
+    results[info] = digest
+    key = f"{info.device}:{info.inode}"
+    entry = cache.get(key)
+    if not entry or entry[0] != info.size or entry[1] != info.mtime:
+        entry = cache[key] = [info.size, info.mtime, None, None]
+    entry[slot] = digest
+
+def _regroup(groups, hashes):
+    """Parte cada grupo por hash y conserva los subgrupos con al menos dos ficheros."""
+    result = []
+    for group in groups:
+        by_hash = collections.defaultdict(list)
+        for info in group:
+            if info in hashes:
+                by_hash[hashes[info]].append(info)
+        result += [(digest, members) for digest, members in by_hash.items() if len(members) > 1]
+    return result
+
+def find_reclaimable(root, min_size=64 * 1024, workers=4, one_filesystem=True, log_age_days=7, core_age_days=0,
+                     cache_dir=None, duplicates=True):
+    """
+    Busca espacio recuperable bajo 'root' en una sola pasada por el árbol:
+      - Duplicados (ficheros >= 'min_size') por etapas: mismo tamaño, después hash del principio y
+        el final, y hash completo solo de los que siguen coincidiendo. La mayoría de ficheros se
+        descarta sin leerlos. Los enlaces duros a un mismo inode no cuentan como duplicados.
+      - Logs rotados con más de 'log_age_days' días y core dumps (cabecera ELF de tipo core o
+        ficheros de los directorios de systemd-coredump/apport) con más de 'core_age_days' días.
+    Con 'cache_dir' los hashes se guardan por inode (con su tamaño y mtime) periódicamente y al
+    interrumpir: al repetir o reanudar el análisis no se vuelven a leer los ficheros sin cambios.
+    Solo se informa; no se borra nada. Retorna un ReclaimReport.
+    """
+    started = time.monotonic()
+    root = os.path.abspath(root)
+    if not os.path.isdir(root):
+        raise NotADirectoryError(f"No es un directorio: '{root}'.")
+    report = ReclaimReport(root)
+    now = time.time()
+    by_size = collections.defaultdict(list)
+    inodes = {}
+    coredump_dirs = tuple(directory + os.sep for directory in COREDUMP_DIRS)
+
+    def on_error(path, error):
+        report.stats["errors"] += 1
+
+    for path, st in walk_files(root, one_filesystem, on_error):
+        report.stats["files"] += 1
+        name = os.path.basename(path)
+        age_days = (now - st.st_mtime) / 86400
+        if is_rotated_log(path, name):
+            if age_days >= log_age_days:
+                report.rotated_logs.append({"path": path, "size": st.st_blocks * 512, "age_days": round(age_days, 1)})
+            continue
+        if (CORE_NAME.search(name) and (path.startswith(coredump_dirs) or is_core_dump(path))) and age_days >= core_age_days:
+            report.core_dumps.append({"path": path, "size": st.st_blocks * 512, "age_days": round(age_days, 1)})
+            continue
+        if not duplicates or st.st_size < min_size:
+            continue
+        key = (st.st_dev, st.st_ino)
+        if key in inodes:
+            inodes[key].links.append(path)
+            continue
+        info = inodes[key] = FileInfo(path, st.st_size, st.st_dev, st.st_ino, st.st_mtime_ns, st.st_nlink)
+        by_size[st.st_size].append(info)
+
+    groups = [group for group in by_size.values() if len(group) > 1]
+    report.stats["size_groups"] = len(groups)
+    cache_file = cache_path(cache_dir, root) if cache_dir else None
+    previous = load_hash_cache(cache_file) if cache_file else {}
+    cache = {} # Solo los inodes vistos en esta pasada: la caché no crece con ficheros ya borrados
+
+    def checkpoint():
+        if cache_file:
+            save_hash_cache(cache_file, {**previous, **cache})
+
+    try:
+        _find_duplicates(groups, workers, previous, cache, checkpoint, report)
+    except BaseException:
+        checkpoint() # Lo ya calculado sirve para reanudar
+        raise
+    if cache_file:
+        save_hash_cache(cache_file, cache)
+    report.rotated_logs.sort(key=lambda entry: -entry["size"])
+    report.core_dumps.sort(key=lambda entry: -entry["size"])
+    report.stats["elapsed"] = time.monotonic() - started
+    return report
+
+def _find_duplicates(groups, workers, previous, cache, checkpoint, report):
+    """Etapas de hash de los grupos de mismo tamaño; añade los duplicados confirmados a 'report'."""
+    candidates = [info for group in groups for info in group]
+    report.stats["partial_hashed"] = len(candidates)
+    partial = _hash_stage(candidates, lambda info: partial_hash(info.path, info.size),
+                          lambda info: min(info.size, 2 * PARTIAL_BYTES), 2, workers, previous, cache, checkpoint, report)
+    matches = _regroup(groups, partial)
+    # Si el hash parcial ya cubrió el fichero entero, no hace falta el completo
+    final = [(digest, members) for digest, members in matches if members[0].size <= 2 * PARTIAL_BYTES]
+    large = [members for digest, members in matches if members[0].size > 2 * PARTIAL_BYTES]
+    candidates = [info for group in large for info in group]
+    report.stats["full_hashed"] = len(candidates)
+    full = _hash_stage(candidates, lambda info: full_hash(info.path), lambda info: info.size, 3, workers, previous, cache,
+                       checkpoint, report)
+    final += _regroup(large, full)
+    for digest, members in final:
+        members.sort(key=lambda info: info.path)
+        report.duplicates.append({"size": members[0].size, "hash": digest,
+                                  "paths": [info.path for info in members],
+                                  "links": {info.path: info.links for info in members if info.links},
+                                  "reclaimable": members[0].size * _freeable_copies(members)})
+    report.duplicates.sort(key=lambda group: -group["reclaimable"])
+
+def _freeable_copies(members):
+    """
+    Copias de un grupo cuyo borrado libera espacio: se conserva una y de las demás solo cuentan
+    los inodes distintos con todos sus enlaces duros dentro del análisis (un enlace fuera del
+    árbol mantiene los datos en disco).
+    """
+    inodes = {(info.device, info.inode): info for info in members}
+    freeable = sum(1 for info in inodes.values() if info.freeable())
+    return min(freeable, len(inodes) - 1)
+
+def format_reclaim_report(report, limit=20):
+    """Texto legible del ReclaimReport: los 'limit' primeros grupos de cada categoría."""
+    totals = report.to_dict()["reclaimable"]
+    stats = report.stats
+    lines = [f"{report.root}: {stats['files']} ficheros en {stats['elapsed']:.2f} s. Leídos {format_bytes(stats['bytes_read'])} "
+             f"({stats['partial_hashed']} hashes parciales, {stats['full_hashed']} completos, {stats['cache_hits']} desde caché)."]
+    lines.append(f"Duplicados: {len(report.duplicates)} grupos, {format_bytes(totals['duplicates'])} recuperables")
+    for group in report.duplicates[:limit]:
+        lines.append(f"  {format_bytes(group['reclaimable']):>11} recuperables ({len(group['paths'])} copias de {format_bytes(group['size'])}):")
+        for path in group["paths"]:
+            links = group["links"].get(path)
+            lines.append(f"      {path}" + (f"  (enlaces duros: {', '.join(links)})" if links else ""))
+    for title, key in (("Logs rotados antiguos", "rotated_logs"), ("Core dumps", "core_dumps")):
+        entries = getattr(report, key)
+        lines.append(f"{title}: {len(entries)}, {format_bytes(totals[key])}")
+        lines += [f"  {format_bytes(e['size']):>11}  {e['age_days']:>7.1f} días  {e['path']}" for e in entries[:limit]]
+    return "\n".join(lines)
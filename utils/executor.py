@@ -0,0 +1,286 @@
+# Capa de ejecución de comandos basada en argv (sin shell): ejecución directa, proceso auxiliar
+# privilegiado de larga duración, pool de hilos acotado y API asyncio con timeout por comando.
+# Solo usa la biblioteca estándar para poder lanzarse como auxiliar: 'python utils/executor.py --helper'.
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+
+TIMEOUT_STATUS = 124    # Mismo código que timeout(1)
+NOT_FOUND_STATUS = 127  # Mismo código que la shell para "comando no encontrado"
+ERROR_STATUS = 1
+HELPER_GRACE = 5 # Segundos de margen sobre el timeout del comando para que el auxiliar responda
+
+_helper = None
+_helper_lock = threading.Lock()
+
+def needs_sudo(sudo):
+    """Indica si hay que anteponer 'sudo': solo en Linux y cuando no se es root ya."""
+    return sudo and os.name != 'nt' and os.geteuid() != 0
+
+def build_argv(argv, sudo=False):
+    """Retorna el argv final, anteponiendo 'sudo' si es necesario."""
+    argv = list(argv)
+    return ["sudo"] + argv if needs_sudo(sudo) else argv
+
+def _run_local(argv, timeout=None, input=None, env=None):
+    """Ejecuta el argv en un subproceso local. Retorna (salida, código)."""
+    try:
+        process = subprocess.run(
+            argv,
+            input=input,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            env=env,
+            check=False, # No lanza excepción para códigos de retorno no cero
+        )
+        return process.stdout + process.stderr, process.returncode
+    except subprocess.TimeoutExpired as e:
+        partial = e.stdout or ""
+        if isinstance(partial, bytes):
+            partial = partial.decode(errors="replace")
+        return f"{partial}Tiempo de espera agotado ({timeout} s) ejecutando: {' '.join(argv)}", TIMEOUT_STATUS
+    except FileNotFoundError:
+        return f"Comando no encontrado: {argv[0]}", NOT_FOUND_STATUS
+    except Exception as e:
+        return f"Excepción al ejecutar comando: {e}", ERROR_STATUS
+
+def run_command(argv, sudo=False, timeout=None, input=None, env=None):
+    """
+    Ejecuta un comando como lista de argumentos, sin shell. Si se requiere sudo y hay un
+    PrivilegedHelper activo, el comando se delega en él en lugar de lanzar 'sudo' de nuevo.
+    Retorna (salida, código de retorno) como execute_command().
+    """
+    if isinstance(argv, str):
+        raise TypeError("run_command espera una lista de argumentos, no una cadena.")
+    helper = _helper
+    if needs_sudo(sudo) and helper is not None and helper.is_running():
+        return helper.run(argv, timeout=timeout, input=input, env=env)
+    return _run_local(build_argv(argv, sudo), timeout=timeout, input=input, env=env)
+
+def default_executor(argv, input=None):
+    """
+    Executor por defecto de los motores que aplican cambios (firewall, red): 'executor(argv,
+    input)' -> (salida, código), con privilegios (vía el auxiliar privilegiado si está activo).
+    """
+    return run_command(argv, sudo=True, input=input)
+
+class RecordingExecutor:
+    """
+    Executor simulado: registra cada llamada (argv, input) sin ejecutar nada y responde con
+    'responses[argv[0]]' o (salida vacía, 0). Permite probar y previsualizar sin root.
+    Con 'read_executor', los comandos para los que 'read_only(argv)' es True se ejecutan de
+    verdad con él, para que la simulación vea el estado real, y solo se registran los demás.
+    """
+
+    def __init__(self, responses=None, read_executor=None, read_only=None):
+        self.responses = responses or {}
+        self.read_executor = read_executor
+        self.read_only = read_only
+        self.calls = []
+
+    def __call__(self, argv, input=None):
+        if self.read_executor and self.read_only and self.read_only(argv):
+            return self.read_executor(argv, input=input)
+        self.calls.append((list(argv), input))
+        return self.responses.get(argv[0], ("", 0))
+
+class PrivilegedHelper:
+    """
+    Proceso auxiliar privilegiado. Se lanza una sola vez (con 'sudo' si no se es root) y
+    ejecuta todos los comandos que recibe por stdin como JSON por líneas, respondiendo por
+    stdout. Admite varias peticiones concurrentes: cada respuesta lleva el id de su petición.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self._process = None
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._write_lock = threading.Lock()
+        self._reader = None
+
+    def start(self):
+        """Lanza el proceso auxiliar. Retorna True si arrancó correctamente."""
+        argv = build_argv([sys.executable, os.path.abspath(__file__), "--helper", str(self.max_workers)], sudo=True)
+        try:
+            self._process = subprocess.Popen(argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+        except OSError:
+            self._process = None
+            return False
+        self._reader = threading.Thread(target=self._read_responses, daemon=True)
+        self._reader.start()
+        # Petición de prueba: confirma que sudo se autenticó y el auxiliar responde
+        _, status = self.run(["true"], timeout=60)
+        if status != 0:
+            self.stop()
+            return False
+        return True
+
+    def is_running(self):
+        return self._process is not None and self._process.poll() is None
+
+    def run(self, argv, timeout=None, input=None, env=None):
+        """
+        Envía un comando al auxiliar y espera su resultado, como mucho 'timeout' segundos más
+        HELPER_GRACE (el auxiliar mata el comando al agotar 'timeout'). Retorna (salida, código).
+        """
+        request_id = next(self._ids)
+        future = concurrent.futures.Future()
+        self._pending[request_id] = future
+        request = {"id": request_id, "argv": list(argv), "timeout": timeout, "input": input,
+                   "env": dict(env) if env is not None else None}
+        try:
+            with self._write_lock:
+                self._process.stdin.write(json.dumps(request) + "\n")
+                self._process.stdin.flush()
+        except (OSError, ValueError, AttributeError) as e:
+            self._pending.pop(request_id, None)
+            return f"El proceso auxiliar privilegiado no está disponible: {e}", ERROR_STATUS
+        try:
+            return future.result(timeout=timeout + HELPER_GRACE if timeout is not None else None)
+        except concurrent.futures.TimeoutError:
+            self._pending.pop(request_id, None)
+            return f"El proceso auxiliar privilegiado no respondió en {timeout + HELPER_GRACE:g} s: {' '.join(argv)}", TIMEOUT_STATUS
+
+    def _read_responses(self):
+        for line in self._process.stdout:
+            try:
+                response = json.loads(line)
+            except ValueError:
+                continue
+            future = self._pending.pop(response.get("id"), None)
+            if future is not None:
+                future.set_result((response["output"], response["status"]))
+        # El auxiliar terminó: se liberan las peticiones pendientes
+        for request_id in list(self._pending):
+            self._pending.pop(request_id).set_result(("El proceso auxiliar privilegiado terminó.", ERROR_STATUS))
+
+    def stop(self):
+        """Cierra el canal y espera a que termine el proceso auxiliar."""
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+            self._process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self._process.kill()
+        self._process = None
+
+def serve_helper(max_workers=4, stdin=None, stdout=None):
+    """Bucle del proceso auxiliar: lee peticiones JSON, las ejecuta en paralelo y responde."""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    write_lock = threading.Lock()
+
+    def handle(request):
+        output, status = _run_local(request["argv"], timeout=request.get("timeout"), input=request.get("input"),
+                                    env=request.get("env"))
+        with write_lock:
+            stdout.write(json.dumps({"id": request["id"], "output": output, "status": status}) + "\n")
+            stdout.flush()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for line in stdin:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                continue
+            pool.submit(handle, request)
+
+def start_privileged_helper(max_workers=4):
+    """
+    Arranca (una sola vez) el auxiliar privilegiado compartido. A partir de entonces,
+    run_command(..., sudo=True) lo usa en lugar de lanzar 'sudo' por comando.
+    """
+    global _helper
+    with _helper_lock:
+        if _helper is not None and _helper.is_running():
+            return True
+        if not needs_sudo(True):
+            return False # Ya somos root (o Windows): no hace falta auxiliar
+        helper = PrivilegedHelper(max_workers)
+        if helper.start():
+            _helper = helper
+            return True
+        return False
+
+def stop_privileged_helper():
+    """Detiene el auxiliar privilegiado compartido, si existe."""
+    global _helper
+    with _helper_lock:
+        if _helper is not None:
+            _helper.stop()
+            _helper = None
+
+class CommandPool:
+    """Pool de hilos acotado para ejecutar comandos argv en paralelo."""
+
+    def __init__(self, max_workers=8):
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit(self, argv, sudo=False, timeout=None, input=None):
+        """Encola un comando. Retorna un Future con (salida, código)."""
+        return self._pool.submit(run_command, argv, sudo, timeout, input)
+
+    def map(self, commands, sudo=False, timeout=None):
+        """Ejecuta varios argv y retorna sus resultados en el mismo orden."""
+        futures = [self.submit(argv, sudo=sudo, timeout=timeout) for argv in commands]
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+async def run_command_async(argv, sudo=False, timeout=None, input=None):
+    """Versión asyncio de run_command. Mata el proceso si supera 'timeout'. Retorna (salida, código)."""
+    if needs_sudo(sudo) and _helper is not None and _helper.is_running():
+        return await asyncio.get_running_loop().run_in_executor(None, _helper.run, list(argv), timeout, input)
+    argv = build_argv(argv, sudo)
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+    except FileNotFoundError:
+        return f"Comando no encontrado: {argv[0]}", NOT_FOUND_STATUS
+    except Exception as e:
+        return f"Excepción al ejecutar comando: {e}", ERROR_STATUS
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(input.encode() if input is not None else None), timeout)
+    except asyncio.TimeoutError:
+        try:
+            process.kill()
+        except (ProcessLookupError, PermissionError):
+            # Terminó justo ahora, o es un 'sudo' de root que no se puede matar: se deja de esperar
+            pass
+        else:
+            await process.wait()
+        return f"Tiempo de espera agotado ({timeout} s) ejecutando: {' '.join(argv)}", TIMEOUT_STATUS
+    return stdout.decode(errors="replace"), process.returncode
+
+async def run_commands_async(commands, sudo=False, timeout=None, limit=8):
+    """Ejecuta varios argv de forma concurrente (como máximo 'limit' a la vez). Retorna los resultados en orden."""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(argv):
+        async with semaphore:
+            return await run_command_async(argv, sudo=sudo, timeout=timeout)
+
+    return await asyncio.gather(*(bounded(argv) for argv in commands))
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "--helper":
+        serve_helper(int(sys.argv[2]) if len(sys.argv) > 2 else 4)
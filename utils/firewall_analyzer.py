@@ -0,0 +1,397 @@
+import bisect
+import ipaddress
+import re
+
+# Acciones que deciden el destino del paquete: solo estas pueden dejar inalcanzables reglas posteriores
+TERMINAL_ACTIONS = ("allow", "deny", "reject")
+ALL_PORTS = (0, 65535)
+MULTIPORT_MAX = 15 # iptables -m multiport y ufw admiten hasta 15 puertos (un rango cuenta como 2)
+
+# Tipos de hallazgo
+SHADOWED = "shadowed"       # Inalcanzable: reglas anteriores con otra acción la tapan
+REDUNDANT = "redundant"     # Inalcanzable: reglas anteriores con la misma acción ya la cubren
+MERGEABLE = "mergeable"     # Rangos de puertos solapados o contiguos que caben en una sola regla
+PORT_SET = "port_set"       # Muchas reglas que solo difieren en el puerto: set de nft / multiport
+SOURCE_SET = "source_set"   # Muchas reglas que solo difieren en el origen: set de nft / ipset
+
+FINDING_LABELS = {SHADOWED: "Tapada", REDUNDANT: "Redundante", MERGEABLE: "Fusionable",
+                  PORT_SET: "Set de puertos", SOURCE_SET: "Set de orígenes"}
+
+class PortCoverage:
+    """
+    Segmentos de puerto disjuntos y ordenados que ya cubren reglas anteriores, cada uno con la
+    primera regla que lo cubrió. Las consultas son por bisección y al añadir un rango solo se
+    insertan los huecos que aún no estaban cubiertos.
+    """
+    __slots__ = ("starts", "ends", "owners")
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.owners = []
+
+    def segment_end(self, port):
+        """(fin del segmento que contiene 'port', regla que lo cubre) o None si no está cubierto."""
+        index = bisect.bisect_right(self.starts, port) - 1
+        if index >= 0 and self.ends[index] >= port:
+            return self.ends[index], self.owners[index]
+        return None
+
+    def add(self, start, end, owner):
+        low = bisect.bisect_right(self.starts, start) - 1
+        if low < 0 or self.ends[low] < start:
+            low += 1
+        high = low
+        gaps = []
+        point = start
+        while high < len(self.starts) and self.starts[high] <= end:
+            if self.starts[high] > point:
+                gaps.append((point, self.starts[high] - 1, owner))
+            point = max(point, self.ends[high] + 1)
+            high += 1
+        if point <= end:
+            gaps.append((point, end, owner))
+        if not gaps:
+            return
+        segments = sorted(list(zip(self.starts[low:high], self.ends[low:high], self.owners[low:high])) + gaps,
+                          key=lambda segment: segment[0])
+        self.starts[low:high] = [s for s, _, _ in segments]
+        self.ends[low:high] = [e for _, e, _ in segments]
+        self.owners[low:high] = [o for _, _, o in segments]
+
+def _covering_rules(coverages, start, end):
+    """Reglas que cubren entre todas [start, end], en orden de aparición, o None si queda algún hueco."""
+    owners = {}
+    point = start
+    while point <= end:
+        best = None
+        for coverage in coverages:
+            found = coverage.segment_end(point)
+            if found and (best is None or found[0] > best[0]):
+                best = found
+        if best is None:
+            return None
+        owners[id(best[1])] = best[1]
+        point = best[0] + 1
+    return list(owners.values())
+
+def _rule_space(rule):
+    """
+    Espacio de coincidencia de la regla: (familia, protocolos, rangos de puerto, red de origen,
+    interfaz, destino). None si no se puede razonar sobre ella (condiciones negadas u origen
+    que no es una dirección, ej. un ipset).
+    """
+    if rule.negated:
+        return None
+    network = None
+    family = rule.family
+    if rule.source:
+        try:
+            network = ipaddress.ip_network(rule.source, strict=False)
+        except ValueError:
+            return None
+        family = f"ipv{network.version}"
+    return family, rule.protocols or ("any",), rule.ports or [ALL_PORTS], network, rule.interface, rule.destination
+
+def _options(value):
+    """Valores de clave que cubren a 'value': el propio y el comodín None."""
+    return (value, None) if value is not None else (None,)
+
+def rule_number(rule):
+    """Número visible de la regla: el de ufw o la posición (desde 1) dentro de su cadena."""
+    return rule.number if rule.number is not None else rule.position + 1
+
+def chain_label(rule):
+    return f"{rule.table} {rule.chain}" if rule.origin == "nft" else rule.chain
+
+def removal_command(rule):
+    """Comando que elimina la regla de su origen."""
+    if rule.origin == "nft":
+        return f"nft delete rule {rule.table} {rule.chain} handle {rule.handle}"
+    if rule.origin == "ufw":
+        return f"ufw --force delete {rule.number}"
+    command = "ip6tables" if rule.family == "ipv6" else "iptables"
+    return f"{command} -D {rule.raw[3:]}" if rule.raw.startswith("-A ") else f"{command} -D {rule.chain} {rule.position + 1}"
+
+def removal_script(findings):
+    """
+    Comandos que eliminan todas las reglas inalcanzables de los hallazgos, de la última a la
+    primera: 'ufw delete N' renumera las reglas siguientes, así que borrar en orden
+    descendente mantiene válidos los números que quedan por borrar.
+    """
+    rules = {id(rule): rule for finding in findings if finding["type"] in (SHADOWED, REDUNDANT)
+             for rule in finding["drop"]}
+    return [removal_command(rule) for rule in sorted(rules.values(), key=rule_number, reverse=True)]
+
+def _find_unreachable(chain_rules, findings):
+    """
+    Recorre la cadena en orden de evaluación. Las reglas terminales ya vistas se guardan como
+    cobertura de puertos por (familia, protocolo, interfaz, destino, red de origen); una regla
+    está cubierta si la unión de las coberturas de todas las claves que la abarcan (comodines y
+    superredes de su origen) contiene todos sus puertos. Retorna los ids de las reglas inalcanzables.
+    """
+    coverage = {}
+    prefixes = {4: set(), 6: set()}
+    unreachable = set()
+    for rule in chain_rules:
+        space = _rule_space(rule)
+        if space is None:
+            continue
+        family, protocols, ports, network, interface, destination = space
+        networks = [None]
+        if network is not None:
+            networks += [network.supernet(new_prefix=length) for length in prefixes[network.version]
+                         if length <= network.prefixlen]
+        owners = {}
+        covered = True
+        for protocol in protocols:
+            protocol_keys = (protocol,) if protocol == "any" else (protocol, "any")
+            coverages = [coverage[key] for key in ((f, p, i, d, n) for f in _options(family) for p in protocol_keys
+                                                   for i in _options(interface) for d in _options(destination) for n in networks)
+                         if key in coverage]
+            for start, end in ports:
+                found = _covering_rules(coverages, start, end) if coverages else None
+                if found is None:
+                    covered = False
+                    break
+                owners.update((id(owner), owner) for owner in found)
+            if not covered:
+                break
+        if covered:
+            related = list(owners.values())
+            unreachable.add(id(rule))
+            numbers = ", ".join(str(rule_number(r)) for r in related)
+            if all(r.action == rule.action for r in related):
+                findings.append({"type": REDUNDANT, "chain": chain_label(rule), "rules": [rule], "related": related, "drop": [rule],
+                                 "detail": f"Las reglas anteriores ({numbers}) ya cubren todo su tráfico con la misma acción.",
+                                 "suggestion": removal_command(rule)})
+            else:
+                actions = "/".join(sorted({str(r.action) for r in related}))
+                findings.append({"type": SHADOWED, "chain": chain_label(rule), "rules": [rule], "related": related, "drop": [rule],
+                                 "detail": f"Nunca coincide: antes la cubren las reglas {numbers} con acción {actions} "
+                                           f"(esta regla dice {rule.action}).",
+                                 "suggestion": f"Revisar el orden o eliminar: {removal_command(rule)}"})
+            continue
+        if rule.action in TERMINAL_ACTIONS and not rule.extra_match:
+            # Las reglas con condiciones extra coinciden con menos tráfico del modelado: no cubren a otras
+            for protocol in protocols:
+                for start, end in ports:
+                    key = (family, protocol, interface, destination, network)
+                    coverage.setdefault(key, PortCoverage()).add(start, end, rule)
+            if network is not None:
+                prefixes[network.version].add(network.prefixlen)
+    return unreachable
+
+def _merge_ranges(ranges):
+    """Une rangos (inicio, fin) solapados o contiguos. Retorna la lista ordenada resultante."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def _port_text(ranges, separator="-"):
+    return ", ".join(str(s) if s == e else f"{s}{separator}{e}" for s, e in ranges)
+
+def _multiport_chunks(ranges):
+    """Reparte los rangos en grupos que caben en un '-m multiport' (15 posiciones, un rango ocupa 2)."""
+    chunks, current, used = [], [], 0
+    for start, end in ranges:
+        size = 1 if start == end else 2
+        if used + size > MULTIPORT_MAX:
+            chunks.append(current)
+            current, used = [], 0
+        current.append((start, end))
+        used += size
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _verdict(rule):
+    return {"allow": "accept", "deny": "drop", "reject": "reject"}[rule.action] if rule.origin == "nft" else rule.target
+
+def _port_set_suggestion(rule, protocols, ranges):
+    """Regla(s) equivalentes con todos los puertos en un set (nft) o en multiport (iptables/ufw)."""
+    if protocols == ("any",):
+        # Un puerto solo tiene sentido en tcp/udp: ufw exige 'proto' con varios puertos y multiport exige -p
+        protocols = ("tcp", "udp")
+    if rule.origin == "nft":
+        if len(protocols) == 1:
+            match = f"{protocols[0]} dport {{ {_port_text(ranges)} }}"
+        else:
+            match = f"meta l4proto {{ {', '.join(protocols)} }} th dport {{ {_port_text(ranges)} }}"
+        source = f"{'ip6' if ':' in rule.source else 'ip'} saddr {rule.source} " if rule.source else ""
+        if rule.destination:
+            source += f"{'ip6' if ':' in rule.destination else 'ip'} daddr {rule.destination} "
+        return [f"nft add rule {rule.table} {rule.chain} {source}{match} {_verdict(rule)}"]
+    chunks = _multiport_chunks(ranges)
+    if rule.origin == "ufw":
+        action = {"allow": "allow", "deny": "deny", "reject": "reject"}[rule.action]
+        source = f"from {rule.source} " if rule.source else ""
+        lines = []
+        for chunk in chunks:
+            ports = ",".join(str(s) if s == e else f"{s}:{e}" for s, e in chunk)
+            for protocol in protocols:
+                target = f"to any port {ports} proto {protocol}"
+                if rule.destination:
+                    target = target.replace("to any", f"to {rule.destination}", 1)
+                lines.append(f"ufw {action} {rule.chain} {source}{target}")
+        return lines
+    command = "ip6tables" if rule.family == "ipv6" else "iptables"
+    source = f"-s {rule.source} " if rule.source else ""
+    if rule.destination:
+        source += f"-d {rule.destination} "
+    interface = f"{'-o' if ' -o ' in rule.raw else '-i'} {rule.interface} " if rule.interface else ""
+    return [f"{command} -A {rule.chain} {interface}{source}-p {protocol} -m multiport --dports "
+            f"{','.join(str(s) if s == e else f'{s}:{e}' for s, e in chunk)} -j {rule.target}"
+            for chunk in chunks for protocol in protocols]
+
+def _source_set_suggestion(rule, networks, set_name):
+    """Conjunto de orígenes como set anónimo de nft o como ipset + '-m set' en iptables/ufw."""
+    ports = rule.ports
+    version = networks[0].version
+    addresses = ", ".join(str(n) for n in networks)
+    if rule.origin == "nft":
+        match = ""
+        if ports:
+            protocol = rule.protocols[0] if len(rule.protocols) == 1 else "th"
+            match = f" {protocol} dport {{ {_port_text(ports)} }}"
+        return [f"nft add rule {rule.table} {rule.chain} {'ip6' if version == 6 else 'ip'} saddr {{ {addresses} }}{match} {_verdict(rule)}"]
+    lines = [f"ipset create {set_name} hash:net family {'inet6' if version == 6 else 'inet'}"]
+    lines += [f"ipset add {set_name} {network}" for network in networks]
+    command = "ip6tables" if version == 6 else "iptables"
+    chain = rule.chain if rule.origin == "iptables" else f"ufw-user-{'output' if rule.chain == 'out' else 'input'}"
+    target = rule.target if rule.origin == "iptables" else {"allow": "ACCEPT", "deny": "DROP", "reject": "REJECT"}[rule.action]
+    for protocol in rule.protocols or ("any",):
+        port_match = ""
+        if ports:
+            port_match = f" -p {protocol} -m multiport --dports {','.join(str(s) if s == e else f'{s}:{e}' for s, e in ports)}"
+        elif protocol != "any":
+            port_match = f" -p {protocol}"
+        lines.append(f"{command} -A {chain} -m set --match-set {set_name} src{port_match} -j {target}")
+    return lines
+
+def _find_consolidations(chain_rules, unreachable, min_set_size, findings):
+    """
+    Parte la cadena en tramos de reglas consecutivas con la misma acción terminal (dentro de un
+    tramo el orden no cambia el resultado) y agrupa en cada tramo las reglas que solo difieren en
+    el puerto o solo en el origen.
+    """
+    runs, current = [], []
+    for rule in chain_rules:
+        if id(rule) in unreachable:
+            continue # Se eliminará igualmente: no corta el tramo
+        if current and (rule.action != current[-1].action or rule.action not in TERMINAL_ACTIONS):
+            runs.append(current)
+            current = []
+        if rule.action in TERMINAL_ACTIONS:
+            current.append(rule)
+    if current:
+        runs.append(current)
+
+    for run in runs:
+        by_match = {}   # Mismo origen/interfaz/destino/protocolos: candidatas a unir puertos
+        by_ports = {}   # Mismos puertos/protocolos/interfaz/destino: candidatas a set de orígenes
+        for rule in run:
+            space = _rule_space(rule)
+            if space is None or rule.extra_match:
+                continue
+            family, protocols, ports, network, interface, destination = space
+            by_match.setdefault((family, protocols, network, interface, destination), []).append(rule)
+            if network is not None:
+                by_ports.setdefault((network.version, protocols, tuple(ports), interface, destination), []).append(rule)
+
+        for (family, protocols, network, interface, destination), rules in by_match.items():
+            if len(rules) < 2 or any(not rule.ports for rule in rules):
+                continue
+            chain = chain_label(rules[0])
+            if len(rules) >= min_set_size:
+                ranges = _merge_ranges([r for rule in rules for r in rule.ports])
+                suggestion = _port_set_suggestion(rules[0], protocols, ranges)
+                findings.append({"type": PORT_SET, "chain": chain, "rules": rules, "related": [], "drop": rules[len(suggestion):],
+                                 "detail": f"{len(rules)} reglas {rules[0].action} que solo difieren en el puerto "
+                                           f"({'/'.join(protocols)}): caben en {len(suggestion)} regla(s).",
+                                 "suggestion": "\n".join(suggestion)})
+                continue
+            # Barrido por inicio: un grupo se cierra cuando el siguiente rango empieza tras el fin acumulado + 1
+            items = sorted((start, end, index) for index, rule in enumerate(rules) for start, end in rule.ports)
+            cluster, cluster_end = [], None
+            for start, end, index in items + [(None, None, None)]:
+                if start is not None and cluster and start <= cluster_end + 1:
+                    cluster.append((start, end, index))
+                    cluster_end = max(cluster_end, end)
+                    continue
+                members = sorted({i for _, _, i in cluster})
+                if len(members) > 1:
+                    merged = (cluster[0][0], cluster_end)
+                    grouped = [rules[i] for i in members]
+                    numbers = ", ".join(str(rule_number(r)) for r in grouped)
+                    findings.append({"type": MERGEABLE, "chain": chain, "rules": grouped, "related": [], "drop": grouped[1:],
+                                     "detail": f"Las reglas {numbers} tienen puertos solapados o contiguos: "
+                                               f"basta una regla con {_port_text([merged])}.",
+                                     "suggestion": "\n".join(_port_set_suggestion(grouped[0], protocols, [merged]))})
+                if start is not None:
+                    cluster, cluster_end = [(start, end, index)], end
+
+        for (version, protocols, ports, interface, destination), rules in by_ports.items():
+            if len(rules) < min_set_size:
+                continue
+            networks = list(ipaddress.collapse_addresses(ipaddress.ip_network(r.source, strict=False) for r in rules))
+            set_name = re.sub(r"[^a-z0-9_]", "_", f"fw_{rules[0].chain}_{rule_number(rules[0])}".lower())[:31]
+            detail = f"{len(rules)} reglas {rules[0].action} que solo difieren en el origen"
+            if len(networks) < len(rules):
+                detail += f" (se agregan en {len(networks)} red(es))"
+            findings.append({"type": SOURCE_SET, "chain": chain_label(rules[0]), "rules": rules, "related": [], "drop": rules[1:],
+                             "detail": detail + ": una sola regla con un set.",
+                             "suggestion": "\n".join(_source_set_suggestion(rules[0], networks, set_name))})
+
+def analyze_rules(rules, min_set_size=4):
+    """
+    Analiza reglas parseadas (ver utils.firewall_rules) cadena por cadena. Retorna (hallazgos,
+    resumen). Cada hallazgo es {'type', 'chain', 'rules', 'related', 'drop', 'detail', 'suggestion'}:
+    'rules' son las reglas afectadas, 'related' las que las tapan y 'drop' las que desaparecerían.
+    Coste O(n log n) con pocas claves por regla: válido para rulesets de decenas de miles de reglas.
+    """
+    chains = {}
+    for rule in rules:
+        chains.setdefault((rule.origin, rule.table, rule.chain), []).append(rule)
+    findings = []
+    for chain_rules in chains.values():
+        chain_rules.sort(key=lambda rule: rule.position)
+        unreachable = _find_unreachable(chain_rules, findings)
+        _find_consolidations(chain_rules, unreachable, max(2, min_set_size), findings)
+    summary = {"rules": len(rules), "chains": len(chains)}
+    for kind in FINDING_LABELS:
+        summary[kind] = sum(1 for finding in findings if finding["type"] == kind)
+    summary["removable"] = len({id(rule) for finding in findings for rule in finding["drop"]})
+    return findings, summary
+
+def finding_to_dict(finding):
+    """Hallazgo serializable (JSON): las reglas se resumen en número, cadena, acción y línea original."""
+    def ref(rule):
+        return {"number": rule_number(rule), "chain": chain_label(rule), "action": rule.action, "raw": rule.raw}
+    return {"type": finding["type"], "chain": finding["chain"], "rules": [ref(r) for r in finding["rules"]],
+            "related": [ref(r) for r in finding["related"]], "removable": len(finding["drop"]),
+            "detail": finding["detail"], "suggestion": finding["suggestion"]}
+
+def format_findings(findings):
+    """Texto legible de los hallazgos, agrupados por cadena."""
+    lines = []
+    chain = None
+    for finding in findings:
+        if finding["chain"] != chain:
+            chain = finding["chain"]
+            lines.append(f"\n== {chain} ==")
+        numbers = ", ".join(str(rule_number(r)) for r in finding["rules"][:12])
+        if len(finding["rules"]) > 12:
+            numbers += f", ... ({len(finding['rules'])})"
+        lines.append(f"[{FINDING_LABELS[finding['type']]}] regla(s) {numbers}: {finding['detail']}")
+        for line in (finding["suggestion"] or "").splitlines():
+            lines.append(f"    {line}")
+    script = removal_script(findings)
+    if len(script) > 1:
+        lines.append("\n== Eliminar todas las reglas inalcanzables (de la última a la primera) ==")
+        lines += [f"    {command}" for command in script]
+    return "\n".join(lines).lstrip("\n")
@@ -0,0 +1,403 @@
+import bisect
+import hashlib
+import ipaddress
+import json
+import re
+import shlex
+import threading
+import time
+from utils.executor import default_executor
+
+UFW_LINE = re.compile(r"^\[\s*(\d+)\]\s+(.+?)\s+(ALLOW|DENY|REJECT|LIMIT)(?:\s+(IN|OUT|FWD))?\s+(.+?)(?:\s+#\s*(.*))?$")
+# Acciones equivalentes entre formatos
+ACTION_NAMES = {"ACCEPT": "allow", "ALLOW": "allow", "accept": "allow", "DROP": "deny", "DENY": "deny", "drop": "deny",
+                "REJECT": "reject", "reject": "reject", "LIMIT": "limit", "RETURN": "return", "return": "return"}
+
+class FirewallRule:
+    """
+    Regla de firewall normalizada, venga de iptables -S, nft -j o ufw status numbered.
+    'ports' es una lista de rangos (inicio, fin) de puerto destino; vacía = cualquier puerto.
+    'protocols' es una tupla ('tcp', 'udp'...) o vacía = cualquier protocolo.
+    """
+    __slots__ = ("origin", "table", "chain", "position", "number", "handle", "action", "target", "protocols",
+                 "ports", "source", "destination", "interface", "comment", "negated", "extra_match", "family", "raw")
+
+    def __init__(self, origin, table, chain, position, raw):
+        self.origin = origin
+        self.table = table
+        self.chain = chain
+        self.position = position  # Orden de evaluación dentro de la cadena (desde 0)
+        self.number = None        # Número de 'ufw status numbered'
+        self.handle = None        # Handle de nft
+        self.action = None        # allow / deny / reject / limit / jump / return / None (sin veredicto)
+        self.target = None        # Objetivo original (ACCEPT, ufw-user-input, accept...)
+        self.protocols = ()
+        self.ports = []
+        self.source = None
+        self.destination = None
+        self.interface = None
+        self.comment = None
+        self.negated = False      # Alguna condición usa '!': se indexa pero no se da por cubierta
+        self.extra_match = False  # Condiciones que no se modelan (estado, límites, icmp, perfiles de ufw...)
+        self.family = None        # 'ipv4', 'ipv6' o None (ambas, ej. tabla inet de nft)
+        self.raw = raw
+
+    def matches_port(self, port, protocol=None):
+        """Indica si la regla aplica al puerto/protocolo (sin tener en cuenta origen ni interfaz)."""
+        if protocol and self.protocols and protocol not in self.protocols:
+            return False
+        return not self.ports or any(start <= port <= end for start, end in self.ports)
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+def _parse_port_list(text, separator=":"):
+    """'22', '80,443', '8000:8100' -> [(22, 22)], ... Los nombres de servicio no numéricos se ignoran."""
+    ports = []
+    for part in text.split(","):
+        start, _, end = part.partition(separator)
+        if start.isdigit() and (not end or end.isdigit()):
+            ports.append((int(start), int(end or start)))
+    return ports
+
+# Módulos de -m cuyas condiciones sí se modelan (protocolo, puertos y comentario)
+MODELED_MATCHES = ("tcp", "udp", "sctp", "multiport", "comment")
+
+def parse_iptables_rules(text, table="filter", family="ipv4"):
+    """Convierte la salida de 'iptables -S' en una lista de FirewallRule (se ignoran -P y -N)."""
+    rules = []
+    positions = {}
+    for line in text.splitlines():
+        try:
+            # shlex solo hace falta con comillas (comentarios); split() es mucho más rápido
+            tokens = shlex.split(line) if '"' in line or "'" in line else line.split()
+        except ValueError:
+            continue
+        if len(tokens) < 2 or tokens[0] != "-A":
+            continue
+        chain = tokens[1]
+        rule = FirewallRule("iptables", table, chain, positions.get(chain, 0), line)
+        positions[chain] = rule.position + 1
+        rule.family = family
+        negate = False
+        index = 2
+        while index < len(tokens):
+            token = tokens[index]
+            value = tokens[index + 1] if index + 1 < len(tokens) else ""
+            if token == "!":
+                negate = rule.negated = True
+                index += 1
+                continue
+            if token in ("-p", "--protocol"):
+                rule.protocols = () if negate or value == "all" else (value,)
+            elif token in ("-s", "--source"):
+                rule.source = value
+            elif token in ("-d", "--destination"):
+                rule.destination = value
+            elif token in ("-i", "--in-interface", "-o", "--out-interface"):
+                rule.interface = value
+            elif token in ("--dport", "--destination-port", "--dports", "--destination-ports"):
+                if not negate:
+                    rule.ports = _parse_port_list(value)
+            elif token == "--comment":
+                rule.comment = value
+            elif token in ("-j", "--jump", "-g", "--goto"):
+                rule.target = value
+                rule.action = ACTION_NAMES.get(value, "jump")
+            elif token in ("-m", "--match"):
+                if value not in MODELED_MATCHES:
+                    rule.extra_match = True
+            elif token in ("--sport", "--source-port", "--sports", "--state", "--ctstate",
+                           "--icmp-type", "--set", "--name"):
+                rule.extra_match = True # Opción con valor que no se indexa
+            else:
+                # Opción sin valor conocido: se avanza de uno en uno. Las que siguen a -j son del objetivo
+                if rule.target is None:
+                    rule.extra_match = True
+                index += 1
+                negate = False
+                continue
+            negate = False
+            index += 2
+        rules.append(rule)
+    return rules
+
+def _nft_ports(right):
+    """Valor derecho de un match de puerto en nft -j: número, {'range'}, {'set'} o lista."""
+    if isinstance(right, int):
+        return [(right, right)]
+    if isinstance(right, dict):
+        if "range" in right:
+            start, end = right["range"]
+            return [(start, end)] if isinstance(start, int) and isinstance(end, int) else []
+        if "set" in right:
+            return [p for item in right["set"] for p in _nft_ports(item)]
+    if isinstance(right, list):
+        return [p for item in right for p in _nft_ports(item)]
+    return []
+
+def _nft_address(right):
+    if isinstance(right, str):
+        return right
+    if isinstance(right, dict) and "prefix" in right:
+        return f"{right['prefix']['addr']}/{right['prefix']['len']}"
+    return json.dumps(right)
+
+# Familia IP de las tablas/protocolos de nft ('inet' y el resto abarcan ambas)
+NFT_FAMILIES = {"ip": "ipv4", "ip6": "ipv6"}
+# Sentencias que no cambian qué paquetes coinciden con la regla
+NFT_PASSIVE_STATEMENTS = ("counter", "log", "comment", "accept", "drop", "reject", "return", "jump", "goto")
+
+def parse_nft_json(text):
+    """Convierte la salida de 'nft -j list ruleset' en una lista de FirewallRule."""
+    data = json.loads(text) if text.strip() else {"nftables": []}
+    rules = []
+    positions = {}
+    for item in data.get("nftables", []):
+        entry = item.get("rule")
+        if entry is None:
+            continue
+        key = (entry.get("family"), entry.get("table"), entry.get("chain"))
+        rule = FirewallRule("nft", f"{entry.get('family')} {entry.get('table')}", entry.get("chain"),
+                            positions.get(key, 0), json.dumps(entry, separators=(",", ":")))
+        positions[key] = rule.position + 1
+        rule.handle = entry.get("handle")
+        rule.comment = entry.get("comment")
+        rule.family = NFT_FAMILIES.get(entry.get("family"))
+        for expr in entry.get("expr", []):
+            if "match" in expr:
+                match = expr["match"]
+                left, right = match.get("left", {}), match.get("right")
+                if match.get("op", "==") not in ("==", "in"):
+                    rule.negated = True
+                    continue
+                if "payload" in left:
+                    protocol, field = left["payload"].get("protocol"), left["payload"].get("field")
+                    if field == "dport":
+                        rule.ports = _nft_ports(right)
+                        if protocol in ("tcp", "udp", "sctp") and not rule.protocols:
+                            rule.protocols = (protocol,)
+                    elif field == "saddr":
+                        rule.source = _nft_address(right)
+                        rule.family = NFT_FAMILIES.get(protocol, rule.family)
+                    elif field == "daddr":
+                        rule.destination = _nft_address(right)
+                        rule.family = NFT_FAMILIES.get(protocol, rule.family)
+                    elif field in ("protocol", "nexthdr") and isinstance(right, str): # 'ip protocol tcp'
+                        rule.protocols = (right,)
+                    else:
+                        rule.extra_match = True
+                elif "meta" in left:
+                    meta_key = left["meta"].get("key")
+                    if meta_key == "l4proto":
+                        values = right["set"] if isinstance(right, dict) and "set" in right else [right]
+                        rule.protocols = tuple(v for v in values if isinstance(v, str))
+                    elif meta_key in ("iifname", "oifname") and isinstance(right, str):
+                        rule.interface = right
+                    else:
+                        rule.extra_match = True
+                else:
+                    rule.extra_match = True # ct state, fib, mark...
+            elif not any(key in expr for key in NFT_PASSIVE_STATEMENTS):
+                rule.extra_match = True # limit, quota...
+            else:
+                for verdict in ("accept", "drop", "reject", "return", "jump", "goto"):
+                    if verdict in expr:
+                        rule.action = ACTION_NAMES.get(verdict, "jump")
+                        target = expr[verdict]
+                        rule.target = target.get("target", verdict) if isinstance(target, dict) else verdict
+        rules.append(rule)
+    return rules
+
+def parse_ufw_numbered(text):
+    """Convierte la salida de 'ufw status numbered' en una lista de FirewallRule."""
+    rules = []
+    for line in text.splitlines():
+        match = UFW_LINE.match(line.strip())
+        if not match:
+            continue
+        number, to, action, direction, source, comment = match.groups()
+        direction = (direction or "IN").lower()
+        rule = FirewallRule("ufw", "ufw", direction, len(rules), line.strip())
+        rule.number = int(number)
+        rule.action = ACTION_NAMES[action]
+        rule.target = action
+        rule.comment = comment
+        rule.family = "ipv6" if "(v6)" in to else "ipv4"
+        to = to.replace(" (v6)", "").strip()
+        source = source.replace(" (v6)", "").strip()
+        rule.source = None if source == "Anywhere" else source
+        # 'To' puede ser '22/tcp', '80,443/tcp', '8000:8100/udp', '53', 'Anywhere', '10.0.0.1 22/tcp',
+        # '22/tcp on eth0' o un perfil de aplicación ('OpenSSH')
+        if " on " in to:
+            to, _, rule.interface = to.partition(" on ")
+        parts = to.split()
+        service = parts[-1] if parts else "Anywhere"
+        if len(parts) > 1 and parts[0] != "Anywhere":
+            rule.destination = parts[0]
+        ports, _, protocol = service.partition("/")
+        if re.match(r"^[\d,:]+$", ports):
+            rule.ports = _parse_port_list(ports)
+            rule.protocols = (protocol,) if protocol else ()
+        elif service != "Anywhere":
+            try:
+                ipaddress.ip_network(service, strict=False)
+                rule.destination = service
+            except ValueError:
+                rule.comment = rule.comment or service # Perfil de aplicación: puertos desconocidos
+                rule.extra_match = True
+        rules.append(rule)
+    return rules
+
+class RuleIndex:
+    """
+    Índice de reglas por nombre/comentario, protocolo, cadena, acción y puerto. Los puertos
+    sueltos van en un diccionario; los rangos, ordenados por inicio con el fin máximo acumulado
+    para descartar de golpe los que no pueden contener el puerto.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.by_comment = {}
+        self.by_protocol = {}
+        self.by_chain = {}
+        self.by_action = {}
+        self.by_port = {}
+        self.any_port = []
+        ranges = []
+        for index, rule in enumerate(rules):
+            if rule.comment:
+                self.by_comment.setdefault(rule.comment.lower(), []).append(index)
+            for protocol in rule.protocols or ("any",):
+                self.by_protocol.setdefault(protocol, []).append(index)
+            self.by_chain.setdefault(rule.chain, []).append(index)
+            self.by_action.setdefault(rule.action, []).append(index)
+            if not rule.ports:
+                self.any_port.append(index)
+            for start, end in rule.ports:
+                if start == end:
+                    self.by_port.setdefault(start, []).append(index)
+                else:
+                    ranges.append((start, end, index))
+        ranges.sort()
+        self._range_starts = [start for start, _, _ in ranges]
+        self._ranges = ranges
+
+    def _port_candidates(self, port):
+        found = set(self.by_port.get(port, ()))
+        # Solo los rangos con inicio <= puerto pueden contenerlo
+        for start, end, index in self._ranges[:bisect.bisect_right(self._range_starts, port)]:
+            if end >= port:
+                found.add(index)
+        return found
+
+    def find(self, name=None, port=None, protocol=None, chain=None, action=None, include_any_port=True):
+        """
+        Reglas que cumplen todos los filtros, en orden de evaluación. 'name' busca el comentario
+        exacto (sin mayúsculas) y, si no existe, como subcadena; con 'port', las reglas sin puerto
+        (que aplican a todos) se incluyen salvo con include_any_port=False.
+        """
+        candidates = None
+
+        def narrow(indexes):
+            nonlocal candidates
+            candidates = set(indexes) if candidates is None else candidates & set(indexes)
+
+        if chain is not None:
+            narrow(self.by_chain.get(chain, ()))
+        if action is not None:
+            narrow(self.by_action.get(action, ()))
+        if protocol is not None:
+            narrow([*self.by_protocol.get(protocol, ()), *self.by_protocol.get("any", ())])
+        if port is not None:
+            narrow(self._port_candidates(port) | (set(self.any_port) if include_any_port else set()))
+        if name is not None:
+            needle = name.lower()
+            exact = self.by_comment.get(needle)
+            narrow(exact if exact is not None else
+                   [i for comment, indexes in self.by_comment.items() if needle in comment for i in indexes])
+        indexes = range(len(self.rules)) if candidates is None else sorted(candidates)
+        return [self.rules[i] for i in indexes]
+
+def read_rules(source, executor=None):
+    """
+    Ejecuta el comando de listado de 'source' ('ufw', 'nft' o 'iptables'/'ip6tables') y
+    retorna (texto, código). El texto se pasa después a parse_rules().
+    """
+    executor = executor or default_executor
+    if source == "ufw":
+        return executor(["ufw", "status", "numbered"])
+    if source == "nft":
+        return executor(["nft", "-j", "list", "ruleset"])
+    return executor([source, "-S"])
+
+def parse_rules(source, text):
+    if source == "ufw":
+        return parse_ufw_numbered(text)
+    if source == "nft":
+        return parse_nft_json(text)
+    return parse_iptables_rules(text, family="ipv6" if source == "ip6tables" else "ipv4")
+
+def detect_rule_source(executor=None):
+    """Elige la fuente: UFW si está activo, si no nft si responde, si no iptables."""
+    executor = executor or default_executor
+    output, status = executor(["ufw", "status"])
+    if status == 0 and "Status: active" in output:
+        return "ufw"
+    _, status = executor(["nft", "list", "tables"])
+    if status == 0:
+        return "nft"
+    return "iptables"
+
+# Caché por fuente: (instante de lectura, hash del texto, índice). La clave "auto" guarda
+# (instante de detección, fuente detectada) para no lanzar ufw/nft en cada consulta
+_cache = {}
+_cache_lock = threading.Lock()
+
+def get_rule_index(source="auto", max_age=5.0, executor=None):
+    """
+    Retorna (RuleIndex, fuente). El listado se vuelve a leer como mucho cada 'max_age'
+    segundos; solo se vuelve a parsear e indexar si el texto del ruleset cambió.
+    Lanza RuntimeError si el comando de listado falla.
+    """
+    if source == "auto":
+        with _cache_lock:
+            detected = _cache.get("auto")
+        if detected and time.monotonic() - detected[0] < max_age:
+            source = detected[1]
+        else:
+            source = detect_rule_source(executor)
+            with _cache_lock:
+                _cache["auto"] = (time.monotonic(), source)
+    with _cache_lock:
+        cached = _cache.get(source)
+        if cached and time.monotonic() - cached[0] < max_age:
+            return cached[2], source
+    text, status = read_rules(source, executor)
+    if status != 0:
+        raise RuntimeError(f"No se pudieron leer las reglas de {source}: {text.strip()}")
+    digest = hashlib.sha1(text.encode()).hexdigest()
+    with _cache_lock:
+        cached = _cache.get(source)
+        if cached and cached[1] == digest:
+            index = cached[2]
+        else:
+            index = RuleIndex(parse_rules(source, text))
+        _cache[source] = (time.monotonic(), digest, index)
+    return index, source
+
+def invalidate_rule_cache():
+    """Descarta los índices en caché (llamar tras modificar el ruleset)."""
+    with _cache_lock:
+        _cache.clear()
+
+def format_rule_table(rules):
+    """Tabla legible de reglas: número/posición, cadena, acción, protocolo, puertos, origen y comentario."""
+    lines = [f"{'#':>5} {'Cadena':<18}{'Acción':<9}{'Proto':<9}{'Puertos':<18}{'Origen':<20}Comentario"]
+    for rule in rules:
+        number = rule.number if rule.number is not None else rule.position + 1
+        ports = ",".join(str(s) if s == e else f"{s}-{e}" for s, e in rule.ports) or "cualquiera"
+        lines.append(f"{number:>5} {str(rule.chain)[:17]:<18}{str(rule.action or '-')[:8]:<9}"
+                     f"{'/'.join(rule.protocols) or 'todos':<9}{ports[:17]:<18}{(rule.source or 'cualquiera')[:19]:<20}"
+                     f"{rule.comment or ''}")
+    return "\n".join(lines)
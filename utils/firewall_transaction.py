@@ -0,0 +1,260 @@
+import ipaddress
+import re
+from utils.executor import default_executor
+
+# Backends: iptables-restore (IPv4), ip6tables-restore (IPv6) y nft -f
+BACKENDS = ("iptables", "ip6tables", "nft")
+ACTIONS = {"allow": ("ACCEPT", "accept"), "deny": ("DROP", "drop")}
+PORT_SPEC = re.compile(r"^(\d{1,5})(?:[-:](\d{1,5}))?$")
+
+class FirewallTransactionError(Exception):
+    """Cambio inválido añadido a una transacción (puerto, protocolo, dirección u origen)."""
+
+class RuleChange:
+    """Un cambio de la transacción: añadir ('add') o quitar ('remove') una regla de puerto."""
+    __slots__ = ("operation", "action", "port", "protocol", "direction", "source", "comment")
+
+    def __init__(self, operation, action, port, protocol, direction, source, comment):
+        self.operation = operation
+        self.action = action
+        self.port = port          # (inicio, fin); inicio == fin para un solo puerto
+        self.protocol = protocol
+        self.direction = direction
+        self.source = source
+        self.comment = comment
+
+    def protocols(self):
+        # 'any' con puerto equivale a tcp + udp (mismo criterio que 'ufw allow 53')
+        return ("tcp", "udp") if self.protocol == "any" else (self.protocol,)
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+def parse_port(port):
+    """Acepta 22, '22', '8000-8100' o '8000:8100'. Retorna (inicio, fin)."""
+    match = PORT_SPEC.match(str(port).strip())
+    if not match:
+        raise FirewallTransactionError(f"Puerto inválido: '{port}'.")
+    start = int(match.group(1))
+    end = int(match.group(2) or start)
+    if not 1 <= start <= end <= 65535:
+        raise FirewallTransactionError(f"Rango de puertos inválido: '{port}'.")
+    return start, end
+
+def is_read_only(argv):
+    """
+    True para los comandos que solo leen el ruleset: 'nft ... list ...' e '*-save' (predicado
+    'read_only' de RecordingExecutor para las simulaciones).
+    """
+    if argv[0] == "nft":
+        return "list" in argv and "-f" not in argv
+    return argv[0].endswith("-save")
+
+class RulesetTransaction:
+    """
+    Acumula cambios de reglas y los aplica en un único payload atómico: 'iptables-restore
+    --noflush' (COMMIT por tabla) o 'nft -f' (el fichero entero es una transacción).
+    Antes de aplicar guarda una instantánea del ruleset y, si la aplicación falla, la restaura.
+    'executor(argv, input)' -> (salida, código) se puede sustituir para pruebas.
+    'chains' permite apuntar a cadenas propias, ej. {'in': 'ufw-user-input', 'out': 'ufw-user-output'}.
+    """
+
+    def __init__(self, backend="iptables", executor=None, chains=None, nft_table=("inet", "filter")):
+        if backend not in BACKENDS:
+            raise FirewallTransactionError(f"Backend inválido: '{backend}'. Use {', '.join(BACKENDS)}.")
+        self.backend = backend
+        self.executor = executor or default_executor
+        if backend == "nft":
+            self.chains = chains or {"in": "input", "out": "output"}
+        else:
+            self.chains = chains or {"in": "INPUT", "out": "OUTPUT"}
+        self.nft_family, self.nft_table = nft_table
+        self.changes = []
+        self.last_snapshot = None
+
+    def _add_change(self, operation, action, port, protocol, direction, source, comment):
+        protocol = (protocol or "tcp").lower()
+        if protocol not in ("tcp", "udp", "any"):
+            raise FirewallTransactionError(f"Protocolo inválido: '{protocol}'. Use tcp, udp o any.")
+        if direction not in self.chains:
+            raise FirewallTransactionError(f"Dirección inválida: '{direction}'. Use 'in' o 'out'.")
+        if source:
+            try:
+                network = ipaddress.ip_network(source, strict=False)
+            except ValueError:
+                raise FirewallTransactionError(f"Origen inválido: '{source}'.")
+            if self.backend == "iptables" and network.version != 4 or self.backend == "ip6tables" and network.version != 6:
+                raise FirewallTransactionError(f"El origen '{source}' no es de la familia de {self.backend}.")
+            # Un host va sin prefijo, como lo imprimen 'nft list' e 'iptables -S' al buscar la regla a quitar
+            source = str(network.network_address) if network.prefixlen == network.max_prefixlen else str(network)
+        if comment is not None and (not comment or len(comment) > 128 or re.search(r'["\\\n]', comment)):
+            raise FirewallTransactionError("El comentario debe tener entre 1 y 128 caracteres, sin comillas ni saltos de línea.")
+        change = RuleChange(operation, action, parse_port(port), protocol, direction, source, comment)
+        self.changes.append(change)
+        return change
+
+    def allow(self, port, protocol="tcp", direction="in", source=None, comment=None):
+        """Permite el puerto (o rango). 'source' es la dirección/red remota opcional."""
+        return self._add_change("add", "allow", port, protocol, direction, source, comment)
+
+    def deny(self, port, protocol="tcp", direction="in", source=None, comment=None):
+        return self._add_change("add", "deny", port, protocol, direction, source, comment)
+
+    def remove(self, port, protocol="tcp", direction="in", action="allow", source=None, comment=None):
+        """Quita la regla que coincide exactamente con la especificación dada."""
+        if action not in ACTIONS:
+            raise FirewallTransactionError(f"Acción inválida: '{action}'.")
+        return self._add_change("remove", action, port, protocol, direction, source, comment)
+
+    # --- Renderizado ---
+
+    def _iptables_rule(self, change, protocol):
+        start, end = change.port
+        port = str(start) if start == end else f"{start}:{end}"
+        parts = [self.chains[change.direction]]
+        if change.source: # Dirección remota: origen en 'in', destino en 'out'
+            parts += ["-s" if change.direction == "in" else "-d", change.source]
+        parts += ["-p", protocol, "-m", protocol, "--dport", port] # Puerto de destino en ambos sentidos, como ufw
+        if change.comment:
+            parts += ["-m", "comment", "--comment", f'"{change.comment}"']
+        parts += ["-j", ACTIONS[change.action][0]]
+        return " ".join(parts)
+
+    def nft_expression(self, change):
+        """Expresión nft de la regla, en la misma forma normalizada en que la imprime 'nft list'."""
+        start, end = change.port
+        port = str(start) if start == end else f"{start}-{end}"
+        parts = []
+        if change.source:
+            address = "saddr" if change.direction == "in" else "daddr"
+            parts.append(f"{'ip6' if ':' in change.source else 'ip'} {address} {change.source}")
+        if change.protocol == "any":
+            parts.append(f"meta l4proto {{ tcp, udp }} th dport {port}")
+        else:
+            parts.append(f"{change.protocol} dport {port}")
+        parts.append(ACTIONS[change.action][1])
+        if change.comment:
+            parts.append(f'comment "{change.comment}"')
+        return " ".join(parts)
+
+    def render(self, handles=None):
+        """
+        Genera el payload completo de la transacción. Para nft, las eliminaciones necesitan
+        el handle de cada regla: 'handles' es {índice del cambio: handle} (ver resolve_nft_handles).
+        """
+        if self.backend == "nft":
+            target = f"{self.nft_family} {self.nft_table}"
+            lines = [f"add table {target}"]
+            for direction, hook in (("in", "input"), ("out", "output")):
+                chain = self.chains[direction]
+                if any(c.direction == direction for c in self.changes):
+                    # Solo las cadenas por defecto se declaran como base con su hook; las propias son regulares
+                    spec = f" {{ type filter hook {hook} priority 0 ; }}" if chain == hook else ""
+                    lines.append(f"add chain {target} {chain}{spec}")
+            for index, change in enumerate(self.changes):
+                chain = self.chains[change.direction]
+                if change.operation == "add":
+                    lines.append(f"add rule {target} {chain} {self.nft_expression(change)}")
+                else:
+                    handle = (handles or {}).get(index)
+                    if handle is None:
+                        raise FirewallTransactionError(f"No se encontró en el ruleset la regla a eliminar: {self.nft_expression(change)}")
+                    lines.append(f"delete rule {target} {chain} handle {handle}")
+            return "\n".join(lines) + "\n"
+
+        lines = ["*filter"]
+        for change in self.changes:
+            flag = "-A" if change.operation == "add" else "-D"
+            for protocol in change.protocols():
+                lines.append(f"{flag} {self._iptables_rule(change, protocol)}")
+        lines.append("COMMIT")
+        return "\n".join(lines) + "\n"
+
+    def resolve_nft_handles(self):
+        """Busca con 'nft -a list chain' el handle de cada regla a eliminar. Retorna {índice: handle}."""
+        handles = {}
+        listings = {}
+        for index, change in enumerate(self.changes):
+            if change.operation != "remove":
+                continue
+            chain = self.chains[change.direction]
+            if chain not in listings:
+                output, status = self.executor(["nft", "-a", "list", "chain", self.nft_family, self.nft_table, chain])
+                listings[chain] = output if status == 0 else ""
+            expression = self.nft_expression(change)
+            for line in listings[chain].splitlines():
+                rule, _, handle = line.strip().partition(" # handle ")
+                if rule == expression and handle.isdigit():
+                    handles[index] = int(handle)
+                    break
+        return handles
+
+    # --- Aplicación ---
+
+    def snapshot(self):
+        """
+        Retorna (texto del ruleset actual, código) para poder restaurarlo. Con nft solo se guarda
+        la tabla de la transacción (texto vacío si todavía no existe): las de otros (docker,
+        libvirt, fail2ban...) no se tocan al restaurar.
+        """
+        if self.backend == "nft":
+            tables, status = self.executor(["nft", "list", "tables"])
+            if status != 0:
+                return tables, status
+            if f"table {self.nft_family} {self.nft_table}" not in (line.strip() for line in tables.splitlines()):
+                return "", 0
+            return self.executor(["nft", "list", "table", self.nft_family, self.nft_table])
+        return self.executor([f"{self.backend}-save"])
+
+    def restore(self, snapshot):
+        """Restaura una instantánea tomada con snapshot(). Retorna (salida, código)."""
+        if self.backend == "nft":
+            target = f"{self.nft_family} {self.nft_table}"
+            if not snapshot:
+                # La tabla no existía: 'add' + 'delete' la quita tanto si se llegó a crear como si no
+                return self.executor(["nft", "-f", "-"], input=f"add table {target}\ndelete table {target}\n")
+            return self.executor(["nft", "-f", "-"], input=f"flush table {target}\n" + snapshot)
+        return self.executor([f"{self.backend}-restore"], input=snapshot)
+
+    def apply_payload(self, payload):
+        if self.backend == "nft":
+            return self.executor(["nft", "-f", "-"], input=payload)
+        return self.executor([f"{self.backend}-restore", "--noflush"], input=payload)
+
+    def commit(self):
+        """
+        Aplica todos los cambios de una vez. Retorna un diccionario con 'status' (0 = aplicado),
+        'output', 'payload', 'rolled_back' y 'rollback_status'. El kernel aplica el payload de
+        forma atómica; si aun así falla, se restaura la instantánea previa.
+        """
+        result = {"status": 0, "output": "", "payload": "", "changes": len(self.changes),
+                  "rolled_back": False, "rollback_status": None}
+        if not self.changes:
+            return result
+        snapshot, status = self.snapshot()
+        if status != 0:
+            result.update(status=status, output=f"No se pudo tomar la instantánea del ruleset: {snapshot}")
+            return result
+        self.last_snapshot = snapshot
+        try:
+            handles = self.resolve_nft_handles() if self.backend == "nft" else None
+            result["payload"] = self.render(handles)
+        except FirewallTransactionError as e:
+            result.update(status=1, output=str(e))
+            return result
+        output, status = self.apply_payload(result["payload"])
+        result.update(status=status, output=output)
+        if status != 0:
+            rollback_output, rollback_status = self.restore(snapshot)
+            result.update(rolled_back=True, rollback_status=rollback_status)
+            if rollback_status != 0:
+                result["output"] += f"\nError al restaurar la instantánea: {rollback_output}"
+        else:
+            self.changes = []
+        return result
+
+    def rollback(self):
+        """Deshace el último commit() restaurando su instantánea. Retorna (salida, código)."""
+        if self.last_snapshot is None:
+            return "No hay ninguna instantánea que restaurar.", 1
+        return self.restore(self.last_snapshot)
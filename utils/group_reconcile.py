@@ -0,0 +1,82 @@
+import csv
+import json
+import re
+from utils.executor import run_command
+from utils.account_db import get_account_db
+
+def _split_members(value):
+    if isinstance(value, (list, tuple)):
+        return [str(m).strip() for m in value if str(m).strip()]
+    return [m for m in re.split(r"[\s,;]+", value or "") if m]
+
+def load_membership_map(path):
+    """
+    Lee la membresía deseada. JSON: {"grupo": ["usuario", ...]}. CSV con cabecera 'group' y
+    'user' (un par por fila, como un export de RR. HH.) o 'members' (lista separada por comas).
+    Retorna {grupo: [usuarios]} conservando el orden de aparición.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".json"):
+            data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("El JSON debe ser un objeto {grupo: [usuarios]}.")
+            return {str(group): list(dict.fromkeys(_split_members(members))) for group, members in data.items()}
+        reader = csv.DictReader(f)
+        if not reader.fieldnames or "group" not in reader.fieldnames:
+            raise ValueError("El CSV debe tener una columna 'group' y otra 'user' o 'members'.")
+        desired = {}
+        for row in reader:
+            group = (row.get("group") or "").strip()
+            if not group:
+                continue
+            members = desired.setdefault(group, [])
+            for member in _split_members(row.get("members") or row.get("user")):
+                if member not in members:
+                    members.append(member)
+        return desired
+
+def plan_reconciliation(desired, root=None, additive=False):
+    """
+    Compara la membresía deseada con los miembros explícitos actuales de /etc/group.
+    Retorna una entrada por grupo con cambios o errores: {'group', 'add', 'remove', 'members', 'error'}.
+    'members' es la lista final (orden actual conservado). Con 'additive' nunca se quitan miembros.
+    Los grupos que ya coinciden no aparecen: no generan ningún comando.
+    """
+    db = get_account_db(root)
+    db.refresh()
+    plan = []
+    for groupname, wanted in desired.items():
+        group = db.groups.get(groupname)
+        if group is None:
+            plan.append({"group": groupname, "add": [], "remove": [], "members": [], "error": "el grupo no existe"})
+            continue
+        unknown = [user for user in wanted if user not in db.users]
+        if unknown:
+            plan.append({"group": groupname, "add": [], "remove": [], "members": [],
+                         "error": f"usuarios inexistentes: {', '.join(unknown)}"})
+            continue
+        current = set(group.members)
+        add = [user for user in wanted if user not in current]
+        remove = [] if additive else [user for user in group.members if user not in set(wanted)]
+        if add or remove:
+            members = [user for user in group.members if user not in remove] + add
+            plan.append({"group": groupname, "add": add, "remove": remove, "members": members, "error": None})
+    return plan
+
+def gpasswd_argv(groupname, members, root=None):
+    """argv que fija de una vez la lista completa de miembros del grupo (gpasswd -M)."""
+    argv = ["gpasswd"]
+    if root:
+        argv += ["-Q", root] # En gpasswd, -R es 'restrict'; el chroot es -Q
+    return argv + ["-M", ",".join(members), groupname]
+
+def apply_reconciliation(plan, root=None, sudo=True):
+    """
+    Aplica el plan con un gpasswd -M por grupo, uno tras otro (todos toman el bloqueo de
+    /etc/group). Añade a cada entrada 'status' y 'output'. Las entradas con error no se
+    ejecutan. Retorna el plan.
+    """
+    for entry in plan:
+        if entry["error"] is None:
+            entry["output"], entry["status"] = run_command(gpasswd_argv(entry["group"], entry["members"], root), sudo=sudo)
+    return plan
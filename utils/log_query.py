@@ -0,0 +1,196 @@
+import bisect
+import datetime
+import glob
+import json
+import mmap
+import os
+import re
+from config import LOG_DIR
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".idx"
+LOG_GLOB = "*_system_admin*.log"
+
+TEXT_LINE = re.compile(r"^\[([^\]]*)\] \[([^\]]*)\] \[([^\]]*)\] ?(.*)$")
+TOKEN = re.compile(r"\w{3,}")
+
+# Índices ya cargados en memoria: ruta -> (mtime_ns, tamaño, índice)
+_index_cache = {}
+
+def parse_line(line):
+    """
+    Convierte una línea de log (formato texto o JSON de utils.logger) en un diccionario
+    con timestamp, module, action y details. Retorna None si la línea no tiene formato válido.
+    """
+    line = line.rstrip("\n")
+    if line.startswith("{"):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        return record if "timestamp" in record and "module" in record else None
+    match = TEXT_LINE.match(line)
+    if not match:
+        return None
+    timestamp, module, action, details = match.groups()
+    return {"timestamp": timestamp, "module": module, "action": action, "details": details}
+
+_day_epochs = {}
+
+def _epoch(timestamp):
+    """Convierte 'YYYY-MM-DD HH:MM:SS' a epoch. El inicio de cada día se calcula una sola vez."""
+    day = timestamp[:10]
+    base = _day_epochs.get(day)
+    try:
+        if base is None:
+            base = _day_epochs[day] = int(datetime.datetime.strptime(day, "%Y-%m-%d").timestamp())
+        return base + int(timestamp[11:13]) * 3600 + int(timestamp[14:16]) * 60 + int(timestamp[17:19])
+    except ValueError:
+        return 0
+
+def _empty_index(stat):
+    return {"version": INDEX_VERSION, "inode": stat.st_ino, "size": 0,
+            "offsets": [], "times": [], "modules": {}, "actions": {}, "tokens": {}}
+
+def _index_lines(index, data, start):
+    """Añade al índice las líneas completas de 'data' a partir del byte 'start'."""
+    offsets, times = index["offsets"], index["times"]
+    modules, actions, tokens = index["modules"], index["actions"], index["tokens"]
+    position = start
+    end = len(data)
+    last_time = times[-1] if times else 0
+    while position < end:
+        newline = data.find(b"\n", position)
+        if newline == -1:
+            break # Línea incompleta (el escritor aún no la terminó): se indexará en la próxima actualización
+        record = parse_line(data[position:newline].decode("utf-8", errors="replace"))
+        if record is not None:
+            line_number = len(offsets)
+            offsets.append(position)
+            # Las líneas van en orden cronológico; se fuerza la monotonía para poder hacer búsqueda binaria
+            last_time = max(_epoch(record["timestamp"]), last_time)
+            times.append(last_time)
+            modules.setdefault(record["module"], []).append(line_number)
+            actions.setdefault(record["action"], []).append(line_number)
+            for token in set(TOKEN.findall(str(record.get("details", "")).lower())):
+                tokens.setdefault(token, []).append(line_number)
+        position = newline + 1
+    index["size"] = position
+
+def load_index(log_path):
+    """
+    Carga (o construye) el índice del fichero de log. Si el log creció desde la última vez
+    solo se indexa la parte nueva; si se truncó o se reemplazó, se reconstruye.
+    El índice se guarda junto al log en '<log>.idx'.
+    """
+    stat = os.stat(log_path)
+    cached = _index_cache.get(log_path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    index_path = log_path + INDEX_SUFFIX
+    index = cached[2] if cached else None
+    if index is None:
+        try:
+            with open(index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = None
+    if (index is None or index.get("version") != INDEX_VERSION or index.get("inode") != stat.st_ino
+            or index.get("size", 0) > stat.st_size):
+        index = _empty_index(stat)
+
+    if index["size"] < stat.st_size:
+        with open(log_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            _index_lines(index, data, index["size"])
+        try:
+            with open(index_path, "w") as f:
+                json.dump(index, f, separators=(",", ":"))
+        except OSError:
+            pass # Sin permisos de escritura: el índice se usa solo en memoria
+    _index_cache[log_path] = (stat.st_mtime_ns, stat.st_size, index)
+    return index
+
+def _file_date(log_path):
+    """Fecha del fichero según su nombre (YYYY-MM-DD_system_admin[.N].log)."""
+    try:
+        return datetime.datetime.strptime(os.path.basename(log_path)[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+def list_log_files(log_dir=LOG_DIR, start=None, end=None):
+    """Ficheros de log cuyo día se solapa con [start, end], en orden cronológico."""
+    files = []
+    for path in glob.glob(os.path.join(log_dir, LOG_GLOB)):
+        date = _file_date(path)
+        if date is not None:
+            if start is not None and date < start.date():
+                continue
+            if end is not None and date > end.date():
+                continue
+        # Las copias rotadas (.N.log) son más antiguas cuanto mayor es N
+        name = os.path.basename(path)
+        rotation = name[len("YYYY-MM-DD_system_admin."):-len(".log")] if name.count(".") > 1 else "0"
+        files.append((str(date), -int(rotation) if rotation.isdigit() else 0, path))
+    return [path for *_, path in sorted(files)]
+
+def _intersect(candidates, postings):
+    if candidates is None:
+        return set(postings)
+    return candidates.intersection(postings)
+
+def _candidate_lines(index, data, module, action, words, substring):
+    """Números de línea candidatos según los filtros (None = sin filtrar)."""
+    candidates = None
+    if module is not None:
+        candidates = _intersect(candidates, index["modules"].get(module, ()))
+    if action is not None:
+        candidates = _intersect(candidates, index["actions"].get(action, ()))
+    for word in words:
+        candidates = _intersect(candidates, index["tokens"].get(word, ()))
+    if substring:
+        # Búsqueda directa sobre el mmap del fichero y mapeo offset -> número de línea
+        pattern = re.compile(re.escape(substring.encode()), re.IGNORECASE)
+        offsets = index["offsets"]
+        found = {bisect.bisect_right(offsets, match.start()) - 1 for match in pattern.finditer(data)}
+        candidates = _intersect(candidates, found)
+    return candidates
+
+def query_logs(start=None, end=None, module=None, action=None, text=None, substring=None, log_dir=LOG_DIR, limit=None):
+    """
+    Busca en el archivo de logs. 'start'/'end' son datetime; 'module'/'action' coincidencia exacta;
+    'text' palabras completas (todas deben aparecer, resuelto con el índice de tokens);
+    'substring' subcadena sin distinguir mayúsculas (búsqueda en mmap).
+    Retorna una lista de registros en orden cronológico.
+    """
+    results = []
+    start_epoch = int(start.timestamp()) if start else None
+    end_epoch = int(end.timestamp()) if end else None
+    words = TOKEN.findall(text.lower()) if text else []
+    for log_path in list_log_files(log_dir, start, end):
+        try:
+            index = load_index(log_path)
+        except OSError:
+            continue
+        if not index["offsets"]:
+            continue
+        # Rango de líneas por tiempo con búsqueda binaria sobre los timestamps
+        first = bisect.bisect_left(index["times"], start_epoch) if start_epoch is not None else 0
+        last = bisect.bisect_right(index["times"], end_epoch) if end_epoch is not None else len(index["times"])
+        if first >= last:
+            continue
+        with open(log_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            candidates = _candidate_lines(index, data, module, action, words, substring)
+            if candidates is None:
+                line_numbers = range(first, last)
+            else:
+                line_numbers = sorted(n for n in candidates if first <= n < last)
+            for number in line_numbers:
+                offset = index["offsets"][number]
+                record = parse_line(data[offset:data.find(b"\n", offset)].decode("utf-8", errors="replace"))
+                if record is None:
+                    continue
+                results.append(record)
+                if limit and len(results) >= limit:
+                    return results
+    return results
@@ -1,17 +1,172 @@
+import atexit
 import datetime
+import json
 import os
-from config import LOG_DIR
+import queue
+import sys
+import threading
+from config import LOG_DIR, LOG_FORMAT, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_FSYNC, LOG_BATCH_SIZE
+
+LOG_FILE_SUFFIX = "_system_admin"
 
 def setup_log_directory():
     """Crea el directorio de logs si no existe."""
     if not os.path.exists(LOG_DIR):
         os.makedirs(LOG_DIR)
 
-def log_action(module, action, details):
-    """Registra una acción en un archivo de log."""
-    setup_log_directory()
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_file_path = os.path.join(LOG_DIR, f"{datetime.date.today().strftime('%Y-%m-%d')}_system_admin.log")
-    
-    with open(log_file_path, "a") as f:
-        f.write(f"[{timestamp}] [{module}] [{action}] {details}\n")
\ No newline at end of file
+def log_file_path(date=None):
+    """Ruta del fichero de log del día indicado (hoy por defecto)."""
+    date = date or datetime.date.today()
+    return os.path.join(LOG_DIR, f"{date.strftime('%Y-%m-%d')}{LOG_FILE_SUFFIX}.log")
+
+def format_record(record, log_format=None):
+    """Convierte un registro en su línea de log (texto clásico o JSON)."""
+    if (log_format or LOG_FORMAT) == "json":
+        return json.dumps(record, ensure_ascii=False) + "\n"
+    line = f"[{record['timestamp']}] [{record['module']}] [{record['action']}] {record['details']}"
+    extras = []
+    if record.get("status") is not None:
+        extras.append(f"status={record['status']}")
+    if record.get("duration") is not None:
+        extras.append(f"duration={record['duration']:.3f}s")
+    if extras:
+        line += " | " + " ".join(extras)
+    return line + "\n"
+
+class LogWriter:
+    """
+    Escritor de logs en segundo plano. log_action() solo encola el registro; un hilo
+    escritor agrupa los registros pendientes en lotes, mantiene el fichero abierto,
+    rota por fecha (un fichero por día) y por tamaño, y aplica la política de fsync.
+    """
+
+    def __init__(self, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT, fsync=LOG_FSYNC, batch_size=LOG_BATCH_SIZE):
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.fsync = fsync
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._file = None
+        self._path = None
+
+    def submit(self, record):
+        self._ensure_started()
+        self._queue.put(record)
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                setup_log_directory()
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            batch = [record]
+            # Se vacía lo que ya esté en cola para escribirlo de una vez
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            records = [r for r in batch if r is not None]
+            try:
+                if records:
+                    self._write_batch(records)
+            except Exception as e: # El hilo escritor nunca debe morir por un error de escritura
+                print(f"[ERROR] No se pudo escribir en el log: {e}", file=sys.stderr)
+                self._close()
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                self._close()
+                return
+
+    def _write_batch(self, records):
+        data = "".join(format_record(r) for r in records)
+        self._open_for(log_file_path())
+        if self.max_bytes and self._file.tell() > 0 and self._file.tell() + len(data.encode()) > self.max_bytes:
+            self._rotate()
+        if self.fsync == "always":
+            # Un write+fsync por registro: máxima durabilidad, mayor coste
+            for r in records:
+                self._file.write(format_record(r))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            return
+        self._file.write(data)
+        self._file.flush()
+        if self.fsync == "batch":
+            os.fsync(self._file.fileno())
+
+    def _open_for(self, path):
+        if self._path == path and self._file is not None:
+            return
+        self._close() # Cambio de día: se cierra el fichero anterior
+        self._file = open(path, "a", encoding="utf-8")
+        self._path = path
+
+    def _rotate(self):
+        """Rota por tamaño: X.log -> X.1.log -> X.2.log ... conservando 'backup_count' copias."""
+        base = self._path[:-len(".log")]
+        self._close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{base}.{index}.log"
+            if os.path.exists(source):
+                os.replace(source, f"{base}.{index + 1}.log")
+        if self.backup_count > 0:
+            os.replace(f"{base}.log", f"{base}.1.log")
+        else:
+            os.remove(f"{base}.log")
+        self._file = open(f"{base}.log", "a", encoding="utf-8")
+        self._path = f"{base}.log"
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._path = None
+
+    def flush(self, timeout=None):
+        """Espera a que se escriban todos los registros encolados."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        threading.Thread(target=lambda: (self._queue.join(), done.set()), daemon=True).start()
+        done.wait(timeout)
+
+    def shutdown(self, timeout=5):
+        """Escribe lo pendiente y detiene el hilo escritor."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+_writer = LogWriter()
+atexit.register(_writer.shutdown)
+
+def log_action(module, action, details, status=None, duration=None):
+    """
+    Registra una acción en el log. La escritura la hace un hilo en segundo plano.
+    'status' (ej. 'ok', 'error') y 'duration' (segundos) son opcionales.
+    """
+    _writer.submit({
+        "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "module": module,
+        "action": action,
+        "status": status,
+        "duration": duration,
+        "pid": os.getpid(),
+        "details": details,
+    })
+
+def flush_logs(timeout=None):
+    """Fuerza la escritura de los registros pendientes (ej. antes de leer el fichero de log)."""
+    _writer.flush(timeout)
@@ -0,0 +1,197 @@
+import collections
+import os
+import re
+import threading
+import time
+from utils.display import format_bytes
+
+MOUNTINFO = "/proc/self/mountinfo"
+
+# Sistemas de ficheros virtuales: no ocupan disco y no se les hace statvfs ('autofs' además
+# dispararía el montaje automático). 'df' también los oculta por defecto.
+PSEUDO_FILESYSTEMS = {"proc", "sysfs", "devpts", "cgroup", "cgroup2", "securityfs", "pstore", "debugfs", "tracefs",
+                      "configfs", "fusectl", "mqueue", "hugetlbfs", "bpf", "binfmt_misc", "autofs", "nsfs", "rpc_pipefs",
+                      "efivarfs", "selinuxfs", "ramfs", "devtmpfs", "nfsd", "fuse.gvfsd-fuse", "fuse.portal"}
+_ESCAPE = re.compile(r"\\([0-7]{3})")
+
+# Llamadas statvfs que siguen colgadas de consultas anteriores: {punto de montaje: instante de inicio}.
+# Mientras una siga sin volver no se lanza otra sobre el mismo punto (no se acumulan hilos bloqueados).
+_stuck = {}
+_stuck_lock = threading.Lock()
+
+class MountEntry:
+    """Punto de montaje de /proc/self/mountinfo, con el uso de statvfs cuando se ha consultado."""
+    __slots__ = ("mount_id", "parent_id", "major", "minor", "root", "mountpoint", "options", "fstype", "source",
+                 "super_options", "total", "used", "available", "inodes", "inodes_free", "status", "error")
+
+    def __init__(self, mount_id, parent_id, major, minor, root, mountpoint, options, fstype, source, super_options):
+        self.mount_id = mount_id
+        self.parent_id = parent_id
+        self.major = major
+        self.minor = minor
+        self.root = root              # Subdirectorio del sistema de ficheros montado ('/' salvo en bind mounts)
+        self.mountpoint = mountpoint
+        self.options = options
+        self.fstype = fstype
+        self.source = source
+        self.super_options = super_options
+        self.total = None
+        self.used = None
+        self.available = None
+        self.inodes = None
+        self.inodes_free = None
+        self.status = None            # 'ok', 'unresponsive', 'error' o 'skipped' (pseudo sistema de ficheros)
+        self.error = None
+
+    @property
+    def device(self):
+        return f"{self.major}:{self.minor}"
+
+    @property
+    def percent(self):
+        """Uso como lo calcula 'df': sobre el espacio utilizable por usuarios no root."""
+        if self.used is None or not self.used + self.available:
+            return None
+        return 100.0 * self.used / (self.used + self.available)
+
+    def to_dict(self):
+        data = {slot: getattr(self, slot) for slot in self.__slots__}
+        data["percent"] = self.percent
+        return data
+
+def _unescape(field):
+    # mountinfo escapa espacio, tabulador, salto de línea y '\' como \ooo en octal
+    return _ESCAPE.sub(lambda m: chr(int(m.group(1), 8)), field) if "\\" in field else field
+
+def read_mountinfo(path=MOUNTINFO):
+    """Lista de MountEntry en el orden de montaje. Solo lee un fichero de /proc: nunca se bloquea."""
+    entries = []
+    with open(path, encoding="utf-8", errors="surrogateescape") as f:
+        for line in f:
+            fields = line.split()
+            try:
+                separator = fields.index("-", 6) # Tras los campos opcionales (shared:N, master:N...)
+            except ValueError:
+                continue
+            if len(fields) < separator + 3:
+                continue
+            major, _, minor = fields[2].partition(":")
+            entries.append(MountEntry(int(fields[0]), int(fields[1]), int(major), int(minor), _unescape(fields[3]),
+                                      _unescape(fields[4]), fields[5], fields[separator + 1],
+                                      _unescape(fields[separator + 2]), fields[separator + 3] if len(fields) > separator + 3 else ""))
+    return entries
+
+def visible_mounts(entries):
+    """
+    Quita los montajes ocultos por otro posterior sobre el mismo punto (solo el último es
+    accesible). Conserva el orden.
+    """
+    last = {}
+    for entry in entries:
+        last[entry.mountpoint] = entry
+    return [entry for entry in entries if last[entry.mountpoint] is entry]
+
+def _statvfs_worker(entry, started, results, condition):
+    try:
+        result = os.statvfs(entry.mountpoint)
+    except OSError as e:
+        result = e
+    with _stuck_lock:
+        if _stuck.get(entry.mountpoint) == started:
+            del _stuck[entry.mountpoint]
+    with condition:
+        results[entry.mount_id] = result
+        condition.notify()
+
+def statvfs_mounts(entries, timeout=2.0, workers=16):
+    """
+    Rellena el uso de cada MountEntry con os.statvfs en hilos concurrentes (como mucho 'workers'
+    a la vez). Cada llamada tiene 'timeout' segundos desde que empieza: si no vuelve, el montaje
+    se marca 'unresponsive' y su hilo (daemon) se abandona, dejando libre el hueco para el resto.
+    Un punto de montaje con un statvfs anterior todavía en curso (colgado o no) se marca
+    'unresponsive' sin volver a tocarlo: nunca hay dos hilos bloqueados en el mismo montaje.
+    Los pseudo sistemas de ficheros se marcan 'skipped'. Retorna la misma lista.
+    """
+    condition = threading.Condition()
+    results = {}
+    pending = collections.deque()
+    for entry in entries:
+        if entry.fstype in PSEUDO_FILESYSTEMS:
+            entry.status = "skipped"
+            continue
+        pending.append(entry)
+    active = {} # mount_id -> (entrada, instante de inicio)
+    with condition:
+        while pending or active:
+            while pending and len(active) < workers:
+                entry = pending.popleft()
+                started = time.monotonic()
+                with _stuck_lock:
+                    since = _stuck.get(entry.mountpoint)
+                    if since is None:
+                        _stuck[entry.mountpoint] = started # Se borra al volver la llamada
+                if since is not None:
+                    # Ya hay un statvfs en curso sobre este punto de montaje: no se lanza otro hilo bloqueado
+                    entry.status = "unresponsive"
+                    entry.error = f"statvfs sigue sin responder desde hace {started - since:.0f} s"
+                    continue
+                active[entry.mount_id] = (entry, started)
+                threading.Thread(target=_statvfs_worker, args=(entry, started, results, condition), daemon=True).start()
+            if not active:
+                continue # Todas las pendientes estaban colgadas de antes
+            deadline = min(started for _, started in active.values()) + timeout
+            condition.wait(max(deadline - time.monotonic(), 0))
+            now = time.monotonic()
+            for mount_id, (entry, started) in list(active.items()):
+                if mount_id in results:
+                    del active[mount_id]
+                    _apply_statvfs(entry, results.pop(mount_id))
+                elif now - started >= timeout:
+                    del active[mount_id]
+                    entry.status = "unresponsive"
+                    entry.error = f"statvfs no respondió en {timeout:g} s"
+    return entries
+
+def _apply_statvfs(entry, result):
+    if isinstance(result, OSError):
+        entry.status, entry.error = "error", result.strerror or str(result)
+        return
+    entry.total = result.f_blocks * result.f_frsize
+    entry.used = (result.f_blocks - result.f_bfree) * result.f_frsize
+    entry.available = result.f_bavail * result.f_frsize
+    entry.inodes = result.f_files
+    entry.inodes_free = result.f_ffree
+    entry.status = "ok"
+
+def mount_usage(all_mounts=False, timeout=2.0, workers=16, path=MOUNTINFO):
+    """
+    Uso de los sistemas de ficheros montados, al estilo de 'df'. Sin 'all_mounts' se omiten los
+    pseudo sistemas de ficheros, los de tamaño 0, los montajes ocultos y los bind mounts de un
+    dispositivo ya listado (se conserva el montaje de su raíz o, si no, el primero).
+    """
+    entries = read_mountinfo(path)
+    if not all_mounts:
+        entries = [entry for entry in visible_mounts(entries) if entry.fstype not in PSEUDO_FILESYSTEMS]
+        first = {}
+        for entry in entries:
+            current = first.get(entry.device)
+            if current is None or entry.root == "/" and current.root != "/":
+                first[entry.device] = entry
+        entries = [entry for entry in entries if first[entry.device] is entry]
+    statvfs_mounts(entries, timeout, workers)
+    if not all_mounts:
+        entries = [entry for entry in entries if entry.status != "ok" or entry.total]
+    return entries
+
+def format_mount_usage(entries):
+    """Tabla al estilo de 'df -hT'; los montajes que no respondieron se indican en lugar de su uso."""
+    lines = [f"{'Origen':<28}{'Tipo':<10}{'Tamaño':>11}{'Usado':>11}{'Disp':>11}{'Uso%':>6}  Montado en"]
+    for e in entries:
+        if e.status == "ok":
+            percent = f"{e.percent:.0f}%" if e.percent is not None else "-"
+            usage = f"{format_bytes(e.total):>11}{format_bytes(e.used):>11}{format_bytes(e.available):>11}{percent:>6}"
+        else:
+            label = {"unresponsive": "SIN RESPUESTA", "error": "ERROR", "skipped": "-"}.get(e.status, "-")
+            usage = f"{label:>39}"
+        lines.append(f"{e.source[:27]:<28}{e.fstype[:9]:<10}{usage}  {e.mountpoint}")
+    return "\n".join(lines)
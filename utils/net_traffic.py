@@ -0,0 +1,118 @@
+import heapq
+from utils.counter_sampler import CounterSampler, counter_delta
+
+PROC_NET_DEV = "/proc/net/dev"
+SYS_CLASS_NET = "/sys/class/net"
+
+# Columnas de /proc/net/dev usadas: recepción 0-3 y transmisión 8-11 (bytes, paquetes, errores, descartes)
+COUNTERS = ("rx_bytes", "rx_packets", "rx_errors", "rx_dropped", "tx_bytes", "tx_packets", "tx_errors", "tx_dropped")
+COLUMNS = (0, 1, 2, 3, 8, 9, 10, 11)
+# Métricas (por segundo) que se guardan en el historial de cada interfaz
+HISTORY_METRICS = ("rx_bytes", "tx_bytes", "rx_packets", "tx_packets", "errors", "dropped")
+SORT_KEYS = ("total_bytes", "rx_bytes", "tx_bytes", "total_packets", "errors", "dropped", "utilization")
+
+def read_net_dev(path=PROC_NET_DEV):
+    """Lee los contadores acumulados de /proc/net/dev. Retorna {interfaz: tupla de COUNTERS}."""
+    counters = {}
+    with open(path, "rb") as f:
+        for line in f:
+            name, separator, data = line.partition(b":")
+            if not separator:
+                continue # Las dos líneas de cabecera no tienen ':'
+            fields = data.split()
+            if len(fields) >= 16:
+                counters[name.strip().decode(errors="replace")] = tuple(int(fields[i]) for i in COLUMNS)
+    return counters
+
+def link_speed(interface):
+    """Velocidad del enlace en Mb/s según /sys/class/net/<if>/speed, o None si no se conoce (veth caídas, wifi...)."""
+    try:
+        with open(f"{SYS_CLASS_NET}/{interface}/speed") as f:
+            speed = int(f.read())
+    except (OSError, ValueError):
+        return None
+    return speed if speed > 0 else None
+
+def interface_rates(before, after, elapsed):
+    """
+    Tasas de una interfaz entre dos lecturas separadas 'elapsed' segundos: las claves de COUNTERS
+    (por segundo) más 'total_bytes', 'total_packets', 'errors' y 'dropped'.
+    """
+    rates = {key: counter_delta(b, a) / elapsed for key, b, a in zip(COUNTERS, before, after)}
+    rates["total_bytes"] = rates["rx_bytes"] + rates["tx_bytes"]
+    rates["total_packets"] = rates["rx_packets"] + rates["tx_packets"]
+    rates["errors"] = rates["rx_errors"] + rates["tx_errors"]
+    rates["dropped"] = rates["rx_dropped"] + rates["tx_dropped"]
+    return rates
+
+class TrafficSampler(CounterSampler):
+    """
+    Muestreo periódico del tráfico por interfaz (ver utils.counter_sampler): bytes/s, paquetes/s,
+    errores/s y descartes/s de cada interfaz de /proc/net/dev, con historial de HISTORY_METRICS.
+    'pattern' limita las interfaces (expresión regular).
+    """
+    HISTORY_METRICS = HISTORY_METRICS
+
+    def __init__(self, interval=1.0, history_seconds=300, pattern=None, path=PROC_NET_DEV):
+        super().__init__(interval, history_seconds, pattern, path)
+        self._speeds = {}
+
+    def read_counters(self):
+        counters = read_net_dev(self.path)
+        if self.pattern:
+            counters = {name: values for name, values in counters.items() if self.pattern.search(name)}
+        return counters
+
+    def compute_rates(self, before, after, elapsed):
+        return interface_rates(before, after, elapsed)
+
+    def forget(self, name):
+        self._speeds.pop(name, None)
+
+    def speed(self, interface):
+        """Velocidad del enlace en Mb/s (se lee una vez por interfaz)."""
+        if interface not in self._speeds:
+            self._speeds[interface] = link_speed(interface)
+        return self._speeds[interface]
+
+    def top(self, n=10, key="total_bytes"):
+        """
+        Las 'n' interfaces más ocupadas en la última muestra según 'key'. 'utilization' es el % del
+        enlace usado en el sentido más cargado (solo interfaces con velocidad conocida).
+        Retorna una lista de {'interface', 'speed', 'utilization', ...tasas}.
+        """
+        with self._lock:
+            latest = dict(self.latest)
+        if key == "utilization":
+            candidates = [name for name in latest if self.speed(name)]
+            rank = lambda name: max(latest[name]["rx_bytes"], latest[name]["tx_bytes"]) / self.speed(name)
+        else:
+            candidates = latest
+            rank = lambda name: latest[name][key]
+        result = []
+        for name in heapq.nlargest(n, candidates, key=rank):
+            speed = self.speed(name)
+            busiest = max(latest[name]["rx_bytes"], latest[name]["tx_bytes"])
+            entry = {"interface": name, "speed": speed,
+                     "utilization": 100.0 * busiest * 8 / (speed * 1e6) if speed else None}
+            entry.update(latest[name])
+            result.append(entry)
+        return result
+
+def format_rate(bytes_per_second):
+    """Tasa legible en bits por segundo (como se expresa la capacidad de un enlace)."""
+    bits = bytes_per_second * 8
+    for unit in ("b/s", "Kb/s", "Mb/s", "Gb/s"):
+        if bits < 1000:
+            return f"{bits:.1f} {unit}"
+        bits /= 1000
+    return f"{bits:.1f} Tb/s"
+
+def format_top(entries):
+    """Tabla de las interfaces más ocupadas."""
+    lines = [f"{'Interfaz':<18}{'RX':>13}{'TX':>13}{'Paq/s RX':>11}{'Paq/s TX':>11}{'Err/s':>8}{'Desc/s':>8}{'Uso':>8}"]
+    for e in entries:
+        usage = f"{e['utilization']:.1f}%" if e["utilization"] is not None else "-"
+        lines.append(f"{e['interface'][:17]:<18}{format_rate(e['rx_bytes']):>13}{format_rate(e['tx_bytes']):>13}"
+                     f"{e['rx_packets']:>11.0f}{e['tx_packets']:>11.0f}{e['errors']:>8.1f}{e['dropped']:>8.1f}{usage:>8}")
+    return "\n".join(lines)
@@ -0,0 +1,461 @@
+import ipaddress
+import json
+import re
+import socket
+from utils.executor import default_executor
+from utils.rtnetlink import get_network_state, table_number, ROUTE_PROTOCOLS, ROUTE_TABLES, ROUTE_TYPES, SCOPES
+
+OPERATIONS = ("add_address", "del_address", "add_route", "replace_route", "del_route", "set_link")
+DEFAULT_METRIC = {socket.AF_INET: 0, socket.AF_INET6: 1024} # Métrica que asigna el kernel si no se indica
+INTERFACE_NAME = re.compile(r"^[^\s/:]{1,15}$")
+FAILED_LINE = re.compile(r"Command failed -:(\d+)")
+MAIN_TABLE = 254
+# Rutas que el kernel crea y borra por su cuenta (direcciones locales, broadcast, multicast)
+KERNEL_ROUTE_TYPES = (2, 3, 4, 5)
+KERNEL_PROTOCOL = 2
+SCOPE_LINK = 253
+
+class NetworkChangesetError(Exception):
+    """Cambio inválido o incompatible con el estado actual de la red."""
+
+class NetworkChange:
+    """Un cambio del conjunto: dirección, ruta o estado de enlace. 'inverse' lo rellena commit()."""
+    __slots__ = ("operation", "interface", "address", "destination", "gateway", "metric", "table", "family",
+                 "state", "mtu", "inverse")
+
+    def __init__(self, operation, interface=None, address=None, destination=None, gateway=None, metric=None,
+                 table=MAIN_TABLE, family=None, state=None, mtu=None):
+        self.operation = operation
+        self.interface = interface
+        self.address = address          # 'ip/prefijo' en cambios de dirección
+        self.destination = destination  # 'red/prefijo' en cambios de ruta ('0.0.0.0/0' o '::/0' para default)
+        self.gateway = gateway
+        self.metric = metric
+        self.table = table
+        self.family = family
+        self.state = state              # 'up' o 'down' en set_link
+        self.mtu = mtu
+        self.inverse = []               # Líneas de 'ip -batch' que deshacen el cambio
+
+    def to_dict(self):
+        data = {slot: getattr(self, slot) for slot in self.__slots__}
+        data["family"] = {socket.AF_INET: "inet", socket.AF_INET6: "inet6"}.get(self.family)
+        data["table"] = ROUTE_TABLES.get(self.table, self.table)
+        return data
+
+def _interface(name):
+    if not name or not INTERFACE_NAME.match(name):
+        raise NetworkChangesetError(f"Nombre de interfaz inválido: '{name}'.")
+    return name
+
+def _family(version):
+    return socket.AF_INET if version == 4 else socket.AF_INET6
+
+def _destination(destination, family=None):
+    """'default', '10.0.0.0/8', '2001:db8::/32'... -> (red normalizada, familia)."""
+    if destination == "default":
+        family = family or socket.AF_INET
+        return ("0.0.0.0/0" if family == socket.AF_INET else "::/0"), family
+    try:
+        network = ipaddress.ip_network(destination, strict=False)
+    except ValueError:
+        raise NetworkChangesetError(f"Destino de ruta inválido: '{destination}'.")
+    return str(network), _family(network.version)
+
+def route_destination(route):
+    """Destino de una Route de rtnetlink en la forma normalizada de los cambios."""
+    if route.destination == "default":
+        return "0.0.0.0/0" if route.family == socket.AF_INET else "::/0"
+    return route.destination
+
+def route_metric(route):
+    return route.metric if route.metric is not None else DEFAULT_METRIC.get(route.family, 0)
+
+def _table(table):
+    return ROUTE_TABLES.get(table, str(table))
+
+def route_spec(route):
+    """Especificación de 'ip route' que vuelve a crear una Route tal como estaba."""
+    parts = []
+    if route.type != 1:
+        parts.append(ROUTE_TYPES.get(route.type, str(route.type)))
+    parts.append(route_destination(route))
+    if route.nexthops:
+        for hop in route.nexthops:
+            parts.append("nexthop")
+            if hop["gateway"]:
+                parts += ["via", hop["gateway"]]
+            if hop["interface"]:
+                parts += ["dev", hop["interface"]]
+            parts += ["weight", str(hop["weight"])]
+    else:
+        if route.gateway:
+            parts += ["via", route.gateway]
+        if route.interface:
+            parts += ["dev", route.interface]
+    parts += ["proto", ROUTE_PROTOCOLS.get(route.protocol, str(route.protocol))]
+    if route.scope and route.family == socket.AF_INET:
+        parts += ["scope", SCOPES.get(route.scope, str(route.scope))]
+    if route.prefsrc:
+        parts += ["src", route.prefsrc]
+    parts += ["metric", str(route_metric(route)), "table", _table(route.table)]
+    return " ".join(parts)
+
+def address_spec(address):
+    """Especificación de 'ip address' de una Address de rtnetlink."""
+    spec = f"{address.address}/{address.prefixlen} dev {address.interface}"
+    if address.label and address.label != address.interface:
+        spec += f" label {address.label}"
+    return spec
+
+class NetworkSnapshot:
+    """Estado de enlaces, direcciones y rutas antes de aplicar un conjunto de cambios."""
+    __slots__ = ("links", "addresses", "routes")
+
+    def __init__(self, links, addresses, routes):
+        self.links = {link.name: link for link in links}
+        self.addresses = list(addresses)
+        self.routes = list(routes)
+
+    @classmethod
+    def capture(cls, state=None):
+        """Lee el estado actual por rtnetlink (sin privilegios). Lanza OSError si netlink falla."""
+        state = state or get_network_state()
+        return cls(state.links(), state.addresses(), state.routes(table=None))
+
+    def address_keys(self):
+        return {(a.interface, a.address, a.prefixlen) for a in self.addresses}
+
+    def route_keys(self):
+        return {(r.family, r.table, route_destination(r), route_metric(r), r.gateway, r.interface) for r in self.routes}
+
+    def restorable_addresses(self):
+        # Las direcciones IPv6 de enlace (fe80::) las regenera el kernel al levantar la interfaz
+        return [a for a in self.addresses if a.interface and not (a.family == socket.AF_INET6 and a.scope == SCOPE_LINK)]
+
+    def restorable_routes(self):
+        return [r for r in self.routes if r.type not in KERNEL_ROUTE_TYPES and r.protocol != KERNEL_PROTOCOL
+                and r.table != 255]
+
+class NetworkChangeset:
+    """
+    Acumula cambios de direcciones, rutas y estado de enlaces y los aplica con un único
+    'ip -batch -'. Antes de aplicar toma una instantánea por rtnetlink y valida cada cambio contra
+    ella (dirección ya asignada, ruta inexistente...), de modo que los errores previsibles se
+    detectan sin tocar nada. 'ip -batch' se detiene en la primera línea que falla: en ese caso se
+    deshacen en orden inverso las líneas ya aplicadas y se restauran las direcciones y rutas de la
+    instantánea que el kernel haya retirado por su cuenta (rutas de una interfaz bajada, por ejemplo).
+    'executor(argv, input)' -> (salida, código) se puede sustituir para pruebas.
+    """
+
+    def __init__(self, executor=None, state=None):
+        self.executor = executor or default_executor
+        self.state = state
+        self.changes = []
+        self.last_snapshot = None
+        self.last_applied = []
+
+    def add_address(self, interface, address):
+        """Añade 'ip/prefijo' (también 'ip/máscara') a la interfaz."""
+        try:
+            value = ipaddress.ip_interface(address)
+        except ValueError:
+            raise NetworkChangesetError(f"Dirección inválida: '{address}'.")
+        change = NetworkChange("add_address", _interface(interface), address=value.with_prefixlen, family=_family(value.version))
+        self.changes.append(change)
+        return change
+
+    def del_address(self, interface, address):
+        """Quita la dirección; sin prefijo se usa el que tenga asignado en la instantánea."""
+        try:
+            value = ipaddress.ip_interface(address)
+        except ValueError:
+            raise NetworkChangesetError(f"Dirección inválida: '{address}'.")
+        text = value.with_prefixlen if "/" in str(address) else str(value.ip)
+        change = NetworkChange("del_address", _interface(interface), address=text, family=_family(value.version))
+        self.changes.append(change)
+        return change
+
+    def _route_change(self, operation, destination, gateway, interface, metric, table, family):
+        if family is not None:
+            family = {4: socket.AF_INET, 6: socket.AF_INET6}.get(int(family))
+            if family is None:
+                raise NetworkChangesetError("La familia debe ser 4 o 6.")
+        if gateway:
+            try:
+                gateway_ip = ipaddress.ip_address(gateway)
+            except ValueError:
+                raise NetworkChangesetError(f"Puerta de enlace inválida: '{gateway}'.")
+            gateway = str(gateway_ip)
+            family = family or _family(gateway_ip.version)
+        destination, family = _destination(destination, family)
+        if gateway and _family(ipaddress.ip_address(gateway).version) != family:
+            raise NetworkChangesetError(f"La puerta de enlace '{gateway}' no es de la familia de '{destination}'.")
+        if operation != "del_route" and not gateway and not interface:
+            raise NetworkChangesetError(f"La ruta a '{destination}' necesita puerta de enlace o interfaz.")
+        if metric is not None:
+            metric = int(metric)
+            if not 0 <= metric < 1 << 32:
+                raise NetworkChangesetError(f"Métrica inválida: {metric}.")
+        try:
+            table = table_number(table)
+        except ValueError as e:
+            raise NetworkChangesetError(str(e))
+        change = NetworkChange(operation, _interface(interface) if interface else None, destination=destination,
+                               gateway=gateway or None, metric=metric, table=table, family=family)
+        self.changes.append(change)
+        return change
+
+    def add_route(self, destination, gateway=None, interface=None, metric=None, table="main", family=None):
+        """Añade una ruta ('default' o red). Falla si ya existe una con el mismo destino, métrica y tabla."""
+        return self._route_change("add_route", destination, gateway, interface, metric, table, family)
+
+    def replace_route(self, destination, gateway=None, interface=None, metric=None, table="main", family=None):
+        """Crea la ruta o sustituye la existente con el mismo destino, métrica y tabla."""
+        return self._route_change("replace_route", destination, gateway, interface, metric, table, family)
+
+    def del_route(self, destination, gateway=None, interface=None, metric=None, table="main", family=None):
+        """Quita la ruta que coincide; gateway, interfaz y métrica acotan la búsqueda si hay varias."""
+        return self._route_change("del_route", destination, gateway, interface, metric, table, family)
+
+    def set_link(self, interface, state=None, mtu=None):
+        """Cambia el estado ('up'/'down') y/o el MTU de la interfaz."""
+        if state not in (None, "up", "down"):
+            raise NetworkChangesetError(f"Estado de enlace inválido: '{state}'. Use 'up' o 'down'.")
+        if mtu is not None:
+            mtu = int(mtu)
+            if not 68 <= mtu <= 65535:
+                raise NetworkChangesetError(f"MTU inválido: {mtu}.")
+        if state is None and mtu is None:
+            raise NetworkChangesetError("set_link necesita 'state' o 'mtu'.")
+        change = NetworkChange("set_link", _interface(interface), state=state, mtu=mtu)
+        self.changes.append(change)
+        return change
+
+    def extend(self, items):
+        """Añade cambios descritos como diccionarios {'op': operación, ...argumentos}. Retorna self."""
+        for number, item in enumerate(items, 1):
+            if not isinstance(item, dict) or item.get("op") not in OPERATIONS:
+                raise NetworkChangesetError(f"Cambio {number}: 'op' debe ser uno de {', '.join(OPERATIONS)}.")
+            arguments = {key: value for key, value in item.items() if key != "op"}
+            try:
+                getattr(self, item["op"])(**arguments)
+            except TypeError as e:
+                raise NetworkChangesetError(f"Cambio {number}: argumentos inválidos para '{item['op']}' ({e}).")
+            except (ValueError, NetworkChangesetError) as e:
+                raise NetworkChangesetError(f"Cambio {number}: {e}")
+        return self
+
+    # --- Renderizado ---
+
+    def render_line(self, change):
+        """Línea de 'ip -batch' del cambio."""
+        if change.operation == "set_link":
+            line = f"link set dev {change.interface}"
+            if change.state:
+                line += f" {change.state}"
+            if change.mtu:
+                line += f" mtu {change.mtu}"
+            return line
+        if change.operation in ("add_address", "del_address"):
+            verb = "add" if change.operation == "add_address" else "del"
+            return f"address {verb} {change.address} dev {change.interface}"
+        verb = {"add_route": "add", "replace_route": "replace", "del_route": "del"}[change.operation]
+        parts = ["route", verb, change.destination]
+        if change.gateway:
+            parts += ["via", change.gateway]
+        if change.interface:
+            parts += ["dev", change.interface]
+        if change.metric is not None:
+            parts += ["metric", str(change.metric)]
+        parts += ["table", _table(change.table)]
+        return " ".join(parts)
+
+    def render(self):
+        """Payload completo para 'ip -batch -'."""
+        return "".join(self.render_line(change) + "\n" for change in self.changes)
+
+    # --- Validación contra la instantánea ---
+
+    def _matching_routes(self, routes, change):
+        metric = change.metric
+        return [key for key in routes if key[:3] == (change.family, change.table, change.destination)
+                and (metric is None or key[3] == metric) and (change.gateway is None or key[4] == change.gateway)
+                and (change.interface is None or key[5] == change.interface)]
+
+    def plan(self, snapshot):
+        """
+        Valida los cambios en orden sobre una copia del estado de 'snapshot' y calcula las líneas
+        que deshacen cada uno (change.inverse). Lanza NetworkChangesetError con el primer conflicto.
+        """
+        links = {name: {"up": link.up, "mtu": link.mtu} for name, link in snapshot.links.items()}
+        addresses = {(a.interface, a.address, a.prefixlen): a for a in snapshot.addresses}
+        routes = {(r.family, r.table, route_destination(r), route_metric(r), r.gateway, r.interface): route_spec(r)
+                  for r in snapshot.routes if not r.nexthops}
+        routes.update({(r.family, r.table, route_destination(r), route_metric(r), None, None): route_spec(r)
+                       for r in snapshot.routes if r.nexthops})
+        for number, change in enumerate(self.changes, 1):
+            prefix = f"Cambio {number} ({self.render_line(change)})"
+            if change.interface and change.interface not in links:
+                raise NetworkChangesetError(f"{prefix}: la interfaz '{change.interface}' no existe.")
+            if change.operation == "set_link":
+                current = links[change.interface]
+                restore = f"link set dev {change.interface} {'up' if current['up'] else 'down'}"
+                if change.mtu and current["mtu"]:
+                    restore += f" mtu {current['mtu']}"
+                change.inverse = [restore]
+                if change.state:
+                    current["up"] = change.state == "up"
+                if change.mtu:
+                    current["mtu"] = change.mtu
+            elif change.operation == "add_address":
+                ip, _, prefixlen = change.address.partition("/")
+                key = (change.interface, ip, int(prefixlen))
+                if key in addresses:
+                    raise NetworkChangesetError(f"{prefix}: la dirección ya está asignada.")
+                addresses[key] = None
+                change.inverse = [f"address del {change.address} dev {change.interface}"]
+            elif change.operation == "del_address":
+                ip, _, prefixlen = change.address.partition("/")
+                found = [key for key in addresses if key[:2] == (change.interface, ip)
+                         and (not prefixlen or key[2] == int(prefixlen))]
+                if not found:
+                    raise NetworkChangesetError(f"{prefix}: la dirección no está asignada a '{change.interface}'.")
+                key = found[0]
+                change.address = f"{ip}/{key[2]}"
+                original = addresses.pop(key)
+                change.inverse = [f"address add {address_spec(original) if original else change.address + ' dev ' + change.interface}"]
+            else:
+                metric = change.metric if change.metric is not None else DEFAULT_METRIC[change.family]
+                matches = self._matching_routes(routes, change)
+                if change.operation == "del_route":
+                    if not matches:
+                        raise NetworkChangesetError(f"{prefix}: la ruta no existe.")
+                    if len(matches) > 1:
+                        raise NetworkChangesetError(f"{prefix}: coinciden {len(matches)} rutas; indique gateway, interfaz o métrica.")
+                    change.inverse = [f"route add {routes.pop(matches[0])}"]
+                    continue
+                # Alta o sustitución: el kernel identifica la ruta por familia, tabla, destino y métrica
+                same = [key for key in routes if key[:4] == (change.family, change.table, change.destination, metric)]
+                if same and change.operation == "add_route":
+                    raise NetworkChangesetError(f"{prefix}: ya existe una ruta con ese destino y métrica (use replace_route).")
+                if same:
+                    change.inverse = [f"route replace {routes[same[0]]}"]
+                else:
+                    change.inverse = [f"route del {change.destination} metric {metric} table {_table(change.table)}"]
+                for key in same:
+                    del routes[key]
+                spec = self.render_line(change).split(" ", 2)[2]
+                if change.metric is None:
+                    spec = spec.replace(" table ", f" metric {metric} table ")
+                routes[change.family, change.table, change.destination, metric, change.gateway, change.interface] = spec
+        return self.changes
+
+    # --- Aplicación ---
+
+    def restore_missing(self, snapshot):
+        """Líneas que vuelven a crear las direcciones y rutas de 'snapshot' que ya no existen."""
+        current = NetworkSnapshot.capture(self.state)
+        lines = []
+        links = {name: link.up for name, link in current.links.items()}
+        addresses = current.address_keys()
+        for address in snapshot.restorable_addresses():
+            if (address.interface, address.address, address.prefixlen) not in addresses and address.interface in links:
+                lines.append(f"address add {address_spec(address)}")
+        routes = current.route_keys()
+        for route in snapshot.restorable_routes():
+            key = (route.family, route.table, route_destination(route), route_metric(route), route.gateway, route.interface)
+            if key not in routes:
+                lines.append(f"route replace {route_spec(route)}")
+        return lines
+
+    def rollback_lines(self, applied):
+        """Inversas de los cambios aplicados, del último al primero."""
+        return [line for change in reversed(applied) for line in change.inverse]
+
+    def commit(self):
+        """
+        Aplica todos los cambios con un único 'ip -batch -'. Retorna un diccionario con 'status'
+        (0 = aplicado), 'output', 'payload', 'changes', 'applied' (cambios que llegaron a aplicarse),
+        'rolled_back', 'rollback_status' y 'rollback_payload'.
+        """
+        result = {"status": 0, "output": "", "payload": "", "changes": len(self.changes), "applied": 0,
+                  "rolled_back": False, "rollback_status": None, "rollback_payload": ""}
+        if not self.changes:
+            return result
+        try:
+            snapshot = NetworkSnapshot.capture(self.state)
+        except OSError as e:
+            result.update(status=1, output=f"No se pudo tomar la instantánea de la red: {e}")
+            return result
+        try:
+            self.plan(snapshot)
+        except NetworkChangesetError as e:
+            result.update(status=1, output=str(e))
+            return result
+        self.last_snapshot = snapshot
+        result["payload"] = self.render()
+        output, status = self.executor(["ip", "-batch", "-"], input=result["payload"])
+        result.update(status=status, output=output)
+        if status == 0:
+            self.last_applied = self.changes
+            result["applied"] = len(self.changes)
+            self.changes = []
+            return result
+        # Sin -force, 'ip -batch' termina en la primera línea que falla y la indica como "-:N"
+        match = FAILED_LINE.search(output)
+        applied = self.changes[:int(match.group(1)) - 1] if match else self.changes
+        result["applied"] = len(applied)
+        rollback_output, rollback_payload, rollback_status = self._restore(snapshot, applied)
+        result.update(rolled_back=True, rollback_status=rollback_status, rollback_payload=rollback_payload)
+        if rollback_status != 0:
+            result["output"] += f"\nError al restaurar el estado previo: {rollback_output}"
+        return result
+
+    def _restore(self, snapshot, applied):
+        """Deshace 'applied' y repone lo que falte de la instantánea. Retorna (salida, payload, código)."""
+        payload = "".join(line + "\n" for line in self.rollback_lines(applied))
+        output, status = "", 0
+        if payload:
+            # -force: se intenta deshacer todo aunque alguna línea falle
+            output, status = self.executor(["ip", "-force", "-batch", "-"], input=payload)
+        try:
+            missing = self.restore_missing(snapshot)
+        except OSError as e:
+            return output + f"\nNo se pudo releer el estado de la red: {e}", payload, 1
+        if missing:
+            extra = "".join(line + "\n" for line in missing)
+            payload += extra
+            missing_output, missing_status = self.executor(["ip", "-force", "-batch", "-"], input=extra)
+            output += missing_output
+            status = status or missing_status
+        return output, payload, status
+
+    def rollback(self):
+        """Deshace el último commit() correcto. Retorna (salida, código)."""
+        if self.last_snapshot is None or not self.last_applied:
+            return "No hay ningún cambio aplicado que deshacer.", 1
+        output, _, status = self._restore(self.last_snapshot, self.last_applied)
+        self.last_applied = []
+        return output, status
+
+def load_network_changes(path):
+    """Lee una lista JSON de cambios: [{"op": "add_address", "interface": "eth0", "address": "10.0.0.5/24"}, ...]."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("changes", [])
+    if not isinstance(data, list):
+        raise NetworkChangesetError("El fichero debe contener una lista de cambios (o {\"changes\": [...]}).")
+    return data
+
+def format_changeset_result(result):
+    """Texto legible del resultado de commit()."""
+    lines = [f"Cambios: {result['changes']}, aplicados: {result['applied']}, código: {result['status']}"]
+    if result["output"].strip():
+        lines.append(result["output"].strip())
+    if result["rolled_back"]:
+        state = "correcta" if result["rollback_status"] == 0 else f"con errores (código {result['rollback_status']})"
+        lines.append(f"Restauración del estado previo {state}:")
+        lines += [f"  {line}" for line in result["rollback_payload"].splitlines()]
+    return "\n".join(lines)
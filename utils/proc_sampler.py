@@ -0,0 +1,142 @@
+import os
+import time
+
+PROC_STAT = "/proc/stat"
+PROC_MEMINFO = "/proc/meminfo"
+PROC_LOADAVG = "/proc/loadavg"
+
+# Columnas de /proc/stat (en jiffies). 'guest' y 'guest_nice' ya están incluidas en 'user' y 'nice'.
+CPU_FIELDS = ("user", "nice", "system", "idle", "iowait", "irq", "softirq", "steal")
+
+def read_cpu_times(path=PROC_STAT):
+    """Lee los contadores acumulados de CPU de /proc/stat. Retorna {'cpu': (...), 'cpu0': (...), ...}."""
+    times = {}
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.startswith(b"cpu"):
+                break # Las líneas de CPU siempre van al principio del fichero
+            parts = line.split()
+            values = [int(v) for v in parts[1:len(CPU_FIELDS) + 1]]
+            values.extend([0] * (len(CPU_FIELDS) - len(values))) # Kernels antiguos con menos columnas
+            times[parts[0].decode()] = tuple(values)
+    return times
+
+def read_meminfo(path=PROC_MEMINFO):
+    """Lee /proc/meminfo y retorna un diccionario con los valores en bytes."""
+    info = {}
+    with open(path, "rb") as f:
+        for line in f:
+            key, _, rest = line.partition(b":")
+            fields = rest.split()
+            if not fields:
+                continue
+            value = int(fields[0])
+            if len(fields) > 1 and fields[1] == b"kB":
+                value *= 1024
+            info[key.decode()] = value
+    return info
+
+def read_loadavg(path=PROC_LOADAVG):
+    """Lee /proc/loadavg. Retorna cargas medias de 1, 5 y 15 minutos y el número de tareas."""
+    with open(path) as f:
+        load1, load5, load15, tasks, last_pid = f.read().split()
+    running, total = tasks.split("/")
+    return {
+        "load1": float(load1),
+        "load5": float(load5),
+        "load15": float(load15),
+        "running": int(running),
+        "total_tasks": int(total),
+        "last_pid": int(last_pid),
+    }
+
+def cpu_percent(previous, current):
+    """
+    Calcula el porcentaje de uso por CPU a partir de dos lecturas de read_cpu_times().
+    Retorna {'cpu': {'usage': x, 'user': x, 'system': x, 'iowait': x, 'steal': x}, 'cpu0': {...}, ...}.
+    """
+    result = {}
+    for name, curr in current.items():
+        prev = previous.get(name)
+        if prev is None:
+            continue # CPU que acaba de aparecer (hotplug): no hay delta todavía
+        deltas = [max(c - p, 0) for c, p in zip(curr, prev)]
+        total = sum(deltas)
+        if total == 0:
+            result[name] = {"usage": 0.0, "user": 0.0, "system": 0.0, "iowait": 0.0, "steal": 0.0}
+            continue
+        user, nice, system, idle, iowait, irq, softirq, steal = deltas
+        result[name] = {
+            "usage": 100.0 * (total - idle - iowait) / total,
+            "user": 100.0 * (user + nice) / total,
+            "system": 100.0 * (system + irq + softirq) / total,
+            "iowait": 100.0 * iowait / total,
+            "steal": 100.0 * steal / total,
+        }
+    return result
+
+def memory_summary(meminfo):
+    """Resume /proc/meminfo en totales de memoria y swap (bytes) y porcentajes de uso."""
+    total = meminfo.get("MemTotal", 0)
+    available = meminfo.get("MemAvailable")
+    if available is None: # Kernels < 3.14 no exponen MemAvailable
+        available = meminfo.get("MemFree", 0) + meminfo.get("Buffers", 0) + meminfo.get("Cached", 0)
+    swap_total = meminfo.get("SwapTotal", 0)
+    swap_used = swap_total - meminfo.get("SwapFree", 0)
+    used = total - available
+    return {
+        "total": total,
+        "available": available,
+        "used": used,
+        "percent": 100.0 * used / total if total else 0.0,
+        "buffers": meminfo.get("Buffers", 0),
+        "cached": meminfo.get("Cached", 0),
+        "swap_total": swap_total,
+        "swap_used": swap_used,
+        "swap_percent": 100.0 * swap_used / swap_total if swap_total else 0.0,
+    }
+
+class CpuMemorySampler:
+    """
+    Muestreador en proceso de CPU, memoria y carga basado en /proc.
+    Conserva la lectura anterior de /proc/stat para que cada llamada a sample()
+    calcule el uso de CPU desde la muestra previa sin necesidad de dormir.
+    """
+
+    def __init__(self):
+        self._previous = read_cpu_times()
+        self._previous_time = time.monotonic()
+
+    def sample(self, min_interval=0.0):
+        """
+        Toma una muestra. Si han pasado menos de 'min_interval' segundos desde la anterior,
+        espera lo que falte (útil en la primera llamada para que el delta sea significativo).
+        """
+        elapsed = time.monotonic() - self._previous_time
+        if elapsed < min_interval:
+            time.sleep(min_interval - elapsed)
+        current = read_cpu_times()
+        now = time.monotonic()
+        cpu = cpu_percent(self._previous, current)
+        interval = now - self._previous_time
+        self._previous, self._previous_time = current, now
+
+        total = cpu.pop("cpu", {"usage": 0.0, "user": 0.0, "system": 0.0, "iowait": 0.0, "steal": 0.0})
+        # Cada núcleo lleva su número de /proc/stat ('id'): con CPUs offline la numeración tiene huecos
+        cores = [dict(cpu[name], id=int(name[3:])) for name in sorted(cpu, key=lambda n: int(n[3:]))]
+        return {
+            "timestamp": time.time(),
+            "interval": interval,
+            "cpu_total": total,
+            "cpu_cores": cores,
+            "memory": memory_summary(read_meminfo()),
+            "load": read_loadavg(),
+        }
+
+def sample_cpu_memory(interval=0.5):
+    """Toma una muestra única de CPU, memoria y carga midiendo el uso de CPU durante 'interval' segundos."""
+    return CpuMemorySampler().sample(min_interval=interval)
+
+def is_available():
+    """Indica si el sistema expone /proc (Linux)."""
+    return os.path.exists(PROC_STAT)
@@ -0,0 +1,180 @@
+import errno
+import os
+import select
+import signal
+import time
+from utils.executor import run_command
+from utils.process_table import read_process_table, filter_processes, read_stat, stat_starttime
+
+# Resultados posibles por PID
+TERMINATED = "terminated"     # Terminó tras la señal inicial
+KILLED = "killed"             # Terminó tras escalar a SIGKILL
+SURVIVED = "survived"         # Sigue vivo tras el periodo de gracia (y la escalada, si la hubo)
+NOT_FOUND = "not_found"       # No existía (o ya había terminado) al enviar la señal
+PERMISSION_DENIED = "permission_denied"
+
+def resolve_targets(pids=None, name_regex=None, user=None, match_cmdline=False):
+    """
+    Resuelve los objetivos a una lista de (pid, starttime). Combina PIDs explícitos con
+    los procesos de la tabla en memoria que coinciden con 'name_regex' (sobre el nombre y,
+    si 'match_cmdline', también la línea de comandos) y/o 'user'.
+    Nunca incluye el propio proceso ni su padre.
+    """
+    excluded = {os.getpid(), os.getppid()}
+    targets = {}
+    for pid in pids or ():
+        pid = int(pid)
+        if pid in excluded or pid <= 1:
+            continue
+        try:
+            targets[pid] = stat_starttime(read_stat(pid))
+        except (FileNotFoundError, ProcessLookupError):
+            targets[pid] = None # Se reportará como no encontrado
+    if name_regex or user:
+        for record in filter_processes(read_process_table(), user=user, name_regex=name_regex,
+                                       match_cmdline=match_cmdline):
+            if record.pid not in excluded and record.pid > 1:
+                targets[record.pid] = record.starttime
+    return sorted(targets.items())
+
+def _open_pidfd(pid, starttime):
+    """
+    Abre un pidfd para 'pid' y comprueba que sigue siendo el mismo proceso (mismo starttime),
+    evitando señalizar un PID reutilizado. Retorna None si pidfd no está disponible.
+    """
+    if not hasattr(os, "pidfd_open"):
+        return None
+    try:
+        fd = os.pidfd_open(pid)
+    except OSError as e:
+        if e.errno in (errno.ENOSYS, errno.EINVAL): # Kernel sin soporte de pidfd
+            return None
+        raise
+    if starttime is not None:
+        try:
+            same = stat_starttime(read_stat(pid)) == starttime
+        except (FileNotFoundError, ProcessLookupError):
+            same = False
+        if not same:
+            os.close(fd)
+            raise ProcessLookupError(pid)
+    return fd
+
+def _is_alive(pid):
+    """Comprueba si un PID sigue vivo (los zombis cuentan como terminados)."""
+    try:
+        data = read_stat(pid)
+    except (FileNotFoundError, ProcessLookupError):
+        return False
+    return data[data.rfind(b")") + 2:data.rfind(b")") + 3] not in (b"Z", b"X")
+
+def _send(pid, fd, sig, sudo=False):
+    """
+    Envía la señal por el pidfd (o con os.kill sin pidfd). Si no hay permiso y 'sudo' es True,
+    la envía con 'kill' privilegiado (vía el auxiliar privilegiado si está activo).
+    """
+    try:
+        if fd is not None:
+            signal.pidfd_send_signal(fd, sig)
+        else:
+            os.kill(pid, sig)
+    except PermissionError:
+        if not sudo:
+            raise
+        output, status = run_command(["kill", f"-{int(sig)}", str(pid)], sudo=True)
+        if status != 0:
+            if "No such process" in output:
+                raise ProcessLookupError(pid)
+            raise PermissionError(output.strip() or f"kill terminó con código {status}")
+
+def _wait_all(alive, timeout):
+    """
+    Espera a la vez a todos los procesos de 'alive' ({pid: fd o None}) hasta 'timeout' segundos.
+    Usa poll() sobre los pidfd; los procesos sin pidfd se comprueban periódicamente.
+    Retorna el conjunto de PIDs que han terminado.
+    """
+    exited = set()
+    poller = select.poll()
+    fd_to_pid = {}
+    for pid, fd in alive.items():
+        if fd is not None:
+            poller.register(fd, select.POLLIN)
+            fd_to_pid[fd] = pid
+    deadline = time.monotonic() + timeout
+    polling_interval = 0.01
+    while len(exited) < len(alive):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        without_fd = [pid for pid, fd in alive.items() if fd is None and pid not in exited]
+        wait = min(remaining, polling_interval) if without_fd else remaining
+        for fd, _ in poller.poll(wait * 1000):
+            exited.add(fd_to_pid[fd])
+            poller.unregister(fd)
+        for pid in without_fd:
+            if not _is_alive(pid):
+                exited.add(pid)
+        polling_interval = min(polling_interval * 2, 0.2)
+    # Un pidfd también es legible cuando el proceso es un zombi; se comprueba igualmente el resto
+    for pid in alive:
+        if pid not in exited and not _is_alive(pid):
+            exited.add(pid)
+    return exited
+
+def signal_processes(targets, sig=signal.SIGTERM, grace=5.0, escalate=True, kill_wait=2.0, sudo=True):
+    """
+    Envía 'sig' a todos los objetivos ([(pid, starttime)] de resolve_targets), espera
+    concurrentemente hasta 'grace' segundos y escala a SIGKILL los que sigan vivos si
+    'escalate' es True (esperando otros 'kill_wait' segundos). Con 'sudo', los procesos que no
+    se pueden señalizar directamente (de otros usuarios) se señalizan con 'kill' privilegiado.
+    Retorna {pid: resultado}.
+    """
+    results = {}
+    alive = {}
+    try:
+        for pid, starttime in targets:
+            if starttime is None:
+                results[pid] = NOT_FOUND
+                continue
+            fd = None
+            try:
+                fd = _open_pidfd(pid, starttime)
+                _send(pid, fd, sig, sudo)
+                alive[pid] = fd
+            except (ProcessLookupError, PermissionError) as e:
+                results[pid] = NOT_FOUND if isinstance(e, ProcessLookupError) else PERMISSION_DENIED
+                if fd is not None:
+                    os.close(fd)
+
+        exited = _wait_all(alive, grace) if alive else set()
+        for pid in exited:
+            results[pid] = TERMINATED
+        remaining = {pid: fd for pid, fd in alive.items() if pid not in exited}
+
+        if remaining and escalate and sig != signal.SIGKILL:
+            for pid, fd in list(remaining.items()):
+                try:
+                    _send(pid, fd, signal.SIGKILL, sudo)
+                except ProcessLookupError:
+                    results[pid] = TERMINATED # Terminó justo antes de la escalada
+                    del remaining[pid]
+                except PermissionError:
+                    pass # Sin SIGKILL: se reportará como superviviente salvo que termine por sí mismo
+            killed = _wait_all(remaining, kill_wait)
+            for pid in remaining:
+                results[pid] = KILLED if pid in killed else SURVIVED
+        else:
+            for pid in remaining:
+                results[pid] = SURVIVED
+    finally:
+        for fd in alive.values():
+            if fd is not None:
+                os.close(fd)
+    return results
+
+def summarize_results(results):
+    """Cuenta los resultados por tipo: {'terminated': n, 'killed': n, ...}."""
+    summary = {}
+    for outcome in results.values():
+        summary[outcome] = summary.get(outcome, 0) + 1
+    return summary
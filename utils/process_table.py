@@ -0,0 +1,270 @@
+import heapq
+import os
+import re
+import time
+
+PROC_DIR = "/proc"
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# Estados de /proc/[pid]/stat
+PROCESS_STATES = {
+    "R": "running", "S": "sleeping", "D": "disk sleep", "Z": "zombie", "T": "stopped",
+    "t": "tracing stop", "X": "dead", "I": "idle", "P": "parked", "W": "waking",
+}
+
+# Campos por los que se puede ordenar / seleccionar el top-N
+SORT_KEYS = ("pid", "ppid", "name", "user", "state", "rss", "vsize", "cpu_percent", "mem_percent", "threads", "cpu_time")
+
+_user_cache = {}
+
+def user_name(uid):
+    """Resuelve un uid a nombre de usuario, con caché para no consultar /etc/passwd por proceso."""
+    name = _user_cache.get(uid)
+    if name is None:
+        try:
+            import pwd # Solo existe en POSIX: importarlo arriba impediría arrancar en Windows
+            name = pwd.getpwuid(uid).pw_name
+        except (ImportError, KeyError):
+            name = str(uid)
+        _user_cache[uid] = name
+    return name
+
+class ProcessRecord:
+    """Registro compacto de un proceso leído de /proc/[pid]."""
+
+    __slots__ = ("pid", "ppid", "name", "state", "uid", "user", "rss", "vsize", "threads",
+                 "utime", "stime", "starttime", "cmdline", "cpu_percent", "mem_percent")
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.ppid = 0
+        self.name = ""
+        self.state = "?"
+        self.uid = -1
+        self.user = ""
+        self.rss = 0
+        self.vsize = 0
+        self.threads = 0
+        self.utime = 0
+        self.stime = 0
+        self.starttime = 0
+        self.cmdline = ""
+        self.cpu_percent = 0.0
+        self.mem_percent = 0.0
+
+    @property
+    def cpu_time(self):
+        """Tiempo de CPU acumulado en segundos."""
+        return (self.utime + self.stime) / CLOCK_TICKS
+
+    def to_dict(self):
+        """Convierte el registro a diccionario (para logs o exportación JSON)."""
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self):
+        return f"ProcessRecord(pid={self.pid}, name={self.name!r}, state={self.state!r})"
+
+def read_uptime():
+    """Segundos desde el arranque según /proc/uptime."""
+    with open(os.path.join(PROC_DIR, "uptime")) as f:
+        return float(f.read().split()[0])
+
+def read_total_memory():
+    """Memoria física total en bytes (MemTotal de /proc/meminfo)."""
+    with open(os.path.join(PROC_DIR, "meminfo"), "rb") as f:
+        for line in f:
+            if line.startswith(b"MemTotal:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+def list_pids():
+    """Retorna los PIDs presentes en /proc."""
+    return [int(entry) for entry in os.listdir(PROC_DIR) if entry.isdigit()]
+
+def parse_stat(record, data):
+    """Rellena los campos variables de 'record' a partir del contenido de /proc/[pid]/stat."""
+    # El nombre (comm) va entre paréntesis y puede contener espacios o ')': se busca el último ')'
+    close = data.rfind(b")")
+    record.name = data[data.find(b"(") + 1:close].decode(errors="replace")
+    fields = data[close + 2:].split()
+    # fields[0] es el campo 3 de stat (state); ver proc(5)
+    record.state = fields[0].decode()
+    record.ppid = int(fields[1])
+    record.utime = int(fields[11])
+    record.stime = int(fields[12])
+    record.threads = int(fields[17])
+    record.starttime = int(fields[19])
+    record.vsize = int(fields[20])
+    record.rss = int(fields[21]) * PAGE_SIZE
+
+def stat_starttime(data):
+    """Extrae solo el starttime (campo 22) de un /proc/[pid]/stat bruto."""
+    return int(data[data.rfind(b")") + 2:].split()[19])
+
+def read_stat(pid):
+    """Lee el contenido bruto de /proc/[pid]/stat."""
+    with open(f"{PROC_DIR}/{pid}/stat", "rb") as f:
+        return f.read()
+
+def read_status_uid(pid):
+    """Obtiene el UID real del proceso a partir de /proc/[pid]/status."""
+    with open(f"{PROC_DIR}/{pid}/status", "rb") as f:
+        for line in f:
+            if line.startswith(b"Uid:"):
+                return int(line.split()[1])
+    return -1
+
+def read_cmdline(pid):
+    """Lee /proc/[pid]/cmdline. Los hilos del kernel tienen la línea de comandos vacía."""
+    with open(f"{PROC_DIR}/{pid}/cmdline", "rb") as f:
+        return f.read().rstrip(b"\0").replace(b"\0", b" ").decode(errors="replace")
+
+def read_process(pid, with_cmdline=True, stat_data=None):
+    """
+    Lee un proceso completo. 'stat_data' permite reutilizar un /proc/[pid]/stat ya leído.
+    Retorna None si el proceso terminó durante la lectura.
+    """
+    record = ProcessRecord(pid)
+    try:
+        parse_stat(record, stat_data if stat_data is not None else read_stat(pid))
+        record.uid = read_status_uid(pid)
+        if with_cmdline:
+            record.cmdline = read_cmdline(pid)
+    except (FileNotFoundError, ProcessLookupError):
+        return None
+    except PermissionError:
+        pass # Algunos ficheros pueden no ser legibles: se conserva lo leído
+    record.user = user_name(record.uid) if record.uid >= 0 else "?"
+    if not record.cmdline:
+        record.cmdline = f"[{record.name}]"
+    return record
+
+def compute_usage(record, uptime, total_memory):
+    """Calcula %CPU (media desde el arranque del proceso, como 'ps') y %MEM."""
+    elapsed = uptime - record.starttime / CLOCK_TICKS
+    record.cpu_percent = 100.0 * record.cpu_time / elapsed if elapsed > 0 else 0.0
+    record.mem_percent = 100.0 * record.rss / total_memory if total_memory else 0.0
+
+def read_process_table(with_cmdline=True):
+    """Lee todos los procesos de /proc y retorna una lista de ProcessRecord."""
+    uptime = read_uptime()
+    total_memory = read_total_memory()
+    records = []
+    for pid in list_pids():
+        record = read_process(pid, with_cmdline)
+        if record is not None:
+            compute_usage(record, uptime, total_memory)
+            records.append(record)
+    return records
+
+class ProcessSnapshot:
+    """
+    Tabla de procesos con refresco incremental. Los procesos se identifican por (pid, starttime)
+    para detectar la reutilización de PIDs. En cada refresh() solo se relee /proc/[pid]/stat de los
+    procesos conocidos; status y cmdline se leen únicamente para los procesos nuevos.
+    El %CPU de los procesos conocidos se calcula con el delta entre refrescos.
+    """
+
+    def __init__(self, with_cmdline=True, rss_tolerance=0.10):
+        self.with_cmdline = with_cmdline
+        self.rss_tolerance = rss_tolerance # Variación relativa de RSS que cuenta como cambio
+        self.records = {} # (pid, starttime) -> ProcessRecord
+        self._last_refresh = None
+
+    def processes(self):
+        """Retorna la lista de registros del último refresco."""
+        return list(self.records.values())
+
+    def refresh(self):
+        """
+        Actualiza la tabla y retorna el diff respecto al refresco anterior:
+        {'started': [...], 'exited': [...], 'changed': [...]}. En el primer refresco
+        todos los procesos aparecen como 'started'.
+        """
+        now = time.monotonic()
+        elapsed_ticks = (now - self._last_refresh) * CLOCK_TICKS if self._last_refresh else 0
+        uptime = read_uptime()
+        total_memory = read_total_memory()
+        by_pid = {key[0]: key for key in self.records}
+        current = {}
+        started, changed = [], []
+
+        for pid in list_pids():
+            try:
+                data = read_stat(pid)
+            except (FileNotFoundError, ProcessLookupError):
+                continue # Terminó entre listdir y open
+            key = by_pid.get(pid)
+            record = self.records.get(key) if key else None
+            # Mismo PID con distinto starttime: el proceso anterior terminó y el PID se reutilizó
+            if record is not None and stat_starttime(data) == key[1]:
+                previous = (record.state, record.threads, record.rss, record.utime + record.stime)
+                parse_stat(record, data)
+                cpu_ticks = record.utime + record.stime - previous[3]
+                record.cpu_percent = 100.0 * cpu_ticks / elapsed_ticks if elapsed_ticks else 0.0
+                record.mem_percent = 100.0 * record.rss / total_memory if total_memory else 0.0
+                current[key] = record
+                if self._has_changed(previous, record):
+                    changed.append(record)
+                continue
+            record = read_process(pid, self.with_cmdline, stat_data=data)
+            if record is None:
+                continue
+            compute_usage(record, uptime, total_memory)
+            current[(pid, record.starttime)] = record
+            started.append(record)
+
+        exited = [record for key, record in self.records.items() if key not in current]
+        self.records = current
+        self._last_refresh = now
+        return {"started": started, "exited": exited, "changed": changed}
+
+    def _has_changed(self, previous, record):
+        state, threads, rss, _ = previous
+        if record.state != state or record.threads != threads:
+            return True
+        return abs(record.rss - rss) > self.rss_tolerance * max(rss, PAGE_SIZE)
+
+def filter_processes(records, user=None, name_regex=None, state=None, min_rss=None, min_cpu=None, match_cmdline=True):
+    """
+    Filtra registros por usuario, expresión regular sobre nombre (y línea de comandos si
+    'match_cmdline'), estado (letra de /proc, ej. 'R', 'Z'), RSS mínimo en bytes y %CPU mínimo.
+    Retorna un generador.
+    """
+    pattern = re.compile(name_regex) if name_regex else None
+    states = set(state) if state else None
+    for record in records:
+        if user is not None and record.user != user and str(record.uid) != str(user):
+            continue
+        if states is not None and record.state not in states:
+            continue
+        if min_rss is not None and record.rss < min_rss:
+            continue
+        if min_cpu is not None and record.cpu_percent < min_cpu:
+            continue
+        if pattern is not None and not (pattern.search(record.name) or (match_cmdline and pattern.search(record.cmdline))):
+            continue
+        yield record
+
+def _sort_key(key):
+    if key not in SORT_KEYS:
+        raise ValueError(f"Campo de ordenación desconocido: '{key}'. Válidos: {', '.join(SORT_KEYS)}")
+    return lambda record: getattr(record, key)
+
+def sort_processes(records, key="pid", reverse=False):
+    """Ordena los registros por el campo indicado."""
+    return sorted(records, key=_sort_key(key), reverse=reverse)
+
+def top_processes(records, n=10, key="cpu_percent"):
+    """Selecciona los 'n' procesos con mayor valor de 'key' en O(N log n) usando un heap."""
+    return heapq.nlargest(n, records, key=_sort_key(key))
+
+def format_process_table(records, cmd_width=60):
+    """Genera el texto de una tabla de procesos al estilo de 'ps aux'."""
+    lines = [f"{'USER':<12}{'PID':>8}{'PPID':>8}{'%CPU':>6}{'%MEM':>6}{'RSS':>10} {'S':<2}{'THR':>4}  COMMAND"]
+    for r in records:
+        command = " ".join(r.cmdline.split()) # Sin saltos de línea ni tabuladores en la tabla
+        lines.append(f"{r.user[:11]:<12}{r.pid:>8}{r.ppid:>8}{r.cpu_percent:>6.1f}{r.mem_percent:>6.1f}"
+                     f"{r.rss // 1024:>9}K {r.state:<2}{r.threads:>4}  {command[:cmd_width]}")
+    return "\n".join(lines)
@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+from utils.proc_sampler import CpuMemorySampler
+from utils.ring_buffer import RingBuffer
+
+# Métricas escalares que se guardan en el historial de cada muestra
+BASE_METRICS = ("cpu", "memory", "swap", "load1", "load5", "load15")
+
+def disk_usage_percent(mountpoint):
+    """Retorna el porcentaje de uso del sistema de ficheros montado en 'mountpoint'."""
+    st = os.statvfs(mountpoint)
+    total = st.f_blocks * st.f_frsize
+    if not total:
+        return 0.0
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    available = st.f_bavail * st.f_frsize
+    # Igual que 'df': porcentaje sobre el espacio utilizable por usuarios no root
+    return 100.0 * used / (used + available) if used + available else 0.0
+
+class ResourceMonitor:
+    """
+    Monitor continuo de recursos. Toma muestras de CPU, memoria, carga y uso de disco
+    cada 'interval' segundos y las guarda en buffers circulares que cubren
+    'history_seconds' segundos, con consumo de memoria constante.
+    """
+
+    def __init__(self, interval=5.0, history_seconds=3600, mountpoints=("/",)):
+        if interval <= 0:
+            raise ValueError("El intervalo de muestreo debe ser mayor que 0.")
+        self.interval = interval
+        self.history_seconds = history_seconds
+        self.mountpoints = tuple(mountpoints)
+        capacity = max(int(history_seconds / interval), 1)
+        self.buffers = {name: RingBuffer(capacity) for name in BASE_METRICS}
+        for mountpoint in self.mountpoints:
+            self.buffers[f"disk:{mountpoint}"] = RingBuffer(capacity)
+        self._sampler = CpuMemorySampler()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def sample_once(self):
+        """Toma una muestra, la añade al historial y la retorna como diccionario métrica -> valor."""
+        sample = self._sampler.sample()
+        values = {
+            "cpu": sample["cpu_total"]["usage"],
+            "memory": sample["memory"]["percent"],
+            "swap": sample["memory"]["swap_percent"],
+            "load1": sample["load"]["load1"],
+            "load5": sample["load"]["load5"],
+            "load15": sample["load"]["load15"],
+        }
+        for mountpoint in self.mountpoints:
+            try:
+                values[f"disk:{mountpoint}"] = disk_usage_percent(mountpoint)
+            except OSError:
+                continue # Punto de montaje desaparecido: se omite esta muestra
+        timestamp = sample["timestamp"]
+        with self._lock:
+            for name, value in values.items():
+                self.buffers[name].append(value, timestamp)
+        return values
+
+    def summary(self, seconds=None):
+        """Retorna {métrica: {'min', 'max', 'avg', 'p95', 'count'}} de los últimos 'seconds' segundos."""
+        now = time.time()
+        with self._lock:
+            return {name: buffer.stats(seconds, now) for name, buffer in self.buffers.items()}
+
+    def run(self, duration=None, on_sample=None):
+        """
+        Bucle de muestreo en primer plano. Se detiene tras 'duration' segundos (None = indefinido)
+        o cuando se llama a stop(). 'on_sample' recibe el diccionario de cada muestra.
+        """
+        deadline = time.monotonic() + duration if duration is not None else None
+        next_tick = time.monotonic()
+        # Primera espera de un intervalo para que el primer delta de CPU sea representativo
+        while not self._stop_event.wait(max(next_tick + self.interval - time.monotonic(), 0)):
+            next_tick += self.interval
+            values = self.sample_once()
+            if on_sample:
+                on_sample(values)
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+
+    def start(self, on_sample=None):
+        """Inicia el muestreo en un hilo en segundo plano (modo demonio)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, kwargs={"on_sample": on_sample}, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Detiene el muestreo continuo."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,87 @@
+import math
+import time
+from array import array
+
+class RingBuffer:
+    """
+    Buffer circular de tamaño fijo respaldado por arrays de tipo 'd' (float de 8 bytes).
+    Guarda pares (timestamp, valor); al llenarse sobrescribe las muestras más antiguas,
+    por lo que la memoria usada no crece con el tiempo de ejecución.
+    """
+
+    __slots__ = ("capacity", "_times", "_values", "_start", "_count")
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("La capacidad del buffer debe ser al menos 1.")
+        self.capacity = capacity
+        self._times = array('d', bytes(8 * capacity))
+        self._values = array('d', bytes(8 * capacity))
+        self._start = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, value, timestamp=None):
+        """Añade una muestra. Si no se indica 'timestamp' se usa time.time()."""
+        if timestamp is None:
+            timestamp = time.time()
+        index = (self._start + self._count) % self.capacity
+        self._times[index] = timestamp
+        self._values[index] = value
+        if self._count < self.capacity:
+            self._count += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+
+    def last(self):
+        """Retorna la última muestra (timestamp, valor) o None si está vacío."""
+        if not self._count:
+            return None
+        index = (self._start + self._count - 1) % self.capacity
+        return self._times[index], self._values[index]
+
+    def items(self, since=None):
+        """Itera (timestamp, valor) en orden cronológico, opcionalmente solo desde 'since'."""
+        for offset in range(self._first_offset(since), self._count):
+            index = (self._start + offset) % self.capacity
+            yield self._times[index], self._values[index]
+
+    def values(self, since=None):
+        """Retorna la lista de valores en orden cronológico, opcionalmente solo desde 'since'."""
+        return [value for _, value in self.items(since)]
+
+    def _first_offset(self, since):
+        # Los timestamps son crecientes: búsqueda binaria de la primera muestra >= since
+        if since is None:
+            return 0
+        low, high = 0, self._count
+        while low < high:
+            mid = (low + high) // 2
+            if self._times[(self._start + mid) % self.capacity] < since:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def stats(self, seconds=None, now=None):
+        """
+        Calcula min/max/avg/p95 de las muestras de los últimos 'seconds' segundos
+        (o de todo el buffer). Retorna None si no hay muestras en la ventana.
+        """
+        since = None
+        if seconds is not None:
+            since = (now if now is not None else time.time()) - seconds
+        values = self.values(since)
+        if not values:
+            return None
+        values.sort()
+        p95_index = max(math.ceil(0.95 * len(values)) - 1, 0)
+        return {
+            "count": len(values),
+            "min": values[0],
+            "max": values[-1],
+            "avg": sum(values) / len(values),
+            "p95": values[p95_index],
+        }
@@ -0,0 +1,517 @@
+import errno
+import os
+import select
+import socket
+import struct
+import threading
+import time
+
+# Constantes de linux/netlink.h y linux/rtnetlink.h
+NETLINK_ROUTE = 0
+SOL_NETLINK = 270
+NETLINK_GET_STRICT_CHK = 12
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NLM_F_REQUEST = 0x1
+NLM_F_MULTI = 0x2
+NLM_F_DUMP = 0x300
+RTM_NEWLINK, RTM_DELLINK, RTM_GETLINK = 16, 17, 18
+RTM_NEWADDR, RTM_DELADDR, RTM_GETADDR = 20, 21, 22
+RTM_NEWROUTE, RTM_DELROUTE, RTM_GETROUTE = 24, 25, 26
+
+# Grupos multicast (máscara de bind) para suscribirse a cambios
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV4_ROUTE = 0x40
+RTMGRP_IPV6_IFADDR = 0x100
+RTMGRP_IPV6_ROUTE = 0x400
+ALL_GROUPS = RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV4_ROUTE | RTMGRP_IPV6_IFADDR | RTMGRP_IPV6_ROUTE
+
+# Atributos
+IFLA_ADDRESS, IFLA_IFNAME, IFLA_MTU, IFLA_LINK, IFLA_MASTER = 1, 3, 4, 5, 10
+IFLA_OPERSTATE, IFLA_LINKINFO, IFLA_STATS64 = 16, 18, 23
+IFLA_INFO_KIND = 1
+IFA_ADDRESS, IFA_LOCAL, IFA_LABEL, IFA_FLAGS = 1, 2, 3, 8
+RTA_DST, RTA_OIF, RTA_GATEWAY, RTA_PRIORITY, RTA_PREFSRC, RTA_MULTIPATH, RTA_TABLE = 1, 4, 5, 6, 7, 9, 15
+
+NLMSGHDR = struct.Struct("=IHHII")     # longitud, tipo, flags, secuencia, pid
+IFINFOMSG = struct.Struct("=BxHiII")   # familia, tipo de enlace, índice, flags, cambio
+IFADDRMSG = struct.Struct("=BBBBI")    # familia, prefijo, flags, ámbito, índice
+RTMSG = struct.Struct("=BBBBBBBBI")    # familia, dst_len, src_len, tos, tabla, protocolo, ámbito, tipo, flags
+RTATTR = struct.Struct("=HH")
+RTNEXTHOP = struct.Struct("=HBBi")
+U32 = struct.Struct("=I")
+STATS64 = struct.Struct("=8Q")         # rx/tx paquetes, rx/tx bytes, rx/tx errores, rx/tx descartados
+
+OPERSTATES = {0: "UNKNOWN", 1: "NOTPRESENT", 2: "DOWN", 3: "LOWERLAYERDOWN", 4: "TESTING", 5: "DORMANT", 6: "UP"}
+LINK_FLAGS = ((0x1, "UP"), (0x2, "BROADCAST"), (0x8, "LOOPBACK"), (0x10, "POINTOPOINT"), (0x40, "RUNNING"),
+              (0x80, "NOARP"), (0x100, "PROMISC"), (0x1000, "MULTICAST"), (0x10000, "LOWER_UP"))
+LINK_TYPES = {1: "ether", 768: "ipip", 769: "tunnel6", 772: "loopback", 776: "sit", 778: "gre", 823: "ip6gre", 65534: "none"}
+SCOPES = {0: "global", 200: "site", 253: "link", 254: "host", 255: "nowhere"}
+ROUTE_TABLES = {253: "default", 254: "main", 255: "local"}
+ROUTE_PROTOCOLS = {1: "redirect", 2: "kernel", 3: "boot", 4: "static", 9: "ra", 11: "zebra", 12: "bird", 16: "dhcp",
+                   42: "babel", 186: "bgp", 187: "isis", 188: "ospf", 189: "rip"}
+ROUTE_TYPES = {1: "unicast", 2: "local", 3: "broadcast", 4: "anycast", 5: "multicast", 6: "blackhole",
+               7: "unreachable", 8: "prohibit", 9: "throw", 10: "nat"}
+FAMILIES = {socket.AF_INET: "inet", socket.AF_INET6: "inet6"}
+
+RECV_SIZE = 1 << 17
+
+class Link:
+    """Interfaz de red (RTM_NEWLINK)."""
+    __slots__ = ("index", "name", "flags", "link_type", "mtu", "mac", "operstate", "kind", "master", "parent", "stats")
+
+    def __init__(self, index, name, flags, link_type):
+        self.index = index
+        self.name = name
+        self.flags = flags
+        self.link_type = link_type
+        self.mtu = None
+        self.mac = None
+        self.operstate = None
+        self.kind = None      # Tipo de enlace virtual: vlan, veth, bridge, bond...
+        self.master = None    # Índice del bridge/bond al que pertenece
+        self.parent = None    # Índice del enlace padre (VLAN sobre eth0, extremo de un veth...)
+        self.stats = None     # {'rx_packets', 'tx_packets', 'rx_bytes', ...}
+
+    @property
+    def up(self):
+        return bool(self.flags & 0x1)
+
+    def flag_names(self):
+        return [name for bit, name in LINK_FLAGS if self.flags & bit]
+
+    def to_dict(self):
+        data = {slot: getattr(self, slot) for slot in self.__slots__}
+        data["flags"] = self.flag_names()
+        data["link_type"] = LINK_TYPES.get(self.link_type, self.link_type)
+        return data
+
+class Address:
+    """Dirección IP de una interfaz (RTM_NEWADDR)."""
+    __slots__ = ("index", "interface", "family", "address", "prefixlen", "scope", "label", "flags")
+
+    def __init__(self, index, family, address, prefixlen, scope, flags):
+        self.index = index
+        self.interface = None
+        self.family = family
+        self.address = address
+        self.prefixlen = prefixlen
+        self.scope = scope
+        self.label = None
+        self.flags = flags
+
+    def to_dict(self):
+        data = {slot: getattr(self, slot) for slot in self.__slots__}
+        data["family"] = FAMILIES.get(self.family, self.family)
+        data["scope"] = SCOPES.get(self.scope, self.scope)
+        return data
+
+class Route:
+    """Ruta de una tabla de enrutamiento (RTM_NEWROUTE)."""
+    __slots__ = ("family", "table", "destination", "gateway", "oif", "interface", "prefsrc", "metric",
+                 "protocol", "scope", "type", "nexthops")
+
+    def __init__(self, family, table, destination, protocol, scope, route_type):
+        self.family = family
+        self.table = table
+        self.destination = destination  # 'default' o 'red/prefijo'
+        self.gateway = None
+        self.oif = None
+        self.interface = None
+        self.prefsrc = None
+        self.metric = None
+        self.protocol = protocol
+        self.scope = scope
+        self.type = route_type
+        self.nexthops = []              # Rutas multipath: [{'gateway', 'oif', 'interface', 'weight'}]
+
+    def to_dict(self):
+        data = {slot: getattr(self, slot) for slot in self.__slots__}
+        data["family"] = FAMILIES.get(self.family, self.family)
+        data["table"] = ROUTE_TABLES.get(self.table, self.table)
+        data["protocol"] = ROUTE_PROTOCOLS.get(self.protocol, self.protocol)
+        data["scope"] = SCOPES.get(self.scope, self.scope)
+        data["type"] = ROUTE_TYPES.get(self.type, self.type)
+        return data
+
+def parse_attributes(data, offset=0, end=None):
+    """Atributos rtattr a partir de 'offset': {tipo: bytes}. Se ignoran los bits NESTED/BYTEORDER del tipo."""
+    attributes = {}
+    end = len(data) if end is None else end
+    while offset + 4 <= end:
+        length, kind = RTATTR.unpack_from(data, offset)
+        if length < 4:
+            break
+        attributes[kind & 0x3FFF] = data[offset + 4:offset + length]
+        offset += (length + 3) & ~3
+    return attributes
+
+def _string(value):
+    return value.rstrip(b"\0").decode(errors="replace") if value is not None else None
+
+def _ip(family, value):
+    return socket.inet_ntop(family, value) if value is not None else None
+
+def parse_link(payload):
+    _, link_type, index, flags, _ = IFINFOMSG.unpack_from(payload)
+    attributes = parse_attributes(payload, IFINFOMSG.size)
+    link = Link(index, _string(attributes.get(IFLA_IFNAME)), flags, link_type)
+    if IFLA_MTU in attributes:
+        link.mtu = U32.unpack(attributes[IFLA_MTU])[0]
+    if attributes.get(IFLA_ADDRESS):
+        link.mac = ":".join(f"{b:02x}" for b in attributes[IFLA_ADDRESS])
+    if IFLA_OPERSTATE in attributes:
+        link.operstate = OPERSTATES.get(attributes[IFLA_OPERSTATE][0], "UNKNOWN")
+    if IFLA_MASTER in attributes:
+        link.master = U32.unpack(attributes[IFLA_MASTER])[0]
+    if IFLA_LINK in attributes:
+        parent = U32.unpack(attributes[IFLA_LINK])[0]
+        link.parent = parent if parent != index else None
+    if IFLA_LINKINFO in attributes:
+        link.kind = _string(parse_attributes(attributes[IFLA_LINKINFO]).get(IFLA_INFO_KIND))
+    if len(attributes.get(IFLA_STATS64, b"")) >= STATS64.size:
+        values = STATS64.unpack_from(attributes[IFLA_STATS64])
+        link.stats = dict(zip(("rx_packets", "tx_packets", "rx_bytes", "tx_bytes",
+                               "rx_errors", "tx_errors", "rx_dropped", "tx_dropped"), values))
+    return link
+
+def parse_address(payload):
+    family, prefixlen, flags, scope, index = IFADDRMSG.unpack_from(payload)
+    attributes = parse_attributes(payload, IFADDRMSG.size)
+    # En IPv4, IFA_LOCAL es la dirección propia (IFA_ADDRESS es el otro extremo en enlaces punto a punto)
+    value = attributes.get(IFA_LOCAL) or attributes.get(IFA_ADDRESS)
+    if IFA_FLAGS in attributes:
+        flags = U32.unpack(attributes[IFA_FLAGS])[0]
+    address = Address(index, family, _ip(family, value), prefixlen, scope, flags)
+    address.label = _string(attributes.get(IFA_LABEL))
+    return address
+
+def parse_route(payload):
+    family, dst_len, _, _, table, protocol, scope, route_type, _ = RTMSG.unpack_from(payload)
+    attributes = parse_attributes(payload, RTMSG.size)
+    if RTA_TABLE in attributes:
+        table = U32.unpack(attributes[RTA_TABLE])[0] # Tablas > 255 solo vienen en el atributo
+    destination = _ip(family, attributes.get(RTA_DST))
+    route = Route(family, table, f"{destination}/{dst_len}" if destination else "default", protocol, scope, route_type)
+    route.gateway = _ip(family, attributes.get(RTA_GATEWAY))
+    route.prefsrc = _ip(family, attributes.get(RTA_PREFSRC))
+    if RTA_OIF in attributes:
+        route.oif = U32.unpack(attributes[RTA_OIF])[0]
+    if RTA_PRIORITY in attributes:
+        route.metric = U32.unpack(attributes[RTA_PRIORITY])[0]
+    data = attributes.get(RTA_MULTIPATH, b"")
+    offset = 0
+    while offset + RTNEXTHOP.size <= len(data):
+        length, _, hops, oif = RTNEXTHOP.unpack_from(data, offset)
+        if length < RTNEXTHOP.size:
+            break
+        nested = parse_attributes(data, offset + RTNEXTHOP.size, offset + length)
+        route.nexthops.append({"gateway": _ip(family, nested.get(RTA_GATEWAY)), "oif": oif, "interface": None,
+                               "weight": hops + 1})
+        offset += (length + 3) & ~3
+    return route
+
+PARSERS = {RTM_NEWLINK: ("link", parse_link), RTM_DELLINK: ("link", parse_link),
+           RTM_NEWADDR: ("address", parse_address), RTM_DELADDR: ("address", parse_address),
+           RTM_NEWROUTE: ("route", parse_route), RTM_DELROUTE: ("route", parse_route)}
+
+def _messages(data):
+    """Genera (tipo, flags, secuencia, payload) de cada mensaje netlink del buffer."""
+    offset = 0
+    while offset + NLMSGHDR.size <= len(data):
+        length, msg_type, flags, seq, _ = NLMSGHDR.unpack_from(data, offset)
+        if length < NLMSGHDR.size:
+            break
+        yield msg_type, flags, seq, data[offset + NLMSGHDR.size:offset + length]
+        offset += (length + 3) & ~3
+
+def _attribute(kind, value):
+    data = RTATTR.pack(RTATTR.size + len(value), kind) + value
+    return data + b"\0" * (-len(data) % 4)
+
+def table_number(table):
+    """'main', 'local', 'default' o un número -> número de tabla."""
+    names = {name: number for number, name in ROUTE_TABLES.items()}
+    if table in names:
+        return names[table]
+    try:
+        return int(table)
+    except ValueError:
+        raise ValueError(f"Tabla de rutas inválida: '{table}'.")
+
+class RtnetlinkSocket:
+    """
+    Socket NETLINK_ROUTE. Las consultas (links, addresses, routes) son volcados NLM_F_DUMP que el
+    kernel filtra por interfaz/tabla si admite NETLINK_GET_STRICT_CHK (5.0+); el filtro se aplica
+    también aquí para kernels anteriores. Con 'groups' recibe además notificaciones (ver events()).
+    """
+
+    def __init__(self, groups=0):
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW | socket.SOCK_CLOEXEC, NETLINK_ROUTE)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        self.sock.bind((0, groups))
+        try:
+            self.sock.setsockopt(SOL_NETLINK, NETLINK_GET_STRICT_CHK, 1)
+            self.strict = True
+        except OSError:
+            self.strict = False
+        self._seq = int(time.time()) & 0xFFFF
+        self._pending = [] # Notificaciones recibidas mientras se esperaba la respuesta a una petición
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def request(self, msg_type, body, dump=True):
+        """Envía una petición y genera (tipo, payload) de cada mensaje de respuesta. Lanza OSError si el kernel la rechaza."""
+        self._seq += 1
+        seq = self._seq
+        flags = NLM_F_REQUEST | (NLM_F_DUMP if dump else 0)
+        self.sock.send(NLMSGHDR.pack(NLMSGHDR.size + len(body), msg_type, flags, seq, 0) + body)
+        while True:
+            data = self.sock.recv(RECV_SIZE)
+            for reply_type, reply_flags, reply_seq, payload in _messages(data):
+                if reply_seq != seq:
+                    if reply_type in PARSERS:
+                        self._pending.append((reply_type, payload))
+                    continue
+                if reply_type == NLMSG_DONE:
+                    return
+                if reply_type == NLMSG_ERROR:
+                    code = -struct.unpack_from("=i", payload)[0]
+                    if code:
+                        raise OSError(code, os.strerror(code))
+                    return
+                yield reply_type, payload
+                if not reply_flags & NLM_F_MULTI:
+                    return
+
+    def _filtered_dump(self, msg_type, body, unfiltered_body):
+        """Volcado con filtro en el kernel; si el kernel no admite el filtro (EINVAL), volcado completo."""
+        if self.strict:
+            try:
+                return list(self.request(msg_type, body))
+            except OSError as e:
+                if e.errno != errno.EINVAL:
+                    raise
+        return list(self.request(msg_type, unfiltered_body))
+
+    def links(self, name=None):
+        """Lista de Link. Con 'name' se pide solo esa interfaz (lista vacía si no existe)."""
+        if name is not None:
+            body = IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0) + _attribute(IFLA_IFNAME, name.encode() + b"\0")
+            try:
+                return [parse_link(payload) for _, payload in self.request(RTM_GETLINK, body, dump=False)]
+            except OSError as e:
+                if e.errno == errno.ENODEV:
+                    return []
+                raise
+        return [parse_link(payload) for _, payload in self.request(RTM_GETLINK, IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0))]
+
+    def addresses(self, family=socket.AF_UNSPEC, index=None):
+        """Lista de Address, opcionalmente de una sola familia e interfaz (por índice)."""
+        body = IFADDRMSG.pack(family, 0, 0, 0, index or 0)
+        replies = self._filtered_dump(RTM_GETADDR, body, IFADDRMSG.pack(family, 0, 0, 0, 0))
+        addresses = [parse_address(payload) for _, payload in replies]
+        return [a for a in addresses if index is None or a.index == index]
+
+    def routes(self, family=socket.AF_UNSPEC, table=None, oif=None):
+        """Lista de Route, opcionalmente de una tabla (número) y una interfaz de salida (índice)."""
+        attributes = b""
+        if table is not None:
+            attributes += _attribute(RTA_TABLE, U32.pack(table))
+        if oif is not None:
+            attributes += _attribute(RTA_OIF, U32.pack(oif))
+        header_table = table if table is not None and table < 256 else 0
+        body = RTMSG.pack(family, 0, 0, 0, header_table, 0, 0, 0, 0) + attributes
+        replies = self._filtered_dump(RTM_GETROUTE, body, RTMSG.pack(family, 0, 0, 0, 0, 0, 0, 0, 0))
+        routes = [parse_route(payload) for _, payload in replies]
+        return [r for r in routes if (table is None or r.table == table) and
+                (oif is None or r.oif == oif or any(hop["oif"] == oif for hop in r.nexthops))]
+
+    def events(self, timeout=None):
+        """
+        Genera (evento, tipo, objeto) de las notificaciones recibidas: evento 'new' o 'del', tipo
+        'link', 'address' o 'route'. Termina al agotarse 'timeout' segundos (None = sin límite).
+        Si el kernel descarta notificaciones por falta de buffer genera ('overflow', None, None).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            while self._pending:
+                msg_type, payload = self._pending.pop(0)
+                kind, parser = PARSERS[msg_type]
+                yield ("del" if msg_type in (RTM_DELLINK, RTM_DELADDR, RTM_DELROUTE) else "new"), kind, parser(payload)
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return
+            if not select.select([self.sock], [], [], remaining)[0]:
+                return
+            try:
+                data = self.sock.recv(RECV_SIZE)
+            except OSError as e:
+                if e.errno == errno.ENOBUFS:
+                    yield "overflow", None, None
+                    continue
+                raise
+            self._pending += [(t, p) for t, _, _, p in _messages(data) if t in PARSERS]
+
+def _resolve_names(items, names):
+    for item in items:
+        if isinstance(item, Address):
+            item.interface = names.get(item.index)
+        else:
+            item.interface = names.get(item.oif)
+            for hop in item.nexthops:
+                hop["interface"] = names.get(hop["oif"])
+    return items
+
+class NetworkState:
+    """
+    Caché de enlaces, direcciones y rutas del kernel. Un socket suscrito a los grupos de cambios
+    se revisa (sin bloquear) en cada consulta: solo se vuelve a volcar la parte que cambió desde
+    la última lectura. Si se pierden notificaciones por desbordamiento, se descarta todo.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._monitor = None
+        self._links = None
+        self._addresses = None
+        self._routes = None
+
+    def _check_changes(self):
+        if self._monitor is None:
+            # El monitor se abre antes del primer volcado para no perder cambios ocurridos durante él
+            self._monitor = RtnetlinkSocket(ALL_GROUPS)
+            self._links = self._addresses = self._routes = None
+            return
+        while True:
+            try:
+                data = self._monitor.sock.recv(RECV_SIZE, socket.MSG_DONTWAIT)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                if e.errno != errno.ENOBUFS:
+                    raise
+                self._links = self._addresses = self._routes = None
+                continue
+            for msg_type, _, _, _ in _messages(data):
+                if msg_type in (RTM_NEWLINK, RTM_DELLINK):
+                    # Un cambio de enlace afecta a los nombres de las direcciones y rutas
+                    self._links = self._addresses = self._routes = None
+                elif msg_type in (RTM_NEWADDR, RTM_DELADDR):
+                    self._addresses = None
+                    self._routes = None # Las rutas de 'proto kernel' cuelgan de las direcciones
+                elif msg_type in (RTM_NEWROUTE, RTM_DELROUTE):
+                    self._routes = None
+
+    def _load(self):
+        with RtnetlinkSocket() as nl:
+            if self._links is None:
+                self._links = nl.links()
+            names = {link.index: link.name for link in self._links}
+            if self._addresses is None:
+                self._addresses = _resolve_names(nl.addresses(), names)
+            if self._routes is None:
+                self._routes = _resolve_names(nl.routes(), names)
+
+    def _refresh(self):
+        self._check_changes()
+        if self._links is None or self._addresses is None or self._routes is None:
+            self._load()
+
+    def links(self, name=None):
+        with self._lock:
+            self._refresh()
+            return [link for link in self._links if name is None or link.name == name]
+
+    def addresses(self, interface=None, family=None):
+        """Direcciones, filtradas por nombre de interfaz y familia (socket.AF_INET/AF_INET6)."""
+        with self._lock:
+            self._refresh()
+            return [a for a in self._addresses if (interface is None or a.interface == interface)
+                    and (family is None or a.family == family)]
+
+    def routes(self, table="main", interface=None, family=None):
+        """Rutas de 'table' ('main', 'local', número o None = todas), filtradas por interfaz y familia."""
+        number = None if table is None else table_number(table)
+        with self._lock:
+            self._refresh()
+            return [r for r in self._routes if (number is None or r.table == number) and (family is None or r.family == family)
+                    and (interface is None or r.interface == interface or any(h["interface"] == interface for h in r.nexthops))]
+
+    def close(self):
+        with self._lock:
+            if self._monitor is not None:
+                self._monitor.close()
+                self._monitor = None
+
+_state = None
+_state_lock = threading.Lock()
+
+def get_network_state():
+    """Retorna la NetworkState compartida por todo el proceso."""
+    global _state
+    with _state_lock:
+        if _state is None:
+            _state = NetworkState()
+    return _state
+
+def format_links(links, addresses):
+    """Texto al estilo de 'ip address': cada interfaz con sus direcciones."""
+    by_index = {}
+    for address in addresses:
+        by_index.setdefault(address.index, []).append(address)
+    names = {link.index: link.name for link in links}
+    lines = []
+    for link in sorted(links, key=lambda l: l.index):
+        extra = f" ({link.kind})" if link.kind else ""
+        if link.master:
+            extra += f" master {names.get(link.master, link.master)}"
+        if link.parent:
+            extra += f" link {names.get(link.parent, link.parent)}"
+        lines.append(f"{link.index}: {link.name}{extra} <{','.join(link.flag_names())}> mtu {link.mtu} state {link.operstate}")
+        if link.mac:
+            lines.append(f"    link/{LINK_TYPES.get(link.link_type, link.link_type)} {link.mac}")
+        for address in by_index.get(link.index, ()):
+            label = f" {address.label}" if address.label and address.label != link.name else ""
+            lines.append(f"    {FAMILIES.get(address.family, address.family)} {address.address}/{address.prefixlen} "
+                         f"scope {SCOPES.get(address.scope, address.scope)}{label}")
+        if link.stats:
+            lines.append(f"    RX: {link.stats['rx_bytes']} bytes {link.stats['rx_packets']} paquetes  "
+                         f"TX: {link.stats['tx_bytes']} bytes {link.stats['tx_packets']} paquetes")
+    return "\n".join(lines)
+
+def format_routes(routes):
+    """Texto al estilo de 'ip route'."""
+    lines = []
+    for route in routes:
+        parts = [] if route.type == 1 else [ROUTE_TYPES.get(route.type, str(route.type))]
+        parts.append(route.destination)
+        if route.gateway:
+            parts.append(f"via {route.gateway}")
+        if route.interface:
+            parts.append(f"dev {route.interface}")
+        if route.table != 254:
+            parts.append(f"table {ROUTE_TABLES.get(route.table, route.table)}")
+        if route.protocol not in (3, 0):
+            parts.append(f"proto {ROUTE_PROTOCOLS.get(route.protocol, route.protocol)}")
+        if route.scope:
+            parts.append(f"scope {SCOPES.get(route.scope, route.scope)}")
+        if route.prefsrc:
+            parts.append(f"src {route.prefsrc}")
+        if route.metric is not None:
+            parts.append(f"metric {route.metric}")
+        lines.append(" ".join(parts))
+        for hop in route.nexthops:
+            lines.append(f"    nexthop via {hop['gateway']} dev {hop['interface']} weight {hop['weight']}")
+    return "\n".join(lines)
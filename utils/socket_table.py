@@ -0,0 +1,252 @@
+import binascii
+import collections
+import os
+import socket
+import sys
+from utils.process_table import PROC_DIR, list_pids
+
+PROTOCOLS = ("tcp", "tcp6", "udp", "udp6")
+
+# Estados de /proc/net/tcp* (include/net/tcp_states.h), con los nombres que usa 'ss'
+TCP_STATES = {b"01": "ESTAB", b"02": "SYN-SENT", b"03": "SYN-RECV", b"04": "FIN-WAIT-1", b"05": "FIN-WAIT-2",
+              b"06": "TIME-WAIT", b"07": "CLOSE", b"08": "CLOSE-WAIT", b"09": "LAST-ACK", b"0A": "LISTEN",
+              b"0B": "CLOSING", b"0C": "NEW-SYN-RECV"}
+# En UDP solo hay sockets conectados (01) o sin conectar (07)
+UDP_STATES = {b"01": "ESTAB", b"07": "UNCONN"}
+
+_ZERO_ADDRESSES = (b"00000000", b"0" * 32)
+_LITTLE_ENDIAN = sys.byteorder == "little"
+_address_cache = {}
+
+class SocketRecord:
+    """Registro compacto de un socket de /proc/net/{tcp,tcp6,udp,udp6}."""
+    __slots__ = ("protocol", "state", "local_address", "local_port", "remote_address", "remote_port",
+                 "tx_queue", "rx_queue", "uid", "inode", "pid", "process")
+
+    def __init__(self, protocol, state, local_address, local_port, remote_address, remote_port,
+                 tx_queue, rx_queue, uid, inode):
+        self.protocol = protocol
+        self.state = state
+        self.local_address = local_address
+        self.local_port = local_port
+        self.remote_address = remote_address
+        self.remote_port = remote_port
+        self.tx_queue = tx_queue
+        self.rx_queue = rx_queue
+        self.uid = uid
+        self.inode = inode
+        self.pid = None      # Solo con atribución de procesos (ver build_inode_index)
+        self.process = None
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+def _states_for(protocol):
+    return TCP_STATES if protocol.startswith("tcp") else UDP_STATES
+
+def state_codes(protocol, states):
+    """Códigos hexadecimales de /proc/net para los nombres de estado dados ('ESTAB', 'LISTEN'...)."""
+    wanted = {state.upper().replace("_", "-") for state in states}
+    if "ESTABLISHED" in wanted:
+        wanted.add("ESTAB")
+    return {code for code, name in _states_for(protocol).items() if name in wanted}
+
+def decode_address(hex_address):
+    """
+    Dirección de /proc/net a texto: 8 dígitos hexadecimales para IPv4 y 32 para IPv6. El kernel
+    escribe cada palabra de 32 bits en el orden de bytes del host. Se cachean las ya decodificadas.
+    """
+    address = _address_cache.get(hex_address)
+    if address is None:
+        raw = binascii.unhexlify(hex_address)
+        if _LITTLE_ENDIAN:
+            raw = b"".join(raw[i:i + 4][::-1] for i in range(0, len(raw), 4))
+        address = socket.inet_ntop(socket.AF_INET if len(raw) == 4 else socket.AF_INET6, raw)
+        if len(_address_cache) < 65536:
+            _address_cache[hex_address] = address
+    return address
+
+def _mask_v4(word):
+    """Pone a cero el último octeto de una dirección IPv4 en hexadecimal de /proc/net (red /24)."""
+    return b"00" + word[2:] if _LITTLE_ENDIAN else word[:6] + b"00"
+
+def _prefix_key(hex_address):
+    """Clave de la red remota: /24 para IPv4 (también las IPv4 mapeadas en IPv6) y /64 para IPv6."""
+    if len(hex_address) == 8:
+        return _mask_v4(hex_address)
+    if hex_address[:16] == b"0" * 16 and hex_address[16:24] in (b"FFFF0000", b"0000FFFF"):
+        return _mask_v4(hex_address[24:])
+    return hex_address[:16] + b"0" * 16
+
+def _prefix_text(key):
+    return f"{decode_address(key)}/{24 if len(key) == 8 else 64}"
+
+def _raw_sockets(protocols):
+    """Genera (protocolo, campos) de cada línea de /proc/net/<protocolo>, sin decodificar nada."""
+    for protocol in protocols:
+        try:
+            f = open(os.path.join(PROC_DIR, "net", protocol), "rb")
+        except FileNotFoundError:
+            continue # Kernel sin IPv6, por ejemplo
+        with f:
+            next(f, None) # Cabecera
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 10:
+                    yield protocol, fields
+
+def iter_sockets(protocols=PROTOCOLS, states=None, port=None):
+    """
+    Recorre los sockets sin cargar las tablas completas en memoria. 'states' filtra por nombre de
+    estado y 'port' por puerto local o remoto; los filtros se aplican antes de decodificar direcciones.
+    """
+    codes = {protocol: state_codes(protocol, states) for protocol in protocols} if states else None
+    for protocol, fields in _raw_sockets(protocols):
+        code = fields[3]
+        if codes is not None and code not in codes[protocol]:
+            continue
+        local, remote = fields[1], fields[2]
+        local_port, remote_port = int(local[-4:], 16), int(remote[-4:], 16)
+        if port is not None and port != local_port and port != remote_port:
+            continue
+        tx_queue, _, rx_queue = fields[4].partition(b":")
+        yield SocketRecord(protocol, _states_for(protocol).get(code, code.decode()),
+                           decode_address(local[:-5]), local_port, decode_address(remote[:-5]), remote_port,
+                           int(tx_queue, 16), int(rx_queue, 16), int(fields[7]), int(fields[9]))
+
+def build_inode_index(wanted=None):
+    """
+    Recorre /proc/[pid]/fd y retorna {inode de socket: pid}. Con 'wanted' (conjunto de inodes)
+    solo se guardan esos y el recorrido termina en cuanto se han encontrado todos. Sin root solo
+    se ven los descriptores de los procesos propios.
+    """
+    index = {}
+    remaining = set(wanted) if wanted is not None else None
+    for pid in list_pids():
+        fd_dir = f"{PROC_DIR}/{pid}/fd"
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue
+        for fd in fds:
+            try:
+                target = os.readlink(f"{fd_dir}/{fd}")
+            except OSError:
+                continue
+            if target.startswith("socket:["):
+                inode = int(target[8:-1])
+                if remaining is None:
+                    index.setdefault(inode, pid)
+                elif inode in remaining:
+                    index[inode] = pid
+                    remaining.discard(inode)
+        if remaining is not None and not remaining:
+            break
+    return index
+
+def process_name(pid):
+    """Nombre corto del proceso (/proc/[pid]/comm) o None si ya terminó."""
+    try:
+        with open(f"{PROC_DIR}/{pid}/comm", "rb") as f:
+            return f.read().strip().decode(errors="replace")
+    except OSError:
+        return None
+
+def attribute_processes(records):
+    """Rellena 'pid' y 'process' de los registros dados. Retorna la misma lista."""
+    index = build_inode_index({record.inode for record in records if record.inode})
+    names = {}
+    for record in records:
+        pid = index.get(record.inode)
+        if pid is not None:
+            if pid not in names:
+                names[pid] = process_name(pid)
+            record.pid, record.process = pid, names[pid]
+    return records
+
+def list_sockets(protocols=PROTOCOLS, states=None, port=None, process=None, with_process=False, limit=None):
+    """
+    Lista de SocketRecord filtrada. 'process' (nombre exacto o PID) implica atribución de procesos.
+    'limit' corta la lista cuando no hace falta atribuir procesos para filtrar.
+    """
+    records = []
+    for record in iter_sockets(protocols, states, port):
+        records.append(record)
+        if limit and process is None and len(records) >= limit:
+            break
+    if with_process or process is not None:
+        attribute_processes(records)
+    if process is not None:
+        records = [r for r in records if str(r.pid) == str(process) or r.process == process]
+    return records[:limit] if limit else records
+
+def summarize_sockets(protocols=PROTOCOLS, states=None, top=10, with_process=False):
+    """
+    Agrega en una sola pasada: sockets por estado, por puerto local, por red remota (/24 o /64)
+    y por dirección remota (top talkers). Se cuenta sobre el texto hexadecimal sin decodificar y
+    solo se decodifican las 'top' primeras entradas. Con 'with_process' añade los procesos con
+    más sockets (recorre /proc/[pid]/fd una sola vez al final).
+    """
+    codes = {protocol: state_codes(protocol, states) for protocol in protocols} if states else None
+    by_state = collections.Counter()
+    by_port = collections.Counter()
+    by_prefix = collections.Counter()
+    by_remote = collections.Counter()
+    inodes = []
+    total = 0
+    for protocol, fields in _raw_sockets(protocols):
+        code = fields[3]
+        if codes is not None and code not in codes[protocol]:
+            continue
+        total += 1
+        kind = protocol[:3]
+        by_state[kind, code] += 1
+        by_port[kind, fields[1][-4:]] += 1
+        remote = fields[2][:-5]
+        if remote not in _ZERO_ADDRESSES:
+            by_remote[remote] += 1
+            by_prefix[_prefix_key(remote)] += 1
+        if with_process:
+            inodes.append(int(fields[9]))
+
+    summary = {"total": total, "by_state": {}}
+    for (kind, code), count in sorted(by_state.items()):
+        summary["by_state"].setdefault(kind, {})[_states_for(kind).get(code, code.decode())] = count
+    summary["local_ports"] = [{"port": f"{kind}/{int(port, 16)}", "count": count}
+                              for (kind, port), count in by_port.most_common(top)]
+    summary["remote_networks"] = [{"network": _prefix_text(key), "count": count} for key, count in by_prefix.most_common(top)]
+    summary["top_talkers"] = [{"address": decode_address(key), "count": count} for key, count in by_remote.most_common(top)]
+    if with_process:
+        index = build_inode_index(set(inodes) - {0})
+        by_pid = collections.Counter(index[inode] for inode in inodes if inode in index)
+        summary["processes"] = [{"pid": pid, "name": process_name(pid), "count": count} for pid, count in by_pid.most_common(top)]
+        summary["unattributed"] = len(inodes) - sum(by_pid.values())
+    return summary
+
+def format_socket_table(records):
+    """Tabla legible de sockets, al estilo de 'ss -tunap'."""
+    lines = [f"{'Proto':<6}{'Estado':<13}{'Recv-Q':>7}{'Send-Q':>7}  {'Local':<42}{'Remoto':<42}Proceso"]
+    for r in records:
+        local = f"[{r.local_address}]:{r.local_port}" if ":" in r.local_address else f"{r.local_address}:{r.local_port}"
+        remote = f"[{r.remote_address}]:{r.remote_port}" if ":" in r.remote_address else f"{r.remote_address}:{r.remote_port}"
+        process = f"{r.process} ({r.pid})" if r.pid is not None else ""
+        lines.append(f"{r.protocol:<6}{r.state:<13}{r.rx_queue:>7}{r.tx_queue:>7}  {local:<42}{remote:<42}{process}")
+    return "\n".join(lines)
+
+def format_socket_summary(summary):
+    """Texto legible del resultado de summarize_sockets()."""
+    lines = [f"Sockets: {summary['total']}"]
+    for kind, states in summary["by_state"].items():
+        lines.append(f"  {kind.upper()}: " + ", ".join(f"{state} {count}" for state, count in
+                                                       sorted(states.items(), key=lambda item: -item[1])))
+    sections = [("Puertos locales", "local_ports", "port"), ("Redes remotas", "remote_networks", "network"),
+                ("Direcciones remotas con más conexiones", "top_talkers", "address")]
+    for title, key, field in sections:
+        if summary[key]:
+            lines.append(f"{title}:")
+            lines += [f"  {entry[field]:<28}{entry['count']:>8}" for entry in summary[key]]
+    if summary.get("processes"):
+        lines.append("Procesos con más sockets:")
+        lines += [f"  {(entry['name'] or '?') + ' (' + str(entry['pid']) + ')':<28}{entry['count']:>8}" for entry in summary["processes"]]
+        lines.append(f"  Sin proceso visible (TIME-WAIT, pendientes de accept o de otros usuarios): {summary['unattributed']}")
+    return "\n".join(lines)
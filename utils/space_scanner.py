@@ -0,0 +1,291 @@
+import gzip
+import hashlib
+import heapq
+import json
+import os
+import queue
+import stat
+import threading
+import time
+from utils.display import format_bytes
+
+CACHE_VERSION = 1
+BLOCK = 512 # st_blocks cuenta bloques de 512 bytes: el espacio real ocupado, como 'du'
+# Ficheros que se recuerdan por directorio para el top de ficheros y para detectar, sin listar el
+# directorio, que un fichero grande creció en su sitio (la mtime del directorio no cambia por eso)
+TRACK_MIN_SIZE = 1 << 20
+
+class DirectoryRecord:
+    """
+    Contenido propio de un directorio (sin subdirectorios): espacio ocupado y aparente de sus
+    ficheros con un solo enlace, número de entradas, subdirectorios, ficheros grandes y ficheros
+    con varios enlaces duros (se suman una sola vez al agregar).
+    """
+    __slots__ = ("mtime", "usage", "apparent", "files", "subdirs", "large", "hardlinks")
+
+    def __init__(self, mtime, usage=0, apparent=0, files=0, subdirs=None, large=None, hardlinks=None):
+        self.mtime = mtime
+        self.usage = usage
+        self.apparent = apparent
+        self.files = files
+        self.subdirs = subdirs or []       # Nombres
+        self.large = large or []           # [(nombre, espacio, tamaño aparente)] de los ficheros >= TRACK_MIN_SIZE
+        self.hardlinks = hardlinks or []   # [(dispositivo, inode, espacio, tamaño aparente, nombre)]
+
+    def to_list(self):
+        return [self.mtime, self.usage, self.apparent, self.files, self.subdirs, self.large, self.hardlinks]
+
+    @classmethod
+    def from_list(cls, data):
+        mtime, usage, apparent, files, subdirs, large, hardlinks = data
+        return cls(mtime, usage, apparent, files, subdirs, [tuple(item) for item in large], [tuple(item) for item in hardlinks])
+
+class ScanResult:
+    """Resultado agregado de scan_tree()."""
+    __slots__ = ("root", "usage", "apparent", "files", "directories", "errors", "top_directories", "top_files",
+                 "scanned", "cached", "elapsed")
+
+    def __init__(self, root):
+        self.root = root
+        self.usage = 0
+        self.apparent = 0
+        self.files = 0
+        self.directories = 0
+        self.errors = []            # [(ruta, error)] de los directorios que no se pudieron leer
+        self.top_directories = []   # [{'path', 'usage', 'apparent', 'files'}]
+        self.top_files = []         # [{'path', 'usage', 'apparent'}]
+        self.scanned = 0            # Directorios listados
+        self.cached = 0             # Directorios reutilizados de la caché (mtime sin cambios)
+        self.elapsed = 0.0
+
+    def to_dict(self):
+        data = {slot: getattr(self, slot) for slot in self.__slots__}
+        data["errors"] = [{"path": path, "error": error} for path, error in self.errors[:100]]
+        data["error_count"] = len(self.errors)
+        return data
+
+def cache_path(cache_dir, root, one_filesystem=True):
+    """
+    Fichero de caché de un directorio raíz. Los escaneos con y sin 'one_filesystem' registran
+    subdirectorios distintos (los puntos de montaje), así que cada modo tiene su propio fichero.
+    """
+    digest = hashlib.sha1(os.path.abspath(root).encode(errors="surrogateescape")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"scan-{digest}{'' if one_filesystem else '-xdev'}.json.gz")
+
+def load_cache(path, root, device, one_filesystem=True):
+    """{ruta relativa: DirectoryRecord} de un escaneo anterior de la misma raíz, dispositivo y modo, o {}."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8", errors="surrogateescape") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if (data.get("version") != CACHE_VERSION or data.get("root") != root or data.get("device") != device
+            or data.get("one_filesystem") != one_filesystem):
+        return {}
+    try:
+        return {relative: DirectoryRecord.from_list(record) for relative, record in data["directories"].items()}
+    except (KeyError, TypeError, ValueError):
+        return {}
+
+def save_cache(path, root, device, records, one_filesystem=True):
+    """Guarda los registros (comprimidos) de forma atómica: fichero temporal y rename."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    data = {"version": CACHE_VERSION, "root": root, "device": device, "one_filesystem": one_filesystem, "saved": time.time(),
+            "directories": {relative: record.to_list() for relative, record in records.items()}}
+    with gzip.open(temporary, "wt", encoding="utf-8", errors="surrogateescape", compresslevel=3) as f:
+        f.write(json.dumps(data, separators=(",", ":"))) # dumps usa el codificador en C; dump() no
+    os.replace(temporary, path)
+
+def _read_directory(path, mtime, device, one_filesystem):
+    """Lista un directorio y hace lstat de cada entrada. Retorna (DirectoryRecord, [(nombre, mtime) de subdirectorios])."""
+    record = DirectoryRecord(mtime)
+    subdirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue # Borrado mientras se escaneaba
+            if stat.S_ISDIR(st.st_mode):
+                if not one_filesystem or st.st_dev == device:
+                    subdirs.append((entry.name, st.st_mtime_ns))
+                    record.subdirs.append(entry.name)
+                    record.usage += st.st_blocks * BLOCK # El propio directorio, como cuenta 'du'
+                continue
+            usage = st.st_blocks * BLOCK
+            record.files += 1
+            if st.st_nlink > 1 and not stat.S_ISLNK(st.st_mode):
+                record.hardlinks.append((st.st_dev, st.st_ino, usage, st.st_size, entry.name))
+                continue
+            record.usage += usage
+            record.apparent += st.st_size
+            if usage >= TRACK_MIN_SIZE:
+                record.large.append((entry.name, usage, st.st_size))
+    return record, subdirs
+
+def _refresh_cached(path, record, device, one_filesystem):
+    """
+    Reutiliza un registro cuya mtime no cambió: no se lista el directorio; solo se hace lstat de
+    sus subdirectorios (para conocer su mtime) y de sus ficheros grandes (por si crecieron).
+    """
+    refreshed = []
+    for name, usage, apparent in record.large:
+        try:
+            st = os.lstat(os.path.join(path, name))
+        except OSError:
+            continue
+        new_usage = st.st_blocks * BLOCK
+        record.usage += new_usage - usage
+        record.apparent += st.st_size - apparent
+        refreshed.append((name, new_usage, st.st_size))
+    record.large = refreshed
+    subdirs = []
+    for name in record.subdirs:
+        try:
+            st = os.lstat(os.path.join(path, name))
+        except OSError:
+            return None # Estado incoherente: se vuelve a listar el directorio
+        if stat.S_ISDIR(st.st_mode) and (not one_filesystem or st.st_dev == device):
+            subdirs.append((name, st.st_mtime_ns))
+    return subdirs
+
+def scan_tree(root, workers=8, one_filesystem=True, top=20, cache_dir=None, use_cache=True):
+    """
+    Calcula el espacio ocupado bajo 'root' al estilo de 'du', repartiendo los directorios entre
+    'workers' hilos (os.scandir + lstat liberan el GIL). Con 'one_filesystem' no cruza puntos de
+    montaje. Los ficheros con varios enlaces duros se cuentan una vez. Con 'cache_dir' se guarda
+    una caché por directorio indexada por su mtime: en el siguiente escaneo los directorios sin
+    cambios no se listan. La mtime de un directorio no cambia cuando un fichero crece en su sitio,
+    así que de los directorios en caché solo se revisan los ficheros de más de TRACK_MIN_SIZE.
+    Retorna un ScanResult con los 'top' directorios y ficheros más grandes.
+    """
+    if top < 1:
+        raise ValueError("El número de directorios y ficheros a mostrar debe ser al menos 1.")
+    started = time.monotonic()
+    root = os.path.abspath(root)
+    root_stat = os.stat(root)
+    if not stat.S_ISDIR(root_stat.st_mode):
+        raise NotADirectoryError(f"No es un directorio: '{root}'.")
+    device = root_stat.st_dev
+    cache_file = cache_path(cache_dir, root, one_filesystem) if cache_dir else None
+    previous = load_cache(cache_file, root, device, one_filesystem) if cache_file and use_cache else {}
+
+    result = ScanResult(root)
+    records = {}
+    errors = []
+    counters = {"scanned": 0, "cached": 0}
+    lock = threading.Lock()
+    tasks = queue.Queue()
+    tasks.put(("", root_stat.st_mtime_ns))
+
+    def worker():
+        while True:
+            item = tasks.get()
+            if item is None:
+                tasks.task_done()
+                return
+            relative, mtime = item
+            path = os.path.join(root, relative) if relative else root
+            try:
+                subdirs = None
+                cached = previous.get(relative)
+                if cached is not None and cached.mtime == mtime:
+                    subdirs = _refresh_cached(path, cached, device, one_filesystem)
+                    record = cached
+                if subdirs is None:
+                    record, subdirs = _read_directory(path, mtime, device, one_filesystem)
+                    kind = "scanned"
+                else:
+                    kind = "cached"
+                records[relative] = record
+                with lock:
+                    counters[kind] += 1
+                for name, sub_mtime in subdirs:
+                    tasks.put((os.path.join(relative, name) if relative else name, sub_mtime))
+            except OSError as e:
+                with lock:
+                    errors.append((path, e.strerror or str(e)))
+            finally:
+                tasks.task_done()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(workers, 1))]
+    for thread in threads:
+        thread.start()
+    tasks.join()
+    for _ in threads:
+        tasks.put(None)
+    for thread in threads:
+        thread.join()
+
+    # Agregación de abajo arriba (orden posterior iterativo): cada inode con varios enlaces se
+    # atribuye al primer directorio que lo contiene en ese recorrido
+    seen_inodes = set()
+    totals = {}
+    top_directories = []
+    top_files = []
+
+    def push(heap, entry):
+        if len(heap) < top:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    stack = [("", False)]
+    while stack:
+        relative, expanded = stack.pop()
+        record = records.get(relative)
+        if record is None:
+            continue # No se pudo leer
+        if not expanded:
+            stack.append((relative, True))
+            stack += [(os.path.join(relative, name) if relative else name, False) for name in record.subdirs]
+            continue
+        path = os.path.join(root, relative) if relative else root
+        usage, apparent, files = record.usage, record.apparent, record.files
+        for inode_device, inode, inode_usage, inode_apparent, name in record.hardlinks:
+            if (inode_device, inode) not in seen_inodes:
+                seen_inodes.add((inode_device, inode))
+                usage += inode_usage
+                apparent += inode_apparent
+                if inode_usage >= TRACK_MIN_SIZE:
+                    push(top_files, (inode_usage, os.path.join(path, name), inode_apparent))
+        for name in record.subdirs:
+            child = totals.pop(os.path.join(relative, name) if relative else name, None)
+            if child is not None:
+                usage += child[0]
+                apparent += child[1]
+                files += child[2]
+        if not relative:
+            usage += root_stat.st_blocks * BLOCK
+        totals[relative] = (usage, apparent, files)
+        push(top_directories, (usage, path, apparent, files))
+        for name, file_usage, file_apparent in record.large:
+            push(top_files, (file_usage, os.path.join(path, name), file_apparent))
+
+    result.usage, result.apparent, result.files = totals.get("", (0, 0, 0))
+    result.directories = len(records)
+    result.errors = errors
+    result.scanned, result.cached = counters["scanned"], counters["cached"]
+    result.top_directories = [{"path": path, "usage": usage, "apparent": apparent, "files": files}
+                              for usage, path, apparent, files in sorted(top_directories, reverse=True)]
+    result.top_files = [{"path": path, "usage": usage, "apparent": apparent}
+                        for usage, path, apparent in sorted(top_files, reverse=True)]
+    if cache_file:
+        save_cache(cache_file, root, device, records, one_filesystem)
+    result.elapsed = time.monotonic() - started
+    return result
+
+def format_scan_result(result):
+    """Texto legible del resultado: totales, directorios y ficheros más grandes."""
+    lines = [f"{result.root}: {format_bytes(result.usage)} ocupados ({format_bytes(result.apparent)} aparentes), "
+             f"{result.files} ficheros en {result.directories} directorios, {result.elapsed:.2f} s "
+             f"({result.scanned} listados, {result.cached} desde caché)"]
+    if result.errors:
+        lines.append(f"Directorios que no se pudieron leer: {len(result.errors)} (ej. {result.errors[0][0]}: {result.errors[0][1]})")
+    lines.append("Directorios más grandes:")
+    lines += [f"  {format_bytes(d['usage']):>11}  {d['files']:>10} fich.  {d['path']}" for d in result.top_directories]
+    if result.top_files:
+        lines.append(f"Ficheros más grandes (de al menos {format_bytes(TRACK_MIN_SIZE)}):")
+        lines += [f"  {format_bytes(f['usage']):>11}  {f['path']}" for f in result.top_files]
+    return "\n".join(lines)
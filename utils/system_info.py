@@ -1,16 +1,21 @@
 import os
 import subprocess
+from utils.executor import run_command, needs_sudo, TIMEOUT_STATUS
 
 def get_os_type():
     """Retorna 'windows' o 'linux'."""
     return 'windows' if os.name == 'nt' else 'linux'
 
-def execute_command(command, sudo=False, shell=True):
+def execute_command(command, sudo=False, shell=True, timeout=None, input=None):
     """
     Ejecuta un comando en el sistema operativo y retorna su salida y código de retorno.
     Añade 'sudo' automáticamente si es necesario en Linux y la opción sudo es True.
+    Si 'command' es una lista se ejecuta sin shell mediante utils.executor.run_command.
     """
-    if get_os_type() == 'linux' and sudo:
+    if isinstance(command, (list, tuple)):
+        return run_command(command, sudo=sudo, timeout=timeout, input=input)
+
+    if needs_sudo(sudo): # Siendo root no hace falta pasar por sudo
         command = f"sudo {command}"
     
     try:
@@ -19,10 +24,14 @@ def execute_command(command, sudo=False, shell=True):
             shell=shell, 
             capture_output=True, 
             text=True, 
+            input=input,
+            timeout=timeout,
             check=False # No lanza excepción para códigos de retorno no cero
         )
         output = process.stdout + process.stderr # Captura stdout y stderr
         status = process.returncode
         return output, status
+    except subprocess.TimeoutExpired:
+        return f"Tiempo de espera agotado ({timeout} s) ejecutando: {command}", TIMEOUT_STATUS
     except Exception as e:
         return f"Excepción al ejecutar comando: {e}", 1 # Retorna un error genérico y código 1
\ No newline at end of file
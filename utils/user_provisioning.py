@@ -0,0 +1,193 @@
+import csv
+import json
+import re
+from utils.executor import run_command
+from utils.account_db import get_account_db
+
+# Columnas admitidas en el fichero de importación (CSV con cabecera o lista JSON de objetos)
+FIELDS = ("username", "password", "groups", "shell", "home", "comment", "uid")
+
+# Mismo criterio que useradd (NAME_REGEX por defecto de Debian), máximo 32 caracteres
+USERNAME = re.compile(r"^[a-z_][a-z0-9_.-]{0,30}[a-z0-9_.$-]?$")
+CHPASSWD_ERROR = re.compile(r"\(line (\d+), user ([^)]+)\)")
+
+# Resultado por fila
+CREATED = "created"
+PLANNED = "planned"          # Modo simulación: la fila es válida y se crearía
+INVALID = "invalid"          # Error de validación en la propia fila
+SKIPPED = "skipped"          # Fila válida no aplicada porque otras filas son inválidas
+FAILED = "failed"            # useradd falló
+PASSWORD_FAILED = "password_failed" # Cuenta creada pero chpasswd rechazó la contraseña
+
+def _split_groups(value):
+    if isinstance(value, (list, tuple)):
+        return [str(g).strip() for g in value if str(g).strip()]
+    return [g for g in re.split(r"[\s,;]+", value or "") if g]
+
+def load_user_rows(path):
+    """
+    Lee las cuentas a crear de un CSV (con cabecera) o de un JSON (lista de objetos).
+    Retorna una lista de diccionarios con las claves de FIELDS ('groups' como lista).
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".json"):
+            data = json.load(f)
+            if not isinstance(data, list):
+                raise ValueError("El JSON debe ser una lista de objetos.")
+        else:
+            data = list(csv.DictReader(f))
+    rows = []
+    for item in data:
+        if not isinstance(item, dict):
+            raise ValueError(f"Entrada inválida (se esperaba un objeto): {item!r}")
+        row = {field: str(item.get(field) or "").strip() for field in FIELDS if field != "groups"}
+        row["groups"] = _split_groups(item.get("groups"))
+        rows.append(row)
+    return rows
+
+def read_account_names(root=None):
+    """Retorna (usuarios, uids, grupos) existentes según etc/passwd y etc/group bajo 'root'."""
+    db = get_account_db(root)
+    db.refresh()
+    return set(db.users), {str(uid) for uid in db.users_by_uid}, set(db.groups)
+
+def validate_rows(rows, root=None):
+    """
+    Valida todas las filas antes de aplicar nada. Retorna una lista paralela a 'rows'
+    con la lista de errores de cada fila (vacía si es válida).
+    """
+    users, uids, groups = read_account_names(root)
+    seen_names, seen_uids = set(), set()
+    errors = []
+    for row in rows:
+        problems = []
+        name = row["username"]
+        if not name:
+            problems.append("nombre de usuario vacío")
+        elif not USERNAME.match(name):
+            problems.append(f"nombre de usuario inválido '{name}'")
+        elif name in users:
+            problems.append(f"el usuario '{name}' ya existe")
+        elif name in seen_names:
+            problems.append(f"usuario '{name}' duplicado en el fichero")
+        seen_names.add(name)
+        # chpasswd separa solo por el primer ':', así que la contraseña sí puede contenerlo
+        if "\n" in row["password"]:
+            problems.append("'password' no puede contener saltos de línea")
+        for field in ("comment", "home", "shell"):
+            if any(c in row[field] for c in ":\n"):
+                problems.append(f"'{field}' no puede contener ':' ni saltos de línea")
+        for field in ("home", "shell"):
+            if row[field] and not row[field].startswith("/"):
+                problems.append(f"'{field}' debe ser una ruta absoluta")
+        if row["uid"]:
+            if not row["uid"].isdigit():
+                problems.append(f"UID inválido '{row['uid']}'")
+            elif row["uid"] in uids or row["uid"] in seen_uids:
+                problems.append(f"el UID {row['uid']} ya está en uso")
+            seen_uids.add(row["uid"])
+        missing = [g for g in row["groups"] if g not in groups]
+        if missing:
+            problems.append(f"grupos inexistentes: {', '.join(missing)}")
+        errors.append(problems)
+    return errors
+
+def useradd_argv(row, root=None, create_home=True):
+    """argv de useradd para una fila (sin contraseña: se establece después con chpasswd)."""
+    argv = ["useradd"]
+    if root:
+        argv += ["-R", root]
+    if create_home:
+        argv.append("-m")
+    if row["home"]:
+        argv += ["-d", row["home"]]
+    if row["shell"]:
+        argv += ["-s", row["shell"]]
+    if row["comment"]:
+        argv += ["-c", row["comment"]]
+    if row["uid"]:
+        argv += ["-u", row["uid"]]
+    if row["groups"]:
+        argv += ["-G", ",".join(row["groups"])]
+    return argv + [row["username"]]
+
+def chpasswd_argv(root=None, crypt_method=None):
+    """argv de chpasswd. Con 'root' hay que indicar el método de cifrado: PAM no está disponible dentro del chroot."""
+    argv = ["chpasswd"]
+    if root:
+        argv += ["-R", root]
+    if crypt_method:
+        argv += ["-c", crypt_method]
+    return argv
+
+def set_passwords(pairs, root=None, crypt_method=None, sudo=True):
+    """
+    Establece todas las contraseñas con una sola invocación de chpasswd, pasando los pares
+    'usuario:contraseña' por stdin. Retorna (salida, código, {usuario fallido: línea}).
+    """
+    if not pairs:
+        return "", 0, {}
+    data = "".join(f"{user}:{password}\n" for user, password in pairs)
+    output, status = run_command(chpasswd_argv(root, crypt_method), sudo=sudo, input=data)
+    failed = {match.group(2): int(match.group(1)) for match in CHPASSWD_ERROR.finditer(output)}
+    if status != 0 and not failed:
+        failed = {user: line for line, (user, _) in enumerate(pairs, 1)} # Error global: ninguna se da por buena
+    return output, status, failed
+
+def provision_users(rows, root=None, dry_run=False, skip_invalid=False, batch_size=100,
+                    create_home=True, crypt_method=None, sudo=True, on_batch=None):
+    """
+    Crea las cuentas de 'rows' (ver load_user_rows). Valida todo el conjunto primero: si hay
+    filas inválidas no se aplica nada, salvo con 'skip_invalid'. Las cuentas se crean por lotes
+    de 'batch_size', un useradd tras otro (todos toman el bloqueo lckpwdf de /etc/passwd, así que
+    en paralelo no irían más rápido), y todas las contraseñas se fijan al final con un único
+    chpasswd. 'root' trabaja sobre un directorio raíz alternativo (useradd/chpasswd -R).
+    'on_batch(hechas, total)' se llama tras cada lote. Retorna una lista de resultados por fila:
+    {'row', 'username', 'result', 'detail'}.
+    """
+    if root and not crypt_method:
+        crypt_method = "SHA512"
+    errors = validate_rows(rows, root)
+    has_invalid = any(errors)
+    results = []
+    pending = []
+    for number, (row, problems) in enumerate(zip(rows, errors), 1):
+        result = {"row": number, "username": row["username"], "result": None, "detail": ""}
+        results.append(result)
+        if problems:
+            result.update(result=INVALID, detail="; ".join(problems))
+        elif has_invalid and not skip_invalid:
+            result.update(result=SKIPPED, detail="no aplicado: hay filas inválidas en el fichero")
+        elif dry_run:
+            result.update(result=PLANNED, detail=" ".join(useradd_argv(row, root, create_home)))
+        else:
+            pending.append((row, result))
+    if not pending:
+        return results
+
+    created = []
+    for start in range(0, len(pending), batch_size):
+        for row, result in pending[start:start + batch_size]:
+            output, status = run_command(useradd_argv(row, root, create_home), sudo=sudo)
+            if status == 0:
+                result.update(result=CREATED)
+                created.append(row)
+            else:
+                result.update(result=FAILED, detail=output.strip() or f"useradd terminó con código {status}")
+        if on_batch:
+            on_batch(min(start + batch_size, len(pending)), len(pending))
+
+    pairs = [(row["username"], row["password"]) for row in created if row["password"]]
+    output, _, failed = set_passwords(pairs, root, crypt_method, sudo)
+    for row, result in pending:
+        if row["username"] in failed:
+            lines = [l for l in output.splitlines() if f"user {row['username']})" in l]
+            result.update(result=PASSWORD_FAILED, detail=" ".join(lines) or output.strip() or "chpasswd rechazó la contraseña")
+    return results
+
+def summarize_provisioning(results):
+    """Cuenta los resultados por tipo: {'created': n, 'invalid': m, ...}."""
+    summary = {}
+    for result in results:
+        summary[result["result"]] = summary.get(result["result"], 0) + 1
+    return summary